@@ -0,0 +1,6 @@
+"""Синтетические бенчмарки разбора графиков, расчета зарплаты и middleware.
+
+Файлы графиков генерируются заданного размера (сотрудники x месяцы), Telegram
+и базы данных заменены заглушками. Результаты пишутся в JSON для
+отслеживания регрессий между запусками.
+"""
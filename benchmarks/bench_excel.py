@@ -0,0 +1,146 @@
+"""Бенчмарки чтения и разбора файлов графиков."""
+
+import asyncio
+import itertools
+from datetime import datetime
+
+from tgbot.services.directory import get_employee_directory
+from tgbot.services.files_processing.core.cache import (
+    ExcelFileCache,
+    get_cache,
+    get_roster_cache,
+)
+from tgbot.services.files_processing.core.workbook import get_workbook_store
+from tgbot.services.files_processing.detectors.changes import (
+    ScheduleChangeDetector,
+)
+from tgbot.services.files_processing.parsers.schedule import (
+    DutyScheduleParser,
+    ScheduleParser,
+)
+from tgbot.services.files_processing.parsers.studies import StudiesScheduleParser
+from tgbot.services.files_processing.utils.schedule import extract_users_schedules
+
+from .timing import BenchmarkResult, ameasure, measure
+from .workbooks import DIVISION
+
+GROUP = "excel"
+
+# Теплые замеры в микросекундах, поэтому их больше
+WARM_FACTOR = 20
+
+
+def reset_excel_caches() -> None:
+    """Сбрасывает кэши книг, листов и графиков дежурных."""
+    get_workbook_store().clear()
+    get_cache().clear()
+    get_roster_cache().clear()
+
+
+def bench_excel_cache_load(uploads, bench_params, report):
+    schedule_file = uploads.schedule_files[0]
+    rounds = bench_params["rounds"]
+    cache = ExcelFileCache()
+
+    def cold_setup():
+        nonlocal cache
+        get_workbook_store().clear()
+        cache = ExcelFileCache()
+
+    cold = measure(lambda: cache.get_dataframe(schedule_file), rounds, cold_setup)
+    df = cache.get_dataframe(schedule_file)
+    assert df is not None
+    assert cache.get_user_row(schedule_file, uploads.employees[0].fullname) is not None
+
+    warm = measure(lambda: cache.get_dataframe(schedule_file), rounds * WARM_FACTOR)
+    extra = {"rows": df.shape[0], "columns": df.shape[1]}
+    report.add(BenchmarkResult.from_timings("excel_cache_cold", GROUP, cold, extra))
+    report.add(BenchmarkResult.from_timings("excel_cache_warm", GROUP, warm, extra))
+
+
+def bench_get_user_schedule(uploads, bench_params, report):
+    rounds = bench_params["rounds"]
+    employees = itertools.cycle(uploads.employees)
+    parser = ScheduleParser()
+
+    def get_schedule():
+        schedule = parser.get_user_schedule(
+            next(employees).fullname, "январь", DIVISION, uploads.year
+        )
+        assert schedule
+
+    def cold_setup():
+        nonlocal parser
+        reset_excel_caches()
+        parser = ScheduleParser()
+
+    cold = measure(get_schedule, rounds, cold_setup)
+    warm = measure(get_schedule, rounds * WARM_FACTOR)
+    report.add(BenchmarkResult.from_timings("get_user_schedule_cold", GROUP, cold))
+    report.add(BenchmarkResult.from_timings("get_user_schedule_warm", GROUP, warm))
+
+
+def bench_get_duties_for_month(uploads, bench_params, database, report):
+    rounds = bench_params["rounds"]
+    parser = DutyScheduleParser()
+    stp_repo = database.repo()
+    date = datetime(uploads.year, 1, 15)
+    days = {}
+
+    async def get_duties():
+        days.update(await parser.get_duties_for_month(date, DIVISION, stp_repo))
+
+    def cold_setup():
+        reset_excel_caches()
+        get_employee_directory().invalidate()
+
+    async def run():
+        cold = await ameasure(get_duties, rounds, cold_setup)
+        warm = await ameasure(get_duties, rounds * WARM_FACTOR)
+        return cold, warm
+
+    cold, warm = asyncio.run(run())
+    assert days, "Дежурства не найдены в сгенерированном файле"
+
+    extra = {"days": len(days), "duties": sum(len(d) for d in days.values())}
+    report.add(
+        BenchmarkResult.from_timings("duties_for_month_cold", GROUP, cold, extra)
+    )
+    report.add(
+        BenchmarkResult.from_timings("duties_for_month_warm", GROUP, warm, extra)
+    )
+
+
+def bench_schedule_diff(uploads, bench_params, report):
+    rounds = bench_params["rounds"]
+    changes = []
+
+    def diff():
+        old_schedules = extract_users_schedules(uploads.previous_schedule)
+        new_schedules = extract_users_schedules(uploads.schedule_files[0])
+        changes[:] = ScheduleChangeDetector.find_changes(old_schedules, new_schedules)
+
+    timings = measure(diff, rounds, reset_excel_caches)
+    assert changes, "Изменения между версиями графика не найдены"
+    report.add(
+        BenchmarkResult.from_timings(
+            "schedule_diff", GROUP, timings, {"changed_employees": len(changes)}
+        )
+    )
+
+
+def bench_parse_studies(uploads, bench_params, report):
+    rounds = bench_params["rounds"]
+    parser = StudiesScheduleParser()
+    sessions = []
+
+    def parse():
+        sessions[:] = parser.parse_studies_file(uploads.studies_file)
+
+    timings = measure(parse, rounds)
+    assert sessions, "Обучения не найдены в сгенерированном файле"
+    report.add(
+        BenchmarkResult.from_timings(
+            "parse_studies", GROUP, timings, {"sessions": len(sessions)}
+        )
+    )
@@ -0,0 +1,167 @@
+"""Бенчмарк цепочки middleware на синтетических апдейтах.
+
+Апдейты проходят через диспетчер с теми же middleware, что и в bot.py, и
+через aiogram-dialog. Обработчики только отвечают пользователю, поэтому
+замер показывает накладные расходы цепочки и сессии бота.
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+from aiogram_dialog import setup_dialogs
+
+from bot import register_middlewares
+from tgbot.config import get_config
+from tgbot.middlewares.MetricsMiddleware import TelegramMetricsMiddleware
+
+from .fakes import FakeBotSession, InMemoryRepo, InMemoryStatsRepo
+from .timing import BenchmarkResult, ameasure
+
+GROUP = "middlewares"
+
+# Доля нажатий кнопок среди апдейтов, остальное - сообщения
+CALLBACK_SHARE = 0.3
+CONCURRENCY = 32
+
+
+def build_dispatcher(bot: Bot, database) -> Dispatcher:
+    """Собирает диспетчер с middleware бота и простыми обработчиками.
+
+    Args:
+        bot: Бот с сессией-заглушкой
+        database: База в памяти
+
+    Returns:
+        Диспетчер
+    """
+    router = Router(name="bench")
+
+    @router.message(F.text)
+    async def echo(message: Message):
+        await message.answer(message.text)
+
+    @router.callback_query()
+    async def press(callback: CallbackQuery):
+        await callback.answer()
+
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(router)
+    setup_dialogs(dp)
+    register_middlewares(
+        dp, get_config(), bot, database.session_pool(), database.session_pool()
+    )
+    return dp
+
+
+def build_updates(employees, count: int, seed: int = 0):
+    """Генерирует апдейты сообщений и нажатий кнопок от сотрудников.
+
+    Args:
+        employees: Сотрудники из базы в памяти
+        count: Количество апдейтов
+        seed: Зерно генератора
+
+    Returns:
+        Список апдейтов
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    updates = []
+    for update_id in range(1, count + 1):
+        employee = rng.choice(employees)
+        user = User(
+            id=employee.user_id,
+            is_bot=False,
+            first_name="Bench",
+            username=employee.username,
+        )
+        message = Message(
+            message_id=update_id,
+            date=now,
+            chat=Chat(id=employee.user_id, type="private"),
+            from_user=user,
+            text="Привет",
+        )
+        if rng.random() < CALLBACK_SHARE:
+            updates.append(
+                Update(
+                    update_id=update_id,
+                    callback_query=CallbackQuery(
+                        id=str(update_id),
+                        from_user=user,
+                        chat_instance="bench",
+                        data="bench",
+                        message=message,
+                    ),
+                )
+            )
+        else:
+            updates.append(Update(update_id=update_id, message=message))
+    return updates
+
+
+def bench_middleware_chain(bench_params, database, report, monkeypatch):
+    # DatabaseMiddleware создает репозитории из сессий пула
+    monkeypatch.setattr(
+        "tgbot.middlewares.DatabaseMiddleware.MainRequestsRepo", InMemoryRepo
+    )
+    monkeypatch.setattr(
+        "tgbot.middlewares.DatabaseMiddleware.StatsRequestsRepo", InMemoryStatsRepo
+    )
+
+    session = FakeBotSession()
+    session.middleware(TelegramMetricsMiddleware())
+    bot = Bot(token="123456789:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA", session=session)
+    dp = build_dispatcher(bot, database)
+
+    count = bench_params["updates"]
+    employees = list(database.employees.values())
+    warmup = build_updates(employees, 20, seed=1)
+    updates = iter(build_updates(employees, count))
+    concurrent_updates = build_updates(employees, count, seed=2)
+
+    async def feed():
+        await dp.feed_update(bot, next(updates))
+
+    async def run():
+        for update in warmup:
+            await dp.feed_update(bot, update)
+
+        session.calls.clear()
+        queries_before = database.queries
+        timings = await ameasure(feed, count)
+        queries = database.queries - queries_before
+        calls = sum(session.calls.values())
+
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def feed_limited(update):
+            async with semaphore:
+                await dp.feed_update(bot, update)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(feed_limited(u) for u in concurrent_updates))
+        elapsed = time.perf_counter() - started
+        return timings, queries, calls, elapsed
+
+    timings, queries, calls, elapsed = asyncio.run(run())
+    assert calls >= count, "Обработчики не ответили на часть апдейтов"
+
+    report.add(
+        BenchmarkResult.from_timings(
+            "middleware_chain",
+            GROUP,
+            timings,
+            {
+                "db_queries_per_update": round(queries / count, 2),
+                "telegram_calls_per_update": round(calls / count, 2),
+                "concurrency": CONCURRENCY,
+                "concurrent_updates_per_second": round(count / elapsed, 1),
+            },
+        )
+    )
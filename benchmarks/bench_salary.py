@@ -0,0 +1,53 @@
+"""Бенчмарк расчета зарплаты."""
+
+import asyncio
+import itertools
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from infrastructure.api.production_calendar import CacheEntry, production_calendar
+from tgbot.services.salary.salary_calculator import SalaryCalculator
+
+from .timing import BenchmarkResult, ameasure
+
+GROUP = "salary"
+
+HOLIDAYS = {
+    (1, 1): "Новый год",
+    (1, 7): "Рождество Христово",
+    (2, 23): "День защитника Отечества",
+    (3, 8): "Международный женский день",
+    (5, 1): "Праздник Весны и Труда",
+    (5, 9): "День Победы",
+    (6, 12): "День России",
+    (11, 4): "День народного единства",
+}
+
+
+def bench_calculate_salary(uploads, bench_params, database, report):
+    # Производственный календарь берется из кэша, без запросов к API
+    production_calendar._cache[uploads.year] = CacheEntry(
+        data={date(uploads.year, m, d): name for (m, d), name in HOLIDAYS.items()},
+        expires_at=datetime.now() + timedelta(days=1),
+    )
+
+    rounds = bench_params["rounds"]
+    stp_repo = database.repo()
+    employees = itertools.cycle(
+        e for e in database.employees.values() if e.position != "Руководитель группы"
+    )
+    premium = SimpleNamespace(
+        total_premium=30, csat_premium=10, gok_premium=10, aht_premium=10
+    )
+    results = []
+
+    async def calculate():
+        results.append(
+            await SalaryCalculator.calculate_salary(
+                next(employees), premium, stp_repo, "январь", uploads.year
+            )
+        )
+
+    timings = asyncio.run(ameasure(calculate, rounds))
+    assert all(result.total_salary > 0 for result in results)
+    report.add(BenchmarkResult.from_timings("calculate_salary", GROUP, timings))
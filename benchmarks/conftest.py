@@ -0,0 +1,144 @@
+"""Общие фикстуры и параметры бенчмарков.
+
+Запуск:
+
+    pytest benchmarks --bench-employees 500 --bench-months 12
+
+Результаты пишутся в JSON (--bench-output), по умолчанию в
+.benchmarks/<время запуска>.json.
+"""
+
+import inspect
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Конфиг бота читается при импорте tgbot, бенчмаркам нужны только заглушки
+for _name, _value in {
+    "ENVIRONMENT": "dev",
+    "BOT_TOKEN": "123456789:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA",
+    "USE_REDIS": "False",
+    "DB_HOST": "localhost",
+    "DB_USER": "bench",
+    "DB_PASS": "bench",
+    "STP_DB_NAME": "STPMain",
+    "STATS_DB_NAME": "Stats",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "465",
+    "EMAIL_USER": "bench",
+    "EMAIL_PASS": "bench",
+    "EMAIL_USE_SSL": "True",
+    "NCK_EMAIL_ADDR": "nck@localhost",
+    "NTP_EMAIL_ADDR": "ntp@localhost",
+    "GOK_EMAIL_ADDR": "gok@localhost",
+    "MIP_EMAIL_ADDR": "mip@localhost",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_PASSWORD": "",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from .fakes import InMemoryDatabase, build_employees  # noqa: E402
+from .timing import BenchmarkReport  # noqa: E402
+from .workbooks import SyntheticUploads, generate_uploads  # noqa: E402
+
+
+def pytest_collect_file(file_path: Path, parent: pytest.Collector):
+    # Бенчмарки собираются по своим шаблонам, не меняя обычный поиск тестов
+    if file_path.suffix == ".py" and file_path.name.startswith("bench_"):
+        return pytest.Module.from_parent(parent, path=file_path)
+    return None
+
+
+def pytest_pycollect_makeitem(collector: pytest.Collector, name: str, obj):
+    if name.startswith("bench_") and inspect.isfunction(obj):
+        return pytest.Function.from_parent(collector, name=name)
+    return None
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-employees",
+        type=int,
+        default=300,
+        help="Количество сотрудников в сгенерированных графиках",
+    )
+    group.addoption(
+        "--bench-months",
+        type=int,
+        default=6,
+        help="Количество месяцев в сгенерированных графиках (1-12)",
+    )
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=5,
+        help="Количество замеров каждого бенчмарка",
+    )
+    group.addoption(
+        "--bench-updates",
+        type=int,
+        default=500,
+        help="Количество апдейтов в бенчмарке middleware",
+    )
+    group.addoption(
+        "--bench-output",
+        default=None,
+        help="Путь к JSON с результатами (по умолчанию .benchmarks/<время>.json)",
+    )
+
+
+@pytest.fixture(scope="session")
+def bench_params(pytestconfig: pytest.Config) -> dict:
+    """Параметры запуска бенчмарков."""
+    return {
+        "employees": pytestconfig.getoption("--bench-employees"),
+        "months": pytestconfig.getoption("--bench-months"),
+        "rounds": pytestconfig.getoption("--bench-rounds"),
+        "updates": pytestconfig.getoption("--bench-updates"),
+    }
+
+
+@pytest.fixture(scope="session")
+def report(pytestconfig: pytest.Config, bench_params: dict):
+    """Отчет бенчмарков, записывается в JSON после всех бенчмарков."""
+    bench_report = BenchmarkReport(bench_params)
+    yield bench_report
+
+    output = pytestconfig.getoption("--bench-output")
+    if output is None:
+        output = (
+            Path(pytestconfig.rootpath)
+            / ".benchmarks"
+            / f"{bench_report.started_at:%Y%m%d-%H%M%S}.json"
+        )
+    path = bench_report.write(Path(output))
+    print(f"\nРезультаты бенчмарков: {path}")
+
+
+@pytest.fixture(scope="session")
+def uploads(tmp_path_factory: pytest.TempPathFactory, bench_params: dict):
+    """Сгенерированные файлы в папке uploads текущей директории.
+
+    Сервисы ищут файлы в относительной папке uploads, поэтому на время
+    бенчмарков рабочая директория меняется на временную.
+    """
+    root = tmp_path_factory.mktemp("bench")
+    generated: SyntheticUploads = generate_uploads(
+        root / "uploads",
+        bench_params["employees"],
+        bench_params["months"],
+        year=datetime.now().year,
+    )
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(root)
+        yield generated
+
+
+@pytest.fixture(scope="session")
+def database(uploads: SyntheticUploads) -> InMemoryDatabase:
+    """База в памяти с сотрудниками сгенерированного графика."""
+    return InMemoryDatabase(build_employees(uploads.employees))
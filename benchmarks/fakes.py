@@ -0,0 +1,291 @@
+"""Заглушки внешних систем для бенчмарков.
+
+FakeBotSession подменяет транспорт Telegram: middleware сессии бота
+работают как обычно, а запросы не уходят в сеть. InMemoryDatabase заменяет
+базы STP и Stats: пулы сессий отдают сессии без подключения, а репозитории
+работают со списками моделей в памяти.
+"""
+
+import asyncio
+import itertools
+from collections import Counter
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    get_args,
+)
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetMe, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Message
+from aiogram_dialog.utils import CB_SEP
+from stp_database.models.STP import Employee
+
+from .workbooks import DIVISION, SyntheticEmployee
+
+
+class FakeBotSession(BaseSession):
+    """Сессия бота без сети: отвечает на методы Telegram заготовками.
+
+    Запоминает последнее сообщение бота в каждом чате и идентификатор
+    диалога из его клавиатуры, чтобы повторять нажатия кнопок.
+
+    Attributes:
+        calls: Количество вызовов каждого метода
+        last_messages: Идентификатор последнего сообщения бота по чатам
+        intents: Идентификатор диалога aiogram-dialog из последней клавиатуры по чатам
+    """
+
+    def __init__(self, latency: float = 0.0, **kwargs: Any):
+        """Инициализирует сессию.
+
+        Args:
+            latency: Имитация задержки ответа Telegram в секундах
+            **kwargs: Параметры BaseSession
+        """
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.last_messages: Dict[int, int] = {}
+        self.intents: Dict[int, str] = {}
+        self._message_ids = itertools.count(1)
+
+    def _remember_keyboard(self, chat_id: int, reply_markup: Any) -> None:
+        for row in getattr(reply_markup, "inline_keyboard", None) or []:
+            for button in row:
+                data = button.callback_data or ""
+                if CB_SEP in data:
+                    self.intents[chat_id] = data.split(CB_SEP, 1)[0]
+                    return
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None,
+    ) -> TelegramType:
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        returning = method.__returning__
+        if returning is bool:
+            return True
+        if isinstance(method, GetMe):
+            result = {"id": bot.id, "is_bot": True, "first_name": "Bench"}
+        elif returning is Message or Message in get_args(returning):
+            chat_id = getattr(method, "chat_id", None)
+            message_id = getattr(method, "message_id", None) or next(self._message_ids)
+            self.last_messages[chat_id] = message_id
+            self._remember_keyboard(chat_id, getattr(method, "reply_markup", None))
+            result = {
+                "message_id": message_id,
+                "date": int(datetime.now().timestamp()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": getattr(method, "text", None),
+            }
+        else:
+            raise NotImplementedError(
+                f"Метод {type(method).__name__} не поддерживается заглушкой"
+            )
+
+        # Ответ разбирается так же, как ответ настоящего Telegram
+        response = self.check_response(
+            bot, method, 200, self.json_dumps({"ok": True, "result": result})
+        )
+        return response.result
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        raise NotImplementedError("Скачивание файлов в бенчмарках не поддерживается")
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class _ScalarResult:
+    """Результат scalars() с интерфейсом ScalarResult SQLAlchemy."""
+
+    def __init__(self, rows: List[Any]):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def all(self) -> List[Any]:
+        return list(self._rows)
+
+    def first(self) -> Optional[Any]:
+        return self._rows[0] if self._rows else None
+
+
+class InMemorySession:
+    """Сессия базы в памяти.
+
+    Поддерживает только выборки моделей без условий (select(Employee)):
+    другие запросы падают с NotImplementedError, чтобы новый запрос в
+    замеряемом коде не прошел незамеченным.
+    """
+
+    def __init__(self, db: "InMemoryDatabase"):
+        self.db = db
+
+    async def __aenter__(self) -> "InMemorySession":
+        self.db.sessions_opened += 1
+        return self
+
+    async def __aexit__(self, *_exc: Any) -> None:
+        pass
+
+    async def scalars(self, statement: Any) -> _ScalarResult:
+        self.db.queries += 1
+        entity = statement.column_descriptions[0]["entity"]
+        if statement.whereclause is not None or entity not in self.db.tables:
+            raise NotImplementedError(f"Запрос не поддерживается: {statement}")
+        return _ScalarResult(self.db.tables[entity])
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class _EmployeeRepo:
+    def __init__(self, db: "InMemoryDatabase"):
+        self.db = db
+
+    async def get_users(self, user_id: Optional[int] = None, **_filters: Any):
+        self.db.queries += 1
+        if user_id is not None:
+            return self.db.employees.get(user_id)
+        return list(self.db.employees.values())
+
+    async def update_user(self, user_id: int, **fields: Any):
+        self.db.queries += 1
+        employee = self.db.employees.get(user_id)
+        for key, value in fields.items():
+            setattr(employee, key, value)
+        return employee
+
+
+class _EventLogRepo:
+    def __init__(self, db: "InMemoryDatabase"):
+        self.db = db
+
+    async def create_event(self, **event: Any) -> None:
+        self.db.queries += 1
+        self.db.events.append(event)
+
+
+class _ExchangeRepo:
+    def __init__(self, db: "InMemoryDatabase"):
+        self.db = db
+
+    async def get_user_total_gain(self, **_filters: Any) -> float:
+        self.db.queries += 1
+        return 0.0
+
+    async def get_user_total_loss(self, **_filters: Any) -> float:
+        self.db.queries += 1
+        return 0.0
+
+
+class InMemoryRepo:
+    """Замена MainRequestsRepo для бенчмарков."""
+
+    def __init__(self, session: InMemorySession):
+        self.session = session
+        self.employee = _EmployeeRepo(session.db)
+        self.event_log = _EventLogRepo(session.db)
+        self.exchange = _ExchangeRepo(session.db)
+
+
+class InMemoryStatsRepo:
+    """Замена StatsRequestsRepo для бенчмарков."""
+
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+
+class InMemoryDatabase:
+    """Базы STP и Stats в памяти.
+
+    Attributes:
+        employees: Сотрудники по идентификатору Telegram
+        tables: Строки моделей для выборок через сессию
+        events: Записанные события журнала
+        queries: Количество обращений к базе
+        sessions_opened: Количество открытых сессий
+    """
+
+    def __init__(self, employees: Iterable[Employee]):
+        """Заполняет базу сотрудниками.
+
+        Args:
+            employees: Сотрудники
+        """
+        self.employees: Dict[int, Employee] = {e.user_id: e for e in employees}
+        self.tables: Mapping[Any, List[Any]] = {Employee: list(self.employees.values())}
+        self.events: List[Dict[str, Any]] = []
+        self.queries = 0
+        self.sessions_opened = 0
+
+    def session_pool(self):
+        """Пул сессий с интерфейсом async_sessionmaker.
+
+        Returns:
+            Фабрика сессий базы в памяти
+        """
+        return lambda: InMemorySession(self)
+
+    def repo(self) -> InMemoryRepo:
+        """Репозиторий STP вне middleware (геттеры, расчеты).
+
+        Returns:
+            Репозиторий базы в памяти
+        """
+        return InMemoryRepo(InMemorySession(self))
+
+
+def build_employees(employees: Iterable[SyntheticEmployee]) -> List[Employee]:
+    """Создает модели сотрудников для базы в памяти.
+
+    Args:
+        employees: Сотрудники синтетического графика
+
+    Returns:
+        Модели Employee
+    """
+    return [
+        Employee(
+            id=pk,
+            user_id=employee.user_id,
+            username=employee.username,
+            fullname=employee.fullname,
+            division=DIVISION,
+            position=employee.position,
+            head=employee.head,
+            role=2 if employee.position == "Руководитель группы" else 1,
+            access=True,
+        )
+        for pk, employee in enumerate(employees, start=1)
+    ]
@@ -0,0 +1,667 @@
+"""Нагрузочное тестирование повтором журнала событий.
+
+EventLoggingMiddleware пишет в журнал событий сообщения и нажатия кнопок
+пользователей с состоянием диалога. Инструмент выгружает окно журнала в
+JSONL и повторяет его в N раз быстрее через настоящий диспетчер бота:
+апдейты идут через очередь вебхука (UpdateQueue), все роутеры, диалоги и
+middleware. Telegram заменен заглушкой, запросы идут в локальную базу.
+
+Выгрузка (из базы, указанной в .env или переменных окружения):
+
+    python -m benchmarks.replay export --since 2025-06-02T09:00 \\
+        --until 2025-06-02T10:00 --output events.jsonl
+
+Повтор (в локальную копию баз STP и Stats, она будет изменена обработчиками):
+
+    DB_HOST=localhost python -m benchmarks.replay run events.jsonl \\
+        --speed 2 --output replay.json
+
+Отчет: пропускная способность, p50/p95/p99 задержки по состояниям диалогов
+(от планового времени апдейта до конца обработки, с ожиданием в очереди) и
+загрузка пулов соединений баз.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import TelegramObject, Update
+from aiogram_dialog.utils import CB_SEP
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from stp_database import create_engine, create_session_pool
+from stp_database.models.STP import Employee
+from stp_database.models.STP.event_log import EventLog
+
+from .fakes import FakeBotSession
+from .timing import percentile
+
+logger = logging.getLogger(__name__)
+
+# Типы событий журнала, которые можно повторить
+REPLAYED_EVENT_TYPES = ("message", "command", "callback_query")
+
+
+@dataclass(slots=True)
+class ReplayEvent:
+    """Событие журнала для повтора.
+
+    Attributes:
+        at: Время события
+        user_id: Идентификатор пользователя Telegram
+        event_type: Тип события (message, command, callback_query)
+        dialog_state: Состояние диалога в момент события
+        text: Текст сообщения
+        callback_data: Данные нажатой кнопки
+        content_type: Тип содержимого сообщения
+    """
+
+    at: datetime
+    user_id: int
+    event_type: str
+    dialog_state: Optional[str] = None
+    text: Optional[str] = None
+    callback_data: Optional[str] = None
+    content_type: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Метка события в отчете: состояние диалога или тип события."""
+        if self.dialog_state and self.dialog_state != "None":
+            return self.dialog_state
+        return self.event_type
+
+    def to_json(self) -> str:
+        """Событие в виде строки JSONL."""
+        data = asdict(self)
+        data["at"] = self.at.isoformat()
+        return json.dumps(data, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> "ReplayEvent":
+        """Читает событие из строки JSONL.
+
+        Args:
+            line: Строка JSONL
+
+        Returns:
+            Событие
+        """
+        data = json.loads(line)
+        data["at"] = datetime.fromisoformat(data["at"])
+        return cls(**data)
+
+
+async def export_events(
+    stp_session_pool: async_sessionmaker[AsyncSession],
+    since: datetime,
+    until: datetime,
+    limit: Optional[int] = None,
+) -> List[ReplayEvent]:
+    """Выгружает события журнала за период.
+
+    Args:
+        stp_session_pool: Пул сессий с базой STP
+        since: Начало периода (включительно)
+        until: Конец периода (не включительно)
+        limit: Максимальное количество событий
+
+    Returns:
+        События по времени
+    """
+    # Атрибут metadata зарезервирован в моделях SQLAlchemy, колонки берутся из таблицы
+    columns = EventLog.__table__.c
+    query = (
+        select(
+            columns.created_at,
+            columns.user_id,
+            columns.event_type,
+            columns.dialog_state,
+            columns["metadata"].label("event_metadata"),
+        )
+        .where(
+            columns.created_at >= since,
+            columns.created_at < until,
+            columns.event_type.in_(REPLAYED_EVENT_TYPES),
+        )
+        .order_by(columns.created_at, columns.id)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+
+    async with stp_session_pool() as session:
+        rows = (await session.execute(query)).all()
+
+    events = []
+    for row in rows:
+        metadata = row.event_metadata or {}
+        events.append(
+            ReplayEvent(
+                at=row.created_at,
+                user_id=row.user_id,
+                event_type=row.event_type,
+                dialog_state=row.dialog_state,
+                text=metadata.get("text"),
+                callback_data=metadata.get("callback_data"),
+                content_type=metadata.get("content_type"),
+            )
+        )
+    return events
+
+
+def write_events(path: Path, events: Iterable[ReplayEvent]) -> int:
+    """Записывает события в JSONL.
+
+    Args:
+        path: Путь к файлу
+        events: События
+
+    Returns:
+        Количество записанных событий
+    """
+    count = 0
+    with path.open("w", encoding="utf-8") as file:
+        for event in events:
+            file.write(event.to_json() + "\n")
+            count += 1
+    return count
+
+
+def read_events(path: Path) -> List[ReplayEvent]:
+    """Читает события из JSONL.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        События по времени
+    """
+    with path.open(encoding="utf-8") as file:
+        events = [ReplayEvent.from_json(line) for line in file if line.strip()]
+    return sorted(events, key=lambda event: event.at)
+
+
+class LatencyRecorder(BaseMiddleware):
+    """Внешний middleware апдейтов, замеряющий задержку повторенных апдейтов.
+
+    Задержка считается от планового времени отправки апдейта, поэтому
+    включает ожидание в очереди вебхука.
+    """
+
+    def __init__(self):
+        self.scheduled: Dict[int, tuple] = {}
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.first_scheduled: Optional[float] = None
+        self.last_finished: Optional[float] = None
+
+    def schedule(self, update_id: int, label: str, at: float) -> None:
+        """Запоминает плановое время апдейта.
+
+        Args:
+            update_id: Идентификатор апдейта
+            label: Метка апдейта в отчете
+            at: Плановое время (time.perf_counter)
+        """
+        self.scheduled[update_id] = (label, at)
+        if self.first_scheduled is None:
+            self.first_scheduled = at
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        label, scheduled_at = self.scheduled.pop(
+            event.update_id, ("unknown", time.perf_counter())
+        )
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors[label] += 1
+            raise
+        finally:
+            finished = time.perf_counter()
+            self.latencies[label].append(finished - scheduled_at)
+            self.last_finished = finished
+
+
+class PoolMonitor:
+    """Периодический замер занятых соединений в пулах баз."""
+
+    def __init__(self, engines: Dict[str, AsyncEngine], interval: float = 0.05):
+        """Инициализирует монитор.
+
+        Args:
+            engines: Движки баз по названиям
+            interval: Период замера в секундах
+        """
+        self.engines = engines
+        self.interval = interval
+        self.samples: Dict[str, List[int]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            for name, engine in self.engines.items():
+                self.samples[name].append(engine.sync_engine.pool.checkedout())
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Запускает замеры."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает замеры."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Загрузка пулов соединений.
+
+        Returns:
+            Для каждой базы: размер пула, лимит переполнения, пик и среднее
+            число занятых соединений, доля замеров с исчерпанным пулом
+        """
+        result = {}
+        for name, engine in self.engines.items():
+            pool = engine.sync_engine.pool
+            samples = self.samples.get(name) or [0]
+            size = pool.size()
+            # QueuePool не отдает лимит переполнения публично
+            capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+            result[name] = {
+                "pool_size": size,
+                "capacity": capacity,
+                "peak_in_use": max(samples),
+                "mean_in_use": round(sum(samples) / len(samples), 2),
+                "saturated_share": round(
+                    sum(1 for s in samples if s >= capacity) / len(samples), 3
+                ),
+            }
+        return result
+
+
+def build_update(
+    update_id: int,
+    event: ReplayEvent,
+    session: FakeBotSession,
+    usernames: Dict[int, Optional[str]],
+) -> Optional[Dict[str, Any]]:
+    """Строит апдейт Telegram по событию журнала.
+
+    Идентификатор диалога в данных кнопки заменяется на текущий диалог
+    пользователя в повторе (из последней клавиатуры бота), иначе
+    aiogram-dialog не найдет контекст.
+
+    Args:
+        update_id: Идентификатор апдейта
+        event: Событие журнала
+        session: Сессия-заглушка бота
+        usernames: Юзернеймы пользователей из локальной базы
+
+    Returns:
+        Сырой апдейт или None, если событие не повторяется
+    """
+    user = {
+        "id": event.user_id,
+        "is_bot": False,
+        "first_name": "Replay",
+        "username": usernames.get(event.user_id),
+    }
+    chat = {"id": event.user_id, "type": "private"}
+    date = int(time.time())
+
+    if event.event_type == "callback_query":
+        if not event.callback_data:
+            return None
+        data = event.callback_data
+        intent_id = session.intents.get(event.user_id)
+        if intent_id and CB_SEP in data:
+            data = f"{intent_id}{CB_SEP}{data.split(CB_SEP, 1)[1]}"
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": user,
+                "chat_instance": str(event.user_id),
+                "data": data,
+                "message": {
+                    "message_id": session.last_messages.get(event.user_id, 1),
+                    "date": date,
+                    "chat": chat,
+                    "from": {"id": 0, "is_bot": True, "first_name": "Bot"},
+                    "text": "…",
+                },
+            },
+        }
+
+    if not event.text or event.content_type not in (None, "text"):
+        return None
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": date,
+            "chat": chat,
+            "from": user,
+            "text": event.text,
+        },
+    }
+
+
+async def load_usernames(
+    stp_session_pool: async_sessionmaker[AsyncSession], user_ids: Iterable[int]
+) -> Dict[int, Optional[str]]:
+    """Получает юзернеймы пользователей из локальной базы.
+
+    Апдейты повтора несут те же юзернеймы, иначе UsersMiddleware стал бы
+    перезаписывать их в базе.
+
+    Args:
+        stp_session_pool: Пул сессий с базой STP
+        user_ids: Идентификаторы пользователей Telegram
+
+    Returns:
+        Юзернеймы по идентификаторам
+    """
+    async with stp_session_pool() as session:
+        rows = await session.execute(
+            select(Employee.user_id, Employee.username).where(
+                Employee.user_id.in_(set(user_ids))
+            )
+        )
+        return dict(rows.all())
+
+
+def _latency_stats(latencies: List[float], errors: int = 0) -> Dict[str, Any]:
+    ms = [value * 1000 for value in latencies]
+    return {
+        "count": len(ms),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p95_ms": round(percentile(ms, 95), 1),
+        "p99_ms": round(percentile(ms, 99), 1),
+        "max_ms": round(max(ms), 1),
+    }
+
+
+async def replay(
+    events: List[ReplayEvent],
+    speed: float,
+    bot: Bot,
+    session: FakeBotSession,
+    update_queue: Any,
+    recorder: LatencyRecorder,
+    monitor: PoolMonitor,
+    usernames: Dict[int, Optional[str]],
+) -> Dict[str, Any]:
+    """Повторяет события в темпе журнала, ускоренном в speed раз.
+
+    Args:
+        events: События по времени
+        speed: Ускорение относительно журнала
+        bot: Бот с сессией-заглушкой
+        session: Сессия-заглушка бота
+        update_queue: Запущенная очередь апдейтов диспетчера
+        recorder: Middleware замера задержек, подключенный к диспетчеру
+        monitor: Монитор пулов соединений
+        usernames: Юзернеймы пользователей из локальной базы
+
+    Returns:
+        Отчет повтора
+    """
+    started = time.perf_counter()
+    origin = events[0].at
+    skipped = 0
+    shed: Counter = Counter()
+    monitor.start()
+
+    for update_id, event in enumerate(events, start=1):
+        scheduled_at = started + (event.at - origin).total_seconds() / speed
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        update = build_update(update_id, event, session, usernames)
+        if update is None:
+            skipped += 1
+            continue
+        recorder.schedule(update_id, event.label, scheduled_at)
+        if not await update_queue.submit(bot, update):
+            recorder.scheduled.pop(update_id, None)
+            shed[event.label] += 1
+
+    await update_queue.stop(timeout=600)
+    await monitor.stop()
+
+    latencies = [value for values in recorder.latencies.values() for value in values]
+    if not latencies:
+        raise RuntimeError("Ни одно событие не было повторено")
+
+    elapsed = recorder.last_finished - recorder.first_scheduled
+    window = (events[-1].at - origin).total_seconds()
+    return {
+        "events": len(events),
+        "replayed": len(latencies),
+        "skipped": skipped,
+        "shed": dict(shed),
+        "speed": speed,
+        "recorded_window_s": round(window, 1),
+        "duration_s": round(elapsed, 1),
+        "recorded_rate_per_s": round(len(latencies) / window, 2) if window else None,
+        "throughput_per_s": round(len(latencies) / elapsed, 2),
+        "overall": _latency_stats(latencies, sum(recorder.errors.values())),
+        "states": {
+            label: _latency_stats(values, recorder.errors[label])
+            for label, values in sorted(
+                recorder.latencies.items(), key=lambda item: -len(item[1])
+            )
+        },
+        "db_pools": monitor.report(),
+        "queue": update_queue.get_stats(),
+        "telegram_calls": dict(session.calls.most_common()),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Выводит основные показатели отчета."""
+    print(
+        f"Повторено {report['replayed']} из {report['events']} событий "
+        f"со скоростью x{report['speed']} за {report['duration_s']} с"
+    )
+    print(
+        f"Пропускная способность: {report['throughput_per_s']} апд/с "
+        f"(в журнале {report['recorded_rate_per_s']} апд/с)"
+    )
+    if report["shed"]:
+        print(f"Отброшено очередью: {sum(report['shed'].values())}")
+    print(
+        f"\n{'Состояние':<48} {'N':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'Ошибки':>7}"
+    )
+    rows = [("Все", report["overall"])] + list(report["states"].items())
+    for label, stats in rows:
+        print(
+            f"{label[:48]:<48} {stats['count']:>6} {stats['p50_ms']:>8} "
+            f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['errors']:>7}"
+        )
+    print()
+    for name, pool in report["db_pools"].items():
+        print(
+            f"Пул {name}: пик {pool['peak_in_use']}/{pool['capacity']}, "
+            f"в среднем {pool['mean_in_use']}, "
+            f"исчерпан {pool['saturated_share'] * 100:.1f}% времени"
+        )
+
+
+def _create_engines(config) -> Dict[str, AsyncEngine]:
+    return {
+        "stp": create_engine(
+            db_name=config.db.stp_db,
+            host=config.db.host,
+            username=config.db.user,
+            password=config.db.password,
+        ),
+        "stats": create_engine(
+            db_name=config.db.stats_db,
+            host=config.db.host,
+            username=config.db.user,
+            password=config.db.password,
+        ),
+    }
+
+
+async def run_export(args: argparse.Namespace) -> None:
+    """Выгружает окно журнала событий в JSONL."""
+    from tgbot.config import get_config
+
+    config = get_config()
+    engine = _create_engines(config)["stp"]
+    try:
+        events = await export_events(
+            create_session_pool(engine),
+            datetime.fromisoformat(args.since),
+            datetime.fromisoformat(args.until),
+            args.limit,
+        )
+    finally:
+        await engine.dispose()
+
+    count = write_events(Path(args.output), events)
+    print(f"Выгружено событий: {count} -> {args.output}")
+
+
+async def run_replay(args: argparse.Namespace) -> None:
+    """Повторяет выгруженные события через диспетчер бота."""
+    from bot import create_dispatcher
+    from tgbot.config import get_config
+    from tgbot.middlewares.MetricsMiddleware import TelegramMetricsMiddleware
+    from tgbot.services.files_processing.core.readers import (
+        set_engine as set_excel_engine,
+    )
+    from tgbot.services.mailing import get_mail_outbox
+    from tgbot.services.metrics import instrument_engine
+    from tgbot.services.replicas import setup_replicas
+    from tgbot.services.schedule_cache import register_exchange_listeners
+    from tgbot.services.update_queue import UpdateQueue
+
+    events = read_events(Path(args.events))
+    if not events:
+        raise SystemExit("В файле нет событий")
+
+    config = get_config()
+    set_excel_engine(config.tg_bot.excel_engine)
+    engines = _create_engines(config)
+    for name, engine in engines.items():
+        instrument_engine(engine, name)
+    stp_session_pool = create_session_pool(engines["stp"])
+    stats_session_pool = create_session_pool(engines["stats"])
+    register_exchange_listeners()
+    setup_replicas(None)
+
+    session = FakeBotSession(latency=args.telegram_latency)
+    session.middleware(TelegramMetricsMiddleware())
+    bot = Bot(
+        token=config.tg_bot.token,
+        session=session,
+        default=DefaultBotProperties(parse_mode="HTML", link_preview_is_disabled=True),
+    )
+    dp = create_dispatcher(
+        config, bot, MemoryStorage(), stp_session_pool, stats_session_pool
+    )
+    recorder = LatencyRecorder()
+    dp.update.outer_middleware(recorder)
+    # aiogram-dialog регистрирует диалоги при запуске диспетчера
+    await dp.emit_startup(bot=bot, dispatcher=dp, **dp.workflow_data)
+
+    update_queue = UpdateQueue(
+        dp,
+        workers=args.workers or config.tg_bot.webhook_workers or 8,
+        max_size=config.tg_bot.webhook_queue_size,
+        high_water=config.tg_bot.webhook_high_water,
+    )
+    update_queue.start()
+
+    try:
+        usernames = await load_usernames(
+            stp_session_pool, {event.user_id for event in events}
+        )
+        report = await replay(
+            events,
+            args.speed,
+            bot,
+            session,
+            update_queue,
+            recorder,
+            PoolMonitor(engines),
+            usernames,
+        )
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+        await get_mail_outbox().stop()
+        for engine in engines.values():
+            await engine.dispose()
+
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"\nОтчет: {args.output}")
+
+
+def main() -> None:
+    """Точка входа: python -m benchmarks.replay."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.replay",
+        description="Нагрузочное тестирование повтором журнала событий",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Выгрузить окно журнала в JSONL")
+    export.add_argument("--since", required=True, help="Начало окна (ISO 8601)")
+    export.add_argument("--until", required=True, help="Конец окна (ISO 8601)")
+    export.add_argument("--limit", type=int, default=None)
+    export.add_argument("--output", default="events.jsonl")
+
+    run = commands.add_parser("run", help="Повторить события через диспетчер")
+    run.add_argument("events", help="Файл событий JSONL")
+    run.add_argument(
+        "--speed", type=float, default=1.0, help="Ускорение относительно журнала"
+    )
+    run.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Воркеры очереди апдейтов (по умолчанию WEBHOOK_WORKERS)",
+    )
+    run.add_argument(
+        "--telegram-latency",
+        type=float,
+        default=0.05,
+        help="Имитация задержки ответа Telegram в секундах",
+    )
+    run.add_argument("--output", default=None, help="Путь к JSON отчета")
+
+    args = parser.parse_args()
+    if args.command == "run" and args.speed <= 0:
+        parser.error("--speed должен быть больше нуля")
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run_export(args) if args.command == "export" else run_replay(args))
+
+
+if __name__ == "__main__":
+    main()
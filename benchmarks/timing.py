@@ -0,0 +1,184 @@
+"""Замеры времени и отчет бенчмарков в JSON."""
+
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу.
+
+    Args:
+        values: Значения (не обязательно отсортированные)
+        q: Перцентиль от 0 до 100
+
+    Returns:
+        Значение перцентиля
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """Результат одного бенчмарка.
+
+    Attributes:
+        name: Название бенчмарка
+        group: Группа бенчмарков
+        rounds: Количество замеров
+        min_ms: Минимальное время, мс
+        mean_ms: Среднее время, мс
+        median_ms: Медиана, мс
+        p95_ms: 95-й перцентиль, мс
+        max_ms: Максимальное время, мс
+        extra: Дополнительные показатели бенчмарка
+    """
+
+    name: str
+    group: str
+    rounds: int
+    min_ms: float
+    mean_ms: float
+    median_ms: float
+    p95_ms: float
+    max_ms: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_timings(
+        cls,
+        name: str,
+        group: str,
+        timings: List[float],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> "BenchmarkResult":
+        """Собирает результат по замерам.
+
+        Args:
+            name: Название бенчмарка
+            group: Группа бенчмарков
+            timings: Замеры в секундах
+            extra: Дополнительные показатели
+
+        Returns:
+            Результат бенчмарка
+        """
+        ms = sorted(t * 1000 for t in timings)
+        return cls(
+            name=name,
+            group=group,
+            rounds=len(ms),
+            min_ms=round(ms[0], 3),
+            mean_ms=round(statistics.fmean(ms), 3),
+            median_ms=round(statistics.median(ms), 3),
+            p95_ms=round(percentile(ms, 95), 3),
+            max_ms=round(ms[-1], 3),
+            extra=extra or {},
+        )
+
+
+def measure(
+    func: Callable[[], Any],
+    rounds: int,
+    setup: Optional[Callable[[], Any]] = None,
+) -> List[float]:
+    """Замеряет время синхронной функции.
+
+    Args:
+        func: Замеряемая функция
+        rounds: Количество замеров
+        setup: Подготовка перед каждым замером (не входит в замер)
+
+    Returns:
+        Замеры в секундах
+    """
+    timings = []
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def ameasure(
+    func: Callable[[], Awaitable[Any]],
+    rounds: int,
+    setup: Optional[Callable[[], Any]] = None,
+) -> List[float]:
+    """Замеряет время асинхронной функции.
+
+    Args:
+        func: Замеряемая функция
+        rounds: Количество замеров
+        setup: Подготовка перед каждым замером (не входит в замер)
+
+    Returns:
+        Замеры в секундах
+    """
+    timings = []
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+class BenchmarkReport:
+    """Результаты запуска бенчмарков."""
+
+    def __init__(self, params: Dict[str, Any]):
+        """Инициализирует отчет.
+
+        Args:
+            params: Параметры запуска (размеры сгенерированных файлов и т.д.)
+        """
+        self.params = params
+        self.results: List[BenchmarkResult] = []
+        self.started_at = datetime.now()
+
+    def add(self, result: BenchmarkResult) -> BenchmarkResult:
+        """Добавляет результат бенчмарка.
+
+        Args:
+            result: Результат бенчмарка
+
+        Returns:
+            Тот же результат
+        """
+        self.results.append(result)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Отчет в виде словаря для JSON."""
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": self.params,
+            "results": [asdict(result) for result in self.results],
+        }
+
+    def write(self, path: Path) -> Path:
+        """Записывает отчет в JSON.
+
+        Args:
+            path: Путь к файлу отчета
+
+        Returns:
+            Путь к файлу отчета
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        return path
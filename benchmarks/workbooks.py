@@ -0,0 +1,477 @@
+"""Генераторы синтетических файлов для бенчмарков.
+
+Файлы повторяют структуру рабочих загрузок: график направления с листами
+ГРАФИК и ЗАЯВЛЕНИЯ, файл старшинства с листами дежурств по месяцам и файл
+обучений. Содержимое детерминировано и зависит только от seed, поэтому
+результаты разных запусков сравнимы.
+"""
+
+import calendar
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+
+from tgbot.services.files_processing.core.constants import (
+    MONTH_NAMES_TITLE,
+    MONTHS_ORDER,
+)
+
+DIVISION = "НЦК"
+
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+POSITIONS = ["Специалист", "Ведущий специалист", "Эксперт"]
+
+HEADER = ["ФИО", "График", "Город", "ПРМ", "Должность", "Руководитель"]
+
+SURNAMES = [
+    "Иванов",
+    "Петров",
+    "Сидоров",
+    "Смирнов",
+    "Кузнецов",
+    "Попов",
+    "Васильев",
+    "Соколов",
+    "Михайлов",
+    "Новиков",
+    "Федоров",
+    "Морозов",
+    "Волков",
+    "Алексеев",
+    "Лебедев",
+    "Семенов",
+    "Егоров",
+    "Павлов",
+    "Козлов",
+    "Степанов",
+]
+NAMES = [
+    "Иван",
+    "Петр",
+    "Алексей",
+    "Сергей",
+    "Андрей",
+    "Дмитрий",
+    "Михаил",
+    "Николай",
+    "Павел",
+    "Артем",
+    "Олег",
+    "Роман",
+    "Егор",
+    "Антон",
+    "Максим",
+    "Илья",
+    "Кирилл",
+    "Денис",
+    "Юрий",
+    "Виктор",
+]
+PATRONYMICS = [
+    "Иванович",
+    "Петрович",
+    "Алексеевич",
+    "Сергеевич",
+    "Андреевич",
+    "Дмитриевич",
+    "Михайлович",
+    "Николаевич",
+    "Павлович",
+    "Олегович",
+    "Романович",
+    "Антонович",
+    "Максимович",
+    "Ильич",
+    "Кириллович",
+    "Денисович",
+    "Юрьевич",
+    "Викторович",
+    "Егорович",
+    "Артемович",
+]
+
+# Значения ячеек графика и их частота
+SHIFTS = [
+    ("09:00-18:00", 30),
+    ("08:00-20:00", 20),
+    ("20:00-08:00", 8),
+    ("", 32),
+    ("Отпуск", 6),
+    ("ЛНТС", 3),
+    ("Н", 1),
+]
+ADDITIONAL_SHIFT = "10:00-19:00"
+ADDITIONAL_SHIFT_FILL = PatternFill("solid", start_color="CC99FF", end_color="CC99FF")
+ADDITIONAL_SHIFT_RATE = 0.02
+
+DUTY_SHIFTS = ["П 09:00-18:00", "П 18:00-21:00", "С 09:00-21:00"]
+
+STATEMENTS = ["Увольнение", "Декрет", "Отпуск"]
+
+_SHIFT_VALUES = [value for value, _ in SHIFTS]
+_SHIFT_WEIGHTS = [weight for _, weight in SHIFTS]
+
+
+@dataclass(slots=True)
+class SyntheticEmployee:
+    """Сотрудник синтетического графика.
+
+    Attributes:
+        fullname: ФИО
+        position: Должность
+        head: ФИО руководителя
+        user_id: Идентификатор Telegram
+        username: Юзернейм Telegram
+    """
+
+    fullname: str
+    position: str
+    head: str
+    user_id: int
+    username: str
+
+
+@dataclass(slots=True)
+class SyntheticUploads:
+    """Сгенерированные файлы в папке загрузок.
+
+    Attributes:
+        folder: Папка загрузок
+        employees: Сотрудники графика
+        year: Год графиков
+        months: Номера месяцев графиков
+        schedule_files: Файлы графиков по полугодиям
+        previous_schedule: Предыдущая версия первого графика для сравнения
+        duty_file: Файл старшинства с листами дежурств
+        studies_file: Файл обучений
+    """
+
+    folder: Path
+    employees: List[SyntheticEmployee]
+    year: int
+    months: List[int]
+    schedule_files: List[Path]
+    previous_schedule: Path
+    duty_file: Path
+    studies_file: Path
+
+
+def generate_employees(count: int, seed: int = 0) -> List[SyntheticEmployee]:
+    """Генерирует сотрудников с уникальными ФИО.
+
+    Args:
+        count: Количество сотрудников (до 8000)
+        seed: Зерно генератора
+
+    Returns:
+        Список сотрудников
+    """
+    total = len(SURNAMES) * len(NAMES) * len(PATRONYMICS)
+    if count > total:
+        raise ValueError(f"Можно сгенерировать не больше {total} сотрудников")
+
+    rng = random.Random(seed)
+    combinations = rng.sample(range(total), count)
+    heads_count = max(1, count // 15)
+
+    employees = []
+    for i, combination in enumerate(combinations):
+        surname_idx, rest = divmod(combination, len(NAMES) * len(PATRONYMICS))
+        name_idx, patronymic_idx = divmod(rest, len(PATRONYMICS))
+        fullname = (
+            f"{SURNAMES[surname_idx]} {NAMES[name_idx]} {PATRONYMICS[patronymic_idx]}"
+        )
+        employees.append(
+            SyntheticEmployee(
+                fullname=fullname,
+                position="Руководитель группы" if i < heads_count else "",
+                head="",
+                user_id=100_000 + i,
+                username=f"bench_user_{i}",
+            )
+        )
+
+    heads = employees[:heads_count]
+    for employee in employees[heads_count:]:
+        employee.position = rng.choice(POSITIONS)
+        employee.head = rng.choice(heads).fullname
+    return employees
+
+
+def _month_columns(year: int, months: Sequence[int]) -> List[tuple]:
+    """Колонки дней: (месяц, день) по порядку."""
+    return [
+        (month, day)
+        for month in months
+        for day in range(1, calendar.monthrange(year, month)[1] + 1)
+    ]
+
+
+def _header_rows(year: int, columns: List[tuple], offset: int) -> List[list]:
+    """Строки месяцев и дней над колонками графика."""
+    months_row = [""] * offset
+    days_row = []
+    previous_month = None
+    for month, day in columns:
+        months_row.append(MONTHS_ORDER[month - 1] if month != previous_month else "")
+        days_row.append(f"{day}{WEEKDAYS[calendar.weekday(year, month, day)]}")
+        previous_month = month
+    return [months_row, days_row]
+
+
+def write_schedule_workbook(
+    path: Path,
+    employees: Sequence[SyntheticEmployee],
+    year: int,
+    months: Sequence[int],
+    seed: int = 0,
+    change_rate: float = 0.0,
+) -> Path:
+    """Записывает файл графика с листами ГРАФИК и ЗАЯВЛЕНИЯ.
+
+    Args:
+        path: Путь к файлу
+        employees: Сотрудники
+        year: Год графика
+        months: Номера месяцев графика
+        seed: Зерно генератора значений
+        change_rate: Доля ячеек, измененных относительно графика с тем же seed
+
+    Returns:
+        Путь к файлу
+    """
+    rng = random.Random(seed)
+    changes = random.Random(seed + 1)
+    columns = _month_columns(year, months)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("ГРАФИК")
+    months_row, days_row = _header_rows(year, columns, len(HEADER))
+    ws.append(months_row)
+    ws.append(HEADER + days_row)
+
+    dismissed = []
+    for employee in employees:
+        row = [
+            employee.fullname,
+            rng.choice(["5/2", "2/2"]),
+            "Пермь",
+            "",
+            employee.position,
+            employee.head,
+        ]
+        for _ in columns:
+            value = rng.choices(_SHIFT_VALUES, _SHIFT_WEIGHTS)[0]
+            additional = rng.random() < ADDITIONAL_SHIFT_RATE
+            if change_rate and changes.random() < change_rate:
+                value = changes.choice([v for v in _SHIFT_VALUES if v != value])
+            if additional and not value:
+                cell = WriteOnlyCell(ws, value=ADDITIONAL_SHIFT)
+                cell.fill = ADDITIONAL_SHIFT_FILL
+                row.append(cell)
+            else:
+                row.append(value)
+        ws.append(row)
+        if rng.random() < 0.03:
+            dismissed.append(employee)
+
+    ws.append(["Переводы/увольнения"])
+    for employee in dismissed:
+        ws.append([employee.fullname, "", "", "", employee.position, employee.head])
+
+    statements = wb.create_sheet("ЗАЯВЛЕНИЯ")
+    start = datetime(year, months[0], 1)
+    for employee in dismissed:
+        statements.append([
+            employee.fullname,
+            start + timedelta(days=rng.randrange(0, 28 * len(months))),
+            rng.choice(STATEMENTS),
+        ])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def write_duty_workbook(
+    path: Path,
+    employees: Sequence[SyntheticEmployee],
+    year: int,
+    months: Sequence[int],
+    seed: int = 0,
+    duty_share: float = 0.2,
+) -> Path:
+    """Записывает файл старшинства с листами "Дежурство {Месяц}".
+
+    Args:
+        path: Путь к файлу
+        employees: Сотрудники
+        year: Год графика
+        months: Номера месяцев
+        seed: Зерно генератора
+        duty_share: Доля сотрудников, участвующих в дежурствах
+
+    Returns:
+        Путь к файлу
+    """
+    rng = random.Random(seed)
+    on_duty = employees[: max(1, int(len(employees) * duty_share))]
+
+    wb = Workbook(write_only=True)
+    for month in months:
+        ws = wb.create_sheet(f"Дежурство {MONTH_NAMES_TITLE[month - 1]}")
+        months_row, days_row = _header_rows(year, _month_columns(year, [month]), 1)
+        ws.append(months_row)
+        ws.append(["ФИО"] + days_row)
+        for employee in on_duty:
+            ws.append(
+                [employee.fullname]
+                + [
+                    rng.choice(DUTY_SHIFTS) if rng.random() < 0.25 else ""
+                    for _ in days_row
+                ]
+            )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def write_studies_workbook(
+    path: Path,
+    employees: Sequence[SyntheticEmployee],
+    year: int,
+    months: Sequence[int],
+    seed: int = 0,
+    sessions_per_month: int = 8,
+    group_size: int = 12,
+) -> Path:
+    """Записывает файл обучений.
+
+    Args:
+        path: Путь к файлу
+        employees: Сотрудники
+        year: Год обучений
+        months: Номера месяцев
+        seed: Зерно генератора
+        sessions_per_month: Количество обучений в месяце
+        group_size: Количество участников обучения
+
+    Returns:
+        Путь к файлу
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Обучения")
+
+    number = 0
+    for month in months:
+        days = calendar.monthrange(year, month)[1]
+        for _ in range(sessions_per_month):
+            number += 1
+            trainer = rng.choice(employees)
+            ws.append([
+                datetime(year, month, rng.randint(1, days)),
+                rng.choice(["10:00", "14:00", "16:00"]),
+                rng.choice(["1 ч", "2 ч"]),
+            ])
+            ws.append([f'"Обучение {number}"'])
+            ws.append([f"Стаж от {rng.choice([1, 3, 6])} месяцев"])
+            ws.append(["Тренер", trainer.fullname])
+            ws.append(["Площадка", "ФИО", "РГ", "Присутствие", "Причина"])
+            for participant in rng.sample(
+                list(employees), min(group_size, len(employees))
+            ):
+                present = rng.random() < 0.9
+                ws.append([
+                    "Пермь",
+                    participant.fullname,
+                    participant.head,
+                    "+" if present else "-",
+                    "" if present else "Больничный",
+                ])
+            ws.append([])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def generate_uploads(
+    folder: Path,
+    employees_count: int,
+    months_count: int,
+    year: Optional[int] = None,
+    seed: int = 0,
+    change_rate: float = 0.01,
+) -> SyntheticUploads:
+    """Генерирует полный набор файлов загрузок направления НЦК.
+
+    Месяцы начинаются с января. Графики делятся на полугодия, как в рабочих
+    загрузках: "ГРАФИК НЦК I {год}.xlsx" и "ГРАФИК НЦК II {год}.xlsx".
+
+    Args:
+        folder: Папка загрузок
+        employees_count: Количество сотрудников
+        months_count: Количество месяцев (1-12)
+        year: Год графиков (по умолчанию текущий)
+        seed: Зерно генератора
+        change_rate: Доля ячеек, измененных в новой версии первого графика
+
+    Returns:
+        Сгенерированные файлы
+    """
+    if not 1 <= months_count <= 12:
+        raise ValueError("Количество месяцев должно быть от 1 до 12")
+
+    year = year or datetime.now().year
+    months = list(range(1, months_count + 1))
+    employees = generate_employees(employees_count, seed)
+
+    schedule_files = []
+    for period, period_months in (
+        ("I", [m for m in months if m <= 6]),
+        ("II", [m for m in months if m > 6]),
+    ):
+        if period_months:
+            schedule_files.append(
+                write_schedule_workbook(
+                    folder / f"ГРАФИК {DIVISION} {period} {year}.xlsx",
+                    employees,
+                    year,
+                    period_months,
+                    seed=seed,
+                    change_rate=change_rate,
+                )
+            )
+
+    # Предыдущая версия хранится вне папки загрузок, чтобы не попасть в поиск
+    previous_schedule = write_schedule_workbook(
+        folder.parent / "previous" / schedule_files[0].name,
+        employees,
+        year,
+        [m for m in months if m <= 6],
+        seed=seed,
+    )
+
+    return SyntheticUploads(
+        folder=folder,
+        employees=employees,
+        year=year,
+        months=months,
+        schedule_files=schedule_files,
+        previous_schedule=previous_schedule,
+        duty_file=write_duty_workbook(
+            folder / f"Старшинство_{DIVISION}.xlsx", employees, year, months, seed
+        ),
+        studies_file=write_studies_workbook(
+            folder / "Обучения.xlsx", employees, year, months, seed
+        ),
+    )
@@ -1,10 +1,12 @@
 import asyncio
 import logging
+import time
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import ExceptionTypeFilter
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 from aiogram.types import (
@@ -13,69 +15,88 @@ from aiogram.types import (
     BotCommandScopeAllPrivateChats,
     ErrorEvent,
 )
-from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
 from aiogram_dialog import DialogManager, StartMode, setup_dialogs
 from aiogram_dialog.api.exceptions import OutdatedIntent, UnknownIntent, UnknownState
 from aiohttp import web
 from aiohttp.web import Response
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from stp_database import create_engine, create_session_pool
 from stp_database.repo.STP import MainRequestsRepo
 
-from tgbot.config import Config, load_config
-from tgbot.dialogs.menus import common_dialogs_list, dialogs_list
+from tgbot.config import Config, get_config
 from tgbot.dialogs.states.admin import AdminSG
 from tgbot.dialogs.states.gok import GokSG
 from tgbot.dialogs.states.head import HeadSG
 from tgbot.dialogs.states.mip import MipSG
 from tgbot.dialogs.states.root import RootSG
 from tgbot.dialogs.states.user import UserSG
-from tgbot.handlers import routers_list
 from tgbot.middlewares.AccessMiddleware import AccessMiddleware
 from tgbot.middlewares.ConfigMiddleware import ConfigMiddleware
 from tgbot.middlewares.DatabaseMiddleware import DatabaseMiddleware
 from tgbot.middlewares.EventLoggingMiddleware import EventLoggingMiddleware
 from tgbot.middlewares.GroupsMiddleware import GroupsMiddleware
+from tgbot.middlewares.MetricsMiddleware import (
+    HandlerMetricsMiddleware,
+    TelegramMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+from tgbot.middlewares.QueryAuditMiddleware import QueryAuditMiddleware
 from tgbot.middlewares.UsersMiddleware import UsersMiddleware
 from tgbot.misc.dicts import roles
 from tgbot.misc.helpers import short_name
+from tgbot.services import query_audit
+from tgbot.services.background import run_detached
 from tgbot.services.files_processing.core.cache import warm_cache_on_startup
+from tgbot.services.files_processing.core.readers import (
+    set_engine as set_excel_engine,
+)
 from tgbot.services.logger import setup_logging
+from tgbot.services.mailing import get_mail_outbox
+from tgbot.services.metrics import instrument_engine
+from tgbot.services.metrics import registry as metrics_registry
+from tgbot.services.replicas import (
+    REPLICA_ID,
+    get_invalidation_bus,
+    register_cache_invalidation,
+    setup_replicas,
+)
+from tgbot.services.schedule_cache import register_exchange_listeners
 from tgbot.services.schedulers.scheduler import SchedulerManager
-
-bot_config = load_config(".env")
+from tgbot.services.startup import StartupTimer
+from tgbot.services.update_queue import (
+    QueuedRequestHandler,
+    ReplicaRouter,
+    UpdateQueue,
+)
 
 logger = logging.getLogger(__name__)
 
 
-async def on_startup():
-    """Функция, активируемая при запуске основного процесса бота."""
-    logger.info("[Startup] Начинаем прогрев кэша Excel файлов...")
+async def warm_excel_cache() -> None:
+    """Прогревает кэш Excel файлов в фоне.
 
+    Запускается, когда бот уже принимает апдейты. Файлы разбираются в
+    отдельном потоке, самые свежие - первыми.
+    """
+    logger.info("[Startup] Начинаем прогрев кэша Excel файлов...")
+    started = time.perf_counter()
     try:
-        # Запускаем прогрев кэша в отдельной задаче
-        def run_cache_warming():
-            try:
-                stats = warm_cache_on_startup("uploads")
-                logger.info(
-                    f"[Startup] Прогрев кэша завершен: {stats['processed_files']} файлов обработано, "
-                    f"{stats['successful_sheets']} листов загружено успешно"
-                )
-                if stats["errors"]:
-                    logger.warning(
-                        f"[Startup] Ошибки при прогреве кэша: {len(stats['errors'])} шт."
-                    )
-            except Exception as e:
-                logger.error(f"[Startup] Ошибка при прогреве кэша: {e}")
-
-        # Запускаем в отдельном потоке, чтобы не блокировать запуск бота
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(None, run_cache_warming)
-
-        logger.info("[Startup] Прогрев кэша запущен в фоновом режиме")
-
+        stats = await asyncio.to_thread(warm_cache_on_startup, "uploads")
     except Exception as e:
-        logger.error(f"[Startup] Не удалось запустить прогрев кэша: {e}")
+        logger.error(f"[Startup] Ошибка при прогреве кэша: {e}")
+        return
+
+    logger.info(
+        f"[Startup] Прогрев кэша завершен за {time.perf_counter() - started:.1f} с: "
+        f"{stats['processed_files']} файлов обработано, "
+        f"{stats['successful_sheets']} листов загружено успешно"
+    )
+    if stats["errors"]:
+        logger.warning(
+            f"[Startup] Ошибки при прогреве кэша: {len(stats['errors'])} шт."
+        )
 
 
 async def _unknown_intent(error: ErrorEvent, dialog_manager: DialogManager):
@@ -211,6 +232,11 @@ def register_middlewares(
     event_logging_middleware = EventLoggingMiddleware()
     access_middleware = AccessMiddleware()
 
+    # Метрики апдейта учитывают все остальные middleware
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    if query_audit.is_enabled():
+        dp.update.outer_middleware(QueryAuditMiddleware())
+
     for middleware in [
         config_middleware,
         database_middleware,
@@ -226,6 +252,62 @@ def register_middlewares(
         dp.chat_member.outer_middleware(middleware)
         dp.chat_join_request.outer_middleware(middleware)
 
+    handler_metrics_middleware = HandlerMetricsMiddleware()
+    dp.message.middleware(handler_metrics_middleware)
+    dp.callback_query.middleware(handler_metrics_middleware)
+    dp.inline_query.middleware(handler_metrics_middleware)
+    dp.my_chat_member.middleware(handler_metrics_middleware)
+    dp.chat_member.middleware(handler_metrics_middleware)
+    dp.chat_join_request.middleware(handler_metrics_middleware)
+
+
+def create_dispatcher(
+    config: Config,
+    bot: Bot,
+    storage: BaseStorage,
+    stp_session_pool: async_sessionmaker[AsyncSession],
+    stats_session_pool: async_sessionmaker[AsyncSession],
+) -> Dispatcher:
+    """Создает диспетчер со всеми роутерами, диалогами и middleware бота.
+
+    Роутеры бота подключаются к одному диспетчеру, поэтому функция
+    вызывается один раз за процесс. Обработчики и диалоги импортируются
+    здесь, а не при импорте модуля: это самая долгая часть запуска, и в
+    режиме вебхука с очередью она выполняется, когда сервер уже принимает
+    апдейты.
+
+    Args:
+        config: Конфигурация
+        bot: Экземпляр бота
+        storage: Хранилище состояний
+        stp_session_pool: Пул сессий с базой STP
+        stats_session_pool: Пул сессий с базой KPI
+
+    Returns:
+        Диспетчер апдейтов
+    """
+    from tgbot.dialogs.menus import common_dialogs_list, dialogs_list
+    from tgbot.handlers import routers_list
+
+    dp = Dispatcher(storage=storage)
+
+    # Храним сессии в диспетчере для доступа из error handlers
+    dp["stp_session_pool"] = stp_session_pool
+    dp["stats_session_pool"] = stats_session_pool
+
+    dp.include_routers(*routers_list)
+    dp.include_routers(*dialogs_list)
+    dp.include_routers(*common_dialogs_list)
+    setup_dialogs(dp)
+
+    register_middlewares(dp, config, bot, stp_session_pool, stats_session_pool)
+
+    # Регистрация обработчиков ошибок
+    dp.errors.register(_unknown_intent, ExceptionTypeFilter(UnknownIntent))
+    dp.errors.register(_unknown_intent, ExceptionTypeFilter(OutdatedIntent))
+    dp.errors.register(_unknown_intent, ExceptionTypeFilter(UnknownState))
+    return dp
+
 
 def get_storage(config) -> RedisStorage | MemoryStorage:
     """Возвращает хранилище исходя из конфигурации.
@@ -265,7 +347,8 @@ async def on_startup_webhook(bot: Bot, config: Config) -> None:
             "chat_member",
             "chat_join_request",
         ],
-        drop_pending_updates=True,
+        # Перезапуск одной из реплик не должен терять апдейты остальных
+        drop_pending_updates=not config.tg_bot.multi_replica,
         secret_token=config.tg_bot.webhook_secret,
     )
     logger.info("[Вебхук] Вебхук установлен")
@@ -282,29 +365,61 @@ async def on_shutdown_webhook(bot: Bot) -> None:
     logger.info("[Вебхук] Вебхук удален")
 
 
-async def health_check(_request) -> Response:
+async def health_check(request: web.Request) -> Response:
     """Эндпоинт для проверки здоровья приложения.
 
     Args:
-        _request: HTTP запрос
+        request: HTTP запрос
 
     Returns:
-        Response: HTTP ответ со статусом здоровья
+        Response: HTTP ответ со статусом здоровья, замерами запуска и
+            состоянием очереди апдейтов
     """
-    return Response(text="OK", status=200)
+    update_queue: UpdateQueue | None = request.app.get("update_queue")
+    if update_queue is None:
+        return Response(text="OK", status=200)
+
+    # Сервер принимает апдейты в очередь еще до сборки диспетчера
+    startup: StartupTimer = request.app["startup"]
+    health = {
+        "status": "OK" if startup.ready is not None else "STARTING",
+        "startup": startup.to_dict(),
+        "queue": update_queue.get_stats(),
+    }
+    router: ReplicaRouter | None = request.app.get("replica_router")
+    if router is not None:
+        health["replica"] = {
+            "id": REPLICA_ID,
+            "index": router.index,
+            "replicas": len(router.urls),
+            "forwarded": router.forwarded,
+            "forward_failed": router.forward_failed,
+        }
+    return web.json_response(health)
+
+
+async def metrics_handler(_request: web.Request) -> Response:
+    """Эндпоинт метрик в текстовом формате Prometheus.
 
+    Args:
+        _request: HTTP запрос
 
-async def main() -> None:
-    """Основная функция запуска бота."""
-    setup_logging()
+    Returns:
+        Response: HTTP ответ с метриками процесса
+    """
+    return Response(
+        text=metrics_registry.render(),
+        content_type="text/plain",
+        headers={"X-Prometheus-Format": "0.0.4"},
+    )
 
-    storage = get_storage(bot_config)
 
-    bot = Bot(
-        token=bot_config.tg_bot.token,
-        default=DefaultBotProperties(parse_mode="HTML", link_preview_is_disabled=True),
-    )
+async def set_bot_commands(bot: Bot) -> None:
+    """Устанавливает меню команд бота.
 
+    Args:
+        bot: Экземпляр бота
+    """
     # Определение команд для приватных чатов
     await bot.set_my_commands(
         commands=[
@@ -329,91 +444,180 @@ async def main() -> None:
         scope=BotCommandScopeAllChatAdministrators(),
     )
 
-    dp = Dispatcher(storage=storage)
 
-    # Создаем движки для доступа к базам
-    stp_engine = create_engine(
-        db_name=bot_config.db.stp_db,
-        host=bot_config.db.host,
-        username=bot_config.db.user,
-        password=bot_config.db.password,
-    )
-    stats_engine = create_engine(
-        db_name=bot_config.db.stats_db,
-        host=bot_config.db.host,
-        username=bot_config.db.user,
-        password=bot_config.db.password,
-    )
+async def main() -> None:
+    """Основная функция запуска бота.
 
-    stp_session_pool = create_session_pool(stp_engine)
-    stats_session_pool = create_session_pool(stats_engine)
+    Этапы запуска замеряются и пишутся в лог. В режиме вебхука с очередью
+    сервер начинает принимать апдейты до сборки диспетчера: апдейты ждут в
+    очереди, пока не запустятся воркеры. Прогрев кэша Excel и установка
+    команд бота выполняются в фоне после готовности.
+    """
+    startup = StartupTimer()
+    setup_logging()
 
-    # Храним сессии в диспетчере для доступа из error handlers
-    dp["stp_session_pool"] = stp_session_pool
-    dp["stats_session_pool"] = stats_session_pool
+    with startup.phase("Конфигурация"):
+        bot_config = get_config()
+        set_excel_engine(bot_config.tg_bot.excel_engine)
+        query_audit.set_mode(bot_config.tg_bot.query_audit)
 
-    dp.include_routers(*routers_list)
-    dp.include_routers(*dialogs_list)
-    dp.include_routers(*common_dialogs_list)
-    setup_dialogs(dp)
+    with startup.phase("Подключения"):
+        storage = get_storage(bot_config)
 
-    register_middlewares(dp, bot_config, bot, stp_session_pool, stats_session_pool)
+        bot = Bot(
+            token=bot_config.tg_bot.token,
+            default=DefaultBotProperties(
+                parse_mode="HTML", link_preview_is_disabled=True
+            ),
+        )
+        bot.session.middleware(TelegramMetricsMiddleware())
+
+        # Создаем движки для доступа к базам
+        stp_engine = create_engine(
+            db_name=bot_config.db.stp_db,
+            host=bot_config.db.host,
+            username=bot_config.db.user,
+            password=bot_config.db.password,
+        )
+        stats_engine = create_engine(
+            db_name=bot_config.db.stats_db,
+            host=bot_config.db.host,
+            username=bot_config.db.user,
+            password=bot_config.db.password,
+        )
 
-    # Регистрация обработчиков ошибок
-    dp.errors.register(_unknown_intent, ExceptionTypeFilter(UnknownIntent))
-    dp.errors.register(_unknown_intent, ExceptionTypeFilter(OutdatedIntent))
-    dp.errors.register(_unknown_intent, ExceptionTypeFilter(UnknownState))
+        # Учет запросов к базам в метриках и аудите запросов
+        instrument_engine(stp_engine, "stp")
+        instrument_engine(stats_engine, "stats")
+        if query_audit.is_enabled():
+            query_audit.audit_engine(stp_engine)
+            query_audit.audit_engine(stats_engine)
 
-    # Запуск планировщика и добавление задач
-    scheduler_manager = SchedulerManager()
-    scheduler_manager.setup_jobs(
-        stp_session_pool=stp_session_pool,
-        stats_session_pool=stats_session_pool,
-        bot=bot,
-    )
-    scheduler_manager.start()
+        stp_session_pool = create_session_pool(stp_engine)
+        stats_session_pool = create_session_pool(stats_engine)
+
+        # Кэш графиков отслеживает изменения сделок во всех сессиях
+        register_exchange_listeners()
+
+        # Общее состояние реплик: дедупликация и сброс кэшей через Redis
+        replicas_redis = None
+        if bot_config.tg_bot.multi_replica:
+            if bot_config.tg_bot.use_redis:
+                replicas_redis = Redis.from_url(bot_config.redis.dsn())
+            else:
+                logger.warning(
+                    "[Реплики] MULTI_REPLICA требует USE_REDIS, общее состояние отключено"
+                )
+        setup_replicas(replicas_redis)
+        register_cache_invalidation()
+        get_invalidation_bus().start()
+
+    def build_dispatcher() -> Dispatcher:
+        with startup.phase("Диспетчер"):
+            return create_dispatcher(
+                bot_config, bot, storage, stp_session_pool, stats_session_pool
+            )
 
-    # await on_startup()
+    dp: Dispatcher | None = None
+    update_queue: UpdateQueue | None = None
+    runner: web.AppRunner | None = None
+    scheduler_manager: SchedulerManager | None = None
 
     try:
         if bot_config.tg_bot.use_webhook:
             # Webhook mode
             logger.info("[Режим запуска] Бот запущен в режиме webhooks")
-            await on_startup_webhook(bot, bot_config)
 
             # Создаем aiohttp приложение
             app = web.Application()
+            app["startup"] = startup
 
             # Регистрируем health check эндпоинт
             app.router.add_get("/health", health_check)
+            app.router.add_get("/metrics", metrics_handler)
 
             # Создаем обработчик webhook
-            webhook_handler = SimpleRequestHandler(
-                dispatcher=dp,
-                bot=bot,
-                secret_token=bot_config.tg_bot.webhook_secret,
-            )
+            if bot_config.tg_bot.webhook_workers > 0:
+                # Апдейты обрабатываются воркерами, вебхук отвечает сразу.
+                # Диспетчер подключается к очереди после запуска сервера
+                update_queue = UpdateQueue(
+                    None,
+                    workers=bot_config.tg_bot.webhook_workers,
+                    max_size=bot_config.tg_bot.webhook_queue_size,
+                    high_water=bot_config.tg_bot.webhook_high_water,
+                )
+                app["update_queue"] = update_queue
+
+                # Апдейты пользователя обрабатывает одна реплика
+                router = None
+                if bot_config.tg_bot.multi_replica and bot_config.tg_bot.replica_urls:
+                    router = ReplicaRouter(
+                        bot_config.tg_bot.replica_urls,
+                        bot_config.tg_bot.replica_index,
+                        bot_config.tg_bot.webhook_secret,
+                    )
+                    app["replica_router"] = router
+
+                webhook_handler = QueuedRequestHandler(
+                    update_queue,
+                    bot=bot,
+                    secret_token=bot_config.tg_bot.webhook_secret,
+                    router=router,
+                )
+            else:
+                dp = build_dispatcher()
+                webhook_handler = SimpleRequestHandler(
+                    dispatcher=dp,
+                    bot=bot,
+                    secret_token=bot_config.tg_bot.webhook_secret,
+                )
             webhook_handler.register(app, path="/")
-            setup_application(app, dp, bot=bot)
 
             # Запускаем веб-сервер
-            runner = web.AppRunner(app)
-            await runner.setup()
-            site = web.TCPSite(
-                runner, host="0.0.0.0", port=bot_config.tg_bot.webhook_port
-            )
-            await site.start()
+            with startup.phase("Вебхук"):
+                runner = web.AppRunner(app)
+                await runner.setup()
+                site = web.TCPSite(
+                    runner, host="0.0.0.0", port=bot_config.tg_bot.webhook_port
+                )
+                await site.start()
+                await on_startup_webhook(bot, bot_config)
 
             logger.info(
                 f"[Вебхук] Сервер запущен на порту {bot_config.tg_bot.webhook_port}"
             )
 
+            if dp is None:
+                dp = build_dispatcher()
+                update_queue.dispatcher = dp
+            # aiogram-dialog регистрирует диалоги при запуске диспетчера
+            await dp.emit_startup(bot=bot, dispatcher=dp, app=app, **dp.workflow_data)
+            if update_queue is not None:
+                update_queue.start()
+            startup.mark_ready()
+        else:
+            dp = build_dispatcher()
+
+        # Запуск планировщика и добавление задач
+        with startup.phase("Планировщик"):
+            scheduler_manager = SchedulerManager(bot_config)
+            scheduler_manager.setup_jobs(
+                stp_session_pool=stp_session_pool,
+                stats_session_pool=stats_session_pool,
+                bot=bot,
+            )
+            scheduler_manager.start()
+
+        run_detached(set_bot_commands(bot), name="set-bot-commands")
+        run_detached(warm_excel_cache(), name="warm-excel-cache")
+
+        if bot_config.tg_bot.use_webhook:
             # Держим сервер запущенным
             await asyncio.Event().wait()
-
         else:
             # Polling mode
             logger.info("[Режим запуска] Бот запущен в режиме polling")
+            startup.mark_ready()
             await dp.start_polling(
                 bot,
                 allowed_updates=[
@@ -427,7 +631,21 @@ async def main() -> None:
             )
     finally:
         if bot_config.tg_bot.use_webhook:
-            await on_shutdown_webhook(bot)
+            # Вебхук общий для всех реплик, остановка одной его не удаляет
+            if not bot_config.tg_bot.multi_replica:
+                await on_shutdown_webhook(bot)
+            if update_queue is not None and dp is not None:
+                await update_queue.stop()
+            if dp is not None:
+                await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+            if runner is not None:
+                await runner.cleanup()
+        if scheduler_manager is not None:
+            await scheduler_manager.close()
+        await get_invalidation_bus().stop()
+        if replicas_redis is not None:
+            await replicas_redis.aclose()
+        await get_mail_outbox().stop()
         await stp_engine.dispose()
         await stats_engine.dispose()
 
@@ -52,6 +52,8 @@ class ProductionCalendarAPI:
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.cache_ttl = cache_ttl
+        # Кеш остается в памяти процесса и при нескольких репликах: праздники
+        # за год не меняются, и отдельная копия стоит реплике одного запроса к API
         self._cache: Dict[int, CacheEntry] = {}
 
     async def _fetch_holidays_data(
@@ -0,0 +1,28 @@
+"""Общие настройки тестов."""
+
+import os
+
+# Конфиг бота читается при импорте tgbot, тестам нужны только заглушки
+for _name, _value in {
+    "ENVIRONMENT": "dev",
+    "BOT_TOKEN": "123456789:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA",
+    "USE_REDIS": "False",
+    "DB_HOST": "localhost",
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "STP_DB_NAME": "STPMain",
+    "STATS_DB_NAME": "Stats",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "465",
+    "EMAIL_USER": "test",
+    "EMAIL_PASS": "test",
+    "EMAIL_USE_SSL": "True",
+    "NCK_EMAIL_ADDR": "nck@localhost",
+    "NTP_EMAIL_ADDR": "ntp@localhost",
+    "GOK_EMAIL_ADDR": "gok@localhost",
+    "MIP_EMAIL_ADDR": "mip@localhost",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_PASSWORD": "",
+}.items():
+    os.environ.setdefault(_name, _value)
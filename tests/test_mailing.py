@@ -0,0 +1,193 @@
+"""Тесты очереди писем на заглушке SMTP сервера."""
+
+import asyncio
+import smtplib
+from typing import List
+
+import pytest
+
+from tgbot.config import MailConfig
+from tgbot.services import mailing
+from tgbot.services.mailing import MailOutbox, OutgoingEmail, SmtpConnection
+
+MAIL_CONFIG = MailConfig(
+    host="localhost",
+    port=465,
+    user="bot@localhost",
+    password="secret",
+    use_ssl=True,
+    nck_email_addr="nck@localhost",
+    ntp_email_addr="ntp@localhost",
+    gok_email_addr="gok@localhost",
+    mip_email_addr="mip@localhost",
+)
+
+
+class FakeSMTP:
+    """Заглушка SMTP сервера: ответы на отправку задаются списком ошибок."""
+
+    instances: List["FakeSMTP"] = []
+    # Ошибки следующих отправок по порядку, None - успешная отправка
+    failures: List[Exception | None] = []
+    noop_code = 250
+
+    def __init__(self, host, port, context=None, timeout=None):
+        self.sent: List[List[str]] = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return self.noop_code, b"OK"
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        error = FakeSMTP.failures.pop(0) if FakeSMTP.failures else None
+        if error is not None:
+            raise error
+        self.sent.append(to_addrs)
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    FakeSMTP.failures = []
+    FakeSMTP.noop_code = 250
+    monkeypatch.setattr(mailing.smtplib, "SMTP_SSL", FakeSMTP)
+    # Тесты подменяют глобальную очередь, после теста она восстанавливается
+    monkeypatch.setattr(mailing, "_mail_outbox", None)
+    return FakeSMTP
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    """Записывает задержки повторов, не дожидаясь их."""
+    delays = []
+    sleep = asyncio.sleep
+
+    async def fast_sleep(delay, result=None):
+        delays.append(delay)
+        await sleep(0)
+        return result
+
+    monkeypatch.setattr(mailing.asyncio, "sleep", fast_sleep)
+    return delays
+
+
+def sent_count() -> int:
+    return sum(len(server.sent) for server in FakeSMTP.instances)
+
+
+def transient_error() -> smtplib.SMTPResponseException:
+    return smtplib.SMTPResponseException(451, b"Try again later")
+
+
+async def send(outbox: MailOutbox, subject: str, **kwargs):
+    mailing._mail_outbox = outbox
+    return await mailing.send_email("user@dom.ru", subject, "body", **kwargs)
+
+
+def test_connection_reused_between_emails():
+    async def scenario():
+        outbox = MailOutbox(MAIL_CONFIG, workers=1)
+        results = [await send(outbox, f"email {i}", wait=True) for i in range(3)]
+        await outbox.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [True, True, True]
+    assert len(FakeSMTP.instances) == 1
+    assert sent_count() == 3
+    assert FakeSMTP.instances[0].closed
+
+
+def test_idle_connection_checked_and_reopened():
+    FakeSMTP.noop_code = 421
+    connection = SmtpConnection(MAIL_CONFIG, idle_timeout=0)
+    email = OutgoingEmail(addresses=["user@dom.ru"], subject="s", body="b")
+
+    connection.send(email)
+    connection.send(email)
+
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[0].closed
+    assert sent_count() == 2
+
+
+def test_transient_errors_retried_with_backoff(sleeps):
+    FakeSMTP.failures = [transient_error(), transient_error()]
+
+    async def scenario():
+        outbox = MailOutbox(MAIL_CONFIG, workers=1, retry_delay=5)
+        result = await send(outbox, "retry", wait=True)
+        await outbox.stop()
+        return result
+
+    assert asyncio.run(scenario()) is True
+    assert sleeps == [5, 10]
+    assert sent_count() == 1
+    # Каждая неудачная попытка закрывает подключение
+    assert len(FakeSMTP.instances) == 3
+
+
+def test_permanent_error_not_retried(sleeps):
+    FakeSMTP.failures = [smtplib.SMTPResponseException(550, b"No such user")]
+
+    async def scenario():
+        outbox = MailOutbox(MAIL_CONFIG, workers=1)
+        result = await send(outbox, "rejected", wait=True)
+        await outbox.stop()
+        return result
+
+    assert asyncio.run(scenario()) is False
+    assert sleeps == []
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    FakeSMTP.failures = [transient_error() for _ in range(3)]
+
+    async def scenario():
+        outbox = MailOutbox(MAIL_CONFIG, workers=1, max_attempts=3, retry_delay=1)
+        result = await send(outbox, "failing", wait=True)
+        await outbox.stop()
+        return result
+
+    assert asyncio.run(scenario()) is False
+    assert sleeps == [1, 2]
+    assert sent_count() == 0
+
+
+def test_wait_timeout_leaves_email_in_flight():
+    FakeSMTP.failures = [transient_error()]
+
+    async def scenario():
+        outbox = MailOutbox(MAIL_CONFIG, workers=1, retry_delay=60)
+        result = await send(outbox, "slow", wait=True, timeout=0.1)
+        pending = len(outbox._retries)
+        await outbox.stop()
+        return result, pending
+
+    assert asyncio.run(scenario()) == (None, 1)
+    # Отложенный повтор отправлен при остановке
+    assert sent_count() == 1
+
+
+def test_stop_drains_pending_retries():
+    FakeSMTP.failures = [transient_error(), transient_error()]
+
+    async def scenario():
+        outbox = MailOutbox(MAIL_CONFIG, workers=2, retry_delay=60)
+        await send(outbox, "first")
+        await send(outbox, "second")
+        while len(outbox._retries) < 2:
+            await asyncio.sleep(0.01)
+        await outbox.stop()
+        return outbox
+
+    outbox = asyncio.run(scenario())
+    assert sent_count() == 2
+    assert not outbox._retries
+    assert outbox.size == 0
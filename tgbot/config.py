@@ -1,7 +1,7 @@
 """Файл конфигурации проекта."""
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 from environs import Env
 from sqlalchemy import URL
@@ -22,6 +22,18 @@ class TgBot:
         webhook_path: Кастомный путь к вебхуку
         webhook_secret: Секретный токен вебхука
         webhook_port: Порт вебхука
+        webhook_workers: Количество воркеров очереди апдейтов (0 - без очереди)
+        webhook_queue_size: Максимальный размер очереди апдейтов
+        webhook_high_water: Глубина очереди, после которой отбрасываются
+            сообщения в группах
+
+        multi_replica: Запуск нескольких реплик бота (требует Redis)
+        replica_urls: Внутренние адреса вебхуков всех реплик для маршрутизации
+            апдейтов по пользователю
+        replica_index: Номер текущей реплики в replica_urls
+
+        excel_engine: Движок чтения Excel (auto, calamine или openpyxl)
+        query_audit: Режим аудита SQL-запросов (off, warn или strict)
     """
 
     environment: str
@@ -32,6 +44,14 @@ class TgBot:
     webhook_path: Optional[str] = None
     webhook_secret: Optional[str] = None
     webhook_port: int = 8443
+    webhook_workers: int = 8
+    webhook_queue_size: int = 1000
+    webhook_high_water: int = 800
+    multi_replica: bool = False
+    replica_urls: List[str] = field(default_factory=list)
+    replica_index: int = 0
+    excel_engine: str = "auto"
+    query_audit: str = "off"
 
     @staticmethod
     def from_env(env: Env):
@@ -51,6 +71,14 @@ class TgBot:
         webhook_path = env.str("WEBHOOK_PATH", "/stpsher")
         webhook_secret = env.str("WEBHOOK_SECRET", None)
         webhook_port = env.int("WEBHOOK_PORT", 8443)
+        webhook_workers = env.int("WEBHOOK_WORKERS", 8)
+        webhook_queue_size = env.int("WEBHOOK_QUEUE_SIZE", 1000)
+        webhook_high_water = env.int("WEBHOOK_HIGH_WATER", 800)
+        multi_replica = env.bool("MULTI_REPLICA", False)
+        replica_urls = env.list("REPLICA_URLS", [])
+        replica_index = env.int("REPLICA_INDEX", 0)
+        excel_engine = env.str("EXCEL_ENGINE", "auto")
+        query_audit = env.str("QUERY_AUDIT", "off")
 
         return TgBot(
             environment=environment,
@@ -61,6 +89,14 @@ class TgBot:
             webhook_path=webhook_path,
             webhook_secret=webhook_secret,
             webhook_port=webhook_port,
+            webhook_workers=webhook_workers,
+            webhook_queue_size=webhook_queue_size,
+            webhook_high_water=webhook_high_water,
+            multi_replica=multi_replica,
+            replica_urls=replica_urls,
+            replica_index=replica_index,
+            excel_engine=excel_engine,
+            query_audit=query_audit,
         )
 
 
@@ -147,7 +183,8 @@ class MailConfig:
         port: Порт почтового сервера
         user: Логин почтового аккаунта
         password: Пароль почтового аккаунта
-        use_ssl: Использовать ли флаг use_ssl при подключении
+        use_ssl: Подключаться ли по SSL (по умолчанию). Без SSL используется
+            STARTTLS, если сервер его поддерживает
     """
 
     host: str
@@ -175,7 +212,7 @@ class MailConfig:
         port = env.int("EMAIL_PORT")
         user = env.str("EMAIL_USER")
         password = env.str("EMAIL_PASS")
-        use_ssl = env.bool("EMAIL_USE_SSL")
+        use_ssl = env.bool("EMAIL_USE_SSL", True)
 
         nck_email_addr = env.str("NCK_EMAIL_ADDR")
         ntp_email_addr = env.str("NTP_EMAIL_ADDR")
@@ -281,6 +318,23 @@ def load_config(path: str = None) -> Config:
     )
 
 
-# Глобальная конфигурация для определения окружения
-_global_config = load_config(".env")
-IS_DEVELOPMENT = _global_config.tg_bot.environment == "dev"
+_config: Optional[Config] = None
+
+
+def get_config() -> Config:
+    """Получает конфигурацию бота (паттерн singleton).
+
+    Файл .env читается один раз при первом обращении, остальные модули
+    получают тот же объект.
+
+    Returns:
+        Глобальный экземпляр Config
+    """
+    global _config
+    if _config is None:
+        _config = load_config(".env")
+    return _config
+
+
+# Окружение нужно при импорте (время жизни кэшей), конфиг читается здесь один раз
+IS_DEVELOPMENT = get_config().tg_bot.environment == "dev"
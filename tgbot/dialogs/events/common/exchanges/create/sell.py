@@ -171,19 +171,13 @@ async def get_user_shift_info(
         duty_time = None
         duty_type = None
         try:
-            duty_parser = DutyScheduleParser()
-            duties_for_date = await duty_parser.get_duties_for_date(
-                date_obj, employee.division, stp_repo
+            duty = DutyScheduleParser().find_duty(
+                employee.fullname, date_obj, employee.division
             )
-
-            if duties_for_date:
-                # Проверяем, есть ли пользователь среди дежурных
-                for duty in duties_for_date:
-                    if duty_parser.names_match(employee.fullname, duty.name):
-                        has_actual_duty = True
-                        duty_time = duty.schedule  # Например, "09:00-18:00"
-                        duty_type = duty.shift_type  # "С" или "П"
-                        break
+            if duty:
+                has_actual_duty = True
+                duty_time = duty.schedule  # Например, "09:00-18:00"
+                duty_type = duty.shift_type  # "С" или "П"
         except Exception as e:
             logger.debug(f"[Биржа] Ошибка проверки дежурств: {e}")
             has_actual_duty = False
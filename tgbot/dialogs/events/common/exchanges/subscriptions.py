@@ -17,6 +17,7 @@ from stp_database.models.STP import Employee, ExchangeSubscription
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.common.exchanges import ExchangesSub
+from tgbot.services.directory import get_employee_directory
 
 logger = logging.getLogger(__name__)
 
@@ -373,7 +374,8 @@ async def on_seller_search_query(
             return
 
         # Поиск сотрудников
-        found_users = await stp_repo.employee.search_users(search_query, limit=50)
+        directory = await get_employee_directory().get(stp_repo)
+        found_users = directory.search(search_query, limit=50)
 
         if not found_users:
             # Сохраняем поисковый запрос для отображения в окне "ничего не найдено"
@@ -384,14 +386,8 @@ async def on_seller_search_query(
             await dialog_manager.switch_to(ExchangesSub.create_seller_results)
             return
 
-        # Сортировка результатов
-        sorted_users = sorted(
-            found_users,
-            key=lambda u: (
-                search_query.lower() not in u.fullname.lower(),
-                u.fullname,
-            ),
-        )
+        # Справочник уже отсортировал результаты по релевантности
+        sorted_users = found_users
 
         # Сохраняем результаты поиска (используем user_id для foreign key)
         dialog_manager.dialog_data["seller_search_results"] = [
@@ -12,6 +12,7 @@ from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.getters.common.files import get_history_file_details
 from tgbot.dialogs.states.common.files import Files
+from tgbot.services.replicas import FILES_CHANGED, get_invalidation_bus
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +73,7 @@ async def on_remove_file(
     file_path = Path("uploads") / file_name
     if file_path.exists():
         file_path.unlink()
+        await get_invalidation_bus().publish(FILES_CHANGED, file_name=file_name)
         await _event.answer(f"Файл {file_name} удалён", show_alert=True)
         await dialog_manager.switch_to(Files.local)
     else:
@@ -117,6 +119,7 @@ async def process_rename(
 
     new_path = Path("uploads") / new_name
     old_path.rename(new_path)
+    await get_invalidation_bus().publish(FILES_CHANGED, file_name=file_name)
 
     dialog_manager.dialog_data["selected_file"] = new_name
     await dialog_manager.switch_to(Files.local_details)
@@ -160,6 +163,7 @@ async def on_restore_selected(
         file = await bot.get_file(file_id)
         file_path = Path("uploads") / file_name
         await bot.download_file(file.file_path, file_path)
+        await get_invalidation_bus().publish(FILES_CHANGED, file_name=file_name)
 
         await _event.answer(f"Файл {file_name} восстановлен", show_alert=True)
         await dialog_manager.switch_to(Files.local_details)
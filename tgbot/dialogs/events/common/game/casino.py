@@ -1,7 +1,7 @@
 """Обработчики событий казино."""
 
-import asyncio
-from typing import Dict
+from dataclasses import dataclass
+from typing import Dict, Optional
 
 from aiogram.enums import DiceEmoji
 from aiogram.types import CallbackQuery
@@ -11,6 +11,34 @@ from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.common.game import GameSG
+from tgbot.services.background import run_later
+from tgbot.services.balances import get_balance_projection
+
+# Длительность анимации dice перед показом результата (секунды)
+CASINO_ANIMATION_DELAY = 3
+
+
+@dataclass(slots=True)
+class CasinoRound:
+    """Проведенный раунд казино.
+
+    Attributes:
+        game_type: Тип игры (slots, dice, darts, bowling)
+        dice_value: Результат броска
+        bet_amount: Размер ставки
+        multiplier: Множитель выигрыша
+        net_win: Чистый выигрыш (отрицательный при проигрыше)
+        old_balance: Баланс до игры
+        new_balance: Баланс после игры
+    """
+
+    game_type: str
+    dice_value: int
+    bet_amount: int
+    multiplier: float
+    net_win: int
+    old_balance: int
+    new_balance: int
 
 
 async def check_casino_access(
@@ -108,6 +136,60 @@ def calculate_simple_multiplier(value: int) -> float:
     return 0.0
 
 
+async def settle_casino_round(
+    stp_repo: MainRequestsRepo,
+    user: Employee,
+    game_type: str,
+    dice_value: int,
+    bet_amount: int,
+) -> Optional[CasinoRound]:
+    """Рассчитать и атомарно провести результат игры.
+
+    Args:
+        stp_repo: Репозиторий операций с базой STP
+        user: Экземпляр пользователя с моделью Employee
+        game_type: Тип игры (slots, dice, darts, bowling)
+        dice_value: Результат броска
+        bet_amount: Размер ставки
+
+    Returns:
+        Результат раунда или None, если баллов на ставку недостаточно
+    """
+    if game_type == "slots":
+        multiplier = calculate_slots_multiplier(dice_value)
+    else:
+        multiplier = calculate_simple_multiplier(dice_value)
+
+    # Вычисляем чистый выигрыш/проигрыш
+    if multiplier > 0:
+        net_win = int(bet_amount * multiplier) - bet_amount
+    else:
+        net_win = -bet_amount
+
+    outcome = "Выигрыш" if net_win > 0 else "Проигрыш"
+    settled = await get_balance_projection().settle(
+        stp_repo,
+        user_id=user.user_id,
+        stake=bet_amount,
+        net_amount=net_win,
+        source_type="casino",
+        comment=f"{outcome} в {game_type}: {dice_value} (ставка {bet_amount})",
+    )
+    if settled is None:
+        return None
+
+    old_balance, new_balance = settled
+    return CasinoRound(
+        game_type=game_type,
+        dice_value=dice_value,
+        bet_amount=bet_amount,
+        multiplier=multiplier,
+        net_win=net_win,
+        old_balance=old_balance,
+        new_balance=new_balance,
+    )
+
+
 async def play_casino_game(
     event: CallbackQuery,
     dialog_manager: DialogManager,
@@ -118,6 +200,9 @@ async def play_casino_game(
 ) -> None:
     """Общая логика для запуска казино-игры.
 
+    Результат проводится сразу после броска, а окно результата показывается
+    фоновой задачей после анимации, не удерживая сессию базы данных.
+
     Args:
         user: Экземпляр пользователя с моделью Employee
         stp_repo: Репозиторий операций с базой STP
@@ -128,67 +213,48 @@ async def play_casino_game(
     """
     # Получаем текущую ставку и баланс
     current_rate = dialog_manager.dialog_data.get("casino_rate", 10)
-    user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+    user_balance = (await get_balance_projection().get(stp_repo, user.user_id)).balance
 
     # Проверяем баланс
     if user_balance < current_rate:
         await event.answer("Недостаточно баллов для игры!", show_alert=True)
         return
 
-    # Сохраняем тип игры и старый баланс
-    dialog_manager.dialog_data["casino_game_type"] = game_type
-    dialog_manager.dialog_data["old_balance"] = user_balance
-
     # Убираем кнопки с текущего сообщения перед отправкой dice
     await event.message.edit_reply_markup(reply_markup=None)
 
-    # Отправляем dice и ждем результата
+    # Отправляем dice и сразу проводим результат
     dice_message = await event.message.answer_dice(emoji=dice_emoji)
-    dice_value = dice_message.dice.value
-
-    # Ждем анимацию (3 секунды)
-    await asyncio.sleep(3)
-
-    # Рассчитываем выигрыш
-    if game_type == "slots":
-        multiplier = calculate_slots_multiplier(dice_value)
-    else:
-        multiplier = calculate_simple_multiplier(dice_value)
-
-    # Вычисляем чистый выигрыш/проигрыш
-    if multiplier > 0:
-        gross_win = int(current_rate * multiplier)
-        net_win = gross_win - current_rate
-    else:
-        net_win = -current_rate
+    casino_round = await settle_casino_round(
+        stp_repo, user, game_type, dice_message.dice.value, current_rate
+    )
+    if casino_round is None:
+        # Баланс изменился параллельной игрой
+        await event.answer("Недостаточно баллов для игры!", show_alert=True)
+        dialog_manager.show_mode = ShowMode.SEND
+        return
 
-    # Обновляем баланс
-    if net_win > 0:
-        await stp_repo.transaction.add_transaction(
-            user_id=user.user_id,
-            transaction_type="earn",
-            source_type="casino",
-            amount=net_win,
-            comment=f"Выигрыш в {game_type}: {dice_value} (ставка {current_rate})",
-        )
-    elif net_win < 0:
-        await stp_repo.transaction.add_transaction(
-            user_id=user.user_id,
-            transaction_type="spend",
-            source_type="casino",
-            amount=abs(net_win),
-            comment=f"Проигрыш в {game_type}: {dice_value} (ставка {current_rate})",
+    # Сохраняем результат для окна результата
+    dialog_manager.dialog_data["casino_game_type"] = game_type
+    dialog_manager.dialog_data["old_balance"] = casino_round.old_balance
+    dialog_manager.dialog_data.update(
+        format_result(
+            game_type,
+            casino_round.dice_value,
+            casino_round.multiplier,
+            casino_round.net_win,
         )
-
-    # Формируем результат
-    result_data = format_result(game_type, dice_value, multiplier, net_win)
-    dialog_manager.dialog_data.update(result_data)
-    dialog_manager.dialog_data["win_amount"] = net_win
-    dialog_manager.dialog_data["multiplier"] = multiplier
-
-    # Переходим к окну результата с новым сообщением
-    dialog_manager.show_mode = ShowMode.SEND
-    await dialog_manager.switch_to(GameSG.casino_result)
+    )
+    dialog_manager.dialog_data["win_amount"] = casino_round.net_win
+    dialog_manager.dialog_data["multiplier"] = casino_round.multiplier
+
+    # Показываем ожидание, а результат - отдельным сообщением после анимации
+    await dialog_manager.switch_to(GameSG.casino_waiting, show_mode=ShowMode.EDIT)
+    run_later(
+        CASINO_ANIMATION_DELAY,
+        dialog_manager.bg().switch_to(GameSG.casino_result, show_mode=ShowMode.SEND),
+        name=f"casino_result:{user.user_id}",
+    )
 
 
 def format_result(game_type: str, value: int, multiplier: float, net_win: int) -> Dict:
@@ -19,6 +19,7 @@ from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.common.game import GameSG
 from tgbot.misc.helpers import format_fullname, strftime_date, tz_perm
+from tgbot.services.balances import get_balance_projection
 from tgbot.services.broadcaster import broadcast
 from tgbot.services.files_processing.parsers.schedule import DutyScheduleParser
 from tgbot.services.mailing import (
@@ -466,7 +467,8 @@ async def on_inventory_sell_product(
 
     try:
         success = await stp_repo.purchase.delete_user_purchase(user_product_id)
-        await stp_repo.transaction.add_transaction(
+        await get_balance_projection().add_transaction(
+            stp_repo,
             user_id=user.user_id,
             transaction_type="earn",
             source_type="product",
@@ -8,6 +8,7 @@ from aiogram_dialog.widgets.kbd import Button, Select
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.common.game import GameSG
+from tgbot.services.balances import get_balance_projection
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +41,7 @@ async def on_product_click(
         return
 
     # Получаем баланс пользователя
-    user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+    user_balance = (await get_balance_projection().get(stp_repo, user.user_id)).balance
 
     # Проверяем, достаточно ли баллов
     if user_balance < product_info.cost:
@@ -80,7 +81,8 @@ async def on_confirm_purchase(
     product_info = dialog_manager.dialog_data["selected_product"]
 
     # Получаем актуальный баланс пользователя
-    user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+    balances = get_balance_projection()
+    user_balance = (await balances.get(stp_repo, user.user_id)).balance
 
     if user_balance < product_info["cost"]:
         await event.answer(
@@ -94,7 +96,8 @@ async def on_confirm_purchase(
         new_purchase = await stp_repo.purchase.add_purchase(
             user_id=user.user_id, product_id=product_info["id"], status="stored"
         )
-        await stp_repo.transaction.add_transaction(
+        await balances.add_transaction(
+            stp_repo,
             user_id=user.user_id,
             transaction_type="spend",
             source_type="product",
@@ -134,7 +137,8 @@ async def on_sell_product(
 
     try:
         success = await stp_repo.purchase.delete_user_purchase(new_purchase["id"])
-        await stp_repo.transaction.add_transaction(
+        await get_balance_projection().add_transaction(
+            stp_repo,
             user_id=user.user_id,
             transaction_type="earn",
             source_type="product",
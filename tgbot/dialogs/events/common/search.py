@@ -10,6 +10,7 @@ from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.common.search import SearchSG
 from tgbot.misc.dicts import roles
+from tgbot.services.directory import get_employee_directory
 
 logger = logging.getLogger(__name__)
 
@@ -122,7 +123,8 @@ async def on_search_query(
             return
 
         # Универсальный поиск пользователей (ФИО, user_id, username)
-        found_users = await stp_repo.employee.search_users(search_query, limit=50)
+        directory = await get_employee_directory().get(stp_repo)
+        found_users = directory.search(search_query, limit=50)
 
         if not found_users:
             # Сохраняем поисковый запрос для отображения в окне "ничего не найдено"
@@ -131,16 +133,8 @@ async def on_search_query(
             await dialog_manager.switch_to(SearchSG.query_no_results)
             return
 
-        # Сортировка результатов (сначала точные совпадения)
-        sorted_users = sorted(
-            found_users,
-            key=lambda u: (
-                # Сначала полные совпадения
-                search_query.lower() not in u.fullname.lower(),
-                # Потом по алфавиту
-                u.fullname,
-            ),
-        )
+        # Справочник уже отсортировал результаты по релевантности
+        sorted_users = found_users
 
         # Сохраняем результаты поиска в dialog_data
         dialog_manager.dialog_data["search_results"] = [
@@ -172,6 +166,7 @@ async def on_casino_click(
     await stp_repo.employee.update_user(
         user_id=selected_user_id, is_casino_allowed=not widget.is_checked()
     )
+    await get_employee_directory().refresh_users(stp_repo, [selected_user_id])
 
 
 async def on_trainee_click(
@@ -190,6 +185,7 @@ async def on_trainee_click(
     await stp_repo.employee.update_user(
         user_id=selected_user_id, is_trainee=not widget.is_checked()
     )
+    await get_employee_directory().refresh_users(stp_repo, [selected_user_id])
 
 
 async def on_exchanges_click(
@@ -208,6 +204,7 @@ async def on_exchanges_click(
     await stp_repo.employee.update_user(
         user_id=selected_user_id, is_exchange_banned=not widget.is_checked()
     )
+    await get_employee_directory().refresh_users(stp_repo, [selected_user_id])
 
 
 async def on_access_click(
@@ -226,6 +223,7 @@ async def on_access_click(
     await stp_repo.employee.update_user(
         user_id=selected_user_id, access=not widget.is_checked()
     )
+    await get_employee_directory().refresh_users(stp_repo, [selected_user_id])
 
 
 async def on_role_change(
@@ -273,6 +271,7 @@ async def on_role_change(
         await stp_repo.employee.update_user(
             user_id=int(selected_user_id), role=new_role_id
         )
+        await get_employee_directory().refresh_users(stp_repo, [int(selected_user_id)])
 
         # Показываем уведомление о смене роли
         await event.answer(
@@ -10,6 +10,7 @@ from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.head import HeadGroupSG
 from tgbot.misc.dicts import roles
+from tgbot.services.directory import get_employee_directory
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +73,7 @@ async def on_casino_click(
     await stp_repo.employee.update_user(
         user_id=selected_member_id, is_casino_allowed=not widget.is_checked()
     )
+    await get_employee_directory().refresh_users(stp_repo, [selected_member_id])
 
 
 async def on_member_role_change(
@@ -121,6 +123,7 @@ async def on_member_role_change(
         await stp_repo.employee.update_user(
             user_id=searched_user.user_id, role=new_role_id
         )
+        await get_employee_directory().refresh_users(stp_repo, [searched_user.user_id])
 
         # Показываем уведомление о смене роли
         await event.answer(
@@ -188,6 +191,7 @@ async def on_game_casino_member_click(
         await stp_repo.employee.update_user(
             user_id=searched_user.user_id, is_casino_allowed=new_casino_state
         )
+        await get_employee_directory().refresh_users(stp_repo, [searched_user.user_id])
 
         # Показываем уведомление
         status_text = "включен" if new_casino_state else "выключен"
@@ -240,6 +244,9 @@ async def on_game_casino_toggle_all(
             await stp_repo.employee.update_user(
                 user_id=member.user_id, is_casino_allowed=new_state
             )
+        await get_employee_directory().refresh_users(
+            stp_repo, [member.user_id for member in group_members]
+        )
 
         status_text = "включено" if new_state else "выключено"
         await event.answer(
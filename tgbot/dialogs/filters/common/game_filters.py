@@ -11,6 +11,7 @@ from tgbot.dialogs.getters.user.game.achievements import (
     achievements_getter,
     user_achievements_getter,
 )
+from tgbot.services.catalog import get_catalog_cache
 
 
 def get_position_display_name(position: str) -> str:
@@ -308,32 +309,15 @@ async def achievements_filter_getter(
 
     # Дополнительно фильтруем по периоду
     if selected_period != "all":
-        # Нужно получить оригинальные данные для фильтрации по периоду
-        # achievement[5] содержит отформатированный период, но нам нужен оригинальный
-
-        if stp_repo:
-            # Для менеджеров используем выбранное подразделение, для пользователей - их подразделение
-            if not is_user:
-                if selected_division != "all":
-                    division_map = {"nck": "НЦК", "ntp": "НТП"}
-                    normalized_division = division_map.get(selected_division)
-                else:
-                    normalized_division = None
-            else:
-                normalized_division = "НЦК" if "НЦК" in user.division else "НТП"
-
-            original_data = await stp_repo.achievement.get_achievements(
-                division=normalized_division
-            )
-            # Создаем словарь для быстрого поиска периода по ID
-            period_map = {ach.id: ach.period for ach in original_data}
-
-            # Фильтруем по периоду
-            filtered_achievements = [
-                ach
-                for ach in filtered_achievements
-                if period_map.get(ach[0]) == selected_period
-            ]
+        # achievement[5] содержит отформатированный период, поэтому
+        # оригинальный период берем из индекса каталога по ID
+        catalog = await get_catalog_cache().get(stp_repo)
+        filtered_achievements = [
+            ach
+            for ach in filtered_achievements
+            if (original := catalog.get_achievement(ach[0]))
+            and original.period == selected_period
+        ]
 
     return {
         "is_user": is_user,
@@ -3,7 +3,7 @@
 import logging
 import re
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from aiogram import Bot
 from aiogram.utils.deep_linking import create_start_link
@@ -356,12 +356,33 @@ async def _get_exchange_button_text(
             return f"📉 Продал {date_str}"
 
 
+async def _resolve_employee(
+    stp_repo: MainRequestsRepo,
+    user_id: int,
+    employees: Optional[Dict[int, Employee]] = None,
+) -> Optional[Employee]:
+    """Получает сотрудника из заранее загруженного словаря или из базы.
+
+    Args:
+        stp_repo: Репозиторий операций с базой STP
+        user_id: Идентификатор Telegram
+        employees: Словарь сотрудников по идентификатору Telegram
+
+    Returns:
+        Экземпляр пользователя с моделью Employee или None
+    """
+    if employees is not None and user_id in employees:
+        return employees[user_id]
+    return await stp_repo.employee.get_users(user_id=user_id)
+
+
 async def get_exchange_text(
     stp_repo: MainRequestsRepo,
     exchange: Exchange,
     user_id: int,
     use_random_currency: bool = False,
     show_detailed_roles: bool = False,
+    employees: Optional[Dict[int, Employee]] = None,
 ) -> str:
     """Форматирует текст для отображения информации о сделке.
 
@@ -371,6 +392,7 @@ async def get_exchange_text(
         user_id: Идентификатор Telegram
         use_random_currency: Использовать случайную валюту вместо рублей
         show_detailed_roles: Показать детальную информацию о ролях
+        employees: Заранее загруженные участники сделок по идентификатору Telegram
 
     Returns:
         Форматированная строка
@@ -440,13 +462,15 @@ async def get_exchange_text(
         is_current_user_seller = exchange.owner_id == user_id
 
         # Получаем информацию о продавце
-        seller = await stp_repo.employee.get_users(user_id=exchange.owner_id)
+        seller = await _resolve_employee(stp_repo, exchange.owner_id, employees)
         seller_name = format_fullname(seller, True, True) if seller else "Не указано"
 
         # Получаем информацию о покупателе (если есть)
         buyer_name = "Не указано"
         if exchange.counterpart_id:
-            buyer = await stp_repo.employee.get_users(user_id=exchange.counterpart_id)
+            buyer = await _resolve_employee(
+                stp_repo, exchange.counterpart_id, employees
+            )
             buyer_name = format_fullname(buyer, True, True) if buyer else "Не указано"
 
         # Определяем роли для отображения в зависимости от типа сделки
@@ -501,10 +525,7 @@ async def get_exchange_text(
         exchange_type = await _get_exchange_type(exchange)
 
         # Получаем информацию о пользователе
-        if exchange.owner_intent == "sell":
-            user_info = await stp_repo.employee.get_users(user_id=exchange.owner_id)
-        else:
-            user_info = await stp_repo.employee.get_users(user_id=exchange.owner_id)
+        user_info = await _resolve_employee(stp_repo, exchange.owner_id, employees)
 
         user_name = format_fullname(user_info, True, True)
 
@@ -975,18 +996,13 @@ async def exchange_buy_detail_getter(
         # Проверяем дежурства продавца на дату смены
         duty_warning = ""
         try:
-            date_obj = exchange.start_time.date()
-            duty_parser = DutyScheduleParser()
-            duties_for_date = await duty_parser.get_duties_for_date(
-                date_obj, seller.division, stp_repo
+            duty = DutyScheduleParser().find_duty(
+                seller.fullname, exchange.start_time, seller.division
             )
-
-            if duties_for_date:
-                # Проверяем, есть ли продавец среди дежурных
-                for duty in duties_for_date:
-                    if duty_parser.names_match(seller.fullname, duty.name):
-                        duty_warning = f"🚩 <b>Включает дежурство:</b>\n{duty.schedule} {duty.shift_type}"
-                        break
+            if duty:
+                duty_warning = (
+                    f"🚩 <b>Включает дежурство:</b>\n{duty.schedule} {duty.shift_type}"
+                )
         except Exception as e:
             logger.debug(f"[Биржа] Ошибка проверки дежурств продавца: {e}")
 
@@ -12,10 +12,12 @@ from stp_database.repo.STP import MainRequestsRepo
 from tgbot.misc.dicts import months_emojis, russian_months
 from tgbot.misc.helpers import format_fullname
 from tgbot.services.files_processing.utils.time_parser import get_current_month
+from tgbot.services.query_audit import query_budget
 
 logger = logging.getLogger(__name__)
 
 
+@query_budget(12)
 async def stats_getter(
     stp_repo: MainRequestsRepo, user: Employee, **_kwargs
 ) -> Dict[str, Any]:
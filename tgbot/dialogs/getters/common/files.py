@@ -7,12 +7,68 @@ from aiogram_dialog import DialogManager
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.misc.helpers import format_fullname, strftime_date
+from tgbot.services.files_processing.core.fingerprints import (
+    STATUS_TITLES,
+    get_fingerprint_index,
+)
 from tgbot.services.files_processing.utils.files import (
     FileTypeDetector,
     generate_detailed_stats_text,
     generate_studies_stats_text,
     generate_user_changes_text,
 )
+from tgbot.services.uploads import get_upload_metadata
+
+# Количество загрузок на странице истории
+HISTORY_PAGE_SIZE = 4
+
+
+async def _get_history_page(
+    stp_repo: MainRequestsRepo,
+    dialog_manager: DialogManager,
+    scroll_id: str,
+    file_name: str | None = None,
+) -> tuple[list, int]:
+    """Получает из БД текущую страницу истории загрузок.
+
+    Если история сократилась и текущей страницы больше нет, открывается первая.
+
+    Args:
+        stp_repo: Репозиторий операций с базой STP
+        dialog_manager: Менеджер диалога
+        scroll_id: Идентификатор виджета страниц
+        file_name: Название файла (None - все файлы)
+
+    Returns:
+        Записи страницы и количество страниц
+    """
+    scroll = dialog_manager.find(scroll_id)
+    page = await scroll.get_page()
+    upload_metadata = get_upload_metadata()
+    records, total = await upload_metadata.get_page(
+        stp_repo, page, HISTORY_PAGE_SIZE, file_name=file_name
+    )
+    if not records and page > 0:
+        await scroll.set_page(0)
+        records, total = await upload_metadata.get_page(
+            stp_repo, 0, HISTORY_PAGE_SIZE, file_name=file_name
+        )
+    return records, max(1, -(-total // HISTORY_PAGE_SIZE))
+
+
+def get_upload_changes_text(file_id: str) -> str:
+    """Получает отметку о загрузке без изменений.
+
+    Args:
+        file_id: Идентификатор файла Telegram из записи о загрузке
+
+    Returns:
+        Текст отметки или пустая строка, если файл изменился или отпечатка нет
+    """
+    fingerprint = get_fingerprint_index().get(file_id)
+    if fingerprint is None or not fingerprint.is_unchanged:
+        return ""
+    return f"🟰 {STATUS_TITLES[fingerprint.status]}"
 
 
 async def get_local_files(**_kwargs) -> dict:
@@ -24,7 +80,8 @@ async def get_local_files(**_kwargs) -> dict:
 
     files = []
     for idx, file_path in enumerate(uploads_dir.iterdir(), start=1):
-        if file_path.is_file():
+        # Скрытые служебные файлы (отпечатки, незавершенные загрузки) не показываем
+        if file_path.is_file() and not file_path.name.startswith("."):
             file_stat = file_path.stat()
             modified_date = datetime.fromtimestamp(file_stat.st_mtime).strftime(
                 strftime_date
@@ -58,15 +115,17 @@ async def get_local_file_details(
 
     modified_date = datetime.fromtimestamp(file_stat.st_mtime)
 
-    # Получаем информацию из БД
-    db_records = await stp_repo.upload.get_files(file_name=file_name)
+    # Получаем из БД последнюю загрузку и количество загрузок
+    db_records, db_count = await get_upload_metadata().get_page(
+        stp_repo, page_size=1, file_name=file_name
+    )
 
     file_info = {
         "name": file_name,
         "size": f"{file_stat.st_size / 1024:.2f} KB",
         "type": file_path.suffix or "Неизвестно",
         "modified": modified_date.strftime(strftime_date),
-        "db_count": len(db_records) if db_records else 0,
+        "db_count": db_count,
     }
 
     db_record = False
@@ -91,13 +150,15 @@ async def get_local_file_details(
 async def get_file_history(
     stp_repo: MainRequestsRepo, dialog_manager: DialogManager, **_kwargs
 ) -> dict:
-    """Получает историю файлов с таким же именем из БД."""
+    """Получает страницу истории файлов с таким же именем из БД."""
     file_name = dialog_manager.dialog_data.get("selected_file")
 
     if not file_name:
-        return {"history": []}
+        return {"history": [], "pages": 0}
 
-    db_records = await stp_repo.upload.get_files(file_name=file_name)
+    db_records, pages = await _get_history_page(
+        stp_repo, dialog_manager, "history_pages", file_name
+    )
 
     # Собираем все user_id и получаем пользователей одним запросом
     user_ids = [record.uploaded_by_user_id for record in db_records]
@@ -109,6 +170,7 @@ async def get_file_history(
     history = []
     for record in db_records:
         uploaded_by_user = users_map.get(record.uploaded_by_user_id)
+        changes = get_upload_changes_text(record.file_id)
         fullname = format_fullname(
             uploaded_by_user,
             True,
@@ -125,17 +187,22 @@ async def get_file_history(
             record.uploaded_by_user_id,  # item[4] - кто загрузил
             record.file_id,  # item[5] - Telegram file_id
             fullname,  # item[6]
+            f"\n{changes}" if changes else "",  # item[7] - отметка без изменений
         ))
 
     # Сохраняем историю в dialog_data для доступа в event handler
     dialog_manager.dialog_data["history"] = history
 
-    return {"history": history}
+    return {"history": history, "pages": pages}
 
 
-async def get_all_files_history(stp_repo: MainRequestsRepo, **_kwargs) -> dict:
-    """Получает список всех загруженных файлов из БД."""
-    db_records = await stp_repo.upload.get_files()
+async def get_all_files_history(
+    stp_repo: MainRequestsRepo, dialog_manager: DialogManager, **_kwargs
+) -> dict:
+    """Получает страницу списка всех загруженных файлов из БД."""
+    db_records, pages = await _get_history_page(
+        stp_repo, dialog_manager, "history_files_pages"
+    )
 
     # Собираем все user_id и получаем пользователей одним запросом
     user_ids = [record.uploaded_by_user_id for record in db_records]
@@ -147,6 +214,7 @@ async def get_all_files_history(stp_repo: MainRequestsRepo, **_kwargs) -> dict:
     files = []
     for record in db_records:
         uploaded_by_user = users_map.get(record.uploaded_by_user_id)
+        changes = get_upload_changes_text(record.file_id)
         uploaded_by_text = format_fullname(
             uploaded_by_user,
             True,
@@ -163,9 +231,10 @@ async def get_all_files_history(stp_repo: MainRequestsRepo, **_kwargs) -> dict:
             record.uploaded_by_user_id,  # item[4] - кто загрузил
             record.file_id,  # item[5] - Telegram file_id
             uploaded_by_text,  # item[6] - имя пользователя
+            f"\n{changes}" if changes else "",  # item[7] - отметка без изменений
         ))
 
-    return {"files": files}
+    return {"files": files, "pages": pages}
 
 
 async def get_history_file_details(
@@ -198,6 +267,7 @@ async def get_history_file_details(
         "uploaded_at": record.uploaded_at.strftime(strftime_date),
         "uploaded_by_fullname": uploaded_by_text,
         "file_id": record.file_id,
+        "changes": get_upload_changes_text(record.file_id),
     }
 
     return {"file_info": file_info}
@@ -240,6 +310,13 @@ async def get_upload_status(dialog_manager: DialogManager, **_kwargs) -> dict:
     # Формируем текст обработки
     processing_text = ""
 
+    upload_status = processing_results.get("upload_status")
+    if upload_status in STATUS_TITLES:
+        processing_text += (
+            f"\n\n🟰 <b>{STATUS_TITLES[upload_status]}</b>\n"
+            "Сравнение и уведомления пропущены"
+        )
+
     # Для файлов расписания
     if FileTypeDetector.is_schedule_file(file_name):
         new_stats = processing_results.get("new_stats")
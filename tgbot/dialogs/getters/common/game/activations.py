@@ -7,6 +7,7 @@ from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.misc.helpers import format_fullname, strftime_date
+from tgbot.services.query_audit import query_budget
 
 
 async def activations_getter(
@@ -144,6 +145,7 @@ async def activation_detail_getter(
     }
 
 
+@query_budget(6)
 async def activations_history_getter(
     stp_repo: MainRequestsRepo, user: Employee, **_kwargs
 ) -> Dict:
@@ -6,6 +6,8 @@ from aiogram_dialog import DialogManager
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
+from tgbot.services.balances import get_balance_projection
+
 # Иконки для разных игр
 GAME_ICONS = {
     "slots": "🎰",
@@ -25,7 +27,7 @@ async def balance_getter(stp_repo: MainRequestsRepo, user: Employee, **_kwargs)
     Returns:
         Словарь с балансом пользователя
     """
-    user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+    user_balance = (await get_balance_projection().get(stp_repo, user.user_id)).balance
     return {
         "balance": user_balance,
         "is_casino_allowed": user.is_casino_allowed,
@@ -48,7 +50,7 @@ async def casino_game_getter(
     Returns:
         Словарь с балансом и текущей ставкой
     """
-    user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+    user_balance = (await get_balance_projection().get(stp_repo, user.user_id)).balance
 
     # Если ставка не установлена, устанавливаем 10% от баланса (минимум 10)
     if "casino_rate" not in dialog_manager.dialog_data:
@@ -124,7 +126,7 @@ async def casino_result_getter(
     Returns:
         Словарь с результатами игры
     """
-    user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+    user_balance = (await get_balance_projection().get(stp_repo, user.user_id)).balance
 
     # Получаем результаты из dialog_data
     result_icon = dialog_manager.dialog_data.get("result_icon", "❌")
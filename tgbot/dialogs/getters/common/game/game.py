@@ -5,6 +5,7 @@ from typing import Dict
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
+from tgbot.services.balances import get_balance_projection
 from tgbot.services.leveling import LevelingSystem
 
 
@@ -20,15 +21,14 @@ async def game_getter(
     Returns:
         Словарь с данными об игровом профиле сотрудника
     """
-    user_balance = await stp_repo.transaction.get_user_balance(user_id=user.user_id)
-    achievements_sum = await stp_repo.transaction.get_user_achievements_sum(
-        user_id=user.user_id
-    )
+    user_balance = await get_balance_projection().get(stp_repo, user.user_id)
     purchases_sum = await stp_repo.purchase.get_user_purchases_sum(user_id=user.user_id)
-    level_info = LevelingSystem.get_level_info_text(achievements_sum, user_balance)
+    level_info = LevelingSystem.get_level_info_text(
+        user_balance.achievements_sum, user_balance.balance
+    )
 
     return {
-        "achievements_sum": achievements_sum,
+        "achievements_sum": user_balance.achievements_sum,
         "purchases_sum": purchases_sum,
         "level_info": level_info,
         "is_user": user.role in [1, 3],
@@ -7,6 +7,7 @@ from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.misc.helpers import strftime_date
+from tgbot.services.catalog import get_catalog_cache
 
 
 async def history_getter(
@@ -100,9 +101,8 @@ async def history_detail_getter(
         and transaction_info["source_id"]
     ):
         try:
-            achievement = await stp_repo.achievement.get_achievements(
-                transaction_info["source_id"]
-            )
+            catalog = await get_catalog_cache().get(stp_repo)
+            achievement = catalog.get_achievement(transaction_info["source_id"])
             if achievement:
                 match achievement.period:
                     case "d":
@@ -6,6 +6,9 @@ from aiogram_dialog import DialogManager
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
+from tgbot.services.balances import get_balance_projection
+from tgbot.services.catalog import get_catalog_cache
+
 
 async def products_getter(
     user: Employee, stp_repo: MainRequestsRepo, division: str = None, **_kwargs
@@ -20,19 +23,18 @@ async def products_getter(
     Returns:
         Словарь из списка предметов и баланса сотрудника
     """
-    user_balance: int = await stp_repo.transaction.get_user_balance(
-        user_id=user.user_id
-    )
+    user_balance = (await get_balance_projection().get(stp_repo, user.user_id)).balance
 
     # Для менеджеров загружаем все продукты или фильтруем по указанному подразделению
     # Для обычных пользователей - только их подразделение
     # Специальное значение "all" означает загрузку всех продуктов без фильтра
+    catalog = await get_catalog_cache().get(stp_repo)
     if division == "all":
-        products = await stp_repo.product.get_products()
+        products = catalog.get_products()
     elif division is not None:
-        products = await stp_repo.product.get_products(division=division)
+        products = catalog.get_products(division=division)
     else:
-        products = await stp_repo.product.get_products(division=user.division)
+        products = catalog.get_products(division=user.division)
 
     formatted_products = []
     for product in products:
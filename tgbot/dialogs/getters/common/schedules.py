@@ -1,8 +1,9 @@
 """Геттеры для функций графиков."""
 
+import logging
 import re
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Sequence
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from aiogram import Bot
 from aiogram_dialog import DialogManager
@@ -21,6 +22,44 @@ from tgbot.services.files_processing.utils.time_parser import (
     get_current_date,
     get_current_month,
 )
+from tgbot.services.uploads import get_upload_metadata
+
+logger = logging.getLogger(__name__)
+
+
+async def get_schedule_file_info(
+    stp_repo: MainRequestsRepo,
+    division: str,
+    period: Optional[str] = None,
+    year: Optional[int] = None,
+) -> Tuple[str, str]:
+    """Получает название и дату загрузки последнего файла графика подразделения.
+
+    Args:
+        stp_repo: Репозиторий операций с базой STP
+        division: Подразделение
+        period: Период графика (I или II), None - любой
+        year: Год графика, None - любой
+
+    Returns:
+        Название файла и дата загрузки для отображения под графиком
+    """
+    file_name = "Файл не найден"
+    upload_date = "Неизвестно"
+
+    try:
+        upload = await get_upload_metadata().get_schedule_upload(
+            stp_repo, division, period, year
+        )
+    except Exception as e:
+        logger.error(f"[Графики] Не удалось получить файл графика {division}: {e}")
+        return file_name, upload_date
+
+    if upload:
+        file_name = upload.file_name
+        if upload.uploaded_at:
+            upload_date = upload.uploaded_at.strftime(strftime_date)
+    return file_name, upload_date
 
 
 async def schedules_getter(
@@ -86,55 +125,27 @@ async def user_schedule_getter(
         bot=bot,
     )
 
-    # Get schedule file metadata for the selected month/year
-    file_name = "Файл не найден"
-    upload_date = "Неизвестно"
-
-    try:
-        # Query all files and filter for division schedules
-        all_files = await stp_repo.upload.get_files()
-
-        # Определяем период (I или II) на основе месяца
-        month_to_num = {
-            "январь": 1,
-            "февраль": 2,
-            "март": 3,
-            "апрель": 4,
-            "май": 5,
-            "июнь": 6,
-            "июль": 7,
-            "август": 8,
-            "сентябрь": 9,
-            "октябрь": 10,
-            "ноябрь": 11,
-            "декабрь": 12,
-        }
-        month_num = month_to_num.get(current_month.lower(), 1)
-        period = "I" if month_num <= 6 else "II"
-
-        # Filter files that match schedule pattern for this division, period, and year
-        matching_files = []
-        for f in all_files:
-            if f.file_name:
-                # Check if file matches pattern: ГРАФИК {division} {period} {year}.xlsx
-                name_parts = f.file_name.split()
-                year_part = name_parts[3].split(".")[0] if len(name_parts) >= 4 else ""
-                if (
-                    len(name_parts) >= 4
-                    and name_parts[0] == "ГРАФИК"
-                    and name_parts[1] == user.division
-                    and name_parts[2].upper() == period
-                    and year_part == str(current_year)
-                ):
-                    matching_files.append(f)
+    # Определяем период (I или II) на основе месяца
+    month_to_num = {
+        "январь": 1,
+        "февраль": 2,
+        "март": 3,
+        "апрель": 4,
+        "май": 5,
+        "июнь": 6,
+        "июль": 7,
+        "август": 8,
+        "сентябрь": 9,
+        "октябрь": 10,
+        "ноябрь": 11,
+        "декабрь": 12,
+    }
+    month_num = month_to_num.get(current_month.lower(), 1)
+    period = "I" if month_num <= 6 else "II"
 
-        if matching_files:
-            latest_file = matching_files[0]
-            file_name = latest_file.file_name or "Неизвестный файл"
-            if latest_file.uploaded_at:
-                upload_date = latest_file.uploaded_at.strftime(strftime_date)
-    except Exception:
-        pass
+    file_name, upload_date = await get_schedule_file_info(
+        stp_repo, user.division, period, current_year
+    )
 
     return {
         "current_month": current_month,
@@ -181,29 +192,7 @@ async def duty_schedule_getter(
     date_display = current_date.strftime("%d.%m")
     is_today = current_date.date() == get_current_date().date()
 
-    # Get latest schedule file metadata
-    file_name = "Файл не найден"
-    upload_date = "Неизвестно"
-
-    try:
-        # Query all files and filter for division schedules
-        all_files = await stp_repo.upload.get_files()
-
-        # Filter files that match schedule pattern for this division
-        division_pattern = f"ГРАФИК {user.division}"
-        matching_files = [
-            f
-            for f in all_files
-            if f.file_name and f.file_name.startswith(division_pattern)
-        ]
-
-        if matching_files:
-            latest_file = matching_files[0]
-            file_name = latest_file.file_name or "Неизвестный файл"
-            if latest_file.uploaded_at:
-                upload_date = latest_file.uploaded_at.strftime(strftime_date)
-    except Exception:
-        pass
+    file_name, upload_date = await get_schedule_file_info(stp_repo, user.division)
 
     return {
         "duties_text": duties_text,
@@ -243,29 +232,7 @@ async def head_schedule_getter(
     date_display = current_date.strftime("%d.%m")
     is_today = current_date.date() == get_current_date().date()
 
-    # Get latest schedule file metadata
-    file_name = "Файл не найден"
-    upload_date = "Неизвестно"
-
-    try:
-        # Query all files and filter for division schedules
-        all_files = await stp_repo.upload.get_files()
-
-        # Filter files that match schedule pattern for this division
-        division_pattern = f"ГРАФИК {user.division}"
-        matching_files = [
-            f
-            for f in all_files
-            if f.file_name and f.file_name.startswith(division_pattern)
-        ]
-
-        if matching_files:
-            latest_file = matching_files[0]
-            file_name = latest_file.file_name or "Неизвестный файл"
-            if latest_file.uploaded_at:
-                upload_date = latest_file.uploaded_at.strftime(strftime_date)
-    except Exception:
-        pass
+    file_name, upload_date = await get_schedule_file_info(stp_repo, user.division)
 
     return {
         "heads_text": heads_text,
@@ -502,29 +469,7 @@ async def group_schedule_getter(
     date_display = current_date.strftime("%d.%m")
     is_today = current_date.date() == get_current_date().date()
 
-    # Get latest schedule file metadata
-    file_name = "Файл не найден"
-    upload_date = "Неизвестно"
-
-    try:
-        # Query all files and filter for division schedules
-        all_files = await stp_repo.upload.get_files()
-
-        # Filter files that match schedule pattern for this division
-        division_pattern = f"ГРАФИК {user.division}"
-        matching_files = [
-            f
-            for f in all_files
-            if f.file_name and f.file_name.startswith(division_pattern)
-        ]
-
-        if matching_files:
-            latest_file = matching_files[0]
-            file_name = latest_file.file_name or "Неизвестный файл"
-            if latest_file.uploaded_at:
-                upload_date = latest_file.uploaded_at.strftime(strftime_date)
-    except Exception:
-        pass
+    file_name, upload_date = await get_schedule_file_info(stp_repo, user.division)
 
     return {
         "group_text": group_text,
@@ -25,6 +25,8 @@ from tgbot.misc.helpers import (
     short_name,
     strftime_date,
 )
+from tgbot.services.catalog import get_catalog_cache
+from tgbot.services.directory import get_employee_directory
 
 
 async def search_getter(
@@ -38,10 +40,12 @@ async def search_getter(
     Returns:
         Словарь специалистов и руководителей
     """
-    specialists = await stp_repo.employee.get_users(roles=[1, 3])
+    directory = await get_employee_directory().get(stp_repo)
+
+    specialists = directory.get_users(roles=[1, 3])
     total_specialists = len(specialists)
 
-    heads = await stp_repo.employee.get_users(roles=2)
+    heads = directory.get_users(roles=2)
     total_heads = len(heads)
 
     return {
@@ -74,10 +78,9 @@ async def search_specialists_getter(
     if selected_division != "all":
         specialists = [s for s in specialists if s.division == selected_division]
 
-    sorted_specialists = sorted(specialists, key=lambda k: k.fullname)
-
+    # Справочник уже отдает сотрудников, отсортированных по ФИО
     formatted_specialists = []
-    for specialist in sorted_specialists:
+    for specialist in specialists:
         role_info = get_role(specialist.role)
         formatted_specialists.append((
             specialist.user_id,
@@ -124,10 +127,9 @@ async def search_heads_getter(
     if selected_division != "all":
         all_heads = [s for s in all_heads if s.division == selected_division]
 
-    sorted_heads = sorted(all_heads, key=lambda k: k.fullname)
-
+    # Справочник уже отдает сотрудников, отсортированных по ФИО
     formatted_heads = []
-    for head in sorted_heads:
+    for head in all_heads:
         role_info = get_role(head.role)
         formatted_heads.append((
             head.user_id,
@@ -209,10 +211,9 @@ async def search_user_info_getter(
         if not searched_user:
             return {"user_info": "❌ Пользователь не найден"}
 
-        # Получаем руководителя если есть
-        user_head = None
-        if searched_user.head:
-            user_head = await stp_repo.employee.get_users(fullname=searched_user.head)
+        # Получаем руководителя из справочника
+        directory = await get_employee_directory().get(stp_repo)
+        user_head = directory.get_head(searched_user)
 
         user_info = create_user_info_message(user=searched_user, user_head=user_head)
 
@@ -491,16 +492,16 @@ async def search_achievements_getter(
         "search_achievement_period_filter"
     ).get_checked()
 
+    catalog = await get_catalog_cache().get(stp_repo)
+
     # Фильтруем по периоду если нужно
     if selected_period != "all":
-        # Получаем все достижения, чтобы найти период
-        all_achievements = await stp_repo.achievement.get_achievements()
-        achievement_periods = {ach.id: ach.period for ach in all_achievements}
-
         transactions = [
             t
             for t in transactions
-            if t.source_id and achievement_periods.get(t.source_id) == selected_period
+            if t.source_id
+            and (achievement := catalog.get_achievement(t.source_id))
+            and achievement.period == selected_period
         ]
 
     # Форматируем достижения для отображения
@@ -509,9 +510,7 @@ async def search_achievements_getter(
         if not transaction.source_id:
             continue
 
-        achievement = await stp_repo.achievement.get_achievements(
-            achievement_id=transaction.source_id
-        )
+        achievement = catalog.get_achievement(transaction.source_id)
         if not achievement:
             continue
 
@@ -13,6 +13,7 @@ from tgbot.misc.helpers import (
     short_name,
     strftime_date,
 )
+from tgbot.services.group_analytics import get_group_analytics
 from tgbot.services.leveling import LevelingSystem
 
 # Словарь для русских названий месяцев
@@ -44,8 +45,9 @@ async def game_statistics_getter(
     Returns:
         Словарь со статистикой группы
     """
-    # Получаем всех пользователей группы
-    group_members = await stp_repo.employee.get_users(head=user.fullname)
+    # Получаем аналитику группы
+    analytics = await get_group_analytics().get(stp_repo, user)
+    group_members = analytics.members
 
     if not group_members:
         return {
@@ -56,45 +58,18 @@ async def game_statistics_getter(
 
     # Получаем текущий месяц и год
     now = datetime.now()
-    current_month = now.month
-    current_year = now.year
-    month_name = f"{RUSSIAN_MONTHS[current_month]} {current_year}"
-
-    # Оптимизация: собираем все данные за один проход
-    total_balance = 0
-    total_level = 0
-    month_balances = {}
-    members_with_balance = []
-
-    for member in group_members:
-        # Получаем баланс
-        balance = await stp_repo.transaction.get_user_balance(member.user_id)
-        total_balance += balance
-        members_with_balance.append((member, balance))
-
-        # Получаем сумму баллов за достижения для расчета уровня
-        achievements_sum = await stp_repo.transaction.get_user_achievements_sum(
-            member.user_id
-        )
-        level = LevelingSystem.calculate_level(achievements_sum)
-        total_level += level
-
-        # Получаем транзакции за текущий месяц для этого пользователя
-        transactions = await stp_repo.transaction.get_user_transactions(
-            user_id=member.user_id
-        )
-        member_month_sum = sum(
-            t.amount
-            for t in transactions
-            if t.created_at.month == current_month and t.created_at.year == current_year
-        )
-        month_balances[member.user_id] = (member, member_month_sum)
+    month_name = f"{RUSSIAN_MONTHS[now.month]} {now.year}"
 
+    total_balance = sum(analytics.balance_of(m).balance for m in group_members)
+    total_level = sum(
+        LevelingSystem.calculate_level(analytics.balance_of(m).achievements_sum)
+        for m in group_members
+    )
     avg_level = total_level / len(group_members)
 
-    # Сортируем для топ-3
-    month_top = sorted(month_balances.values(), key=lambda x: x[1], reverse=True)[:3]
-    all_time_top = sorted(members_with_balance, key=lambda x: x[1], reverse=True)[:3]
+    # Топ-3 за месяц и за все время
+    month_top = analytics.top_by_month(3)
+    all_time_top = analytics.top_by_balance(3)
 
     # Форматируем топ-3 за месяц
     month_top_text = []
@@ -142,52 +117,19 @@ async def game_achievements_getter(
     """
     from html import escape
 
-    # Получаем всех пользователей группы
-    group_members = await stp_repo.employee.get_users(head=user.fullname)
+    # Получаем аналитику группы
+    analytics = await get_group_analytics().get(stp_repo, user)
 
-    if not group_members:
+    if not analytics.members:
         return {
             "achievements_text": "❌ В твоей группе нет сотрудников",
             "achievements": [],
             "total_achievements": 0,
         }
 
-    # Получаем все транзакции-достижения группы
-    all_achievements = []
-    for member in group_members:
-        transactions = await stp_repo.transaction.get_user_transactions(
-            user_id=member.user_id, only_achievements=True
-        )
-        for transaction in transactions:
-            all_achievements.append((member, transaction))
-
-    # Сортируем по дате получения (новые сначала)
-    all_achievements.sort(key=lambda x: x[1].created_at, reverse=True)
-
-    # Оптимизация: получаем все уникальные достижения одним запросом
-    # Сначала собираем все уникальные ID достижений
-    achievement_ids = set(t.source_id for _, t in all_achievements[:50] if t.source_id)
-
-    # Получаем все достижения одним запросом (если есть метод для этого)
-    # Иначе кэшируем в словаре
-    achievements_cache = {}
-    for achievement_id in achievement_ids:
-        achievement = await stp_repo.achievement.get_achievements(
-            achievement_id=achievement_id
-        )
-        if achievement:
-            achievements_cache[achievement_id] = achievement
-
-    # Форматируем достижения для отображения
+    # Форматируем последние достижения для отображения (новые сначала)
     formatted_achievements = []
-    for member, transaction in all_achievements[:50]:  # Ограничиваем 50 последними
-        if not transaction.source_id:
-            continue
-
-        achievement = achievements_cache.get(transaction.source_id)
-        if not achievement:
-            continue
-
+    for member, transaction, achievement in analytics.achievements:
         period = "Неизвестно"
         match achievement.period:
             case "d":
@@ -215,7 +157,7 @@ async def game_achievements_getter(
 
     return {
         "achievements": formatted_achievements,
-        "total_achievements": len(all_achievements),
+        "total_achievements": analytics.achievements_total,
     }
 
 
@@ -232,10 +174,10 @@ async def game_products_getter(
     Returns:
         Словарь с покупками группы
     """
-    # Получаем всех пользователей группы
-    group_members = await stp_repo.employee.get_users(head=user.fullname)
+    # Получаем аналитику группы
+    analytics = await get_group_analytics().get(stp_repo, user)
 
-    if not group_members:
+    if not analytics.members:
         return {
             "products": [],
             "total_bought": 0,
@@ -246,20 +188,10 @@ async def game_products_getter(
     filter_widget = dialog_manager.find("game_inventory_filter")
     filter_type = filter_widget.get_checked() if filter_widget else "all"
 
-    # Получаем все покупки группы
-    all_products = []
-    for member in group_members:
-        user_products = await stp_repo.purchase.get_user_purchases_with_details(
-            user_id=member.user_id
-        )
-        for product in user_products:
-            all_products.append((member, product))
-
-    total_bought = len(all_products)
-
-    # Применяем фильтр и форматируем
+    # Применяем фильтр и форматируем (покупки уже отсортированы от новых к старым)
     formatted_products = []
-    for member, product in all_products:
+    for product in analytics.purchases:
+        member = product.member
         user_product = product.user_purchase
         product_info = product.product_info
 
@@ -285,20 +217,9 @@ async def game_products_getter(
             member_name,
         ))
 
-    # Сортируем по дате покупки (новые сначала) - оптимизация
-    # Создаем словарь для быстрого поиска даты покупки по ID
-    purchase_dates = {
-        product.user_purchase.id: product.user_purchase.bought_at
-        for _, product in all_products
-    }
-    formatted_products.sort(
-        key=lambda x: purchase_dates.get(x[0], datetime.min),
-        reverse=True,
-    )
-
     return {
         "products": formatted_products,
-        "total_bought": total_bought,
+        "total_bought": len(analytics.purchases),
         "total_shown": len(formatted_products),
     }
 
@@ -315,30 +236,18 @@ async def game_balance_history_getter(
     Returns:
         Словарь с историей баланса группы
     """
-    # Получаем всех пользователей группы
-    group_members = await stp_repo.employee.get_users(head=user.fullname)
+    # Получаем аналитику группы
+    analytics = await get_group_analytics().get(stp_repo, user)
 
-    if not group_members:
+    if not analytics.members:
         return {
             "history": [],
             "total_transactions": 0,
         }
 
-    # Получаем все транзакции группы
-    all_transactions = []
-    for member in group_members:
-        transactions = await stp_repo.transaction.get_user_transactions(
-            user_id=member.user_id
-        )
-        for transaction in transactions:
-            all_transactions.append((member, transaction))
-
-    # Сортируем по дате (новые сначала)
-    all_transactions.sort(key=lambda x: x[1].created_at, reverse=True)
-
-    # Форматируем транзакции для отображения (последние 100)
+    # Форматируем последние транзакции для отображения (новые сначала)
     formatted_history = []
-    for member, transaction in all_transactions[:100]:
+    for member, transaction in analytics.history:
         date_str = transaction.created_at.strftime(strftime_date)
         member_name = format_fullname(member, True, True)
 
@@ -371,7 +280,7 @@ async def game_balance_history_getter(
 
     return {
         "history": formatted_history,
-        "total_transactions": len(all_transactions),
+        "total_transactions": analytics.history_total,
     }
 
 
@@ -436,23 +345,17 @@ async def game_rating_getter(
     Returns:
         Словарь с рейтингом группы по балансу
     """
-    # Получаем всех пользователей группы
-    group_members = await stp_repo.employee.get_users(head=user.fullname)
+    # Получаем аналитику группы
+    analytics = await get_group_analytics().get(stp_repo, user)
 
-    if not group_members:
+    if not analytics.members:
         return {
             "rating_text": "❌ В твоей группе нет сотрудников",
             "members": [],
         }
 
-    # Получаем балансы для всех членов группы
-    members_with_balance = []
-    for member in group_members:
-        balance = await stp_repo.transaction.get_user_balance(member.user_id)
-        members_with_balance.append((member, balance))
-
-    # Сортируем по балансу (убывание)
-    sorted_members = sorted(members_with_balance, key=lambda x: x[1], reverse=True)
+    # Рейтинг по балансу (убывание)
+    sorted_members = analytics.top_by_balance()
 
     # Форматируем рейтинг
     rating_lines = ["🎖️ <b>Рейтинг группы по балансу</b>\n"]
@@ -16,6 +16,7 @@ from tgbot.dialogs.getters.common.kpi import (
 from tgbot.dialogs.getters.common.schedules import user_schedule_getter
 from tgbot.misc.dicts import roles
 from tgbot.misc.helpers import format_fullname, get_role, short_name
+from tgbot.services.catalog import get_catalog_cache
 
 
 async def group_members_getter(
@@ -341,16 +342,16 @@ async def member_achievements_getter(
         "member_achievement_period_filter"
     ).get_checked()
 
+    catalog = await get_catalog_cache().get(stp_repo)
+
     # Фильтруем по периоду если нужно
     if selected_period != "all":
-        # Получаем все достижения, чтобы найти период
-        all_achievements = await stp_repo.achievement.get_achievements()
-        achievement_periods = {ach.id: ach.period for ach in all_achievements}
-
         transactions = [
             t
             for t in transactions
-            if t.source_id and achievement_periods.get(t.source_id) == selected_period
+            if t.source_id
+            and (achievement := catalog.get_achievement(t.source_id))
+            and achievement.period == selected_period
         ]
 
     # Форматируем достижения для отображения
@@ -359,9 +360,7 @@ async def member_achievements_getter(
         if not transaction.source_id:
             continue
 
-        achievement = await stp_repo.achievement.get_achievements(
-            achievement_id=transaction.source_id
-        )
+        achievement = catalog.get_achievement(transaction.source_id)
         if not achievement:
             continue
 
@@ -6,6 +6,8 @@ from typing import Any, Dict
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
+from tgbot.services.catalog import get_catalog_cache
+
 
 async def achievements_getter(stp_repo: MainRequestsRepo, **_kwargs) -> Dict[str, Any]:
     """Геттер получения списка достижений.
@@ -13,12 +15,8 @@ async def achievements_getter(stp_repo: MainRequestsRepo, **_kwargs) -> Dict[str
     Returns:
         Словарь отформатированных к отображению достижений
     """
-    if "division" in _kwargs:
-        achievements_list = await stp_repo.achievement.get_achievements(
-            division=_kwargs["division"]
-        )
-    else:
-        achievements_list = await stp_repo.achievement.get_achievements()
+    catalog = await get_catalog_cache().get(stp_repo)
+    achievements_list = catalog.get_achievements(division=_kwargs.get("division"))
 
     formatted_achievements = []
     for achievement in achievements_list:
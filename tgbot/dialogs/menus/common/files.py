@@ -7,7 +7,20 @@ from aiogram.enums import ContentType
 from aiogram_dialog import Dialog, Window
 from aiogram_dialog.widgets.common import sync_scroll
 from aiogram_dialog.widgets.input import MessageInput, TextInput
-from aiogram_dialog.widgets.kbd import Button, Row, ScrollingGroup, Select, SwitchTo
+from aiogram_dialog.widgets.kbd import (
+    Button,
+    CurrentPage,
+    FirstPage,
+    Group,
+    LastPage,
+    NextPage,
+    PrevPage,
+    Row,
+    ScrollingGroup,
+    Select,
+    StubScroll,
+    SwitchTo,
+)
 from aiogram_dialog.widgets.text import Const, Format, List
 
 from tgbot.dialogs.events.common.files.files import (
@@ -134,12 +147,11 @@ restore_window = Window(
     List(
         Format("""{pos}. <b>{item[3]}</b>
 <blockquote>📦 Размер: {item[2]}
-👤 Пользователь: {item[6]}</blockquote>\n"""),
+👤 Пользователь: {item[6]}{item[7]}</blockquote>\n"""),
         items="history",
         id="history_list",
-        page_size=4,
     ),
-    ScrollingGroup(
+    Group(
         Select(
             Format("{pos}. {item[3]}"),
             id="history_item",
@@ -148,10 +160,15 @@ restore_window = Window(
             on_click=on_restore_selected,
         ),
         width=2,
-        height=2,
-        hide_on_single_page=True,
-        id="history_scroll",
-        on_page_changed=sync_scroll("history_list"),
+    ),
+    StubScroll(id="history_pages", pages="pages"),
+    Row(
+        FirstPage(scroll="history_pages", text=Format("1")),
+        PrevPage(scroll="history_pages", text=Format("<")),
+        CurrentPage(scroll="history_pages", text=Format("{current_page1}")),
+        NextPage(scroll="history_pages", text=Format(">")),
+        LastPage(scroll="history_pages", text=Format("{target_page1}")),
+        when=F["pages"] > 1,
     ),
     Const("<i>Выбери версию файла для восстановления</i>"),
     Row(
@@ -169,12 +186,11 @@ history_window = Window(
         Format("""{pos}. <b>{item[1]}</b>
 <blockquote>📦 Размер: {item[2]}
 📅 Загружен: {item[3]}
-👤 Пользователь: {item[6]}</blockquote>\n"""),
+👤 Пользователь: {item[6]}{item[7]}</blockquote>\n"""),
         items="files",
         id="history_files_list",
-        page_size=4,
     ),
-    ScrollingGroup(
+    Group(
         Select(
             Format("{pos}. {item[1]}"),
             id="history_file",
@@ -183,10 +199,15 @@ history_window = Window(
             on_click=on_history_file_selected,
         ),
         width=2,
-        height=2,
-        hide_on_single_page=True,
-        id="history_files_scroll",
-        on_page_changed=sync_scroll("history_files_list"),
+    ),
+    StubScroll(id="history_files_pages", pages="pages"),
+    Row(
+        FirstPage(scroll="history_files_pages", text=Format("1")),
+        PrevPage(scroll="history_files_pages", text=Format("<")),
+        CurrentPage(scroll="history_files_pages", text=Format("{current_page1}")),
+        NextPage(scroll="history_files_pages", text=Format(">")),
+        LastPage(scroll="history_files_pages", text=Format("{target_page1}")),
+        when=F["pages"] > 1,
     ),
     Row(
         SwitchTo(Const("↩️ Назад"), id="back", state=Files.menu),
@@ -204,6 +225,7 @@ history_details_window = Window(
 <b>Размер:</b> {file_info[size]}
 <b>Загружен:</b> {file_info[uploaded_at]}
 <b>Пользователем:</b> {file_info[uploaded_by_fullname]}"""),
+    Format("{file_info[changes]}", when=F["file_info"]["changes"]),
     Row(
         Button(Const("♻️ Восстановить"), id="restore", on_click=on_restore_history_file),
         Button(Const("📥 Скачать"), id="download", on_click=on_download_history_file),
@@ -9,6 +9,7 @@ from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.states.user import Authorization
 from tgbot.misc.helpers import generate_auth_code
+from tgbot.services.directory import get_employee_directory
 from tgbot.services.mailing import send_auth_email
 
 logger = logging.getLogger(__name__)
@@ -70,14 +71,41 @@ async def user_auth_email(message: Message, state: FSMContext):
 
     auth_code = generate_auth_code()
     bot_info = await message.bot.get_me()
-    await state.update_data(email=message.text, auth_code=auth_code)
-    await state.set_state(Authorization.auth_code)
-    await send_auth_email(
+    await message.bot.edit_message_text(
+        chat_id=message.chat.id,
+        message_id=state_data.get("bot_message_id"),
+        text=f"""<b>📨 Отправка кода</b>
+
+Отправляю код подтверждения на <code>{message.text}</code>, подожди немного""",
+    )
+    delivered = await send_auth_email(
         code=auth_code, email=message.text, bot_username=bot_info.username
     )
+    if delivered is False:
+        logger.warning(
+            f"[Авторизация] Не удалось отправить код авторизации пользователю {message.from_user.username} ({message.from_user.id}) на {message.text}"
+        )
+        await message.bot.edit_message_text(
+            chat_id=message.chat.id,
+            message_id=state_data.get("bot_message_id"),
+            text=f"""<b>🔑 Авторизация</b>
+
+Не получилось отправить письмо на <code>{message.text}</code>
+
+Проверь почту и введи ее еще раз или попробуй позже 🙏""",
+        )
+        return
+
+    await state.update_data(email=message.text, auth_code=auth_code)
+    await state.set_state(Authorization.auth_code)
     logger.info(
         f"[Авторизация] Пользователю {message.from_user.username} ({message.from_user.id}) отправлено письмо с кодом авторизации {auth_code} на {message.text}"
     )
+    delay_note = (
+        "\nПочта сейчас отвечает медленно, письмо может прийти с задержкой\n"
+        if delivered is None
+        else ""
+    )
 
     await message.bot.edit_message_text(
         chat_id=message.chat.id,
@@ -85,7 +113,7 @@ async def user_auth_email(message: Message, state: FSMContext):
         text=f"""<b>🔐 Код с почты</b>
 
 Отправил на почту <code>{message.text}</code> код подтверждения
-
+{delay_note}
 Напиши полученный код в чат для завершения авторизации
 
 <i>Если письмо не пришло - проверь папку СПАМ
@@ -171,6 +199,7 @@ async def user_auth_fullname(
             db_user.email = state_data.get("email")
             db_user.role = 1
             await stp_repo.session.commit()
+            await get_employee_directory().refresh_users(stp_repo, [message.chat.id])
 
             await state.clear()
             await message.bot.edit_message_text(
@@ -1,6 +1,5 @@
 """Обработчики команд казино для групп."""
 
-import asyncio
 import logging
 import re
 
@@ -12,11 +11,14 @@ from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.events.common.game.casino import (
-    calculate_simple_multiplier,
-    calculate_slots_multiplier,
+    CASINO_ANIMATION_DELAY,
+    CasinoRound,
     format_result,
+    settle_casino_round,
 )
 from tgbot.filters.group_casino import IsGroupCasinoAllowed
+from tgbot.services.background import run_later
+from tgbot.services.balances import get_balance_projection
 
 logger = logging.getLogger(__name__)
 
@@ -121,6 +123,62 @@ def parse_casino_command(message_text: str) -> int | None:
     return 10  # Ставка по умолчанию для других случаев
 
 
+async def reply_insufficient_balance(
+    message: Message, user_balance: int, bet_amount: int
+) -> None:
+    """Сообщить о нехватке баллов для ставки.
+
+    Args:
+        message: Сообщение от пользователя
+        user_balance: Текущий баланс
+        bet_amount: Размер ставки
+    """
+    await message.reply(
+        f"❌ Недостаточно баллов для игры!\n"
+        f"✨ Твой баланс: {user_balance} баллов\n"
+        f"🎲 Нужно для ставки: {bet_amount} баллов"
+    )
+
+
+def format_group_result(casino_round: CasinoRound) -> str:
+    """Сформировать сообщение о результате игры для группы.
+
+    Args:
+        casino_round: Проведенный раунд казино
+
+    Returns:
+        Текст сообщения с результатом, ставкой и балансом
+    """
+    net_win = casino_round.net_win
+    result_data = format_result(
+        casino_round.game_type,
+        casino_round.dice_value,
+        casino_round.multiplier,
+        net_win,
+    )
+
+    # Дополняем информацией о ставке и балансе для групповых команд
+    message_parts = [
+        f"{result_data['result_icon']} <b>{result_data['result_title']}</b>",
+        result_data["result_message"],
+        f"\n<b>Ставка:</b> {casino_round.bet_amount} баллов",
+    ]
+
+    # Информация о выигрыше/проигрыше
+    if net_win > 0:
+        gross_win = int(casino_round.bet_amount * casino_round.multiplier)
+        message_parts.append(f"<b>Выигрыш:</b> {gross_win} баллов → прибыль +{net_win}")
+    elif net_win < 0:
+        message_parts.append(f"<b>Проиграно:</b> {abs(net_win)} баллов")
+
+    message_parts.append(
+        f"\n✨ <b>Баланс:</b> {casino_round.old_balance} → "
+        f"{casino_round.new_balance} баллов"
+    )
+
+    return "\n".join(message_parts)
+
+
 async def process_casino_game(
     message: Message,
     user: Employee,
@@ -140,96 +198,38 @@ async def process_casino_game(
         bet_amount: Размер ставки
     """
     try:
-        # Проверяем баланс
-        user_balance = await stp_repo.transaction.get_user_balance(user.user_id)
+        # Предварительная проверка баланса по проекции
+        user_balance = (
+            await get_balance_projection().get(stp_repo, user.user_id)
+        ).balance
 
         if user_balance < bet_amount:
-            await message.reply(
-                f"❌ Недостаточно баллов для игры!\n"
-                f"✨ Твой баланс: {user_balance} баллов\n"
-                f"🎲 Нужно для ставки: {bet_amount} баллов"
-            )
+            await reply_insufficient_balance(message, user_balance, bet_amount)
             return
 
-        # Отправляем dice и ждем результата
+        # Отправляем dice и сразу атомарно проводим результат
         dice_message = await message.reply_dice(emoji=dice_emoji)
-        dice_value = dice_message.dice.value
-
-        # Ждем анимацию (3 секунды)
-        await asyncio.sleep(3)
-
-        # Рассчитываем выигрыш
-        if game_type == "slots":
-            multiplier = calculate_slots_multiplier(dice_value)
-        else:
-            multiplier = calculate_simple_multiplier(dice_value)
-
-        # Вычисляем чистый выигрыш/проигрыш
-        if multiplier > 0:
-            gross_win = int(bet_amount * multiplier)
-            net_win = gross_win - bet_amount
-        else:
-            net_win = -bet_amount
-
-        # Обновляем баланс
-        if net_win > 0:
-            await stp_repo.transaction.add_transaction(
-                user_id=user.user_id,
-                transaction_type="earn",
-                source_type="casino",
-                amount=net_win,
-                comment=f"Выигрыш в {game_type}: {dice_value} (ставка {bet_amount})",
-            )
-        elif net_win < 0:
-            await stp_repo.transaction.add_transaction(
-                user_id=user.user_id,
-                transaction_type="spend",
-                source_type="casino",
-                amount=abs(net_win),
-                comment=f"Проигрыш в {game_type}: {dice_value} (ставка {bet_amount})",
-            )
-
-        # Получаем новый баланс
-        new_balance = await stp_repo.transaction.get_user_balance(user.user_id)
-
-        # Формируем сообщение о результате используя общую функцию
-        result_data = format_result(game_type, dice_value, multiplier, net_win)
-
-        # Дополняем информацией о ставке и балансе для групповых команд
-        message_parts = [
-            f"{result_data['result_icon']} <b>{result_data['result_title']}</b>",
-            result_data["result_message"],
-            f"\n<b>Ставка:</b> {bet_amount} баллов",
-        ]
-
-        # Информация о выигрыше/проигрыше
-        if net_win > 0:
-            gross_win = int(bet_amount * multiplier)
-            message_parts.append(
-                f"<b>Выигрыш:</b> {gross_win} баллов → прибыль +{net_win}"
-            )
-        elif net_win < 0:
-            message_parts.append(f"<b>Проиграно:</b> {abs(net_win)} баллов")
-
-        message_parts.append(
-            f"\n✨ <b>Баланс:</b> {user_balance} → {new_balance} баллов"
+        casino_round = await settle_casino_round(
+            stp_repo, user, game_type, dice_message.dice.value, bet_amount
         )
+        if casino_round is None:
+            # Баланс изменился параллельной игрой
+            user_balance = (
+                await get_balance_projection().get(stp_repo, user.user_id)
+            ).balance
+            await reply_insufficient_balance(message, user_balance, bet_amount)
+            return
 
-        result_message = "\n".join(message_parts)
-
-        await message.reply(result_message)
-
-        # Логируем игру
-        user_name = (
-            user.fullname
-            if user
-            else f"@{message.from_user.username}"
-            if message.from_user.username
-            else message.from_user.full_name
+        # Результат показываем после анимации, не удерживая сессию базы данных
+        run_later(
+            CASINO_ANIMATION_DELAY,
+            message.reply(format_group_result(casino_round)),
+            name=f"casino_result:{user.user_id}",
         )
+
         logger.info(
-            f"[Casino/{game_type}] {user_name} ({user.user_id}) играл с ставкой {bet_amount}, "
-            f"результат {dice_value}, выигрыш {net_win}"
+            f"[Casino/{game_type}] {user.fullname} ({user.user_id}) играл с ставкой {bet_amount}, "
+            f"результат {casino_round.dice_value}, выигрыш {casino_round.net_win}"
         )
 
     except Exception as e:
@@ -7,12 +7,15 @@ from aiogram.types import (
     ChatMemberOwner,
     Message,
 )
+from sqlalchemy import select
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.filters.role import DutyFilter, MultiRoleFilter, SpecialistFilter
 from tgbot.misc.helpers import format_fullname
+from tgbot.services.balances import get_balance_projection
 from tgbot.services.leveling import LevelingSystem
+from tgbot.services.query_audit import query_budget
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,7 @@ group_user_router.message.filter(F.chat.type.in_(("groups", "supergroup")))
 
 
 @group_user_router.message(Command("admins"))
+@query_budget(3)
 async def admins_cmd(
     message: Message, user: Employee, stp_repo: MainRequestsRepo
 ) -> None:
@@ -105,12 +109,9 @@ async def balance_cmd(message: Message, user: Employee, stp_repo: MainRequestsRe
         stp_repo: Репозиторий операций с базой STP
     """
     try:
-        user_balance = await stp_repo.transaction.get_user_balance(user_id=user.user_id)
-        achievements_sum = await stp_repo.transaction.get_user_achievements_sum(
-            user_id=user.user_id
-        )
+        user_balance = await get_balance_projection().get(stp_repo, user.user_id)
         level_info_text = LevelingSystem.get_level_info_text(
-            achievements_sum, user_balance
+            user_balance.achievements_sum, user_balance.balance
         )
 
         await message.reply(level_info_text)
@@ -133,6 +134,7 @@ async def balance_cmd(message: Message, user: Employee, stp_repo: MainRequestsRe
 
 
 @group_user_router.message(Command("top"))
+@query_budget(6)
 async def top_cmd(message: Message, user: Employee, stp_repo: MainRequestsRepo):
     """Обработчик команды /top для групп.
 
@@ -153,15 +155,19 @@ async def top_cmd(message: Message, user: Employee, stp_repo: MainRequestsRepo):
             )
             return
 
-        # Получаем информацию о сотрудниках и их балансах
-        balance_data = []
-
-        for member_data in group_members_data:
-            # Получаем информацию о сотруднике по member_id
-            employee = await stp_repo.employee.get_users(user_id=member_data.member_id)
-            if employee and employee.user_id:
-                balance = await stp_repo.transaction.get_user_balance(employee.user_id)
-                balance_data.append({"employee": employee, "balance": balance})
+        # Получаем сотрудников и их балансы пакетными запросами
+        member_ids = [member_data.member_id for member_data in group_members_data]
+        employees = await stp_repo.session.scalars(
+            select(Employee).where(Employee.user_id.in_(member_ids))
+        )
+        employees = [employee for employee in employees if employee.user_id]
+        balances = await get_balance_projection().get_many(
+            stp_repo, [employee.user_id for employee in employees]
+        )
+        balance_data = [
+            {"employee": employee, "balance": balances[employee.user_id].balance}
+            for employee in employees
+        ]
 
         # Сортируем по балансу (больше = лучше)
         balance_data.sort(key=lambda x: x["balance"], reverse=True)
@@ -12,6 +12,7 @@ from tgbot.misc.helpers import (
     format_fullname,
     get_role,
 )
+from tgbot.services.directory import get_employee_directory
 
 logger = logging.getLogger(__name__)
 
@@ -113,8 +114,9 @@ async def whois_command(
     replied_user_id = message.reply_to_message.from_user.id
 
     try:
-        # Ищем пользователя в базе данных
-        target_user = await stp_repo.employee.get_users(user_id=replied_user_id)
+        # Ищем пользователя в справочнике сотрудников
+        directory = await get_employee_directory().get(stp_repo)
+        target_user = directory.get_user(user_id=replied_user_id)
 
         if not target_user:
             await message.reply(
@@ -133,9 +135,7 @@ async def whois_command(
             return
 
         # Получаем информацию о руководителе, если указан
-        user_head = None
-        if target_user.head:
-            user_head = await stp_repo.employee.get_users(fullname=target_user.head)
+        user_head = directory.get_head(target_user)
 
         # Формируем и отправляем ответ с информацией о пользователе
         user_info_message = create_user_info_message(target_user, user_head)
@@ -181,9 +181,8 @@ async def whois_with_args(
 
     try:
         # Поиск пользователей по частичному совпадению ФИО
-        found_users = await stp_repo.employee.get_users_by_fio_parts(
-            search_query, limit=10
-        )
+        directory = await get_employee_directory().get(stp_repo)
+        found_users = directory.search(search_query, limit=10)
 
         if not found_users:
             await message.reply(
@@ -203,9 +202,7 @@ async def whois_with_args(
             target_user = found_users[0]
 
             # Получаем информацию о руководителе
-            user_head = None
-            if target_user.head:
-                user_head = await stp_repo.employee.get_users(fullname=target_user.head)
+            user_head = directory.get_head(target_user)
 
             user_info_message = create_user_info_message(target_user, user_head)
             await message.reply(user_info_message)
@@ -217,14 +214,8 @@ async def whois_with_args(
             return
 
         # Если найдено несколько пользователей, показываем список
-        # Сортируем результаты (сначала точные совпадения)
-        sorted_users = sorted(
-            found_users,
-            key=lambda u: (
-                search_query.lower() not in u.fullname.lower(),
-                u.fullname,
-            ),
-        )
+        # (справочник уже отсортировал результаты по релевантности)
+        sorted_users = found_users
 
         # Формируем список найденных пользователей
         user_list = []
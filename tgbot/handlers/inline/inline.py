@@ -1,4 +1,5 @@
 import logging
+from datetime import date
 from typing import List
 
 from aiogram import Bot, Router
@@ -22,7 +23,9 @@ from tgbot.handlers.inline.helpers import CACHE_TIMES
 from tgbot.handlers.inline.search import InlineResultBuilder, handle_search_query
 from tgbot.handlers.inline.subscriptions import handle_subscription_query
 from tgbot.services.files_processing.handlers.schedule import schedule_service
+from tgbot.services.files_processing.managers.files import ScheduleFileManager
 from tgbot.services.files_processing.utils.time_parser import get_current_month
+from tgbot.services.inline_cache import get_inline_cache
 
 logger = logging.getLogger(__name__)
 
@@ -106,12 +109,29 @@ async def inline_handler(
 async def create_default_commands(
     user: Employee, stp_repo: MainRequestsRepo
 ) -> List[InlineQueryResultArticle]:
-    """Создание дефолтных команд."""
+    """Создание дефолтных команд.
+
+    Отрендеренные команды кэшируются по пользователю, месяцу, дате и версии
+    файлов графиков, поэтому повторное открытие inline-меню не разбирает
+    файлы заново.
+    """
+    current_month = get_current_month()
+    cache_key = (
+        user.id,
+        user.division,
+        current_month,
+        date.today(),
+        ScheduleFileManager().get_files_version(),
+    )
+    inline_cache = get_inline_cache()
+    cached = inline_cache.get_defaults(cache_key)
+    if cached is not None:
+        return cached
+
     results = []
 
     # Мой график
     try:
-        current_month = get_current_month()
         schedule_text = await schedule_service.get_user_schedule_response(
             user=user, month=current_month, compact=True
         )
@@ -175,6 +195,7 @@ async def create_default_commands(
             exc_info=True,
         )
 
+    inline_cache.store_defaults(cache_key, results)
     return results
 
 
@@ -9,10 +9,14 @@ from tgbot.handlers.groups.user.whois import create_user_info_message
 from tgbot.handlers.inline.helpers import SEARCH_LIMITS
 from tgbot.handlers.inline.texts import ERROR_MESSAGES
 from tgbot.misc.helpers import get_role
+from tgbot.services.directory import get_employee_directory
+from tgbot.services.inline_cache import get_inline_cache
+from tgbot.services.query_audit import query_budget
 
 logger = logging.getLogger(__name__)
 
 
+@query_budget(2)
 async def handle_search_query(
     query_text: str, stp_repo: MainRequestsRepo
 ) -> List[InlineQueryResultArticle]:
@@ -29,27 +33,32 @@ async def handle_search_query(
         return []
 
     try:
-        # Используем тот же простой поиск, что и в диалогах
-        found_users = await stp_repo.employee.search_users(query_text, limit=50)
-
-        if not found_users:
+        directory = await get_employee_directory().get(stp_repo)
+        inline_cache = get_inline_cache()
+
+        entry = inline_cache.get_search(query_text, directory)
+        if entry is None:
+            # Продолжение уже введенного запроса ищем среди совпадений префикса
+            candidates = inline_cache.get_prefix_candidates(query_text, directory)
+            matched_ids = directory.search_ids(query_text, candidates)
+
+            results = []
+            for pk in matched_ids[: SEARCH_LIMITS["MAX_DISPLAY_RESULTS"]]:
+                found_user = directory.by_id[pk]
+                user_head = directory.get_head(found_user)
+                results.append(
+                    InlineResultBuilder.create_user_result(
+                        found_user, user_head, query_text
+                    )
+                )
+            inline_cache.store_search(query_text, directory, matched_ids, results)
+        else:
+            results = entry.results
+
+        if not results:
             # Результаты не найдены
             return [InlineResultBuilder.create_no_results(query_text)]
 
-        # Применяем ту же логику сортировки, что и в диалогах
-        sorted_users = _sort_search_results(found_users, query_text)
-
-        # Ограничиваем результаты для inline отображения
-        limited_users = sorted_users[: SEARCH_LIMITS["MAX_DISPLAY_RESULTS"]]
-
-        results = []
-        for found_user in limited_users:
-            user_head = await _get_user_head(stp_repo, found_user.head)
-            result_item = InlineResultBuilder.create_user_result(
-                found_user, user_head, query_text
-            )
-            results.append(result_item)
-
         return results
 
     except Exception as e:
@@ -57,47 +66,6 @@ async def handle_search_query(
         return [InlineResultBuilder.create_error_result(e)]
 
 
-async def _get_user_head(stp_repo: MainRequestsRepo, head_name: str) -> Employee:
-    """Получение информации о руководителе пользователя.
-
-    Args:
-        stp_repo: Репозиторий операций с базой STP
-        head_name: Полное имя руководителя
-
-    Returns:
-        Объект Employee руководителя или None, если не найден
-    """
-    if not head_name:
-        return None
-
-    try:
-        return await stp_repo.employee.get_users(fullname=head_name)
-    except Exception as e:
-        logger.warning(f"[Inline] Не удалось найти руководителя '{head_name}': {e}")
-        return None
-
-
-def _sort_search_results(users: List[Employee], query_text: str) -> List[Employee]:
-    """Сортировка результатов поиска по релевантности.
-
-    Args:
-        users: Список пользователей для сортировки
-        query_text: Поисковый запрос для определения релевантности
-
-    Returns:
-        Отсортированный список пользователей
-    """
-    return sorted(
-        users,
-        key=lambda u: (
-            # Сначала полные совпадения
-            query_text.lower() not in u.fullname.lower(),
-            # Потом по алфавиту
-            u.fullname,
-        ),
-    )
-
-
 class InlineResultBuilder:
     """Класс для создания различных типов inline query результатов."""
 
@@ -10,6 +10,7 @@ from stp_database.models.STP.group import Group
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.misc.helpers import format_fullname
+from tgbot.services.replicas import SharedKeys
 
 logger = logging.getLogger(__name__)
 
@@ -125,8 +126,8 @@ class GroupsMiddleware(BaseMiddleware):
     """
 
     def __init__(self):
-        # Отслеживание текущих операций для предотвращения дубликатов
-        self._processing_operations: set = set()
+        # Текущие операции (общие для всех реплик) для предотвращения дубликатов
+        self._processing_operations = SharedKeys("groups:operations", ttl_seconds=60)
         super().__init__()
 
     async def _safe_execute(
@@ -222,16 +223,13 @@ class GroupsMiddleware(BaseMiddleware):
         operation_key = f"{group_id}:{user_id}"
 
         # Проверяем, не обрабатывается ли уже этот пользователь в этой группе
-        if operation_key in self._processing_operations:
+        if not await self._processing_operations.claim(operation_key):
             logger.debug(
                 f"[Группы] Операция для пользователя {user_id} в группе {group_id} "
                 "уже выполняется, пропускаем дублированный запрос"
             )
             return False
 
-        # Добавляем операцию в список обрабатываемых
-        self._processing_operations.add(operation_key)
-
         try:
             # Получаем контекст пользователя
             user_context = await self._get_user_context(
@@ -260,7 +258,7 @@ class GroupsMiddleware(BaseMiddleware):
             return False
         finally:
             # Убираем операцию из списка обрабатываемых
-            self._processing_operations.discard(operation_key)
+            await self._processing_operations.release(operation_key)
 
     async def _handle_user_access_and_membership(
         self,
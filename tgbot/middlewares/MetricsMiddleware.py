@@ -0,0 +1,99 @@
+"""Middleware для сбора метрик производительности."""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+
+from tgbot.services.metrics import (
+    finish_update,
+    get_update_metrics,
+    record_telegram_request,
+    start_update,
+)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Middleware для замера полного времени обработки апдейта.
+
+    Регистрируется внешним middleware на dp.update, поэтому учитывает все
+    остальные middleware, обработчик и отрисовку диалога.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        metrics = start_update()
+        status = "ok"
+        try:
+            return await handler(event, data)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            finish_update(metrics, status)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Middleware для определения обработчика апдейта в метриках.
+
+    Для диалогов вместо внутреннего обработчика aiogram-dialog используется
+    состояние окна, которое отрисовывается после обработки (и его геттер).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            metrics = get_update_metrics()
+            if metrics is not None:
+                metrics.handler = self._handler_name(data)
+
+    @staticmethod
+    def _handler_name(data: Dict[str, Any]) -> str:
+        dialog_manager = data.get("dialog_manager")
+        if dialog_manager is not None and dialog_manager.has_context():
+            return str(dialog_manager.current_context().state)
+
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        if callback is None:
+            return "unknown"
+        return getattr(callback, "__qualname__", type(callback).__name__)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота для замера вызовов Telegram API."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        failed = True
+        try:
+            # Сессия возвращает результат метода, ошибки API приходят исключениями
+            result = await make_request(bot, method)
+            failed = False
+            return result
+        finally:
+            record_telegram_request(
+                type(method).__name__, time.perf_counter() - started, failed
+            )
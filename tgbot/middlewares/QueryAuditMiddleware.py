@@ -0,0 +1,30 @@
+"""Middleware для аудита SQL-запросов апдейта."""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from tgbot.services.metrics import get_update_metrics
+from tgbot.services.query_audit import check_audit, count_queries
+
+
+class QueryAuditMiddleware(BaseMiddleware):
+    """Middleware для поиска N+1 в апдейтах.
+
+    Регистрируется внешним middleware на dp.update после UpdateMetricsMiddleware,
+    чтобы в сообщениях был обработчик апдейта из метрик.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with count_queries() as audit:
+            result = await handler(event, data)
+
+        metrics = get_update_metrics()
+        check_audit(audit, metrics.handler if metrics else type(event).__name__)
+        return result
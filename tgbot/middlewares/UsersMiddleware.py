@@ -8,6 +8,8 @@ from aiogram.types import CallbackQuery, InlineQuery, Message
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
+from tgbot.services.directory import get_employee_directory
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,6 +70,9 @@ class UsersMiddleware(BaseMiddleware):
                     logger.info(
                         f"[Юзернейм] Обновлен юзернейм пользователя {event.from_user.id} - @{current_username}"
                     )
+                await get_employee_directory().refresh_users(
+                    stp_repo, [event.from_user.id]
+                )
             except Exception as e:
                 logger.error(
                     f"[Юзернейм] Ошибка обновления юзернейма для пользователя {event.from_user.id}: {e}"
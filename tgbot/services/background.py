@@ -0,0 +1,61 @@
+"""Фоновые задачи, отвязанные от обработки апдейта."""
+
+import asyncio
+import logging
+from typing import Any, Coroutine, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Ссылки на запущенные задачи, чтобы сборщик мусора не отменил их до завершения
+_tasks: Set[asyncio.Task] = set()
+
+
+def _on_done(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(f"[Фон] Задача {task.get_name()} завершилась с ошибкой: {exc}")
+
+
+def run_detached(
+    coro: Coroutine[Any, Any, Any], name: Optional[str] = None
+) -> asyncio.Task:
+    """Запускает корутину в фоне, не дожидаясь ее завершения.
+
+    Корутина не должна использовать сессии базы данных и другие объекты
+    из данных middleware: к моменту ее выполнения они уже будут закрыты.
+
+    Args:
+        coro: Корутина для выполнения
+        name: Название задачи для логов
+
+    Returns:
+        Запущенная задача
+    """
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+async def _delayed(delay: float, coro: Coroutine[Any, Any, Any]) -> Any:
+    await asyncio.sleep(delay)
+    return await coro
+
+
+def run_later(
+    delay: float, coro: Coroutine[Any, Any, Any], name: Optional[str] = None
+) -> asyncio.Task:
+    """Запускает корутину в фоне после задержки.
+
+    Args:
+        delay: Задержка в секундах
+        coro: Корутина для выполнения
+        name: Название задачи для логов
+
+    Returns:
+        Запущенная задача
+    """
+    return run_detached(_delayed(delay, coro), name=name)
@@ -0,0 +1,344 @@
+"""Материализованные балансы пользователей.
+
+Модуль хранит проекцию баланса и суммы баллов за достижения для каждого
+пользователя, чтобы не пересчитывать их из журнала транзакций на каждом экране.
+Проекция обновляется инкрементально при каждой транзакции бота и периодически
+сверяется с журналом. Остальные реплики сбрасывают баланс пользователя по
+событию BALANCES_CHANGED.
+"""
+
+import asyncio
+import logging
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import case, func, select
+from stp_database.models.STP import Employee, Transaction
+from stp_database.repo.STP import MainRequestsRepo
+
+from tgbot.services.replicas import BALANCES_CHANGED, get_invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# Размер пачки пользователей для одного агрегирующего запроса
+RECONCILE_CHUNK_SIZE = 500
+
+
+@dataclass(slots=True)
+class UserBalance:
+    """Баланс пользователя.
+
+    Attributes:
+        balance: Текущий баланс (начисления минус списания)
+        achievements_sum: Сумма баллов, полученных за достижения
+    """
+
+    balance: int = 0
+    achievements_sum: int = 0
+
+
+class BalanceProjection:
+    """Кэшированная проекция балансов пользователей поверх журнала транзакций."""
+
+    def __init__(self, max_size: int = 5000, ttl_seconds: int = 900):
+        """Инициализирует проекцию с ограничениями по размеру и TTL.
+
+        Args:
+            max_size: Максимальное количество пользователей в проекции
+            ttl_seconds: Время жизни записи. Ограничивает устаревание из-за транзакций,
+                созданных вне бота (например, начисления достижений)
+        """
+        self._balances: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        # Блокировка живет, пока ее держит или ждет хотя бы одна ставка
+        self._locks: weakref.WeakValueDictionary[int, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
+    @staticmethod
+    def _aggregate_query(user_ids: Iterable[int]):
+        """Собирает запрос агрегации журнала транзакций по пользователям.
+
+        Args:
+            user_ids: Идентификаторы пользователей Telegram
+
+        Returns:
+            SQLAlchemy запрос (user_id, balance, achievements_sum)
+        """
+        signed_amount = case(
+            (Transaction.type == "earn", Transaction.amount),
+            else_=-Transaction.amount,
+        )
+        achievement_amount = case(
+            (
+                (Transaction.type == "earn")
+                & (Transaction.source_type == "achievement"),
+                Transaction.amount,
+            ),
+            else_=0,
+        )
+        return (
+            select(
+                Transaction.user_id,
+                func.coalesce(func.sum(signed_amount), 0).label("balance"),
+                func.coalesce(func.sum(achievement_amount), 0).label(
+                    "achievements_sum"
+                ),
+            )
+            .where(Transaction.user_id.in_(list(user_ids)))
+            .group_by(Transaction.user_id)
+        )
+
+    async def _load(
+        self, stp_repo: MainRequestsRepo, user_ids: list[int]
+    ) -> Dict[int, UserBalance]:
+        """Загружает балансы из журнала транзакций одним запросом на пачку.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            user_ids: Идентификаторы пользователей Telegram
+
+        Returns:
+            Словарь балансов по идентификатору пользователя
+        """
+        loaded = {user_id: UserBalance() for user_id in user_ids}
+        for start in range(0, len(user_ids), RECONCILE_CHUNK_SIZE):
+            chunk = user_ids[start : start + RECONCILE_CHUNK_SIZE]
+            result = await stp_repo.session.execute(self._aggregate_query(chunk))
+            for row in result:
+                loaded[row.user_id] = UserBalance(
+                    balance=int(row.balance), achievements_sum=int(row.achievements_sum)
+                )
+        return loaded
+
+    async def get(self, stp_repo: MainRequestsRepo, user_id: int) -> UserBalance:
+        """Получает баланс пользователя.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            user_id: Идентификатор пользователя Telegram
+
+        Returns:
+            Баланс пользователя
+        """
+        return (await self.get_many(stp_repo, [user_id]))[user_id]
+
+    async def get_many(
+        self, stp_repo: MainRequestsRepo, user_ids: Iterable[Optional[int]]
+    ) -> Dict[int, UserBalance]:
+        """Получает балансы группы пользователей.
+
+        Отсутствующие в проекции пользователи загружаются одним агрегирующим запросом.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            user_ids: Идентификаторы пользователей Telegram
+
+        Returns:
+            Словарь балансов по идентификатору пользователя
+        """
+        result: Dict[int, UserBalance] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            if user_id is None:
+                continue
+            cached = self._balances.get(user_id)
+            if cached is None:
+                missing.append(user_id)
+            else:
+                result[user_id] = cached
+
+        if missing:
+            loaded = await self._load(stp_repo, missing)
+            self._balances.update(loaded)
+            result.update(loaded)
+            logger.debug(f"[Балансы] Загружено из журнала: {len(missing)}")
+
+        return result
+
+    def apply(
+        self, user_id: int, transaction_type: str, source_type: str, amount: int
+    ) -> None:
+        """Применяет транзакцию к проекции.
+
+        Если пользователя нет в проекции, он будет загружен из журнала при следующем чтении.
+
+        Args:
+            user_id: Идентификатор пользователя Telegram
+            transaction_type: Тип транзакции (earn/spend)
+            source_type: Источник транзакции
+            amount: Сумма транзакции
+        """
+        cached = self._balances.get(user_id)
+        if cached is None:
+            return
+
+        if transaction_type == "earn":
+            cached.balance += amount
+            if source_type == "achievement":
+                cached.achievements_sum += amount
+        else:
+            cached.balance -= amount
+
+    async def add_transaction(
+        self,
+        stp_repo: MainRequestsRepo,
+        user_id: int,
+        transaction_type: str,
+        source_type: str,
+        amount: int,
+        **kwargs,
+    ):
+        """Создает транзакцию в журнале и применяет ее к проекции.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            user_id: Идентификатор пользователя Telegram
+            transaction_type: Тип транзакции (earn/spend)
+            source_type: Источник транзакции
+            amount: Сумма транзакции
+            **kwargs: Дополнительные параметры транзакции (source_id, comment)
+
+        Returns:
+            Результат создания транзакции репозиторием
+        """
+        result = await stp_repo.transaction.add_transaction(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            source_type=source_type,
+            amount=amount,
+            **kwargs,
+        )
+        self.apply(user_id, transaction_type, source_type, amount)
+        await get_invalidation_bus().broadcast(BALANCES_CHANGED, user_ids=[user_id])
+        return result
+
+    async def settle(
+        self,
+        stp_repo: MainRequestsRepo,
+        user_id: int,
+        stake: int,
+        net_amount: int,
+        source_type: str,
+        comment: str,
+    ) -> Optional[Tuple[int, int]]:
+        """Атомарно проверяет баланс и проводит результат ставки одной транзакцией.
+
+        Списание ставки и начисление выигрыша сворачиваются в одну транзакцию
+        на чистую сумму. Конкурентные ставки одного пользователя сериализуются
+        блокировкой в процессе и блокировкой строки сотрудника в базе, а баланс
+        перед проверкой перечитывается из журнала внутри этой блокировки.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            user_id: Идентификатор пользователя Telegram
+            stake: Размер ставки, который должен быть на балансе
+            net_amount: Чистый результат (положительный - начисление, отрицательный - списание)
+            source_type: Источник транзакции
+            comment: Комментарий к транзакции
+
+        Returns:
+            Баланс до и после проведения или None, если баллов недостаточно
+        """
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        async with lock:
+            session = stp_repo.session
+            # Начинаем новую транзакцию, чтобы чтение журнала не шло из старого снимка
+            await session.commit()
+            await session.execute(
+                select(Employee.id).where(Employee.user_id == user_id).with_for_update()
+            )
+            row = (await session.execute(self._aggregate_query([user_id]))).first()
+            actual = (
+                UserBalance(
+                    balance=int(row.balance), achievements_sum=int(row.achievements_sum)
+                )
+                if row
+                else UserBalance()
+            )
+
+            if actual.balance < stake:
+                await session.commit()
+                self._balances[user_id] = actual
+                return None
+
+            if net_amount:
+                # Транзакция репозитория фиксирует изменения и снимает блокировку строки
+                await stp_repo.transaction.add_transaction(
+                    user_id=user_id,
+                    transaction_type="earn" if net_amount > 0 else "spend",
+                    source_type=source_type,
+                    amount=abs(net_amount),
+                    comment=comment,
+                )
+            else:
+                await session.commit()
+
+            old_balance = actual.balance
+            actual.balance += net_amount
+            self._balances[user_id] = actual
+
+        if net_amount:
+            await get_invalidation_bus().broadcast(BALANCES_CHANGED, user_ids=[user_id])
+        return old_balance, actual.balance
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Инвалидирует проекцию пользователя или всю проекцию.
+
+        Args:
+            user_id: Идентификатор пользователя Telegram. Если не указан - очищается все
+        """
+        if user_id is None:
+            self._balances.clear()
+        else:
+            self._balances.pop(user_id, None)
+
+    async def reconcile(self, stp_repo: MainRequestsRepo) -> int:
+        """Сверяет проекцию с журналом транзакций.
+
+        Записи исправляются на месте, поэтому сверка не продлевает их TTL и
+        не мешает вытеснению давно не запрашиваемых пользователей.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+
+        Returns:
+            Количество исправленных записей
+        """
+        user_ids = list(self._balances.keys())
+        if not user_ids:
+            return 0
+
+        actual = await self._load(stp_repo, user_ids)
+        drifted = 0
+        for user_id, balance in actual.items():
+            # Записи, истекшие во время загрузки, не возвращаем в проекцию
+            cached = self._balances.get(user_id)
+            if cached is None or cached == balance:
+                continue
+            drifted += 1
+            cached.balance = balance.balance
+            cached.achievements_sum = balance.achievements_sum
+
+        logger.info(
+            f"[Балансы] Сверка завершена: {len(user_ids)} пользователей, расхождений: {drifted}"
+        )
+        return drifted
+
+
+_balance_projection: Optional[BalanceProjection] = None
+
+
+def get_balance_projection() -> BalanceProjection:
+    """Получает глобальный экземпляр проекции балансов (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр BalanceProjection
+    """
+    global _balance_projection
+    if _balance_projection is None:
+        _balance_projection = BalanceProjection()
+    return _balance_projection
@@ -2,12 +2,53 @@
 
 import asyncio
 import logging
-from typing import Awaitable, Callable, Union
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
 
 from aiogram import Bot, exceptions
 from aiogram.types import InlineKeyboardMarkup
 
 
+@dataclass(slots=True)
+class OutgoingMessage:
+    """Сообщение для отправки пользователю.
+
+    Attributes:
+        user_id: Идентификатор пользователя Telegram
+        text: Текст сообщения
+        reply_markup: Клавиатура к сообщению
+    """
+
+    user_id: Union[int, str]
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+
+
+class RateLimiter:
+    """Ограничитель частоты вызовов с равномерным интервалом между ними."""
+
+    def __init__(self, rate: float):
+        """Инициализация ограничителя.
+
+        Args:
+            rate: Максимальное количество вызовов в секунду
+        """
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Ожидает ближайшего свободного слота для вызова."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
 async def send_message(
     bot: Bot,
     user_id: Union[int, str],
@@ -196,3 +237,135 @@ async def broadcast_copy(
             f"Broadcast completed: {success_count} successful, {error_count} failed."
         )
         return success_count, error_count, failed_user_ids
+
+
+async def send_messages(
+    bot: Bot,
+    messages: Iterable[OutgoingMessage],
+    concurrency: int = 8,
+    rate: float = 20,
+    disable_notification: bool = False,
+) -> int:
+    """Параллельная отправка набора сообщений с ограничением частоты.
+
+    Args:
+        bot: Экземпляр бота
+        messages: Сообщения для отправки
+        concurrency: Максимальное количество одновременных запросов
+        rate: Максимальное количество сообщений в секунду (Лимит: 30 сообщений в секунду)
+        disable_notification: Отключить ли уведомление о сообщениях
+
+    Returns:
+        Кол-во успешно отправленных сообщений
+    """
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _send(message: OutgoingMessage) -> bool:
+        async with semaphore:
+            await limiter.wait()
+            return await send_message(
+                bot,
+                message.user_id,
+                message.text,
+                disable_notification,
+                message.reply_markup,
+            )
+
+    results = await asyncio.gather(
+        *(_send(message) for message in messages), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logging.error(f"Message sending failed: {result}")
+    count = sum(1 for result in results if result is True)
+    logging.info(f"{count}/{len(results)} messages successful sent.")
+    return count
+
+
+@dataclass(slots=True)
+class ChatAction:
+    """Действие Bot API в рамках одного чата.
+
+    Attributes:
+        chat_id: Идентификатор чата, в котором выполняется действие
+        call: Функция, выполняющая запрос к Bot API
+        label: Описание действия для логов
+    """
+
+    chat_id: Union[int, str]
+    call: Callable[[], Awaitable[Any]]
+    label: str = ""
+
+
+@dataclass(slots=True)
+class ChatActionResult:
+    """Результат выполнения действия.
+
+    Attributes:
+        action: Выполненное действие
+        ok: Действие выполнено успешно
+        result: Ответ Bot API
+        error: Текст ошибки
+    """
+
+    action: ChatAction
+    ok: bool
+    result: Any = None
+    error: Optional[str] = None
+
+
+async def run_chat_actions(
+    actions: Iterable[ChatAction],
+    concurrency: int = 8,
+    rate: float = 20,
+    max_retries: int = 3,
+) -> List[ChatActionResult]:
+    """Параллельное выполнение действий Bot API с сохранением порядка внутри чата.
+
+    Действия одного чата выполняются строго по очереди в исходном порядке,
+    разные чаты обрабатываются параллельно. Все запросы проходят через общий
+    ограничитель частоты, при TelegramRetryAfter действие повторяется после паузы.
+
+    Args:
+        actions: Действия для выполнения
+        concurrency: Максимальное количество одновременно обрабатываемых чатов
+        rate: Максимальное количество запросов в секунду
+        max_retries: Максимальное количество повторов при превышении лимита
+
+    Returns:
+        Результаты действий в исходном порядке
+    """
+    actions = list(actions)
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    results: Dict[int, ChatActionResult] = {}
+
+    by_chat: Dict[Union[int, str], List[int]] = defaultdict(list)
+    for idx, action in enumerate(actions):
+        by_chat[action.chat_id].append(idx)
+
+    async def _run(action: ChatAction) -> ChatActionResult:
+        for attempt in range(max_retries + 1):
+            await limiter.wait()
+            try:
+                return ChatActionResult(action, ok=True, result=await action.call())
+            except exceptions.TelegramRetryAfter as e:
+                if attempt == max_retries:
+                    return ChatActionResult(action, ok=False, error=str(e))
+                logging.warning(
+                    f"Chat [ID:{action.chat_id}]: Flood limit is exceeded. "
+                    f"Sleep {e.retry_after} seconds."
+                )
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logging.warning(f"Chat [ID:{action.chat_id}] {action.label}: {e}")
+                return ChatActionResult(action, ok=False, error=str(e))
+
+    async def _run_chat(indexes: List[int]) -> None:
+        async with semaphore:
+            for idx in indexes:
+                results[idx] = await _run(actions[idx])
+
+    await asyncio.gather(*(_run_chat(indexes) for indexes in by_chat.values()))
+    return [results[idx] for idx in range(len(actions))]
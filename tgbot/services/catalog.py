@@ -0,0 +1,242 @@
+"""Кэш каталогов достижений и предметов магазина.
+
+Каталоги меняются редко, поэтому хранятся в памяти процесса целиком вместе
+с индексами по идентификатору, подразделению и позиции. Каждое обновление
+увеличивает версию каталога - по ней зависимые кэши понимают, что данные
+устарели. Обновление происходит по таймеру планировщика, при истечении TTL
+и явно через invalidate() после изменения каталога.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from stp_database.models.STP import Achievement, Product
+from stp_database.repo.STP import MainRequestsRepo
+
+logger = logging.getLogger(__name__)
+
+# Максимальный возраст каталога до принудительной перезагрузки при чтении
+CATALOG_TTL = timedelta(minutes=15)
+
+
+@dataclass(slots=True)
+class CatalogSnapshot:
+    """Неизменяемый снимок каталогов с индексами.
+
+    Attributes:
+        version: Версия снимка
+        achievements: Достижения в порядке загрузки
+        products: Предметы магазина в порядке загрузки
+        achievements_by_id: Индекс достижений по идентификатору
+        achievements_by_division: Индекс достижений по подразделению
+        achievements_by_position: Индекс достижений по позиции
+        products_by_id: Индекс предметов по идентификатору
+        products_by_division: Индекс предметов по подразделению
+        loaded_at: Время загрузки снимка
+    """
+
+    version: int
+    achievements: List[Achievement] = field(default_factory=list)
+    products: List[Product] = field(default_factory=list)
+    achievements_by_id: Dict[int, Achievement] = field(default_factory=dict)
+    achievements_by_division: Dict[str, List[Achievement]] = field(default_factory=dict)
+    achievements_by_position: Dict[str, List[Achievement]] = field(default_factory=dict)
+    products_by_id: Dict[int, Product] = field(default_factory=dict)
+    products_by_division: Dict[str, List[Product]] = field(default_factory=dict)
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        achievements: Iterable[Achievement],
+        products: Iterable[Product],
+    ) -> "CatalogSnapshot":
+        """Строит снимок и индексы каталогов.
+
+        Args:
+            version: Версия снимка
+            achievements: Достижения
+            products: Предметы магазина
+
+        Returns:
+            Снимок каталогов
+        """
+        snapshot = cls(
+            version=version, achievements=list(achievements), products=list(products)
+        )
+
+        by_division = defaultdict(list)
+        by_position = defaultdict(list)
+        for achievement in snapshot.achievements:
+            snapshot.achievements_by_id[achievement.id] = achievement
+            by_division[achievement.division].append(achievement)
+            by_position[achievement.position].append(achievement)
+        snapshot.achievements_by_division = dict(by_division)
+        snapshot.achievements_by_position = dict(by_position)
+
+        by_division = defaultdict(list)
+        for product in snapshot.products:
+            snapshot.products_by_id[product.id] = product
+            by_division[product.division].append(product)
+        snapshot.products_by_division = dict(by_division)
+
+        return snapshot
+
+    def get_achievements(
+        self, division: Optional[str] = None, position: Optional[str] = None
+    ) -> List[Achievement]:
+        """Получает достижения с фильтрами по индексам.
+
+        Args:
+            division: Подразделение
+            position: Позиция
+
+        Returns:
+            Список достижений
+        """
+        if division is None and position is None:
+            return self.achievements
+        if position is None:
+            return self.achievements_by_division.get(division, [])
+
+        by_position = self.achievements_by_position.get(position, [])
+        if division is None:
+            return by_position
+        return [a for a in by_position if a.division == division]
+
+    def get_achievement(self, achievement_id: Optional[int]) -> Optional[Achievement]:
+        """Получает достижение по идентификатору.
+
+        Args:
+            achievement_id: Идентификатор достижения
+
+        Returns:
+            Достижение или None
+        """
+        return self.achievements_by_id.get(achievement_id)
+
+    def get_products(self, division: Optional[str] = None) -> List[Product]:
+        """Получает предметы магазина с фильтром по подразделению.
+
+        Args:
+            division: Подразделение
+
+        Returns:
+            Список предметов
+        """
+        if division is None:
+            return self.products
+        return self.products_by_division.get(division, [])
+
+    def get_product(self, product_id: Optional[int]) -> Optional[Product]:
+        """Получает предмет по идентификатору.
+
+        Args:
+            product_id: Идентификатор предмета
+
+        Returns:
+            Предмет или None
+        """
+        return self.products_by_id.get(product_id)
+
+
+class CatalogCache:
+    """Версионированный кэш каталогов достижений и предметов."""
+
+    def __init__(self, ttl: timedelta = CATALOG_TTL):
+        """Инициализирует кэш.
+
+        Args:
+            ttl: Максимальный возраст снимка до перезагрузки при чтении
+        """
+        self.ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        """Текущая версия каталогов."""
+        return self._version
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and datetime.now() - self._snapshot.loaded_at < self.ttl
+        )
+
+    async def get(self, stp_repo: MainRequestsRepo) -> CatalogSnapshot:
+        """Получает актуальный снимок каталогов.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+
+        Returns:
+            Снимок каталогов
+        """
+        if self._is_fresh():
+            return self._snapshot
+
+        async with self._lock:
+            # Снимок мог обновить другой обработчик, пока мы ждали блокировку
+            if self._is_fresh():
+                return self._snapshot
+            return await self._load(stp_repo)
+
+    async def refresh(self, stp_repo: MainRequestsRepo) -> CatalogSnapshot:
+        """Принудительно перезагружает каталоги.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+
+        Returns:
+            Новый снимок каталогов
+        """
+        async with self._lock:
+            return await self._load(stp_repo)
+
+    def invalidate(self) -> None:
+        """Помечает каталоги устаревшими. Следующее чтение перезагрузит их."""
+        self._snapshot = None
+        self._version += 1
+
+    async def _load(self, stp_repo: MainRequestsRepo) -> CatalogSnapshot:
+        session = stp_repo.session
+        achievements = (
+            await session.scalars(select(Achievement).order_by(Achievement.id))
+        ).all()
+        products = (await session.scalars(select(Product).order_by(Product.id))).all()
+
+        # Отвязываем объекты от сессии, чтобы снимок пережил ее закрытие
+        for instance in (*achievements, *products):
+            if instance in session:
+                session.expunge(instance)
+
+        self._version += 1
+        self._snapshot = CatalogSnapshot.build(self._version, achievements, products)
+        logger.debug(
+            f"[Каталог] Версия {self._version}: {len(achievements)} достижений, "
+            f"{len(products)} предметов"
+        )
+        return self._snapshot
+
+
+_catalog_cache: Optional[CatalogCache] = None
+
+
+def get_catalog_cache() -> CatalogCache:
+    """Получает глобальный экземпляр кэша каталогов (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр CatalogCache
+    """
+    global _catalog_cache
+    if _catalog_cache is None:
+        _catalog_cache = CatalogCache()
+    return _catalog_cache
@@ -0,0 +1,442 @@
+"""Справочник сотрудников в памяти процесса.
+
+Модуль хранит снимок таблицы сотрудников вместе с индексами для поиска:
+префиксы и триграммы нормализованных слов ФИО, а также индексы по
+подразделению, роли и руководителю. Поиск, /whois, inline-поиск и получение
+руководителя обслуживаются из снимка без запросов к базе.
+
+Снимок обновляется инкрементально после изменений сотрудников ботом
+(refresh_users) и полностью - по таймеру и при истечении TTL.
+"""
+
+import asyncio
+import itertools
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import inspect, select
+from stp_database.models.STP import Employee
+from stp_database.repo.STP import MainRequestsRepo
+
+from tgbot.services.replicas import EMPLOYEES_CHANGED, get_invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# Максимальный возраст снимка до полной перезагрузки при чтении
+DIRECTORY_TTL = timedelta(minutes=10)
+
+_WORD_SPLIT = re.compile(r"[\s\-]+")
+
+# Счетчик поколений снимков для различения перезагрузок справочника
+_generations = itertools.count(1)
+
+
+def normalize_name(text: str) -> str:
+    """Нормализует строку для поиска: нижний регистр, ё -> е, одиночные пробелы.
+
+    Args:
+        text: Исходная строка
+
+    Returns:
+        Нормализованная строка
+    """
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def _detached_copy(employee: Employee) -> Employee:
+    """Создает копию сотрудника, не привязанную к сессии.
+
+    Объекты из сессии обработчика (в том числе пользователь из middleware)
+    не отвязываются, а копируются, чтобы не ломать работу обработчика.
+
+    Args:
+        employee: Экземпляр пользователя с моделью Employee
+
+    Returns:
+        Копия сотрудника со значениями всех колонок
+    """
+    return Employee(**{
+        attr.key: getattr(employee, attr.key) for attr in inspect(Employee).column_attrs
+    })
+
+
+class EmployeeIndex:
+    """Снимок сотрудников с поисковыми индексами.
+
+    Attributes:
+        generation: Номер снимка, меняется при каждой полной перезагрузке
+        version: Счетчик изменений снимка, растет при каждом обновлении сотрудника
+    """
+
+    def __init__(self, employees: Iterable[Employee] = ()):
+        """Строит индексы по списку сотрудников.
+
+        Args:
+            employees: Сотрудники
+        """
+        self.loaded_at = datetime.now()
+        self.generation = next(_generations)
+        self.version = 0
+        self.by_id: Dict[int, Employee] = {}
+        self.by_user_id: Dict[int, Employee] = {}
+        self.by_fullname: Dict[str, Employee] = {}
+        self.by_username: Dict[str, int] = {}
+        self.by_division: Dict[str, Set[int]] = defaultdict(set)
+        self.by_role: Dict[int, Set[int]] = defaultdict(set)
+        self.by_head: Dict[str, Set[int]] = defaultdict(set)
+        self._names: Dict[int, str] = {}
+        self._prefixes: Dict[str, Set[int]] = defaultdict(set)
+        self._trigrams: Dict[str, Set[int]] = defaultdict(set)
+
+        for employee in employees:
+            self.upsert(employee)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def _words(self, name: str) -> List[str]:
+        return [word for word in _WORD_SPLIT.split(name) if word]
+
+    def upsert(self, employee: Employee) -> None:
+        """Добавляет или обновляет сотрудника во всех индексах.
+
+        Args:
+            employee: Экземпляр пользователя с моделью Employee (не привязанный к сессии)
+        """
+        self.remove(employee.id)
+        self.version += 1
+
+        pk = employee.id
+        self.by_id[pk] = employee
+        if employee.user_id:
+            self.by_user_id[employee.user_id] = employee
+        if employee.fullname:
+            self.by_fullname[employee.fullname] = employee
+        if employee.username:
+            self.by_username[employee.username.lower()] = pk
+        if employee.division:
+            self.by_division[employee.division].add(pk)
+        if employee.role is not None:
+            self.by_role[employee.role].add(pk)
+        if employee.head:
+            self.by_head[employee.head].add(pk)
+
+        name = normalize_name(employee.fullname or "")
+        self._names[pk] = name
+        for word in self._words(name):
+            for end in range(1, len(word) + 1):
+                self._prefixes[word[:end]].add(pk)
+            for trigram in _trigrams(word):
+                self._trigrams[trigram].add(pk)
+
+    def remove(self, pk: int) -> None:
+        """Удаляет сотрудника из всех индексов.
+
+        Args:
+            pk: Идентификатор сотрудника в базе
+        """
+        employee = self.by_id.pop(pk, None)
+        if employee is None:
+            return
+        self.version += 1
+
+        if self.by_user_id.get(employee.user_id) is employee:
+            del self.by_user_id[employee.user_id]
+        if self.by_fullname.get(employee.fullname) is employee:
+            del self.by_fullname[employee.fullname]
+        if employee.username and self.by_username.get(employee.username.lower()) == pk:
+            del self.by_username[employee.username.lower()]
+        self.by_division.get(employee.division, set()).discard(pk)
+        self.by_role.get(employee.role, set()).discard(pk)
+        self.by_head.get(employee.head, set()).discard(pk)
+
+        name = self._names.pop(pk, "")
+        for word in self._words(name):
+            for end in range(1, len(word) + 1):
+                self._prefixes.get(word[:end], set()).discard(pk)
+            for trigram in _trigrams(word):
+                self._trigrams.get(trigram, set()).discard(pk)
+
+    def get_user(
+        self, user_id: Optional[int] = None, fullname: Optional[str] = None
+    ) -> Optional[Employee]:
+        """Получает сотрудника по идентификатору Telegram или ФИО.
+
+        Args:
+            user_id: Идентификатор пользователя Telegram
+            fullname: ФИО сотрудника
+
+        Returns:
+            Сотрудник или None
+        """
+        if user_id is not None:
+            return self.by_user_id.get(user_id)
+        if fullname is not None:
+            return self.by_fullname.get(fullname)
+        return None
+
+    def get_head(self, employee: Employee) -> Optional[Employee]:
+        """Получает руководителя сотрудника.
+
+        Args:
+            employee: Экземпляр пользователя с моделью Employee
+
+        Returns:
+            Руководитель или None
+        """
+        if not employee or not employee.head:
+            return None
+        return self.by_fullname.get(employee.head)
+
+    def get_users(
+        self,
+        roles: Optional[int | Iterable[int]] = None,
+        division: Optional[str] = None,
+        head: Optional[str] = None,
+    ) -> List[Employee]:
+        """Получает сотрудников с фильтрами по индексам.
+
+        Args:
+            roles: Роль или список ролей
+            division: Подразделение
+            head: ФИО руководителя
+
+        Returns:
+            Список сотрудников, отсортированный по ФИО
+        """
+        selected: Optional[Set[int]] = None
+
+        if roles is not None:
+            role_ids = [roles] if isinstance(roles, int) else roles
+            selected = set().union(*(self.by_role.get(r, set()) for r in role_ids))
+        if division is not None:
+            by_division = self.by_division.get(division, set())
+            selected = by_division if selected is None else selected & by_division
+        if head is not None:
+            by_head = self.by_head.get(head, set())
+            selected = by_head if selected is None else selected & by_head
+
+        pks = self.by_id.keys() if selected is None else selected
+        return sorted((self.by_id[pk] for pk in pks), key=lambda e: e.fullname or "")
+
+    def _match_token(
+        self, token: str, candidates: Optional[Set[int]] = None
+    ) -> Set[int]:
+        if len(token) < 3:
+            # Для коротких частей триграмм нет - проверяем подстроку напрямую
+            pool = self._names.keys() if candidates is None else candidates
+            return {pk for pk in pool if token in self._names[pk]}
+
+        grams = sorted(
+            (self._trigrams.get(gram, set()) for gram in _trigrams(token)), key=len
+        )
+        matched = set(grams[0]) if candidates is None else candidates & grams[0]
+        for gram in grams[1:]:
+            matched &= gram
+            if not matched:
+                break
+        # Триграммы дают надмножество - проверяем подстроку
+        return {pk for pk in matched if token in self._names[pk]}
+
+    def search_ids(
+        self, query: str, candidates: Optional[Set[int]] = None
+    ) -> List[int]:
+        """Ищет сотрудников и возвращает все совпадения в порядке релевантности.
+
+        Каждая часть запроса должна встречаться в ФИО как подстрока, поэтому
+        совпадения более длинного запроса всегда входят в совпадения его префикса.
+        Выше в выдаче сотрудники, чье ФИО начинается с запроса, затем совпадения
+        по началу слов (по индексу префиксов), затем остальные - по алфавиту.
+
+        Args:
+            query: Поисковый запрос (ФИО, идентификатор Telegram или юзернейм)
+            candidates: Ограничение поиска по ФИО (совпадения префикса запроса)
+
+        Returns:
+            Идентификаторы найденных сотрудников в базе
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        found: Set[int] = set()
+
+        if normalized.isdigit() and (by_user := self.by_user_id.get(int(normalized))):
+            found.add(by_user.id)
+        if (pk := self.by_username.get(normalized.lstrip("@"))) is not None:
+            found.add(pk)
+
+        tokens = normalized.split()
+        matched = candidates
+        for token in tokens:
+            matched = self._match_token(token, matched)
+            if not matched:
+                break
+        found |= matched or set()
+
+        def rank(pk: int):
+            return (
+                not self._names[pk].startswith(normalized),
+                not all(pk in self._prefixes.get(t, ()) for t in tokens),
+                self.by_id[pk].fullname or "",
+            )
+
+        return sorted(found, key=rank)
+
+    def search(self, query: str, limit: int = 50) -> List[Employee]:
+        """Ищет сотрудников по ФИО, идентификатору Telegram или юзернейму.
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное количество результатов
+
+        Returns:
+            Список найденных сотрудников в порядке релевантности
+        """
+        return [self.by_id[pk] for pk in self.search_ids(query)[:limit]]
+
+
+class EmployeeDirectory:
+    """Кэш справочника сотрудников с инкрементальным обновлением."""
+
+    def __init__(self, ttl: timedelta = DIRECTORY_TTL):
+        """Инициализирует справочник.
+
+        Args:
+            ttl: Максимальный возраст снимка до полной перезагрузки при чтении
+        """
+        self.ttl = ttl
+        self._index: Optional[EmployeeIndex] = None
+        self._lock = asyncio.Lock()
+        # Сотрудники, измененные другими репликами, перечитываются при чтении
+        self._stale_user_ids: Set[int] = set()
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._index is not None
+            and datetime.now() - self._index.loaded_at < self.ttl
+        )
+
+    async def get(self, stp_repo: MainRequestsRepo) -> EmployeeIndex:
+        """Получает актуальный снимок справочника.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+
+        Returns:
+            Снимок сотрудников с индексами
+        """
+        if self._is_fresh():
+            if self._stale_user_ids:
+                await self._refresh_index(stp_repo, self._stale_user_ids)
+            return self._index
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._index
+            return await self._load(stp_repo)
+
+    async def refresh(self, stp_repo: MainRequestsRepo) -> EmployeeIndex:
+        """Полностью перезагружает справочник.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+
+        Returns:
+            Новый снимок справочника
+        """
+        async with self._lock:
+            return await self._load(stp_repo)
+
+    async def refresh_users(
+        self, stp_repo: MainRequestsRepo, user_ids: Iterable[int]
+    ) -> None:
+        """Перечитывает из базы указанных сотрудников после их изменения.
+
+        Если снимок еще не загружен, ничего не делает: сотрудники попадут
+        в него при первой загрузке. Сотрудники, которых не было в снимке
+        (например, только что авторизованные), добавляются в него. Остальные
+        реплики получают событие и перечитывают сотрудников при чтении.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            user_ids: Идентификаторы пользователей Telegram
+        """
+        user_ids = [int(user_id) for user_id in user_ids if user_id is not None]
+        if not user_ids:
+            return
+        await get_invalidation_bus().broadcast(EMPLOYEES_CHANGED, user_ids=user_ids)
+        await self._refresh_index(stp_repo, user_ids)
+
+    def mark_stale(self, user_ids: Iterable[int]) -> None:
+        """Помечает сотрудников устаревшими после изменения другой репликой.
+
+        Args:
+            user_ids: Идентификаторы пользователей Telegram
+        """
+        if self._index is not None:
+            self._stale_user_ids.update(int(user_id) for user_id in user_ids)
+
+    async def _refresh_index(
+        self, stp_repo: MainRequestsRepo, user_ids: Iterable[int]
+    ) -> None:
+        index = self._index
+        user_ids = list(user_ids)
+        self._stale_user_ids.difference_update(user_ids)
+        if index is None or not user_ids:
+            return
+
+        employees = (
+            await stp_repo.session.scalars(
+                select(Employee).where(Employee.user_id.in_(user_ids))
+            )
+        ).all()
+        for employee in employees:
+            # Идентификатор Telegram мог перейти от другой записи
+            previous = index.by_user_id.get(employee.user_id)
+            if previous is not None and previous.id != employee.id:
+                index.remove(previous.id)
+            index.upsert(_detached_copy(employee))
+
+        # Сотрудники, удаленные из базы, удаляются и из справочника
+        found = {employee.user_id for employee in employees}
+        for user_id in set(user_ids) - found:
+            if stale := index.by_user_id.get(user_id):
+                index.remove(stale.id)
+
+    def invalidate(self) -> None:
+        """Помечает справочник устаревшим. Следующее чтение перезагрузит его."""
+        self._index = None
+
+    async def _load(self, stp_repo: MainRequestsRepo) -> EmployeeIndex:
+        started = datetime.now()
+        employees = (await stp_repo.session.scalars(select(Employee))).all()
+        self._index = EmployeeIndex(_detached_copy(e) for e in employees)
+        self._stale_user_ids.clear()
+        logger.debug(
+            f"[Справочник] Загружено сотрудников: {len(self._index)} "
+            f"за {(datetime.now() - started).total_seconds():.2f}с"
+        )
+        return self._index
+
+
+_employee_directory: Optional[EmployeeDirectory] = None
+
+
+def get_employee_directory() -> EmployeeDirectory:
+    """Получает глобальный экземпляр справочника сотрудников (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр EmployeeDirectory
+    """
+    global _employee_directory
+    if _employee_directory is None:
+        _employee_directory = EmployeeDirectory()
+    return _employee_directory
@@ -6,20 +6,28 @@
 
 import hashlib
 import logging
+import time
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, TypeVar
 
-import pandas as pd
-from cachetools import TTLCache
+from cachetools import LRUCache, TTLCache
+
+from tgbot.services.metrics import record_excel_cache
 
 from ..utils.excel_helpers import get_cell_value
 from ..utils.validators import is_valid_fullname
 from .constants import MONTH_NAMES_TITLE, MONTHS_ORDER
+from .workbook import get_workbook_store, open_workbook
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class ExcelFileCache:
     """Система кэширования файлов Excel с автоматической инвалидацией."""
@@ -104,7 +112,7 @@ class ExcelFileCache:
 
     def get_dataframe(
         self, file_path: Path, sheet_name: str = "ГРАФИК"
-    ) -> Optional[pd.DataFrame]:
+    ) -> Optional["pd.DataFrame"]:
         """Получает кешированный DataFrame или загружает из файла.
 
         Args:
@@ -127,18 +135,16 @@ class ExcelFileCache:
         # Пытаемся получить файл из кеша
         if cache_key in self._df_cache:
             logger.debug(f"[Cache] Попадание для {file_path.name}:{sheet_name}")
+            record_excel_cache(hit=True)
             return self._df_cache[cache_key]
 
         # Загрузка из файла
         logger.debug(f"[Cache] Промах для {file_path.name}:{sheet_name}, загрузка...")
+        started = time.perf_counter()
         try:
-            # Используем pandas
-            df = pd.read_excel(
-                file_path,
-                sheet_name=sheet_name,
-                header=None,
-                dtype=str,
-            )
+            # Лист берется из общей сессии книги, архив разбирается один раз
+            df = open_workbook(file_path).get_sheet(sheet_name, dtype=str)
+            record_excel_cache(hit=False, load_time=time.perf_counter() - started)
 
             # Сохраняем в кеш
             self._df_cache[cache_key] = df
@@ -199,7 +205,7 @@ class ExcelFileCache:
 
             return None
 
-    def _build_indexes(self, file_key: str, df: pd.DataFrame):
+    def _build_indexes(self, file_key: str, df: "pd.DataFrame"):
         """Создает индексы для быстрого поиска пользователей и дат.
 
         Args:
@@ -249,7 +255,7 @@ class ExcelFileCache:
             logger.warning(f"[Cache] Ошибка построения индекса дат: {e}")
 
     @staticmethod
-    def _column_belongs_to_month(df: pd.DataFrame, col_idx: int, month: str) -> bool:
+    def _column_belongs_to_month(df: "pd.DataFrame", col_idx: int, month: str) -> bool:
         """Проверяет принадлежит ли столбец указанному месяцу.
 
         Args:
@@ -337,6 +343,7 @@ class ExcelFileCache:
         self._file_metadata.clear()
         self._user_indexes.clear()
         self._date_indexes.clear()
+        get_workbook_store().clear()
         logger.info("[Cache] Cleared all caches")
 
     def get_stats(self) -> Dict[str, Any]:
@@ -355,6 +362,9 @@ class ExcelFileCache:
     def warm_cache(self, uploads_directory: str = "uploads") -> Dict[str, Any]:
         """Прогревает кэш путем загрузки всех Excel файлов из директории uploads.
 
+        Файлы прогреваются от новых к старым, листы дежурств - начиная с
+        текущего месяца, чтобы первыми попадали в кэш самые запрашиваемые.
+
         Args:
             uploads_directory: Путь к директории с загруженными файлами
 
@@ -390,11 +400,15 @@ class ExcelFileCache:
             logger.info(f"[Cache Warm] Не найдено Excel файлов в {uploads_path}")
             return stats
 
+        # Сначала свежие файлы: к ним относится большинство запросов
+        excel_files.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+
         # Список листов для прогрева
         sheet_names_to_warm = ["ГРАФИК"]
 
-        # Добавляем листы дежурств для каждого месяца (в правильном регистре)
-        for month in MONTH_NAMES_TITLE:
+        # Добавляем листы дежурств начиная с текущего месяца (в правильном регистре)
+        current = datetime.now().month - 1
+        for month in MONTH_NAMES_TITLE[current:] + MONTH_NAMES_TITLE[:current]:
             sheet_names_to_warm.append(f"Дежурство {month}")
 
         # Прогреваем кэш для каждого файла
@@ -403,8 +417,11 @@ class ExcelFileCache:
                 stats["processed_files"] += 1
                 logger.debug(f"[Cache Warm] Обрабатываем файл: {excel_file.name}")
 
-                # Пытаемся загрузить каждый лист
+                # Загружаем только листы, которые есть в книге
+                workbook = open_workbook(excel_file)
                 for sheet_name in sheet_names_to_warm:
+                    if not workbook.has_sheet(sheet_name):
+                        continue
                     try:
                         df = self.get_dataframe(excel_file, sheet_name)
                         if df is not None:
@@ -463,6 +480,96 @@ def get_cache() -> ExcelFileCache:
     return _global_cache
 
 
+class FileSnapshotCache:
+    """Кэш материализованных снимков листов Excel по версии файла.
+
+    Снимок строится один раз на версию файла (время изменения и размер)
+    и используется всеми читателями до следующей загрузки файла. Снимок
+    должен иметь атрибут version - его проставляет кэш.
+    """
+
+    def __init__(self, name: str, max_size: int = 64):
+        """Инициализирует кэш.
+
+        Args:
+            name: Название кэша для логов
+            max_size: Максимальное количество снимков в кэше
+        """
+        self.name = name
+        self._snapshots: LRUCache = LRUCache(maxsize=max_size)
+        self.builds = 0
+
+    @staticmethod
+    def file_version(file_path: Path) -> Tuple[int, int]:
+        """Получает версию файла.
+
+        Args:
+            file_path: Путь к файлу
+
+        Returns:
+            Кортеж (время изменения в наносекундах, размер)
+        """
+        stat = file_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path: Path, key: Tuple[Any, ...], build: Callable[[], T]) -> T:
+        """Получает снимок, при необходимости строя его заново.
+
+        Args:
+            file_path: Путь к файлу
+            key: Дополнительная часть ключа (лист, месяц и т.п.)
+            build: Функция построения снимка по текущему файлу
+
+        Returns:
+            Снимок листа
+        """
+        cache_key = (str(file_path.absolute()), *key)
+        version = self.file_version(file_path)
+
+        snapshot = self._snapshots.get(cache_key)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        snapshot = build()
+        snapshot.version = version
+        self._snapshots[cache_key] = snapshot
+        self.builds += 1
+        logger.debug(f"[Cache] Построен снимок {self.name}: {file_path.name} {key}")
+        return snapshot
+
+    def clear(self):
+        """Очищает кэш снимков."""
+        self._snapshots.clear()
+
+
+_roster_cache: Optional[FileSnapshotCache] = None
+_group_sheet_cache: Optional[FileSnapshotCache] = None
+
+
+def get_roster_cache() -> FileSnapshotCache:
+    """Получает глобальный кэш графиков дежурных (паттерн singleton).
+
+    Returns:
+        Кэш снимков DutyRoster по (файл, лист, год, месяц)
+    """
+    global _roster_cache
+    if _roster_cache is None:
+        _roster_cache = FileSnapshotCache("графика дежурных")
+    return _roster_cache
+
+
+def get_group_sheet_cache() -> FileSnapshotCache:
+    """Получает глобальный кэш листов групп (паттерн singleton).
+
+    Returns:
+        Кэш снимков GroupSheet по (файл, лист)
+    """
+    global _group_sheet_cache
+    if _group_sheet_cache is None:
+        _group_sheet_cache = FileSnapshotCache("групп", max_size=16)
+    return _group_sheet_cache
+
+
 @lru_cache(maxsize=128)
 def normalize_month(month: str) -> str:
     """Нормализует название месяца с кэшированием.
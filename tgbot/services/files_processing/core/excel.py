@@ -3,9 +3,7 @@
 import logging
 import re
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from tgbot.misc.dicts import schedule_types
 
@@ -14,6 +12,9 @@ from ..utils.validators import is_valid_fullname
 from .cache import get_cache
 from .constants import MONTHS_ORDER
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,10 +31,10 @@ class ExcelReader:
         self.file_path = file_path
         self.sheet_name = sheet_name
         self.cache = get_cache()
-        self._df: Optional[pd.DataFrame] = None
+        self._df: Optional["pd.DataFrame"] = None
 
     @property
-    def df(self) -> pd.DataFrame:
+    def df(self) -> "pd.DataFrame":
         """Получает датафрейм.
 
         Returns:
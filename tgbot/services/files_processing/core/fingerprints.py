@@ -0,0 +1,261 @@
+"""Отпечатки загруженных файлов.
+
+Для каждой загрузки хранятся два хэша:
+
+- content_hash - SHA-256 содержимого файла, считается при скачивании;
+- values_hash - SHA-256 значений ячеек всех листов книги. Он не зависит от
+  форматирования, поэтому совпадает у файлов, которые отличаются только
+  оформлением.
+
+Схема записей о загрузках находится в stp_database, поэтому отпечатки
+хранятся рядом с файлами (uploads/.fingerprints.json) по file_id записи
+о загрузке.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+from .workbook import open_workbook
+
+logger = logging.getLogger(__name__)
+
+# Результат сравнения с предыдущей версией файла
+STATUS_NEW = "new"
+STATUS_CHANGED = "changed"
+STATUS_SAME_VALUES = "same_values"
+STATUS_IDENTICAL = "identical"
+
+STATUS_TITLES = {
+    STATUS_IDENTICAL: "Файл не изменился",
+    STATUS_SAME_VALUES: "Изменилось только оформление",
+}
+
+
+@dataclass(slots=True)
+class FileFingerprint:
+    """Отпечаток загрузки файла.
+
+    Attributes:
+        file_id: Идентификатор файла Telegram из записи о загрузке
+        file_name: Название файла
+        content_hash: Хэш содержимого файла
+        values_hash: Хэш значений ячеек (None для файлов не Excel)
+        status: Результат сравнения с предыдущей версией файла
+        created_at: Время загрузки (unix time)
+    """
+
+    file_id: str
+    file_name: str
+    content_hash: str
+    values_hash: Optional[str] = None
+    status: str = STATUS_NEW
+    created_at: float = 0.0
+
+    @property
+    def is_unchanged(self) -> bool:
+        """Значения файла не изменились относительно предыдущей версии."""
+        return self.status in STATUS_TITLES
+
+
+class HashingWriter:
+    """Файл для записи, считающий хэш записанных данных."""
+
+    def __init__(self, file: BinaryIO):
+        """Оборачивает файл.
+
+        Args:
+            file: Файл, открытый для записи в бинарном режиме
+        """
+        self.file = file
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> int:
+        """Записывает часть данных, обновляя хэш.
+
+        Args:
+            chunk: Часть данных
+
+        Returns:
+            Количество записанных байт
+        """
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        return self.file.write(chunk)
+
+    def flush(self) -> None:
+        """Сбрасывает буфер файла."""
+        self.file.flush()
+
+    def hexdigest(self) -> str:
+        """Хэш записанных данных."""
+        return self._hash.hexdigest()
+
+
+def hash_file(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Считает хэш содержимого файла.
+
+    Args:
+        file_path: Путь к файлу
+        chunk_size: Размер читаемой части файла
+
+    Returns:
+        SHA-256 содержимого
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_workbook_values(file_path: Path) -> str:
+    """Считает хэш значений ячеек всех листов книги.
+
+    Пустые строки в конце листа и пустые ячейки в конце строки не учитываются:
+    их количество зависит от оформления, а не от данных.
+
+    Args:
+        file_path: Путь к файлу Excel
+
+    Returns:
+        SHA-256 значений ячеек
+    """
+    workbook = open_workbook(file_path)
+    digest = hashlib.sha256()
+    for sheet_name in workbook.sheet_names:
+        digest.update(f"\x1d{sheet_name}".encode())
+        empty_rows = 0
+        for row in workbook.iter_rows(sheet_name, dtype=str):
+            values = list(row)
+            while values and values[-1] is None:
+                values.pop()
+            if not values:
+                empty_rows += 1
+                continue
+            digest.update(b"\x1e" * (empty_rows + 1))
+            empty_rows = 0
+            digest.update(
+                "\x1f".join("" if value is None else value for value in values).encode()
+            )
+    return digest.hexdigest()
+
+
+class FingerprintIndex:
+    """Хранилище отпечатков загрузок в JSON-файле."""
+
+    def __init__(
+        self,
+        path: Path = Path("uploads") / ".fingerprints.json",
+        max_records: int = 2000,
+    ):
+        """Инициализирует хранилище.
+
+        Args:
+            path: Путь к файлу хранилища
+            max_records: Максимальное количество хранимых отпечатков
+        """
+        self.path = path
+        self.max_records = max_records
+        self._records: Optional[Dict[str, FileFingerprint]] = None
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, FileFingerprint]:
+        # Файл могла изменить другая реплика - перечитываем по mtime
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._records is not None and mtime == self._mtime:
+            return self._records
+
+        self._records = {}
+        self._mtime = mtime
+        if mtime is None:
+            return self._records
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for record in data.values():
+                self._records[record["file_id"]] = FileFingerprint(**record)
+        except Exception as e:
+            logger.error(f"[Отпечатки] Не удалось прочитать {self.path}: {e}")
+        return self._records
+
+    def _save(self) -> None:
+        data = {file_id: asdict(record) for file_id, record in self._records.items()}
+        self.path.parent.mkdir(exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        temp_path.replace(self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def get(self, file_id: str) -> Optional[FileFingerprint]:
+        """Получает отпечаток загрузки.
+
+        Args:
+            file_id: Идентификатор файла Telegram из записи о загрузке
+
+        Returns:
+            Отпечаток или None, если его нет
+        """
+        with self._lock:
+            return self._load().get(file_id)
+
+    def latest(self, file_name: str) -> Optional[FileFingerprint]:
+        """Получает отпечаток последней загрузки файла.
+
+        Args:
+            file_name: Название файла
+
+        Returns:
+            Отпечаток или None, если файл не загружался
+        """
+        with self._lock:
+            records = [
+                record
+                for record in self._load().values()
+                if record.file_name == file_name
+            ]
+        return max(records, key=lambda record: record.created_at, default=None)
+
+    def add(self, fingerprint: FileFingerprint) -> None:
+        """Сохраняет отпечаток загрузки.
+
+        Args:
+            fingerprint: Отпечаток
+        """
+        if not fingerprint.created_at:
+            fingerprint.created_at = time.time()
+        with self._lock:
+            records = self._load()
+            records[fingerprint.file_id] = fingerprint
+            if len(records) > self.max_records:
+                oldest = sorted(records.values(), key=lambda record: record.created_at)
+                for record in oldest[: len(records) - self.max_records]:
+                    del records[record.file_id]
+            try:
+                self._save()
+            except Exception as e:
+                logger.error(f"[Отпечатки] Не удалось сохранить {self.path}: {e}")
+
+
+_fingerprint_index: Optional[FingerprintIndex] = None
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """Получает глобальное хранилище отпечатков (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр FingerprintIndex
+    """
+    global _fingerprint_index
+    if _fingerprint_index is None:
+        _fingerprint_index = FingerprintIndex()
+    return _fingerprint_index
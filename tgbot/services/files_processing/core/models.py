@@ -4,8 +4,24 @@
 элементов графиков работы.
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+def name_key(fullname: str) -> str:
+    """Ключ имени для поиска по индексам.
+
+    Совпадает с правилом BaseParser.names_match: сравниваются фамилия
+    и имя, а короткие имена - целиком.
+
+    Args:
+        fullname: ФИО
+
+    Returns:
+        Ключ имени
+    """
+    parts = fullname.split()
+    return " ".join(parts[:2]) if len(parts) >= 2 else fullname.strip()
 
 
 @dataclass(slots=True)
@@ -119,3 +135,112 @@ class GroupMemberInfo:
     position: str = ""
     working_hours: str = ""
     duty_info: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class DutyShift:
+    """Смена дежурного из листа дежурств (без данных из базы).
+
+    Attributes:
+        name: ФИО дежурного как в файле
+        shift_type: Тип смены ("П" - помощник, "С" - старший)
+        schedule: График дежурства (например, "09:00-18:00")
+    """
+
+    name: str
+    shift_type: str
+    schedule: str
+
+
+@dataclass(slots=True)
+class DutyRoster:
+    """Материализованный график дежурных направления на месяц.
+
+    Attributes:
+        version: Версия файла дежурств, из которого построен график
+        by_day: Смены по дню месяца
+        by_name: Смены по ключу имени (фамилия и имя) и дню месяца
+    """
+
+    version: Tuple[int, int]
+    by_day: Dict[int, List[DutyShift]] = field(default_factory=dict)
+    by_name: Dict[str, Dict[int, DutyShift]] = field(default_factory=dict)
+
+    def add(self, day: int, shift: DutyShift) -> None:
+        """Добавляет смену в график и индексы.
+
+        Args:
+            day: День месяца
+            shift: Смена дежурного
+        """
+        self.by_day.setdefault(day, []).append(shift)
+        self.by_name.setdefault(name_key(shift.name), {}).setdefault(day, shift)
+
+    def get_day(self, day: int) -> List[DutyShift]:
+        """Получает смены дежурных на день.
+
+        Args:
+            day: День месяца
+
+        Returns:
+            Список смен
+        """
+        return self.by_day.get(day, [])
+
+    def get_person_days(self, fullname: str) -> Dict[int, DutyShift]:
+        """Получает дежурства сотрудника за месяц.
+
+        Args:
+            fullname: ФИО сотрудника
+
+        Returns:
+            Словарь {день_месяца: смена}
+        """
+        if not fullname:
+            return {}
+        return self.by_name.get(name_key(fullname), {})
+
+
+@dataclass(slots=True)
+class GroupSheetRow:
+    """Строка сотрудника из листа графика.
+
+    Attributes:
+        name: ФИО сотрудника
+        schedule: График работы
+        position: Должность
+        hours: Рабочие часы по индексу столбца даты (только ячейки со временем)
+    """
+
+    name: str
+    schedule: Optional[str]
+    position: str
+    hours: Dict[int, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class GroupSheet:
+    """Снимок листа графика: участники групп по руководителям.
+
+    Attributes:
+        version: Версия файла графика, из которого построен снимок
+        members_by_head: Строки сотрудников по ключу имени руководителя
+        date_columns: Столбцы дат по (месяц, день), заполняются по мере запросов
+    """
+
+    version: Tuple[int, int]
+    members_by_head: Dict[str, List[GroupSheetRow]] = field(default_factory=dict)
+    date_columns: Dict[Tuple[int, int], Optional[int]] = field(default_factory=dict)
+
+    def get_members(self, head_fullname: str) -> List[GroupSheetRow]:
+        """Получает строки сотрудников группы руководителя.
+
+        Args:
+            head_fullname: ФИО руководителя
+
+        Returns:
+            Список строк сотрудников
+        """
+        if not head_fullname:
+            return []
+        return self.members_by_head.get(name_key(head_fullname), [])
@@ -0,0 +1,213 @@
+"""Движки чтения Excel.
+
+Разбор .xlsx - самая затратная по CPU операция бота. Если установлен
+python-calamine (разбор на Rust), книги читаются через него, иначе через
+openpyxl. Стили ячеек (цвет дополнительных смен) доступны только в openpyxl,
+поэтому такие чтения всегда выполняются через него.
+
+Для полного прохода по листу без построения DataFrame (сотрудники, увольнения)
+используется потоковое чтение строк iter_book_rows.
+
+Сравнение скорости движков на реальном файле:
+
+    python -m tgbot.services.files_processing.core.readers "uploads/ГРАФИК НЦК I 2026.xlsx"
+"""
+
+import importlib.util
+import logging
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+ENGINE_AUTO = "auto"
+ENGINE_CALAMINE = "calamine"
+ENGINE_OPENPYXL = "openpyxl"
+
+# Движки в порядке предпочтения
+ENGINES = (ENGINE_CALAMINE, ENGINE_OPENPYXL)
+
+SheetRef = Union[str, int]
+Row = Tuple[Any, ...]
+
+_engine: Optional[str] = None
+
+
+def is_engine_available(engine: str) -> bool:
+    """Проверяет, установлен ли движок.
+
+    Args:
+        engine: Название движка
+
+    Returns:
+        True если движок можно использовать
+    """
+    if engine == ENGINE_CALAMINE:
+        return importlib.util.find_spec("python_calamine") is not None
+    return engine == ENGINE_OPENPYXL
+
+
+def available_engines() -> List[str]:
+    """Получает установленные движки в порядке предпочтения.
+
+    Returns:
+        Список названий движков
+    """
+    return [engine for engine in ENGINES if is_engine_available(engine)]
+
+
+def set_engine(engine: str = ENGINE_AUTO) -> str:
+    """Выбирает движок чтения книг.
+
+    Если запрошенный движок не установлен, используется самый быстрый
+    из установленных.
+
+    Args:
+        engine: Название движка или "auto"
+
+    Returns:
+        Выбранный движок
+    """
+    global _engine
+    if engine != ENGINE_AUTO and not is_engine_available(engine):
+        logger.warning(f"[Excel] Движок {engine} недоступен, выбираем автоматически")
+        engine = ENGINE_AUTO
+    if engine == ENGINE_AUTO:
+        engine = available_engines()[0]
+    _engine = engine
+    logger.info(f"[Excel] Движок чтения книг: {engine}")
+    return engine
+
+
+def get_engine(styles: bool = False) -> str:
+    """Получает движок чтения книг.
+
+    Args:
+        styles: Нужны ли стили ячеек
+
+    Returns:
+        Название движка
+    """
+    if styles:
+        return ENGINE_OPENPYXL
+    if _engine is None:
+        return set_engine()
+    return _engine
+
+
+def _normalize_calamine_row(row: Sequence[Any], offset: int) -> Row:
+    """Приводит строку calamine к значениям openpyxl.
+
+    Пустые ячейки - None, целые числа - int, даты - datetime (как у pandas).
+    """
+    values = [None] * offset
+    for value in row:
+        if value == "":
+            value = None
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        values.append(value)
+    return tuple(values)
+
+
+def iter_book_rows(book: Any, engine: str, sheet_name: str) -> Iterator[Row]:
+    """Потоково читает строки листа открытой книги.
+
+    Строки и колонки нумеруются с начала листа, как в DataFrame
+    с header=None. Пустые ячейки - None.
+
+    Args:
+        book: Книга движка (pd.ExcelFile.book)
+        engine: Движок книги
+        sheet_name: Название листа
+
+    Yields:
+        Кортежи значений ячеек строки
+    """
+    if engine == ENGINE_CALAMINE:
+        sheet = book.get_sheet_by_name(sheet_name)
+        # calamine пропускает пустые колонки перед первой заполненной
+        offset = sheet.start[1] if sheet.start else 0
+        for row in sheet.iter_rows():
+            yield _normalize_calamine_row(row, offset)
+        return
+
+    yield from book[sheet_name].iter_rows(values_only=True)
+
+
+@dataclass(slots=True)
+class EngineBenchmark:
+    """Результат замера движка на одном листе.
+
+    Attributes:
+        engine: Движок
+        sheet: Лист
+        rows: Количество строк
+        open_ms: Открытие книги, мс
+        parse_ms: Разбор листа в DataFrame (dtype=str), мс
+        stream_ms: Потоковое чтение строк листа, мс
+    """
+
+    engine: str
+    sheet: str
+    rows: int
+    open_ms: float
+    parse_ms: float
+    stream_ms: float
+
+
+def benchmark_engines(
+    file_path: Path, sheets: Optional[List[SheetRef]] = None, repeat: int = 3
+) -> List[EngineBenchmark]:
+    """Замеряет скорость чтения книги каждым установленным движком.
+
+    Для каждого замера берется лучшее время из нескольких повторов.
+
+    Args:
+        file_path: Путь к файлу Excel
+        sheets: Листы для замера (по умолчанию все листы книги)
+        repeat: Количество повторов
+
+    Returns:
+        Результаты замеров
+    """
+    import pandas as pd
+
+    def best(func) -> Tuple[float, Any]:
+        timings, result = [], None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(min(timings), 1), result
+
+    results = []
+    for engine in available_engines():
+        open_ms, _ = best(lambda: pd.ExcelFile(file_path, engine=engine).close())
+        with pd.ExcelFile(file_path, engine=engine) as excel:
+            for sheet in sheets or excel.sheet_names:
+                name = excel.sheet_names[sheet] if isinstance(sheet, int) else sheet
+                parse_ms, df = best(lambda: excel.parse(name, header=None, dtype=str))
+                stream_ms, _ = best(
+                    lambda: sum(1 for _ in iter_book_rows(excel.book, engine, name))
+                )
+                results.append(
+                    EngineBenchmark(engine, name, len(df), open_ms, parse_ms, stream_ms)
+                )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(
+            "Использование: python -m tgbot.services.files_processing.core.readers "
+            "<файл.xlsx> [лист ...]"
+        )
+    for result in benchmark_engines(Path(sys.argv[1]), sys.argv[2:] or None):
+        print(asdict(result))
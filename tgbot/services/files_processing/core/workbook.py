@@ -0,0 +1,258 @@
+"""Сессии книг Excel: один разбор архива на версию файла.
+
+Файл .xlsx - это zip-архив, и каждый вызов pd.read_excel заново открывает
+и распаковывает его. Сессия открывает книгу один раз (pd.ExcelFile) и лениво
+разбирает запрошенные листы, запоминая результат. Сессии хранятся по версии
+файла (путь, mtime, размер), поэтому кэш, задачи HR, статистика загрузки и
+поиск изменений работают с одним разобранным архивом.
+
+Книга читается самым быстрым установленным движком (см. readers). Для полного
+прохода по листу без DataFrame есть потоковое чтение строк iter_rows.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from .readers import ENGINE_OPENPYXL, Row, SheetRef, get_engine, iter_book_rows
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class WorkbookSession:
+    """Открытая книга Excel с ленивым разбором листов."""
+
+    def __init__(self, file_path: Path, engine: Optional[str] = None):
+        """Открывает книгу.
+
+        Если быстрый движок не смог открыть файл, книга открывается через openpyxl.
+
+        Args:
+            file_path: Путь к файлу Excel
+            engine: Движок чтения (по умолчанию выбранный в readers)
+        """
+        import pandas as pd
+
+        self.file_path = file_path
+        self.engine = engine or get_engine()
+        try:
+            self._excel = pd.ExcelFile(file_path, engine=self.engine)
+        except Exception as e:
+            if self.engine == ENGINE_OPENPYXL:
+                raise
+            logger.warning(
+                f"[Книга] Движок {self.engine} не открыл {file_path.name}: {e}, "
+                f"используем {ENGINE_OPENPYXL}"
+            )
+            self.engine = ENGINE_OPENPYXL
+            self._excel = pd.ExcelFile(file_path, engine=self.engine)
+        self._sheets: Dict[Tuple[str, Optional[type]], "pd.DataFrame"] = {}
+        self._lock = threading.Lock()
+        self.parsed = 0
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Названия листов книги."""
+        return self._excel.sheet_names
+
+    def resolve_sheet(self, sheet: SheetRef) -> Optional[str]:
+        """Получает название листа по названию или номеру.
+
+        Args:
+            sheet: Название или номер листа
+
+        Returns:
+            Название листа или None, если его нет в книге
+        """
+        names = self.sheet_names
+        if isinstance(sheet, int):
+            return names[sheet] if 0 <= sheet < len(names) else None
+        return sheet if sheet in names else None
+
+    def has_sheet(self, sheet: SheetRef) -> bool:
+        """Проверяет наличие листа в книге.
+
+        Args:
+            sheet: Название или номер листа
+
+        Returns:
+            True если лист есть в книге
+        """
+        return self.resolve_sheet(sheet) is not None
+
+    def get_sheet(
+        self, sheet: SheetRef = 0, dtype: Optional[type] = None
+    ) -> "pd.DataFrame":
+        """Получает лист без заголовков, разбирая его при первом запросе.
+
+        Возвращаемый DataFrame общий для всех потребителей и не должен
+        изменяться на месте.
+
+        Args:
+            sheet: Название или номер листа
+            dtype: Тип значений (str - все значения строками, как в ExcelFileCache)
+
+        Returns:
+            DataFrame листа
+
+        Raises:
+            ValueError: Листа нет в книге
+        """
+        name = self.resolve_sheet(sheet)
+        if name is None:
+            raise ValueError(f"Worksheet named '{sheet}' not found")
+
+        key = (name, dtype)
+        with self._lock:
+            df = self._sheets.get(key)
+            if df is None:
+                df = self._excel.parse(name, header=None, dtype=dtype)
+                self._sheets[key] = df
+                self.parsed += 1
+                logger.debug(f"[Книга] Разобран лист {self.file_path.name}:{name}")
+        return df
+
+    def iter_rows(
+        self, sheet: SheetRef = 0, dtype: Optional[type] = None
+    ) -> Iterator[Row]:
+        """Потоково читает строки листа без построения DataFrame.
+
+        Если лист с таким dtype уже разобран, строки берутся из него.
+        Строки и колонки нумеруются как в get_sheet, пустые ячейки - None.
+
+        Args:
+            sheet: Название или номер листа
+            dtype: Тип значений (str - непустые значения строками, как в get_sheet)
+
+        Yields:
+            Кортежи значений ячеек строки
+
+        Raises:
+            ValueError: Листа нет в книге
+        """
+        import pandas as pd
+
+        name = self.resolve_sheet(sheet)
+        if name is None:
+            raise ValueError(f"Worksheet named '{sheet}' not found")
+
+        df = self._sheets.get((name, dtype))
+        if df is not None:
+            for row in df.itertuples(index=False, name=None):
+                yield tuple(None if pd.isna(value) else value for value in row)
+            return
+
+        for row in iter_book_rows(self._excel.book, self.engine, name):
+            if dtype is str:
+                row = tuple(None if value is None else str(value) for value in row)
+            yield row
+
+    def close(self) -> None:
+        """Закрывает книгу."""
+        self._excel.close()
+
+
+class _SessionCache(LRUCache):
+    """LRU-кэш сессий, закрывающий вытесненные книги."""
+
+    def popitem(self):
+        key, session = super().popitem()
+        session.close()
+        return key, session
+
+
+class WorkbookStore:
+    """Хранилище открытых книг по версии файла."""
+
+    def __init__(self, max_size: int = 8):
+        """Инициализирует хранилище.
+
+        Args:
+            max_size: Максимальное количество открытых книг
+        """
+        self._sessions: LRUCache = _SessionCache(maxsize=max_size)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    @staticmethod
+    def _version(file_path: Path) -> Tuple[str, int, int]:
+        stat = file_path.stat()
+        return str(file_path.absolute()), stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path: Path) -> WorkbookSession:
+        """Получает сессию книги для текущей версии файла.
+
+        Args:
+            file_path: Путь к файлу Excel
+
+        Returns:
+            Сессия книги
+        """
+        file_path = Path(file_path)
+        version = self._version(file_path)
+        with self._lock:
+            session = self._sessions.get(version)
+            if session is not None:
+                self.reused += 1
+                return session
+
+            # Предыдущие версии файла больше не нужны
+            for stale in [key for key in self._sessions if key[0] == version[0]]:
+                self._sessions.pop(stale).close()
+
+            session = WorkbookSession(file_path)
+            self._sessions[version] = session
+            self.opened += 1
+            logger.debug(f"[Книга] Открыт файл {file_path.name}")
+            return session
+
+    def invalidate(self, file_path: Path) -> None:
+        """Закрывает все версии книги.
+
+        Args:
+            file_path: Путь к файлу Excel
+        """
+        path = str(Path(file_path).absolute())
+        with self._lock:
+            for stale in [key for key in self._sessions if key[0] == path]:
+                self._sessions.pop(stale).close()
+
+    def clear(self) -> None:
+        """Закрывает все книги."""
+        with self._lock:
+            # Вытеснение через popitem закрывает каждую книгу
+            self._sessions.clear()
+
+
+_workbook_store: Optional[WorkbookStore] = None
+
+
+def get_workbook_store() -> WorkbookStore:
+    """Получает глобальное хранилище книг (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр WorkbookStore
+    """
+    global _workbook_store
+    if _workbook_store is None:
+        _workbook_store = WorkbookStore()
+    return _workbook_store
+
+
+def open_workbook(file_path: Path) -> WorkbookSession:
+    """Открывает книгу или возвращает уже открытую для этой версии файла.
+
+    Args:
+        file_path: Путь к файлу Excel
+
+    Returns:
+        Сессия книги
+    """
+    return get_workbook_store().get(file_path)
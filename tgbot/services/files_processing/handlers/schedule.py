@@ -14,6 +14,7 @@ from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.keyboards.auth import auth_kb
+from tgbot.services.schedule_cache import ScheduleKey, get_schedule_cache
 
 from ..core.analyzers import ScheduleAnalyzer
 from ..core.exceptions import (
@@ -22,6 +23,7 @@ from ..core.exceptions import (
     UserNotFoundError,
 )
 from ..formatters.schedule import ScheduleFormatter
+from ..managers.files import ScheduleFileManager
 from ..parsers.schedule import (
     DutyScheduleParser,
     GroupScheduleParser,
@@ -44,6 +46,7 @@ class ScheduleHandlerService:
         self.group_parser = GroupScheduleParser()
         self.formatter = ScheduleFormatter()
         self.analyzer = ScheduleAnalyzer()
+        self.file_manager = ScheduleFileManager()
 
     @staticmethod
     async def check_user_auth(event: CallbackQuery, user: Employee) -> bool:
@@ -126,10 +129,29 @@ class ScheduleHandlerService:
         Returns:
             Отформатированная строка с расписанием
         """
+        # Текст меняется только с файлами графиков и сделками сотрудника
+        cache = get_schedule_cache()
+        cache_key = ScheduleKey(
+            user_id=user.user_id,
+            fullname=user.fullname,
+            division=user.division,
+            month=month,
+            year=year,
+            compact=compact,
+            with_duties=stp_repo is not None,
+            with_links=bot is not None,
+            day=get_current_date().date(),
+            files_version=self.file_manager.get_files_version(),
+            exchanges_version=cache.exchanges_version(user.user_id),
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             if stp_repo:
                 # График с дежурными
-                return (
+                text = (
                     await self.schedule_parser.get_user_schedule_formatted_with_duties(
                         fullname=user.fullname,
                         month=month,
@@ -142,7 +164,7 @@ class ScheduleHandlerService:
                 )
             else:
                 # Обычный график
-                return self.schedule_parser.get_user_schedule_formatted(
+                text = self.schedule_parser.get_user_schedule_formatted(
                     fullname=user.fullname,
                     month=month,
                     year=year,
@@ -154,6 +176,11 @@ class ScheduleHandlerService:
             logger.error(f"Schedule error (optimized): {e}", exc_info=True)
             return f"❌ <b>Ошибка графика:</b>\n<code>{e}</code>"
 
+        # Ошибки не кэшируем, чтобы следующий запрос попробовал снова
+        if text and not text.startswith("❌"):
+            cache.store(cache_key, text)
+        return text
+
     async def get_duties_response(
         self, division: str, date: Optional[datetime.datetime] = None, stp_repo=None
     ) -> str:
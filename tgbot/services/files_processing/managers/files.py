@@ -198,6 +198,28 @@ class ScheduleFileManager:
             logger.error(f"[График] Ошибка нахождения файла для месяца: {e}")
             return self._search_schedule_file(division)  # Fallback to default search
 
+    def get_files_version(self) -> int:
+        """Возвращает версию набора загруженных файлов.
+
+        Версия меняется при добавлении, удалении или перезаписи любого файла
+        в папке загрузок и используется как часть ключа кешей отрендеренных
+        графиков.
+
+        Returns:
+            Версия файлов (0 если папка не существует)
+        """
+        try:
+            entries = tuple(
+                sorted(
+                    (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                    for entry in os.scandir(self.uploads_folder)
+                    if entry.is_file()
+                )
+            )
+        except FileNotFoundError:
+            return 0
+        return hash(entries)
+
     def clear_cache(self, division: Optional[str] = None) -> None:
         """Очищает кеш.
 
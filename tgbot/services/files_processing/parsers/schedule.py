@@ -12,20 +12,31 @@ import logging
 import re
 from collections import defaultdict
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from aiogram import Bot
 from aiogram.utils.deep_linking import create_start_link
-from openpyxl import load_workbook
 from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.misc.dicts import schedule_types
 from tgbot.misc.helpers import format_fullname, tz_perm
+from tgbot.services.directory import EmployeeIndex, get_employee_directory
 
 from ..core.analyzers import ScheduleAnalyzer
+from ..core.cache import get_group_sheet_cache, get_roster_cache
 from ..core.excel import ExcelReader
-from ..core.models import DutyInfo, GroupMemberInfo, HeadInfo
+from ..core.models import (
+    DutyInfo,
+    DutyRoster,
+    DutyShift,
+    GroupMemberInfo,
+    GroupSheet,
+    GroupSheetRow,
+    HeadInfo,
+    name_key,
+)
 from ..formatters.schedule import ScheduleFormatter
 from ..managers.files import MonthManager
 from ..utils.time_parser import (
@@ -98,7 +109,8 @@ class ScheduleParser(BaseParser):
             division: Направление
             year: Год (опционально)
             stp_repo: Репозиторий операций с базой STP
-            current_day_only: Если True, получает дежурство только для текущего дня
+            current_day_only: Не используется: дежурства сотрудника за месяц
+                берутся из закэшированного графика дежурных
             bot: Экземпляр бота
 
         Returns:
@@ -112,52 +124,17 @@ class ScheduleParser(BaseParser):
                     day: (schedule, None) for day, schedule in schedule_data.items()
                 }
 
-            # Получаем парсер графика дежурных
-            duty_parser = DutyScheduleParser()
-
-            # Получаем данные о текущем дне
+            # Дежурства сотрудника берем из индекса имен графика дежурных
             current_year = datetime.now().year
-            current_month_num = datetime.now().month
-            current_day_num = datetime.now().day
             month_num = MonthManager.get_month_number(month)
-
-            # Проверяем открыт ли текущий месяц
-            is_current_month = (current_year, month_num) == (
-                current_year,
-                current_month_num,
-            )
-
-            month_duties = {}
-
-            # Для компактного режима грузим дежурных только за текущий день
-            if current_day_only and is_current_month:
-                try:
-                    current_date = datetime(current_year, month_num, current_day_num)
-                    today_duties = await duty_parser.get_duties_for_date(
-                        current_date, division, stp_repo
-                    )
-                    if today_duties:
-                        month_duties[current_day_num] = today_duties
-                    logger.debug(
-                        f"[Excel] Получены дежурные только на текущий день ({current_day_num})"
-                    )
-                except Exception as e:
-                    logger.debug(
-                        f"[Excel] Ошибка получения дежурных на текущий день: {e}"
-                    )
-            else:
-                # Дежурные на весь месяц (для детального просмотра или не текущего месяца)
-                try:
-                    first_day_of_month = datetime(current_year, month_num, 1)
-                    month_duties = await duty_parser.get_duties_for_month(
-                        first_day_of_month, division, stp_repo
-                    )
-                    logger.debug(
-                        f"[Excel] Получены дежурные на {len(month_duties)} дней на {month}"
-                    )
-                except Exception as e:
-                    logger.warning(f"[Excel] Ошибка получения дежурных на месяц: {e}")
-                    month_duties = {}
+            try:
+                roster = DutyScheduleParser().get_duty_roster(
+                    datetime(current_year, month_num, 1), division
+                )
+                person_duties = roster.get_person_days(fullname)
+            except Exception as e:
+                logger.debug(f"[Excel] Ошибка получения дежурных на {month}: {e}")
+                person_duties = {}
 
             # Получаем информацию о купленных обменах пользователя
             schedule_exchanges = {}
@@ -226,14 +203,9 @@ class ScheduleParser(BaseParser):
                         day_num = int(day_match.group(1))
 
                         # Проверяем дежурства
-                        if month_duties and day_num in month_duties:
-                            duties = month_duties[day_num]
-
-                            # Проверяем есть ли сотрудник в дежурных
-                            for duty in duties:
-                                if self.names_match(fullname, duty.name):
-                                    duty_info = f"{duty.schedule} {duty.shift_type}"
-                                    break
+                        duty = person_duties.get(day_num)
+                        if duty:
+                            duty_info = f"{duty.schedule} {duty.shift_type}"
 
                         # Проверяем сделки
                         if day_num in schedule_exchanges:
@@ -421,6 +393,8 @@ class ScheduleParser(BaseParser):
                 raise FileNotFoundError(f"Файл графика для {division} не найден")
 
             # Load with openpyxl to access cell formatting
+            from openpyxl import load_workbook
+
             wb = load_workbook(schedule_file, data_only=False)
             ws = wb["ГРАФИК"] if "ГРАФИК" in wb.sheetnames else wb.active
 
@@ -505,129 +479,152 @@ class DutyScheduleParser(BaseParser):
         """
         return parse_duty_entry(cell_value)
 
-    async def get_duties_for_month(
-        self, date: datetime, division: str, stp_repo: MainRequestsRepo
-    ) -> Dict[int, List[DutyInfo]]:
-        """Получает все дежурства за весь месяц.
+    def get_duty_file(self, division: str) -> Optional[Path]:
+        """Определяет файл дежурств направления.
 
         Args:
-            date: Дата в нужном месяце
             division: Направление
-            stp_repo: Репозиторий операций с базой STP
 
         Returns:
-            Словарь {день_месяца: список_дежурных}
+            Путь к файлу дежурств или None
         """
-        try:
-            # Определяем файл дежурств
-            if division in ["НТП1", "НТП2"]:
-                duty_file = self.file_manager.uploads_folder / "Старшинство_НТП.xlsx"
-            elif division == "НЦК":
-                duty_file = self.file_manager.uploads_folder / "Старшинство_НЦК.xlsx"
-            else:
-                duty_file = self.file_manager.find_schedule_file(division)
+        if division in ["НТП1", "НТП2"]:
+            return self.file_manager.uploads_folder / "Старшинство_НТП.xlsx"
+        if division == "НЦК":
+            return self.file_manager.uploads_folder / "Старшинство_НЦК.xlsx"
+        return self.file_manager.find_schedule_file(division)
 
-            if not duty_file or not duty_file.exists():
-                raise FileNotFoundError(
-                    f"Файл график для дежурных {division} не найден"
-                )
+    def _build_roster(self, duty_file: Path, date: datetime) -> DutyRoster:
+        """Строит график дежурных на месяц по листу дежурств.
 
-            sheet_name = self.get_duty_sheet_name(date)
+        Args:
+            duty_file: Путь к файлу дежурств
+            date: Дата в нужном месяце
 
-            # Читаем файл с графиком
-            reader = ExcelReader(duty_file, sheet_name)
-            df = reader.df
-            month_duties = {}
+        Returns:
+            График дежурных (версия проставляется кэшем)
+        """
+        reader = ExcelReader(duty_file, self.get_duty_sheet_name(date))
+        df = reader.df
+        roster = DutyRoster(version=(0, 0))
 
-            # Находим все колонки с датами для месяца
-            days_in_month = calendar.monthrange(date.year, date.month)[1]
+        # Находим ФИО сотрудников в первых колонках
+        row_name_map = {}
+        for row_idx in range(len(df)):
+            for col_idx in range(min(3, df.shape[1])):
+                cell_value = reader.get_cell(row_idx, col_idx)
+                if is_valid_fullname(cell_value):
+                    row_name_map[row_idx] = cell_value.strip()
+                    break
+
+        if not row_name_map:
+            return roster
+
+        # Колонки дат месяца ищем один раз
+        days_in_month = calendar.monthrange(date.year, date.month)[1]
+        date_columns = {}
+        for day in range(1, days_in_month + 1):
+            day_col = reader.find_date_column(datetime(date.year, date.month, day))
+            if day_col is not None and day_col < df.shape[1]:
+                date_columns[day] = day_col
+
+        for row_idx, name in row_name_map.items():
+            for day, day_col in date_columns.items():
+                duty_cell = reader.get_cell(row_idx, day_col)
+                if not duty_cell or duty_cell.strip() in [
+                    "",
+                    "nan",
+                    "None",
+                    "0",
+                    "0.0",
+                ]:
+                    continue
 
-            # Собираем все уникальные ФИО
-            names_to_fetch = set()
-            row_name_map = {}  # Map row_idx to name
+                shift_type, schedule = self.parse_duty_entry(duty_cell)
+                if shift_type in ["С", "П"] and self.is_time_format(schedule):
+                    roster.add(day, DutyShift(name, shift_type, schedule))
 
-            for row_idx in range(len(df)):
-                # Находим ФИО сотрудника в первых колонках
-                name = ""
-                for col_idx in range(min(3, df.shape[1])):
-                    cell_value = reader.get_cell(row_idx, col_idx)
+        return roster
 
-                    if is_valid_fullname(cell_value):
-                        name = cell_value.strip()
-                        break
+    def get_duty_roster(self, date: datetime, division: str) -> DutyRoster:
+        """Получает график дежурных направления на месяц.
 
-                if name:
-                    names_to_fetch.add(name)
-                    row_name_map[row_idx] = name
+        График строится один раз на версию файла дежурств и хранится в кэше.
 
-            if not names_to_fetch:
-                return {}
+        Args:
+            date: Дата в нужном месяце
+            division: Направление
 
-            employee_cache = {}
-            for name in names_to_fetch:
-                try:
-                    user: Employee = await stp_repo.employee.get_users(fullname=name)
-                    if user:
-                        employee_cache[name] = user
-                except Exception as e:
-                    logger.debug(f"Error fetching user {name}: {e}")
+        Returns:
+            График дежурных
 
-            if not employee_cache:
-                return {}
+        Raises:
+            FileNotFoundError: Если файл дежурств не найден
+        """
+        duty_file = self.get_duty_file(division)
+        if not duty_file or not duty_file.exists():
+            raise FileNotFoundError(f"Файл график для дежурных {division} не найден")
+
+        return get_roster_cache().get(
+            duty_file,
+            (self.get_duty_sheet_name(date), date.year, date.month),
+            lambda: self._build_roster(duty_file, date),
+        )
 
-            date_column_cache = {}
-            for day in range(1, days_in_month + 1):
-                day_date = datetime(date.year, date.month, day)
-                day_col = reader.find_date_column(day_date)
-                if day_col is not None:
-                    date_column_cache[day] = day_col
+    @staticmethod
+    def _resolve_shifts(
+        shifts: List[DutyShift], directory: EmployeeIndex
+    ) -> List[DutyInfo]:
+        """Дополняет смены дежурных данными сотрудников из справочника.
 
-            # Сканим все строки и колонки
-            for row_idx, name in row_name_map.items():
-                # Пропускаем если сотрудник не найден в кеше
-                if name not in employee_cache:
-                    continue
+        Args:
+            shifts: Смены дежурных
+            directory: Справочник сотрудников
 
-                user = employee_cache[name]
+        Returns:
+            Список дежурных (сотрудники, которых нет в базе, пропускаются)
+        """
+        duties = []
+        for shift in shifts:
+            user = directory.get_user(fullname=shift.name)
+            if user is None:
+                continue
+            duties.append(
+                DutyInfo(
+                    name=shift.name,
+                    user_id=user.user_id,
+                    username=user.username,
+                    schedule=shift.schedule,
+                    shift_type=shift.shift_type,
+                    work_hours=shift.schedule,
+                )
+            )
+        return duties
 
-                # Проверяем все дни в месяце
-                for day, day_col in date_column_cache.items():
-                    try:
-                        if day_col < df.shape[1]:
-                            duty_cell = reader.get_cell(row_idx, day_col)
-
-                            if duty_cell and duty_cell.strip() not in [
-                                "",
-                                "nan",
-                                "None",
-                                "0",
-                                "0.0",
-                            ]:
-                                shift_type, schedule = self.parse_duty_entry(duty_cell)
-
-                                if shift_type in ["С", "П"] and self.is_time_format(
-                                    schedule
-                                ):
-                                    if day not in month_duties:
-                                        month_duties[day] = []
-
-                                    month_duties[day].append(
-                                        DutyInfo(
-                                            name=name,
-                                            user_id=user.user_id,
-                                            username=user.username,
-                                            schedule=schedule,
-                                            shift_type=shift_type,
-                                            work_hours=schedule,
-                                        )
-                                    )
-                    except (ValueError, Exception):
-                        continue
+    async def get_duties_for_month(
+        self, date: datetime, division: str, stp_repo: MainRequestsRepo
+    ) -> Dict[int, List[DutyInfo]]:
+        """Получает все дежурства за весь месяц.
 
-            total_duties = sum(len(duties) for duties in month_duties.values())
-            logger.debug(
-                f"[Excel] Найдены дежурные на {len(month_duties)} дней, всего {total_duties} дежурных"
-            )
+        Args:
+            date: Дата в нужном месяце
+            division: Направление
+            stp_repo: Репозиторий операций с базой STP
+
+        Returns:
+            Словарь {день_месяца: список_дежурных}
+        """
+        try:
+            roster = self.get_duty_roster(date, division)
+            if not roster.by_day:
+                return {}
+
+            directory = await get_employee_directory().get(stp_repo)
+            month_duties = {}
+            for day, shifts in roster.by_day.items():
+                duties = self._resolve_shifts(shifts, directory)
+                if duties:
+                    month_duties[day] = duties
             return month_duties
 
         except Exception as e:
@@ -648,18 +645,41 @@ class DutyScheduleParser(BaseParser):
             Список дежурных на эту дату
         """
         try:
-            # Сперва пробуем использовать кеш
-            month_duties = await self.get_duties_for_month(date, division, stp_repo)
-
-            if date.day in month_duties:
-                return month_duties[date.day]
+            shifts = self.get_duty_roster(date, division).get_day(date.day)
+            if not shifts:
+                return []
 
-            return []
+            directory = await get_employee_directory().get(stp_repo)
+            return self._resolve_shifts(shifts, directory)
 
         except Exception as e:
             logger.debug(f"[Excel] Ошибка получения дежурных для даты: {e}")
             return []
 
+    def find_duty(
+        self, fullname: str, date: datetime, division: str
+    ) -> Optional[DutyShift]:
+        """Ищет дежурство сотрудника на дату по индексу имен.
+
+        Args:
+            fullname: ФИО сотрудника
+            date: Дата
+            division: Направление
+
+        Returns:
+            Смена дежурного или None
+        """
+        try:
+            return (
+                self
+                .get_duty_roster(date, division)
+                .get_person_days(fullname)
+                .get(date.day)
+            )
+        except Exception as e:
+            logger.debug(f"[Excel] Ошибка поиска дежурства {fullname}: {e}")
+            return None
+
     async def get_current_senior_duty(
         self, division: str, stp_repo: MainRequestsRepo
     ) -> Optional[DutyInfo]:
@@ -772,6 +792,7 @@ class DutyScheduleParser(BaseParser):
             return f"<b>👮‍♂️ Дежурные • {date.strftime('%d.%m.%Y')}</b>\n\n❌ Не найдено дежурных на эту дату"
 
         lines = [f"<b>👮‍♂️ Дежурные • {date.strftime('%d.%m.%Y')}</b>\n"]
+        directory = await get_employee_directory().get(stp_repo)
 
         current_senior = None
         current_helper = None
@@ -843,13 +864,13 @@ class DutyScheduleParser(BaseParser):
 
             # Добавляем старших дежурных
             for duty in group["seniors"]:
-                duty_user = await stp_repo.employee.get_users(user_id=duty.user_id)
+                duty_user = directory.get_user(user_id=duty.user_id)
                 duty_fullname = format_fullname(duty_user, True, True)
                 lines.append(f"Дежурный - {duty_fullname}")
 
             # Добавляем помощников
             for duty in group["helpers"]:
-                duty_user = await stp_repo.employee.get_users(user_id=duty.user_id)
+                duty_user = directory.get_user(user_id=duty.user_id)
                 duty_fullname = format_fullname(duty_user, True, True)
                 lines.append(f"Помощник - {duty_fullname}")
 
@@ -1158,11 +1179,91 @@ class GroupScheduleParser(BaseParser):
         except (ValueError, IndexError):
             return 99, 0
 
+    def _build_group_sheet(self, schedule_file: Path) -> GroupSheet:
+        """Строит снимок групп по листу графика.
+
+        Args:
+            schedule_file: Путь к файлу графика
+
+        Returns:
+            Снимок групп (версия проставляется кэшем)
+        """
+        reader = ExcelReader(schedule_file, "ГРАФИК")
+        df = reader.df
+        sheet = GroupSheet(version=(0, 0))
+
+        for row_idx in range(len(df)):
+            name_cell = reader.get_cell(row_idx, 0)
+            head_cell = reader.get_cell(row_idx, 5)
+            if not name_cell or len(name_cell.split()) < 2 or not head_cell:
+                continue
+
+            schedule_cell = reader.get_cell(row_idx, 1)
+            position_cell = reader.get_cell(row_idx, 4)
+            row = GroupSheetRow(
+                name=name_cell.strip(),
+                schedule=schedule_cell.strip() if schedule_cell else None,
+                position=position_cell.strip() if position_cell else "Специалист",
+            )
+            for col_idx in range(df.shape[1]):
+                cell_value = reader.get_cell(row_idx, col_idx)
+                if cell_value and self.is_time_format(cell_value):
+                    row.hours[col_idx] = cell_value
+
+            sheet.members_by_head.setdefault(name_key(head_cell), []).append(row)
+
+        return sheet
+
+    def get_group_sheet(self, division: str) -> Optional[Tuple[Path, GroupSheet]]:
+        """Получает снимок групп направления.
+
+        Снимок строится один раз на версию файла графика и хранится в кэше.
+
+        Args:
+            division: Направление
+
+        Returns:
+            Кортеж (файл графика, снимок) или None, если файл не найден
+        """
+        schedule_file = self.file_manager.find_schedule_file(division)
+        if not schedule_file:
+            logger.warning(f"Schedule file for {division} not found")
+            return None
+
+        sheet = get_group_sheet_cache().get(
+            schedule_file, ("ГРАФИК",), lambda: self._build_group_sheet(schedule_file)
+        )
+        return schedule_file, sheet
+
+    @staticmethod
+    def _get_date_column(
+        schedule_file: Path, sheet: GroupSheet, date: datetime
+    ) -> Optional[int]:
+        """Получает столбец даты с запоминанием в снимке.
+
+        Args:
+            schedule_file: Путь к файлу графика
+            sheet: Снимок групп
+            date: Дата
+
+        Returns:
+            Индекс столбца или None
+        """
+        key = (date.month, date.day)
+        if key not in sheet.date_columns:
+            reader = ExcelReader(schedule_file, "ГРАФИК")
+            sheet.date_columns[key] = reader.find_date_column(date)
+        return sheet.date_columns[key]
+
     async def get_group_members(
         self, head_fullname: str, date: datetime, division: str, stp_repo
     ) -> List[GroupMemberInfo]:
         """Получает членов группы для руководителя.
 
+        Участники берутся из снимка листа графика, сотрудники - из справочника,
+        дежурства - из индекса имен графика дежурных, поэтому время ответа
+        не зависит от размера листа.
+
         Args:
             head_fullname: ФИО руководителя
             date: Дата
@@ -1181,46 +1282,49 @@ class GroupScheduleParser(BaseParser):
             else:
                 divisions_to_check = [division]
 
+            directory = await get_employee_directory().get(stp_repo)
+
             for div in divisions_to_check:
-                schedule_file = self.file_manager.find_schedule_file(div)
-                if not schedule_file:
-                    logger.warning(f"Schedule file for {div} not found")
+                group_sheet = self.get_group_sheet(div)
+                if group_sheet is None:
                     continue
+                schedule_file, sheet = group_sheet
+                date_column = self._get_date_column(schedule_file, sheet, date)
+
+                for row in sheet.get_members(head_fullname):
+                    # Если дата найдена - показываем только работающих в этот день
+                    working_hours = None
+                    if date_column is not None:
+                        working_hours = row.hours.get(date_column)
+                        if working_hours is None:
+                            continue
+
+                    user = directory.get_user(fullname=row.name)
+                    if user is None:
+                        logger.debug(f"User {row.name} not found in DB, skipping")
+                        continue
 
-                # Use FastExcelReader with caching
-                reader = ExcelReader(schedule_file, "ГРАФИК")
-
-                # Find date column
-                date_column = reader.find_date_column(date)
-
-                # Process members from this division
-                division_members = await self._process_division_members(
-                    reader, head_fullname, date_column, stp_repo
-                )
-                group_members.extend(division_members)
+                    group_members.append(
+                        GroupMemberInfo(
+                            name=row.name,
+                            user_id=user.user_id,
+                            username=user.username,
+                            schedule=row.schedule,
+                            position=row.position,
+                            working_hours=working_hours,
+                        )
+                    )
 
-            # Fetch duty information for all members
-            if group_members:
+            # Дежурства участников берем из индекса имен графика дежурных
+            for member in group_members:
                 for div in divisions_to_check:
-                    try:
-                        duties = await self.duty_parser.get_duties_for_date(
-                            date, div, stp_repo
-                        )
-                        for member in group_members:
-                            if not hasattr(member, "duty_info") or not member.duty_info:
-                                for duty in duties:
-                                    if self.names_match(member.name, duty.name):
-                                        member.duty_info = (
-                                            f"{duty.schedule} {duty.shift_type}"
-                                        )
-                                        break
-                    except Exception as duty_error:
-                        logger.warning(
-                            f"Could not fetch duty information for {div}: {duty_error}"
-                        )
+                    duty = self.duty_parser.find_duty(member.name, date, div)
+                    if duty:
+                        member.duty_info = f"{duty.schedule} {duty.shift_type}"
+                        break
 
-            logger.info(
-                f"[Optimized] Found {len(group_members)} members for head {head_fullname}"
+            logger.debug(
+                f"[Группа] Найдено {len(group_members)} участников у {head_fullname}"
             )
             return self._sort_members_by_time(group_members)
 
@@ -1228,96 +1332,6 @@ class GroupScheduleParser(BaseParser):
             logger.error(f"Error getting group members for head: {e}")
             return []
 
-    async def _process_division_members(
-        self, reader: ExcelReader, head_fullname: str, date_column, stp_repo
-    ) -> List[GroupMemberInfo]:
-        """Обрабатывает членов группы из файла направления.
-
-        Args:
-            reader: Читатель Excel
-            head_fullname: ФИО руководителя
-            date_column: Индекс столбца даты
-            stp_repo: Репозиторий базы данных
-
-        Returns:
-            Список членов группы из этого направления
-        """
-        division_members = []
-        df = reader.df
-
-        # OPTIMIZATION 1: First pass - collect all candidate members
-        candidate_members = []
-        names_to_fetch = set()
-
-        for row_idx in range(len(df)):
-            name_cell = reader.get_cell(row_idx, 0)
-            schedule_cell = reader.get_cell(row_idx, 1)
-            position_cell = reader.get_cell(row_idx, 4)
-            head_cell = reader.get_cell(row_idx, 5)
-
-            # Check if this person belongs to the specified head
-            if not self.names_match(head_fullname, head_cell):
-                continue
-
-            if not name_cell or len(name_cell.split()) < 2:
-                continue
-
-            # Get working hours for the specific date
-            working_hours = None
-            if date_column is not None:
-                hours_cell = reader.get_cell(row_idx, date_column)
-                if hours_cell and hours_cell.strip():
-                    if self.is_time_format(hours_cell):
-                        working_hours = hours_cell
-                    else:
-                        # Non-time value - skip
-                        continue
-                else:
-                    # Empty cell - skip
-                    continue
-
-            name_stripped = name_cell.strip()
-            names_to_fetch.add(name_stripped)
-            candidate_members.append({
-                "name": name_stripped,
-                "schedule": schedule_cell.strip() if schedule_cell else None,
-                "position": position_cell.strip() if position_cell else "Специалист",
-                "working_hours": working_hours,
-            })
-
-        if not names_to_fetch:
-            return []
-
-        # OPTIMIZATION 2: Batch fetch all employees
-        employee_cache = {}
-        for name in names_to_fetch:
-            try:
-                user = await stp_repo.employee.get_users(fullname=name)
-                if user:
-                    employee_cache[name] = user
-            except Exception as e:
-                logger.debug(f"Error getting user {name}: {e}")
-
-        # OPTIMIZATION 3: Build member list from cached data
-        for candidate in candidate_members:
-            name = candidate["name"]
-            if name not in employee_cache:
-                logger.debug(f"User {name} not found in DB, skipping")
-                continue
-
-            user = employee_cache[name]
-            member = GroupMemberInfo(
-                name=name,
-                user_id=user.user_id,
-                username=user.username,
-                schedule=candidate["schedule"],
-                position=candidate["position"],
-                working_hours=candidate["working_hours"],
-            )
-            division_members.append(member)
-
-        return division_members
-
     async def get_group_members_for_user(
         self, user_fullname: str, date: datetime, division: str, stp_repo
     ) -> List[GroupMemberInfo]:
@@ -1333,7 +1347,8 @@ class GroupScheduleParser(BaseParser):
             Список коллег по группе
         """
         try:
-            user = await stp_repo.employee.get_users(fullname=user_fullname)
+            directory = await get_employee_directory().get(stp_repo)
+            user = directory.get_user(fullname=user_fullname)
             if not user or not user.head:
                 logger.warning(
                     f"User {user_fullname} not found or has no head assigned"
@@ -1341,11 +1356,7 @@ class GroupScheduleParser(BaseParser):
                 return []
 
             # Get all members under the same head
-            all_members = await self.get_group_members(
-                user.head, date, division, stp_repo
-            )
-
-            return self._sort_members_by_time(all_members)
+            return await self.get_group_members(user.head, date, division, stp_repo)
 
         except Exception as e:
             logger.error(f"Error getting colleagues for user: {e}")
@@ -3,15 +3,15 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
-
-import pandas as pd
-from pandas import DataFrame
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from ..formatters.notifications import StudiesFormatter
 from ..utils.excel_helpers import get_cell_value
 from .base import BaseParser
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,6 +55,8 @@ class StudiesScheduleParser(BaseParser):
 
     def parse_studies_file(self, file_path: Path) -> List[StudySession]:
         """Parse studies Excel file and return list of study sessions."""
+        import pandas as pd
+
         try:
             df = pd.read_excel(file_path, header=None)
             if df is None or df.empty:
@@ -124,7 +126,7 @@ class StudiesScheduleParser(BaseParser):
             return []
 
     @staticmethod
-    def _parse_session_details(df: DataFrame, start_row: int) -> Tuple[str, str, str]:
+    def _parse_session_details(df: "DataFrame", start_row: int) -> Tuple[str, str, str]:
         """Parse session title, experience level, and trainer from rows after date."""
         title = ""
         experience_level = ""
@@ -154,8 +156,10 @@ class StudiesScheduleParser(BaseParser):
         return title, experience_level, trainer
 
     @staticmethod
-    def _find_participants_start(df: DataFrame, start_row: int) -> int:
+    def _find_participants_start(df: "DataFrame", start_row: int) -> int:
         """Find the row where participant list starts (after header row)."""
+        import pandas as pd
+
         # Look for the header row with "Площадка", "ФИО", "РГ", etc.
         for i in range(start_row, min(start_row + 10, len(df))):
             if i >= len(df):
@@ -176,6 +180,8 @@ class StudiesScheduleParser(BaseParser):
     @staticmethod
     def _is_participant_row(row) -> bool:
         """Check if row contains participant data."""
+        import pandas as pd
+
         first_col = str(row.iloc[0]) if pd.notna(row.iloc[0]) else ""
 
         # Should not be empty or contain datetime
@@ -196,6 +202,8 @@ class StudiesScheduleParser(BaseParser):
     @staticmethod
     def _parse_participant_row(row) -> Optional[Tuple[str, str, str, str, str]]:
         """Parse participant data from row."""
+        import pandas as pd
+
         try:
             # Extract data from columns
             area = str(row.iloc[0]) if pd.notna(row.iloc[0]) else ""
@@ -0,0 +1,580 @@
+"""Фоновая обработка загруженных файлов.
+
+Загрузка выполняется фоновой задачей по этапам:
+скачивание → разбор → поиск изменений → запись в базу → уведомления.
+
+Повторная загрузка файла с тем же содержимым не обрабатывается, а файл
+с теми же значениями ячеек (изменилось только оформление) не сравнивается
+и не рассылает уведомления (см. fingerprints).
+
+Обработчик загрузки только создает задачу и подписывает диалог на события
+прогресса, поэтому администратор сразу получает управление. Разбор старого
+и нового файлов выполняется параллельно в потоках, не блокируя бота.
+Загрузки разных файлов обрабатываются параллельно (до max_jobs задач),
+загрузки одного и того же файла - по очереди.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from stp_database.repo.STP import MainRequestsRepo
+
+from tgbot.services.background import run_detached
+from tgbot.services.replicas import (
+    EMPLOYEES_CHANGED,
+    FILES_CHANGED,
+    get_invalidation_bus,
+)
+from tgbot.services.schedulers.hr import remove_from_groups
+from tgbot.services.uploads import get_upload_metadata
+
+from ..core.fingerprints import (
+    STATUS_CHANGED,
+    STATUS_IDENTICAL,
+    STATUS_SAME_VALUES,
+    FileFingerprint,
+    HashingWriter,
+    get_fingerprint_index,
+    hash_file,
+    hash_workbook_values,
+)
+from ..core.workbook import get_workbook_store
+from ..detectors.changes import ScheduleChangeDetector
+from ..utils.files import FileProcessor, FileStatsExtractor, FileTypeDetector
+from ..utils.schedule import extract_division_from_filename, extract_users_schedules
+from .users import (
+    EmployeeChangeSet,
+    apply_employee_changes,
+    compute_employee_changes,
+    get_users_from_excel,
+    load_employee_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGE_DOWNLOAD = "download"
+STAGE_PARSE = "parse"
+STAGE_DIFF = "diff"
+STAGE_SYNC = "sync"
+STAGE_NOTIFY = "notify"
+
+STAGE_TITLES = {
+    STAGE_DOWNLOAD: "Загрузка файла...",
+    STAGE_PARSE: "Анализ файла...",
+    STAGE_DIFF: "Поиск изменений...",
+    STAGE_SYNC: "Обновление сотрудников...",
+    STAGE_NOTIFY: "Отправка уведомлений...",
+}
+
+SCHEDULE_STAGES = [STAGE_DOWNLOAD, STAGE_PARSE, STAGE_DIFF, STAGE_SYNC, STAGE_NOTIFY]
+STUDIES_STAGES = [STAGE_DOWNLOAD, STAGE_PARSE, STAGE_NOTIFY]
+FILE_STAGES = [STAGE_DOWNLOAD]
+
+
+@dataclass(slots=True)
+class UploadRequest:
+    """Загруженный администратором документ.
+
+    Attributes:
+        file_id: Идентификатор файла Telegram
+        file_name: Название файла
+        file_size: Размер файла по данным Telegram
+        uploaded_by: Идентификатор Telegram загрузившего
+    """
+
+    file_id: str
+    file_name: str
+    file_size: Optional[int]
+    uploaded_by: int
+
+
+@dataclass(slots=True)
+class ParsedSchedule:
+    """Результат разбора файла графика.
+
+    Attributes:
+        stats: Статистика файла
+        schedules: Расписания сотрудников (только для сравнения файлов)
+        users: Сотрудники из листа графика
+        fired: ФИО уволенных по листу заявлений
+        values_hash: Хэш значений ячеек книги
+    """
+
+    stats: Dict[str, int]
+    schedules: Dict[str, Dict] = field(default_factory=dict)
+    users: List[Dict[str, Any]] = field(default_factory=list)
+    fired: List[str] = field(default_factory=list)
+    values_hash: Optional[str] = None
+
+
+UploadListener = Callable[["UploadJob"], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class UploadJob:
+    """Фоновая задача обработки загрузки.
+
+    Attributes:
+        id: Идентификатор задачи
+        request: Загруженный документ
+        stages: Этапы задачи
+        stage: Текущий этап (None - задача в очереди)
+        done: Задача завершена
+        error: Текст ошибки, если задача завершилась с ошибкой
+        file_replaced: Загрузка заменила существующий файл
+        actual_size: Размер скачанного файла
+        results: Результаты обработки для отображения в диалоге
+        fingerprint: Отпечаток загруженного файла
+        previous: Отпечаток предыдущей версии файла, если он известен
+        started_at: Время создания задачи (time.monotonic)
+        finished_at: Время завершения задачи (time.monotonic)
+    """
+
+    id: str
+    request: UploadRequest
+    stages: List[str]
+    stage: Optional[str] = None
+    done: bool = False
+    error: Optional[str] = None
+    file_replaced: bool = False
+    actual_size: int = 0
+    results: Dict[str, Any] = field(default_factory=dict)
+    fingerprint: Optional[FileFingerprint] = None
+    previous: Optional[FileFingerprint] = None
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    listeners: List[UploadListener] = field(default_factory=list, repr=False)
+
+    @property
+    def step(self) -> int:
+        """Номер текущего этапа, начиная с 1 (0 - задача в очереди)."""
+        return self.stages.index(self.stage) + 1 if self.stage else 0
+
+    @property
+    def elapsed(self) -> float:
+        """Время обработки в секундах."""
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def progress_text(self) -> str:
+        """Текст прогресса для диалога."""
+        if self.done:
+            return "Готово!"
+        if self.stage is None:
+            return "Ожидание очереди..."
+        return STAGE_TITLES[self.stage]
+
+    def subscribe(self, listener: UploadListener) -> None:
+        """Подписывает обработчик на события прогресса задачи.
+
+        Args:
+            listener: Корутина, получающая задачу после каждого изменения
+        """
+        self.listeners.append(listener)
+
+    async def emit(self) -> None:
+        """Уведомляет подписчиков об изменении задачи."""
+        for listener in self.listeners:
+            try:
+                await listener(self)
+            except Exception as e:
+                logger.debug(f"[Загрузка] Подписчик задачи {self.id} недоступен: {e}")
+
+    def to_dialog_data(self) -> Dict[str, Any]:
+        """Получает состояние задачи для данных диалога загрузки.
+
+        Returns:
+            Словарь с ключами данных диалога
+        """
+        data = {
+            "upload_job_id": self.id,
+            "upload_progress": self.step,
+            "upload_total_steps": len(self.stages),
+            "upload_progress_text": self.progress_text,
+            "processing_complete": self.done and self.error is None,
+        }
+        if self.done:
+            data.update({
+                "upload_file_path": str(Path("uploads") / self.request.file_name),
+                "upload_actual_size": self.actual_size,
+                "upload_file_replaced": self.file_replaced,
+                "upload_time": self.elapsed,
+                "processing_results": self.results,
+            })
+        return data
+
+
+class UploadPipeline:
+    """Исполнитель фоновых задач обработки загрузок."""
+
+    def __init__(self, uploads_dir: str = "uploads", max_jobs: int = 2):
+        """Инициализирует исполнитель.
+
+        Args:
+            uploads_dir: Папка с загруженными файлами
+            max_jobs: Максимальное количество одновременно обрабатываемых загрузок
+        """
+        self.uploads_dir = Path(uploads_dir)
+        self._slots = asyncio.Semaphore(max_jobs)
+        self._file_locks: Dict[str, asyncio.Lock] = {}
+        self._jobs: TTLCache = TTLCache(maxsize=100, ttl=3600)
+        self.detector = ScheduleChangeDetector(uploads_dir)
+
+    def get_job(self, job_id: str) -> Optional[UploadJob]:
+        """Получает задачу по идентификатору.
+
+        Args:
+            job_id: Идентификатор задачи
+
+        Returns:
+            Задача или None, если она не найдена
+        """
+        return self._jobs.get(job_id)
+
+    def submit(
+        self,
+        request: UploadRequest,
+        bot: Bot,
+        stp_session_pool: async_sessionmaker[AsyncSession],
+        listener: Optional[UploadListener] = None,
+    ) -> UploadJob:
+        """Создает задачу обработки загрузки и запускает ее в фоне.
+
+        Args:
+            request: Загруженный документ
+            bot: Экземпляр бота
+            stp_session_pool: Пул сессий с базой STP
+            listener: Подписчик на события прогресса
+
+        Returns:
+            Созданная задача
+        """
+        if FileTypeDetector.is_schedule_file(request.file_name):
+            stages = SCHEDULE_STAGES
+        elif FileTypeDetector.is_studies_file(request.file_name):
+            stages = STUDIES_STAGES
+        else:
+            stages = FILE_STAGES
+
+        job = UploadJob(id=uuid.uuid4().hex[:12], request=request, stages=stages)
+        if listener is not None:
+            job.subscribe(listener)
+        self._jobs[job.id] = job
+
+        run_detached(self._run(job, bot, stp_session_pool), name=f"upload-{job.id}")
+        return job
+
+    async def _run(
+        self,
+        job: UploadJob,
+        bot: Bot,
+        stp_session_pool: async_sessionmaker[AsyncSession],
+    ) -> None:
+        file_name = job.request.file_name
+        lock = self._file_locks.setdefault(file_name, asyncio.Lock())
+        try:
+            async with lock, self._slots:
+                await self._process(job, bot, stp_session_pool)
+        except Exception as e:
+            logger.error(
+                f"[Загрузка] Ошибка загрузки файла {file_name}: {e}", exc_info=True
+            )
+            job.error = f"Не удалось загрузить файл: {e}"
+        finally:
+            job.done = True
+            job.finished_at = time.monotonic()
+            logger.info(
+                f"[Загрузка] Задача {job.id} ({file_name}) завершена за {job.elapsed:.2f} с"
+            )
+            await job.emit()
+
+    async def _enter(self, job: UploadJob, stage: str) -> None:
+        job.stage = stage
+        await job.emit()
+
+    async def _process(
+        self,
+        job: UploadJob,
+        bot: Bot,
+        stp_session_pool: async_sessionmaker[AsyncSession],
+    ) -> None:
+        file_path = self.uploads_dir / job.request.file_name
+        old_path = await self._download(job, bot, file_path)
+        try:
+            async with stp_session_pool() as session:
+                await MainRequestsRepo(session).upload.add_file(
+                    file_id=job.request.file_id,
+                    file_name=file_path.name,
+                    file_size=job.actual_size,
+                    uploaded_by_user_id=job.request.uploaded_by,
+                )
+            get_upload_metadata().record(file_path.name)
+
+            if job.fingerprint.status == STATUS_IDENTICAL:
+                logger.info(
+                    f"[Загрузка] {file_path.name} совпадает с загруженным, обработка пропущена"
+                )
+            elif job.stages is SCHEDULE_STAGES:
+                await self._process_schedule(
+                    job, bot, stp_session_pool, file_path, old_path
+                )
+            elif job.stages is STUDIES_STAGES:
+                await self._process_studies(job, bot, stp_session_pool, file_path)
+
+            job.results["upload_status"] = job.fingerprint.status
+            get_fingerprint_index().add(job.fingerprint)
+        finally:
+            if old_path is not None:
+                # Книга старой версии могла быть открыта при сравнении
+                get_workbook_store().invalidate(old_path)
+                old_path.unlink(missing_ok=True)
+
+    async def _download(
+        self, job: UploadJob, bot: Bot, file_path: Path
+    ) -> Optional[Path]:
+        """Скачивает файл, считая хэш содержимого.
+
+        Файл с тем же содержимым, что и загруженный ранее, не заменяется.
+        Иначе предыдущая версия файла сохраняется для сравнения.
+
+        Returns:
+            Путь к предыдущей версии файла или None, если ее нет
+        """
+        await self._enter(job, STAGE_DOWNLOAD)
+        self.uploads_dir.mkdir(exist_ok=True)
+
+        incoming_path = self.uploads_dir / f".upload_{job.id}"
+        try:
+            file = await bot.get_file(job.request.file_id)
+            with open(incoming_path, "wb") as destination:
+                writer = HashingWriter(destination)
+                await bot.download_file(file.file_path, writer, seek=False)
+        except Exception:
+            incoming_path.unlink(missing_ok=True)
+            raise
+
+        job.actual_size = writer.size
+        job.fingerprint = FileFingerprint(
+            file_id=job.request.file_id,
+            file_name=file_path.name,
+            content_hash=writer.hexdigest(),
+        )
+        if not file_path.exists():
+            incoming_path.replace(file_path)
+            await get_invalidation_bus().publish(
+                FILES_CHANGED, file_name=file_path.name
+            )
+            return None
+
+        job.file_replaced = True
+        old_hash = await asyncio.to_thread(hash_file, file_path)
+        previous = get_fingerprint_index().latest(file_path.name)
+        if previous is not None and previous.content_hash == old_hash:
+            job.previous = previous
+
+        if old_hash == job.fingerprint.content_hash:
+            # Файл не изменился - кэши и разобранные книги остаются актуальными
+            incoming_path.unlink()
+            job.fingerprint.status = STATUS_IDENTICAL
+            job.fingerprint.values_hash = previous.values_hash if job.previous else None
+            return None
+
+        job.fingerprint.status = STATUS_CHANGED
+        old_path = self.uploads_dir / f"temp_old_{file_path.name}"
+        file_path.replace(old_path)
+        incoming_path.replace(file_path)
+        await get_invalidation_bus().publish(FILES_CHANGED, file_name=file_path.name)
+        return old_path
+
+    @staticmethod
+    def _parse_schedule(
+        file_path: Path, compare: bool, is_new: bool, hash_values: bool = True
+    ) -> ParsedSchedule:
+        """Разбирает файл графика (выполняется в отдельном потоке).
+
+        Args:
+            file_path: Путь к файлу графика
+            compare: Нужны ли расписания сотрудников для сравнения файлов
+            is_new: Новый файл (нужны сотрудники и увольнения)
+            hash_values: Нужен ли хэш значений ячеек
+
+        Returns:
+            Результат разбора
+        """
+        from tgbot.services.schedulers.hr import get_fired_users
+
+        parsed = ParsedSchedule(stats=FileStatsExtractor.extract_stats(file_path))
+        if compare:
+            parsed.schedules = extract_users_schedules(file_path)
+        if is_new:
+            parsed.users = get_users_from_excel(file_path.name)
+            parsed.fired = get_fired_users([file_path.name])
+        if hash_values:
+            # Листы уже разобраны - хэш значений считается по ним
+            parsed.values_hash = hash_workbook_values(file_path)
+        return parsed
+
+    async def _process_schedule(
+        self,
+        job: UploadJob,
+        bot: Bot,
+        stp_session_pool: async_sessionmaker[AsyncSession],
+        file_path: Path,
+        old_path: Optional[Path],
+    ) -> None:
+        from tgbot.misc.helpers import format_fullname
+
+        results = job.results
+        compare = old_path is not None
+
+        # Старый и новый файлы разбираются параллельно. Если хэш значений
+        # старого файла известен, старый файл разбирается только при изменениях
+        await self._enter(job, STAGE_PARSE)
+        old_values_hash = job.previous.values_hash if job.previous else None
+        tasks = [asyncio.to_thread(self._parse_schedule, file_path, compare, True)]
+        if compare and old_values_hash is None:
+            tasks.append(asyncio.to_thread(self._parse_schedule, old_path, True, False))
+        parsed = await asyncio.gather(*tasks)
+        new = parsed[0]
+        old = parsed[1] if len(parsed) > 1 else None
+        if old is not None:
+            old_values_hash = old.values_hash
+        job.fingerprint.values_hash = new.values_hash
+
+        if compare and new.values_hash == old_values_hash:
+            job.fingerprint.status = STATUS_SAME_VALUES
+            logger.info(
+                f"[Загрузка] Значения {file_path.name} не изменились, "
+                f"сравнение и уведомления пропущены"
+            )
+            results["new_stats"] = new.stats
+            results["old_stats"] = old.stats if old else new.stats
+            return
+
+        if compare and old is None:
+            old = await asyncio.to_thread(
+                self._parse_schedule, old_path, True, False, False
+            )
+        results["new_stats"] = new.stats
+        results["old_stats"] = old.stats if old else None
+
+        await self._enter(job, STAGE_DIFF)
+        async with stp_session_pool() as session:
+            snapshot = await load_employee_snapshot(session)
+        changes = compute_employee_changes(
+            snapshot,
+            new.users,
+            extract_division_from_filename(file_path.name),
+            new.fired,
+        )
+        employees = {row.fullname: row for row in snapshot}
+        # После синхронизации в базе останутся все, кроме уволенных, и новые
+        known_fullnames = (set(employees) - set(changes.fired_names)) | set(
+            changes.new_names
+        )
+        changed_users = (
+            self.detector.find_changes(old.schedules, new.schedules, known_fullnames)
+            if compare
+            else []
+        )
+
+        await self._enter(job, STAGE_SYNC)
+        try:
+            async with stp_session_pool() as session:
+                await apply_employee_changes(session, changes)
+        except Exception as e:
+            logger.error(f"[Загрузка] Ошибка синхронизации сотрудников: {e}")
+            changes = EmployeeChangeSet()
+        else:
+            await get_invalidation_bus().publish(EMPLOYEES_CHANGED)
+            logger.info(f"[Загрузка] Синхронизация сотрудников: {changes.summary()}")
+            if changes.fired:
+                # Уволенные уже удалены из базы, и задача увольнений их не найдет
+                run_detached(
+                    remove_from_groups(stp_session_pool, bot, changes.fired),
+                    name=f"upload-{job.id}:remove_fired",
+                )
+
+        def format_ref(ref) -> str:
+            return format_fullname(
+                fullname=ref.fullname,
+                username=ref.username,
+                user_id=ref.user_id,
+                short=True,
+                gender_emoji=True,
+            )
+
+        results["user_changes"] = changes.to_dict()
+        results["fired_names"] = [format_ref(ref) for ref in changes.fired]
+        results["updated_names"] = [format_ref(upd.employee) for upd in changes.updated]
+        results["new_names"] = [
+            format_fullname(fullname=name, short=True, gender_emoji=True)
+            for name in changes.new_names
+        ]
+
+        await self._enter(job, STAGE_NOTIFY)
+        if not changed_users:
+            return
+
+        user_ids = {
+            row.fullname: row.user_id for row in snapshot if row.user_id is not None
+        }
+        notified_users = await self.detector.notify_changes(
+            bot, changed_users, user_ids
+        )
+        results["changed_users"] = [
+            {
+                "name": format_ref(employees[change["fullname"]])
+                if change["fullname"] in employees
+                else change["fullname"],
+                "status": "✅" if change["fullname"] in notified_users else "❌",
+            }
+            for change in changed_users
+        ]
+        results["notified_users"] = notified_users
+
+    async def _process_studies(
+        self,
+        job: UploadJob,
+        bot: Bot,
+        stp_session_pool: async_sessionmaker[AsyncSession],
+        file_path: Path,
+    ) -> None:
+        from tgbot.services.schedulers.studies import check_upcoming_studies
+
+        await self._enter(job, STAGE_PARSE)
+        studies_stats = await FileProcessor.process_studies_file(file_path)
+        if not studies_stats:
+            return
+        job.results["studies_stats"] = studies_stats
+
+        await self._enter(job, STAGE_NOTIFY)
+        try:
+            job.results["notification_results"] = await check_upcoming_studies(
+                stp_session_pool, bot
+            )
+        except Exception as e:
+            logger.error(f"[Загрузка] Ошибка проверки обучений: {e}")
+
+
+_pipeline: Optional[UploadPipeline] = None
+
+
+def get_upload_pipeline() -> UploadPipeline:
+    """Получает глобальный исполнитель загрузок (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр UploadPipeline
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = UploadPipeline()
+    return _pipeline
@@ -1,62 +1,35 @@
-"""User processing service for handling Excel-based user data changes."""
+"""Синхронизация сотрудников с загруженными файлами графиков.
+
+Изменения (новые, обновленные, уволенные, отпуска) рассчитываются в памяти
+по одному снимку базы и одному разобранному листу, а затем применяются
+пакетными запросами в одной транзакции.
+"""
 
 import logging
+from dataclasses import dataclass, field
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-import pandas as pd
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from stp_database.models.STP import Employee
-from stp_database.repo.STP.employee import EmployeeRepo
 
 from tgbot.services.schedulers.hr import get_fired_users
 
+from ..core.workbook import open_workbook
 from ..parsers.base import BaseParser
-from ..utils.files import find_header_columns
+from ..utils.files import find_header_in_rows
 from ..utils.schedule import extract_division_from_filename
 
 logger = logging.getLogger(__name__)
 
 
-async def _update_existing_user(db_user: Employee, excel_user: Dict[str, str]) -> bool:
-    """Обновляет сотрудника в БД с новыми данными. Returns 1 if updated, 0 if no changes.
-
-    Args:
-        db_user: Сотрудник из БД
-        excel_user: Сотрудник из Excel файла
-
-    Returns:
-        True если сотрудник был обновлен, иначе False
-    """
-    updated = False
-    is_in_transfer_section = excel_user.get("is_in_transfer_section", False)
-
-    # Обновляем должность только если пользователь не в секции переводов
-    if not is_in_transfer_section and db_user.position != excel_user["position"]:
-        logger.info(
-            f"[Изменения] {db_user.fullname}: должность {db_user.position} → {excel_user['position']}"
-        )
-        db_user.position = excel_user["position"]
-        updated = True
-    elif is_in_transfer_section and db_user.position != excel_user["position"]:
-        logger.info(
-            f"[Изменения] {db_user.fullname}: игнорируем изменение должности (пользователь в секции переводов)"
-        )
-
-    if db_user.head != excel_user["head"]:
-        logger.info(
-            f"[Изменения] {db_user.fullname}: руководитель {db_user.head} → {excel_user['head']}"
-        )
-        db_user.head = excel_user["head"]
-        updated = True
-
-    return True if updated else False
-
-
 def get_users_from_excel(file_name: str) -> List[Dict[str, str]]:
     """Достает сотрудников из файла графиков Excel.
 
     Формат: ДАТА → График Город ПРМ Должность Руководитель 1 смена.
+    Лист читается потоково, без построения DataFrame.
 
     Args:
         file_name: Название файла Excel
@@ -73,16 +46,18 @@ def get_users_from_excel(file_name: str) -> List[Dict[str, str]]:
 
     try:
         logger.info(f"[Изменения] Читаем пользователей из файла: {file_name}")
-        df = pd.read_excel(file_path, sheet_name=0, header=None)
+        rows = open_workbook(file_path).iter_rows(0, dtype=str)
+        first_rows = list(islice(rows, 10))
 
-        header_info = find_header_columns(df)
+        header_info = find_header_in_rows(first_rows)
         if not header_info:
             logger.warning(
                 f"[Изменения] Не найдены необходимые колонки в файле {file_name}"
             )
             return users
 
-        users = _extract_users_from_dataframe(df, header_info)
+        body_rows = chain(first_rows[header_info["header_row"] + 1 :], rows)
+        users = _extract_users_from_rows(body_rows, header_info)
         logger.info(f"[Изменения] Найдено {len(users)} пользователей в файле")
         return users
 
@@ -91,232 +66,386 @@ def get_users_from_excel(file_name: str) -> List[Dict[str, str]]:
         return users
 
 
-def _extract_users_from_dataframe(
-    df: pd.DataFrame, header_info: Dict[str, int]
+def _extract_users_from_rows(
+    rows: Iterable[Sequence[Optional[str]]], header_info: Dict[str, int]
 ) -> List[Dict[str, str]]:
-    """Достает пользователей из датафрейма.
+    """Достает пользователей из строк листа после заголовка.
 
     Args:
-        df: Датафрейм
+        rows: Строки листа, следующие за строкой заголовка
         header_info: Заголовок колонки
 
     Returns:
-        Список словарей сотрудников из датафрейма
+        Список словарей сотрудников из строк листа
     """
+
+    def cell(row: Sequence[Optional[str]], col: int) -> str:
+        value = row[col] if col < len(row) else None
+        return "" if value is None else str(value)
+
     users = []
-    transfer_section_row = None
-
-    # Находим строку "Переводы/увольнения"
-    for row_idx in range(header_info["header_row"] + 1, len(df)):
-        fullname_cell = (
-            str(df.iloc[row_idx, header_info["fullname_col"]])
-            if pd.notna(df.iloc[row_idx, header_info["fullname_col"]])
-            else ""
-        )
+    in_transfer_section = False
+
+    for row_idx, row in enumerate(rows, start=header_info["header_row"] + 1):
+        fullname_cell = cell(row, header_info["fullname_col"])
+
+        # Сотрудники после строки "Переводы/увольнения" в секции переводов
         if (
-            "переводы" in fullname_cell.lower()
+            not in_transfer_section
+            and "переводы" in fullname_cell.lower()
             and "увольнения" in fullname_cell.lower()
         ):
-            transfer_section_row = row_idx
+            in_transfer_section = True
             logger.info(
                 f"[Изменения] Найдена секция 'Переводы/увольнения' в строке {row_idx}"
             )
-            break
-
-    for row_idx in range(header_info["header_row"] + 1, len(df)):
-        fullname_cell = (
-            str(df.iloc[row_idx, header_info["fullname_col"]])
-            if pd.notna(df.iloc[row_idx, header_info["fullname_col"]])
-            else ""
-        )
-        position_cell = (
-            str(df.iloc[row_idx, header_info["position_col"]])
-            if pd.notna(df.iloc[row_idx, header_info["position_col"]])
-            else ""
-        )
-        head_cell = (
-            str(df.iloc[row_idx, header_info["head_col"]])
-            if pd.notna(df.iloc[row_idx, header_info["head_col"]])
-            else ""
-        )
+            continue
 
         if BaseParser.is_valid_fullname(fullname_cell):
             fullname = fullname_cell.strip()
+            position_cell = cell(row, header_info["position_col"]).strip()
+            head_cell = cell(row, header_info["head_col"]).strip()
             position = (
-                position_cell.strip()
-                if position_cell.strip() not in ["", "nan", "None"]
+                position_cell
+                if position_cell not in ["", "nan", "None"]
                 else "Специалист"
             )
-            head = (
-                head_cell.strip()
-                if head_cell.strip() not in ["", "nan", "None"]
-                else ""
-            )
-
-            # Mark if user is in transfer section
-            is_in_transfer_section = (
-                transfer_section_row is not None and row_idx > transfer_section_row
-            )
+            head = head_cell if head_cell not in ["", "nan", "None"] else ""
 
             users.append({
                 "fullname": fullname,
                 "position": position,
                 "head": head,
-                "is_in_transfer_section": is_in_transfer_section,
+                "is_in_transfer_section": in_transfer_section,
             })
 
     return users
 
 
-async def process_fired_users_with_stats(
-    files_list: list[str] | list[Path],
-    stp_session_pool: async_sessionmaker[AsyncSession],
-) -> list[Any]:
-    """Обработка уволенных сотрудников - удаление из базы.
+@dataclass(slots=True, frozen=True)
+class EmployeeRef:
+    """Снимок сотрудника из базы для отчета об изменениях.
+
+    Attributes:
+        id: Идентификатор сотрудника в базе
+        fullname: ФИО сотрудника
+        user_id: Идентификатор Telegram
+        username: Юзернейм Telegram
+    """
+
+    id: int
+    fullname: str
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+
+
+@dataclass(slots=True)
+class EmployeeUpdate:
+    """Изменение полей сотрудника.
+
+    Attributes:
+        employee: Сотрудник
+        changes: Измененные поля {поле: (старое значение, новое значение)}
+    """
+
+    employee: EmployeeRef
+    changes: Dict[str, Tuple[Any, Any]]
+
+
+@dataclass(slots=True)
+class EmployeeChangeSet:
+    """Полный набор изменений сотрудников по загруженным файлам.
+
+    Attributes:
+        new: Новые сотрудники (строки для вставки)
+        updated: Обновленные сотрудники
+        fired: Уволенные сотрудники
+        vacation_on: Сотрудники, ушедшие в отпуск
+        vacation_off: Сотрудники, вернувшиеся из отпуска
+    """
+
+    new: List[Dict[str, Any]] = field(default_factory=list)
+    updated: List[EmployeeUpdate] = field(default_factory=list)
+    fired: List[EmployeeRef] = field(default_factory=list)
+    vacation_on: List[EmployeeRef] = field(default_factory=list)
+    vacation_off: List[EmployeeRef] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        """Нет ни одного изменения."""
+        return not (
+            self.new
+            or self.updated
+            or self.fired
+            or self.vacation_on
+            or self.vacation_off
+        )
+
+    @property
+    def new_names(self) -> List[str]:
+        """ФИО новых сотрудников."""
+        return [row["fullname"] for row in self.new]
+
+    @property
+    def updated_names(self) -> List[str]:
+        """ФИО обновленных сотрудников."""
+        return [update.employee.fullname for update in self.updated]
+
+    @property
+    def fired_names(self) -> List[str]:
+        """ФИО уволенных сотрудников."""
+        return [employee.fullname for employee in self.fired]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализует набор изменений для данных диалога.
+
+        Returns:
+            Словарь с изменениями по категориям
+        """
+        return {
+            "new": self.new_names,
+            "updated": [
+                {
+                    "fullname": update.employee.fullname,
+                    "changes": {k: list(v) for k, v in update.changes.items()},
+                }
+                for update in self.updated
+            ],
+            "fired": self.fired_names,
+            "vacation_on": [e.fullname for e in self.vacation_on],
+            "vacation_off": [e.fullname for e in self.vacation_off],
+        }
+
+    def summary(self) -> str:
+        """Краткая сводка изменений для логов."""
+        return (
+            f"добавлено {len(self.new)}, обновлено {len(self.updated)}, "
+            f"уволено {len(self.fired)}, в отпуск {len(self.vacation_on)}, "
+            f"из отпуска {len(self.vacation_off)}"
+        )
+
+
+def _ref(row) -> EmployeeRef:
+    return EmployeeRef(
+        id=row.id, fullname=row.fullname, user_id=row.user_id, username=row.username
+    )
+
+
+def compute_employee_changes(
+    db_employees: Iterable,
+    excel_users: Iterable[Dict[str, Any]] = (),
+    division: Optional[str] = None,
+    fired_names: Iterable[str] = (),
+    vacation_names: Optional[Set[str]] = None,
+) -> EmployeeChangeSet:
+    """Рассчитывает изменения сотрудников в памяти.
 
     Args:
-        files_list: Список файлов для проверки
-        stp_session_pool: Пул сессий с базой STP
+        db_employees: Снимок сотрудников из базы (id, fullname, position, head,
+            on_vacation, user_id, username)
+        excel_users: Сотрудники из файла графика
+        division: Направление файла графика (для новых сотрудников)
+        fired_names: ФИО уволенных по листу заявлений
+        vacation_names: ФИО сотрудников в отпуске сегодня. Если не указано -
+            статус отпуска не пересчитывается
 
     Returns:
-         Список фио уволенных специалистов
+        Набор изменений
     """
+    changes = EmployeeChangeSet()
+    db_employees = list(db_employees)
+
+    # При дублях ФИО обновляется первый сотрудник, увольняются все
+    by_fullname = {}
+    for row in db_employees:
+        by_fullname.setdefault(row.fullname, row)
+
+    fired_set = set(fired_names)
+    changes.fired = [_ref(row) for row in db_employees if row.fullname in fired_set]
+
+    seen = set()
+    for excel_user in excel_users:
+        fullname = excel_user["fullname"]
+        if fullname == "Стажеры общего ряда" or fullname in fired_set:
+            continue
+        if fullname in seen:
+            continue
+        seen.add(fullname)
+
+        is_in_transfer_section = excel_user.get("is_in_transfer_section", False)
+        db_user = by_fullname.get(fullname)
+
+        if db_user is None:
+            if is_in_transfer_section:
+                logger.info(
+                    f"[Изменения] Пропуск добавления {fullname} (в секции переводов)"
+                )
+                continue
+            changes.new.append({
+                "division": division,
+                "position": excel_user["position"],
+                "fullname": fullname,
+                "head": excel_user["head"],
+                "role": 0,
+            })
+            continue
+
+        updated_fields = {}
+        # Должность не меняем, пока сотрудник в секции переводов
+        if db_user.position != excel_user["position"]:
+            if is_in_transfer_section:
+                logger.info(
+                    f"[Изменения] {fullname}: игнорируем изменение должности "
+                    f"(пользователь в секции переводов)"
+                )
+            else:
+                updated_fields["position"] = (db_user.position, excel_user["position"])
+        if db_user.head != excel_user["head"]:
+            updated_fields["head"] = (db_user.head, excel_user["head"])
+
+        if updated_fields:
+            changes.updated.append(EmployeeUpdate(_ref(db_user), updated_fields))
+
+    if vacation_names is not None:
+        for row in db_employees:
+            if row.fullname in fired_set:
+                continue
+            on_vacation = row.fullname in vacation_names
+            if on_vacation and not row.on_vacation:
+                changes.vacation_on.append(_ref(row))
+            elif row.on_vacation and not on_vacation:
+                changes.vacation_off.append(_ref(row))
+
+    return changes
+
+
+async def load_employee_snapshot(session: AsyncSession) -> list:
+    """Загружает снимок сотрудников одним запросом без объектов ORM.
+
+    Args:
+        session: Сессия с базой STP
+
+    Returns:
+        Строки с полями, нужными для расчета изменений
+    """
+    result = await session.execute(
+        select(
+            Employee.id,
+            Employee.fullname,
+            Employee.position,
+            Employee.head,
+            Employee.on_vacation,
+            Employee.user_id,
+            Employee.username,
+        ).order_by(Employee.id)
+    )
+    return list(result.all())
+
+
+async def apply_employee_changes(
+    session: AsyncSession, changes: EmployeeChangeSet
+) -> None:
+    """Применяет изменения пакетными запросами в одной транзакции.
+
+    Args:
+        session: Сессия с базой STP
+        changes: Набор изменений
+    """
+    if changes.is_empty:
+        return
+
     try:
-        fired_users = get_fired_users(files_list)
-
-        if not fired_users:
-            logger.info("[Увольнения] Нет сотрудников для увольнения на сегодня")
-            return []
-
-        # Получение сессии из пула
-        async with stp_session_pool() as session:
-            user_repo = EmployeeRepo(session)
-
-            fired_names = []
-            total_deleted = 0
-
-            for fullname in fired_users:
-                try:
-                    deleted_count = await user_repo.delete_user(fullname)
-                    total_deleted += deleted_count
-                    if deleted_count > 0:
-                        fired_names.append(fullname)
-                        logger.info(
-                            f"[Увольнения] Сотрудник {fullname} - удалено {deleted_count} записей из БД"
-                        )
-                    else:
-                        logger.debug(
-                            f"[Увольнения] Сотрудник {fullname} не найден в БД"
-                        )
-                except Exception as e:
-                    logger.error(
-                        f"[Увольнения] Ошибка удаления сотрудника {fullname}: {e}"
-                    )
+        if changes.fired:
+            await session.execute(
+                delete(Employee)
+                .where(Employee.fullname.in_(set(changes.fired_names)))
+                .execution_options(synchronize_session=False)
+            )
 
-            logger.info(
-                f"[Увольнения] Обработка завершена. Удалено {total_deleted} записей для {len(fired_users)} сотрудников"
+        if changes.updated:
+            # Пакетное обновление по первичному ключу
+            await session.execute(
+                update(Employee),
+                [
+                    {"id": upd.employee.id}
+                    | {name: new for name, (_, new) in upd.changes.items()}
+                    for upd in changes.updated
+                ],
             )
 
-            return fired_names
+        if changes.new:
+            await session.execute(insert(Employee), changes.new)
 
-    except Exception as e:
-        logger.error(f"[Увольнения] Критическая ошибка при обработке увольнений: {e}")
-        return []
+        for ids, on_vacation in (
+            ([e.id for e in changes.vacation_on], True),
+            ([e.id for e in changes.vacation_off], False),
+        ):
+            if ids:
+                await session.execute(
+                    update(Employee)
+                    .where(Employee.id.in_(ids))
+                    .values(on_vacation=on_vacation)
+                    .execution_options(synchronize_session=False)
+                )
 
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
 
-async def process_user_changes(
-    stp_session_pool: async_sessionmaker[AsyncSession], file_name: str
-):
-    """Процессинг изменений должности и руководителя специалиста из файла.
+
+async def sync_employees(
+    stp_session_pool: async_sessionmaker[AsyncSession],
+    excel_users: Iterable[Dict[str, Any]] = (),
+    division: Optional[str] = None,
+    fired_names: Iterable[str] = (),
+    vacation_names: Optional[Set[str]] = None,
+) -> EmployeeChangeSet:
+    """Синхронизирует сотрудников: снимок базы, расчет изменений, пакетная запись.
 
     Args:
         stp_session_pool: Пул сессий с базой STP
-        file_name: Название файла с таблицей
+        excel_users: Сотрудники из файла графика
+        division: Направление файла графика
+        fired_names: ФИО уволенных
+        vacation_names: ФИО сотрудников в отпуске (None - не пересчитывать)
 
     Returns:
-        Список имен обновленных и новых сотрудников
+        Примененный набор изменений
     """
-    try:
-        logger.info(f"[Изменения] Проверка изменений в файле: {file_name}")
-
-        division = extract_division_from_filename(file_name)
-        excel_users = get_users_from_excel(file_name)
-
-        if not excel_users:
-            logger.info("[Изменения] Пользователи не найдены в файле")
-            return [], []
-
-        fired_users = get_fired_users([file_name])
-
-        async with stp_session_pool() as session:
-            user_repo = EmployeeRepo(session)
-            db_users = await user_repo.get_users()
-            existing_fullnames = [user.fullname for user in db_users]
-            updated_names = []
-            new_names = []
-
-            for excel_user in excel_users:
-                fullname = excel_user["fullname"]
-
-                if fullname == "Стажеры общего ряда":
-                    continue
-
-                if fullname in existing_fullnames and fullname in fired_users:
-                    await user_repo.delete_user(fullname=fullname)
-                    logger.info(f"[Изменения] Удален уволенный: {fullname}")
-
-                if fullname in fired_users:
-                    logger.info(f"[Изменения] Пропущен уволенный: {fullname}")
-                    continue
-
-                try:
-                    # Получает список существующих ФИО
-                    if fullname in existing_fullnames:
-                        # Находим конкретного сотрудника
-                        db_user = next(
-                            (user for user in db_users if user.fullname == fullname),
-                            None,
-                        )
-                        if db_user:
-                            was_updated = await _update_existing_user(
-                                db_user, excel_user
-                            )
-                            if was_updated:
-                                updated_names.append(fullname)
-                    else:
-                        is_in_transfer_section = excel_user.get(
-                            "is_in_transfer_section", False
-                        )
-                        if not is_in_transfer_section:
-                            new_user = await user_repo.add_user(
-                                division=division,
-                                position=excel_user["position"],
-                                fullname=excel_user["fullname"],
-                                head=excel_user["head"],
-                                role=0,
-                            )
-                            if new_user:
-                                new_names.append(fullname)
-                        else:
-                            logger.info(
-                                f"[Изменения] Пропуск добавления {fullname} (в секции переводов)"
-                            )
-
-                except Exception as e:
-                    logger.error(
-                        f"[Изменения] Ошибка обработки пользователя {fullname}: {e}"
-                    )
-
-            if updated_names or new_names:
-                await session.commit()
-                logger.info(
-                    f"[Изменения] Обновлено {len(updated_names)}, добавлено {len(new_names)} пользователей"
-                )
-            else:
-                logger.info("[Изменения] Нет изменений для применения")
+    async with stp_session_pool() as session:
+        db_employees = await load_employee_snapshot(session)
+        changes = compute_employee_changes(
+            db_employees, excel_users, division, fired_names, vacation_names
+        )
+        await apply_employee_changes(session, changes)
 
-            return updated_names, new_names
+    if changes.is_empty:
+        logger.info("[Изменения] Нет изменений для применения")
+    else:
+        logger.info(f"[Изменения] Синхронизация сотрудников: {changes.summary()}")
+    return changes
 
-    except Exception as e:
-        logger.error(f"[Изменения] Критическая ошибка при обработке изменений: {e}")
-        return [], []
+
+async def sync_employees_from_file(
+    stp_session_pool: async_sessionmaker[AsyncSession], file_name: str
+) -> EmployeeChangeSet:
+    """Синхронизирует сотрудников по загруженному файлу графика.
+
+    Увольнения берутся из листа заявлений файла, новые и измененные
+    сотрудники - из листа графика.
+
+    Args:
+        stp_session_pool: Пул сессий с базой STP
+        file_name: Название файла графика
+
+    Returns:
+        Примененный набор изменений
+    """
+    logger.info(f"[Изменения] Проверка изменений в файле: {file_name}")
+    return await sync_employees(
+        stp_session_pool,
+        excel_users=get_users_from_excel(file_name),
+        division=extract_division_from_filename(file_name),
+        fired_names=get_fired_users([file_name]),
+    )
@@ -5,14 +5,15 @@ and Excel files. Replaces 20+ instances of duplicate cell access patterns.
 """
 
 import logging
-from typing import Any, List, Tuple
+from typing import TYPE_CHECKING, Any, List, Tuple
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 
-def get_cell_value(df: pd.DataFrame, row: int, col: int, default: str = "") -> str:
+def get_cell_value(df: "pd.DataFrame", row: int, col: int, default: str = "") -> str:
     """Safely extract cell value from DataFrame.
 
     This replaces the common pattern:
@@ -34,6 +35,8 @@ def get_cell_value(df: pd.DataFrame, row: int, col: int, default: str = "") -> s
         >>> get_cell_value(df, 5, 0)  # Out of bounds
         ''
     """
+    import pandas as pd
+
     try:
         if row < df.shape[0] and col < df.shape[1]:
             value = df.iloc[row, col]
@@ -44,7 +47,7 @@ def get_cell_value(df: pd.DataFrame, row: int, col: int, default: str = "") -> s
 
 
 def batch_get_cells(
-    df: pd.DataFrame, positions: List[Tuple[int, int]], default: str = ""
+    df: "pd.DataFrame", positions: List[Tuple[int, int]], default: str = ""
 ) -> List[str]:
     """Batch extract multiple cells efficiently.
 
@@ -60,7 +63,7 @@ def batch_get_cells(
 
 
 def get_column_values(
-    df: pd.DataFrame, col_idx: int, start_row: int = 0, end_row: int = None
+    df: "pd.DataFrame", col_idx: int, start_row: int = 0, end_row: int = None
 ) -> List[str]:
     """Get entire column values efficiently.
 
@@ -73,6 +76,8 @@ def get_column_values(
     Returns:
         List of cell values from the column
     """
+    import pandas as pd
+
     if end_row is None:
         end_row = df.shape[0]
 
@@ -85,7 +90,7 @@ def get_column_values(
 
 
 def get_row_values(
-    df: pd.DataFrame, row_idx: int, start_col: int = 0, end_col: int = None
+    df: "pd.DataFrame", row_idx: int, start_col: int = 0, end_col: int = None
 ) -> List[str]:
     """Get entire row values efficiently.
 
@@ -98,6 +103,8 @@ def get_row_values(
     Returns:
         List of cell values from the row
     """
+    import pandas as pd
+
     if end_col is None:
         end_col = df.shape[1]
 
@@ -1,16 +1,20 @@
 """Утилиты для процессинга загруженных файлов."""
 
+import asyncio
 import fnmatch
 import logging
+from itertools import islice
 from pathlib import Path
-from typing import Optional
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence
 
+from tgbot.services.files_processing.core.workbook import open_workbook
 from tgbot.services.files_processing.utils.excel_helpers import get_cell_value
 from tgbot.services.files_processing.utils.validators import is_valid_fullname
 from tgbot.services.schedulers.hr import get_fired_users
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 # Паттерны типов файлов
@@ -19,7 +23,7 @@ DUTIES_PATTERNS = ["Старшинство*", "*Старшинство*", "*ст
 STUDIES_PATTERNS = ["Обучения *", "*обучения*"]
 
 
-def find_header_columns(df: pd.DataFrame) -> Optional[dict]:
+def find_header_columns(df: "pd.DataFrame") -> Optional[dict]:
     """Находит строки заголовков в датафрейме.
 
     Args:
@@ -28,11 +32,29 @@ def find_header_columns(df: pd.DataFrame) -> Optional[dict]:
     Returns:
         Словарь со строками и колонками с полезными данными, или None если не найдено
     """
-    for row_idx in range(min(10, len(df))):
-        row_values = []
-        for col_idx in range(min(10, len(df.columns))):
-            cell_value = get_cell_value(df, row_idx, col_idx)
-            row_values.append(cell_value.strip().upper())
+    rows = [
+        [
+            get_cell_value(df, row_idx, col_idx)
+            for col_idx in range(min(10, len(df.columns)))
+        ]
+        for row_idx in range(min(10, len(df)))
+    ]
+    return find_header_in_rows(rows)
+
+
+def find_header_in_rows(rows: Iterable[Sequence[Any]]) -> Optional[dict]:
+    """Находит строку заголовков среди первых 10 строк листа.
+
+    Args:
+        rows: Строки листа (пустые ячейки - None или "")
+
+    Returns:
+        Словарь со строками и колонками с полезными данными, или None если не найдено
+    """
+    for row_idx, row in enumerate(islice(rows, 10)):
+        row_values = [
+            "" if value is None else str(value).strip().upper() for value in row[:10]
+        ]
 
         position_col = head_col = None
 
@@ -109,7 +131,7 @@ class FileStatsExtractor:
                 return stats
 
             # Читаем Excel файл
-            df = pd.read_excel(file_path, sheet_name=0, header=None, dtype=str)
+            df = open_workbook(file_path).get_sheet(0, dtype=str)
 
             # Считаем сотрудников
             stats["total_people"] = FileStatsExtractor._count_users_in_dataframe(df)
@@ -128,7 +150,7 @@ class FileStatsExtractor:
         return stats
 
     @staticmethod
-    def _count_users_in_dataframe(df: pd.DataFrame) -> int:
+    def _count_users_in_dataframe(df: "pd.DataFrame") -> int:
         """Считает пользователей в датафрейме.
 
         Args:
@@ -154,7 +176,7 @@ class FileStatsExtractor:
         return len(users_found)
 
     @staticmethod
-    def _count_users_with_schedule(df: pd.DataFrame) -> int:
+    def _count_users_with_schedule(df: "pd.DataFrame") -> int:
         """Считает пользователей с графиком.
 
         Args:
@@ -245,7 +267,19 @@ class FileProcessor:
 
     @staticmethod
     async def process_studies_file(file_path: Path) -> Optional[dict]:
-        """Процессит файл обучений.
+        """Процессит файл обучений в отдельном потоке.
+
+        Args:
+            file_path: Путь к файлу обучений
+
+        Returns:
+            Словарь со статистикой обучений или None если файл не с обучениями
+        """
+        return await asyncio.to_thread(FileProcessor.extract_studies_stats, file_path)
+
+    @staticmethod
+    def extract_studies_stats(file_path: Path) -> Optional[dict]:
+        """Разбирает файл обучений и считает статистику.
 
         Args:
             file_path: Путь к файлу обучений
@@ -7,15 +7,16 @@
 import logging
 import re
 from pathlib import Path
-from typing import Dict, Optional
-
-import pandas as pd
-from pandas import DataFrame
+from typing import TYPE_CHECKING, Dict, Optional
 
 from ..core.constants import MONTHS_ORDER
+from ..core.workbook import open_workbook
 from ..utils.excel_helpers import get_cell_value
 from ..utils.validators import is_valid_fullname
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,7 +35,7 @@ def extract_users_schedules(file_path: Path) -> Dict[str, Dict[str, str]]:
 
     try:
         # Читаем файл графиков
-        df = pd.read_excel(file_path, sheet_name=0, header=None, dtype=str)
+        df = open_workbook(file_path).get_sheet(0, dtype=str)
         logger.debug(f"[График] Прочитан Excel файл {file_path}, размер: {df.shape}")
 
         # Находим все месяцы и их диапазоны колонок
@@ -90,7 +91,7 @@ def extract_users_schedules(file_path: Path) -> Dict[str, Dict[str, str]]:
         return {}
 
 
-def find_all_months_ranges(df: DataFrame) -> Dict[str, tuple]:
+def find_all_months_ranges(df: "DataFrame") -> Dict[str, tuple]:
     """Находит диапазоны колонок для всех месяцев в файле.
 
     Args:
@@ -106,6 +107,8 @@ def find_all_months_ranges(df: DataFrame) -> Dict[str, tuple]:
         target_month: str, target_first_col: int = 0
     ) -> Optional[int]:
         """Находит колонку с указанным месяцем."""
+        import pandas as pd
+
         for col_idx in range(target_first_col, len(df.columns)):
             # Проверяем заголовки колонок
             col_name = str(df.columns[col_idx]).upper() if df.columns[col_idx] else ""
@@ -144,7 +147,7 @@ def find_all_months_ranges(df: DataFrame) -> Dict[str, tuple]:
     return months_ranges
 
 
-def find_all_users_rows(df: DataFrame) -> Dict[str, int]:
+def find_all_users_rows(df: "DataFrame") -> Dict[str, int]:
     """Находит строки всех пользователей в файле.
 
     Args:
@@ -168,7 +171,7 @@ def find_all_users_rows(df: DataFrame) -> Dict[str, int]:
 
 
 def find_day_headers_in_range(
-    df: DataFrame, start_col: int, end_col: int
+    df: "DataFrame", start_col: int, end_col: int
 ) -> Dict[int, str]:
     """Находит заголовки дней в указанном диапазоне колонок.
 
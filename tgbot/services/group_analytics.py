@@ -0,0 +1,326 @@
+"""Аналитика игровых показателей группы руководителя.
+
+Модуль собирает транзакции, достижения и покупки всей группы пакетными
+запросами и рассчитывает топы, историю и суммы за один проход. Результат
+кратковременно кэшируется для каждого руководителя, чтобы переключение
+между экранами группы не повторяло запросы.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import case, func, select
+from stp_database.models.STP import (
+    Achievement,
+    Employee,
+    Product,
+    Purchase,
+    Transaction,
+)
+from stp_database.repo.STP import MainRequestsRepo
+
+from tgbot.services.balances import UserBalance, get_balance_projection
+from tgbot.services.catalog import get_catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# Окно загрузки транзакций для истории и достижений
+TRANSACTIONS_WINDOW = timedelta(days=180)
+
+# Ограничения списков для отображения
+ACHIEVEMENTS_LIMIT = 50
+HISTORY_LIMIT = 100
+
+
+@dataclass(slots=True)
+class GroupPurchase:
+    """Покупка сотрудника группы с информацией о предмете.
+
+    Attributes:
+        member: Сотрудник, совершивший покупку
+        user_purchase: Экземпляр покупки с моделью Purchase
+        product_info: Экземпляр предмета с моделью Product
+    """
+
+    member: Employee
+    user_purchase: Purchase
+    product_info: Product
+
+    @property
+    def current_usages(self) -> int:
+        """Количество использований предмета."""
+        return self.user_purchase.usage_count
+
+    @property
+    def max_usages(self) -> int:
+        """Максимальное количество использований предмета."""
+        return self.product_info.count
+
+
+@dataclass(slots=True)
+class GroupAnalytics:
+    """Агрегированные игровые показатели группы.
+
+    Attributes:
+        members: Сотрудники группы
+        balances: Балансы сотрудников по идентификатору Telegram
+        month_sums: Сумма баллов за текущий месяц по идентификатору Telegram
+        achievements: Последние полученные достижения (сотрудник, транзакция, достижение)
+        achievements_total: Общее количество полученных достижений
+        history: Последние транзакции группы (сотрудник, транзакция)
+        history_total: Общее количество транзакций группы
+        purchases: Покупки группы, отсортированные от новых к старым
+        built_at: Время сборки аналитики
+    """
+
+    members: List[Employee]
+    balances: Dict[int, UserBalance] = field(default_factory=dict)
+    month_sums: Dict[int, int] = field(default_factory=dict)
+    achievements: List[Tuple[Employee, Transaction, Achievement]] = field(
+        default_factory=list
+    )
+    achievements_total: int = 0
+    history: List[Tuple[Employee, Transaction]] = field(default_factory=list)
+    history_total: int = 0
+    purchases: List[GroupPurchase] = field(default_factory=list)
+    built_at: datetime = field(default_factory=datetime.now)
+
+    def balance_of(self, member: Employee) -> UserBalance:
+        """Получает баланс сотрудника группы.
+
+        Args:
+            member: Экземпляр пользователя с моделью Employee
+
+        Returns:
+            Баланс сотрудника (нулевой, если сотрудник не авторизован)
+        """
+        return self.balances.get(member.user_id) or UserBalance()
+
+    def top_by_balance(self, limit: Optional[int] = None) -> List[Tuple[Employee, int]]:
+        """Рейтинг сотрудников по балансу.
+
+        Args:
+            limit: Ограничение количества позиций
+
+        Returns:
+            Список (сотрудник, баланс) по убыванию баланса
+        """
+        rating = sorted(
+            ((member, self.balance_of(member).balance) for member in self.members),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+        return rating[:limit] if limit else rating
+
+    def top_by_month(self, limit: Optional[int] = None) -> List[Tuple[Employee, int]]:
+        """Рейтинг сотрудников по баллам за текущий месяц.
+
+        Args:
+            limit: Ограничение количества позиций
+
+        Returns:
+            Список (сотрудник, сумма за месяц) по убыванию суммы
+        """
+        rating = sorted(
+            (
+                (member, self.month_sums.get(member.user_id, 0))
+                for member in self.members
+            ),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+        return rating[:limit] if limit else rating
+
+
+class GroupAnalyticsService:
+    """Сервис сборки аналитики группы с кратковременным кэшем по руководителю."""
+
+    def __init__(self, max_size: int = 200, ttl_seconds: int = 60):
+        """Инициализирует сервис.
+
+        Args:
+            max_size: Максимальное количество групп в кэше
+            ttl_seconds: Время жизни аналитики группы в секундах
+        """
+        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+
+    async def get(self, stp_repo: MainRequestsRepo, head: Employee) -> GroupAnalytics:
+        """Получает аналитику группы руководителя.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            head: Экземпляр пользователя с моделью Employee (руководитель)
+
+        Returns:
+            Аналитика группы
+        """
+        analytics = self._cache.get(head.fullname)
+        if analytics is None:
+            analytics = await self.build(stp_repo, head.fullname)
+            self._cache[head.fullname] = analytics
+        return analytics
+
+    def invalidate(self, head_fullname: Optional[str] = None) -> None:
+        """Инвалидирует аналитику группы или весь кэш.
+
+        Args:
+            head_fullname: ФИО руководителя. Если не указано - очищается все
+        """
+        if head_fullname is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(head_fullname, None)
+
+    @staticmethod
+    def _detach(stp_repo: MainRequestsRepo, instances: list) -> None:
+        """Отвязывает объекты моделей от сессии репозитория.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            instances: Объекты моделей
+        """
+        session = stp_repo.session
+        for instance in instances:
+            if instance in session:
+                session.expunge(instance)
+
+    async def build(
+        self,
+        stp_repo: MainRequestsRepo,
+        head_fullname: str,
+        window: timedelta = TRANSACTIONS_WINDOW,
+    ) -> GroupAnalytics:
+        """Собирает аналитику группы пакетными запросами.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            head_fullname: ФИО руководителя
+            window: Окно загрузки транзакций для истории и достижений
+
+        Returns:
+            Аналитика группы
+        """
+        started = datetime.now()
+        members = await stp_repo.employee.get_users(head=head_fullname) or []
+        analytics = GroupAnalytics(members=list(members))
+
+        members_by_id = {member.user_id: member for member in members if member.user_id}
+        if not members_by_id:
+            self._detach(stp_repo, members)
+            return analytics
+        user_ids = list(members_by_id)
+
+        analytics.balances = await get_balance_projection().get_many(stp_repo, user_ids)
+
+        now = datetime.now()
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        window_start = min(now - window, month_start)
+
+        # Общие счетчики транзакций за все время одним запросом
+        counters = (
+            await stp_repo.session.execute(
+                select(
+                    func.count(Transaction.id).label("total"),
+                    func.coalesce(
+                        func.sum(
+                            case((Transaction.source_type == "achievement", 1), else_=0)
+                        ),
+                        0,
+                    ).label("achievements"),
+                ).where(Transaction.user_id.in_(user_ids))
+            )
+        ).one()
+        analytics.history_total = int(counters.total)
+        analytics.achievements_total = int(counters.achievements)
+
+        # Транзакции группы за окно одним запросом
+        transactions = (
+            await stp_repo.session.scalars(
+                select(Transaction)
+                .where(
+                    Transaction.user_id.in_(user_ids),
+                    Transaction.created_at >= window_start,
+                )
+                .order_by(Transaction.created_at.desc())
+            )
+        ).all()
+
+        achievement_transactions = []
+        for transaction in transactions:
+            member = members_by_id.get(transaction.user_id)
+            if member is None:
+                continue
+
+            created_at = transaction.created_at
+            if created_at.year == now.year and created_at.month == now.month:
+                analytics.month_sums[transaction.user_id] = (
+                    analytics.month_sums.get(transaction.user_id, 0)
+                    + transaction.amount
+                )
+
+            if len(analytics.history) < HISTORY_LIMIT:
+                analytics.history.append((member, transaction))
+
+            if (
+                transaction.source_type == "achievement"
+                and transaction.source_id
+                and len(achievement_transactions) < ACHIEVEMENTS_LIMIT
+            ):
+                achievement_transactions.append((member, transaction))
+
+        # Достижения берем из кэша каталога по индексу идентификаторов
+        if achievement_transactions:
+            catalog = await get_catalog_cache().get(stp_repo)
+            analytics.achievements = [
+                (member, transaction, achievement)
+                for member, transaction in achievement_transactions
+                if (achievement := catalog.get_achievement(transaction.source_id))
+            ]
+
+        # Покупки группы вместе с предметами одним запросом
+        purchases = await stp_repo.session.execute(
+            select(Purchase, Product)
+            .join(Product, Purchase.product_id == Product.id)
+            .where(Purchase.user_id.in_(user_ids))
+            .order_by(Purchase.bought_at.desc())
+        )
+        analytics.purchases = [
+            GroupPurchase(members_by_id[purchase.user_id], purchase, product)
+            for purchase, product in purchases
+        ]
+
+        # Отвязываем объекты от сессии, чтобы кэш пережил ее закрытие и commit
+        self._detach(
+            stp_repo,
+            [
+                *members,
+                *transactions,
+                *(purchase.user_purchase for purchase in analytics.purchases),
+                *(purchase.product_info for purchase in analytics.purchases),
+            ],
+        )
+
+        logger.debug(
+            f"[Аналитика группы] {head_fullname}: {len(members)} сотрудников, "
+            f"{len(transactions)} транзакций, {len(analytics.purchases)} покупок "
+            f"за {(datetime.now() - started).total_seconds():.2f}с"
+        )
+        return analytics
+
+
+_group_analytics: Optional[GroupAnalyticsService] = None
+
+
+def get_group_analytics() -> GroupAnalyticsService:
+    """Получает глобальный экземпляр сервиса аналитики групп (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр GroupAnalyticsService
+    """
+    global _group_analytics
+    if _group_analytics is None:
+        _group_analytics = GroupAnalyticsService()
+    return _group_analytics
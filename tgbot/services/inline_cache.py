@@ -0,0 +1,185 @@
+"""Серверный кэш результатов inline-запросов.
+
+Inline-запросы приходят на каждое нажатие клавиши, а кеш Telegram
+(cache_time) срабатывает только для полностью одинаковых строк. Модуль
+хранит уже отрендеренные наборы результатов:
+
+- поиск - по нормализованному запросу (выдача не зависит от того, кто ищет). Для нового
+  запроса, продолжающего закэшированный ("Ива" после "Ив"), поиск ведется
+  только среди совпадений префикса;
+- команды по умолчанию - по ключу (пользователь, месяц, дата, версия файлов
+  графиков).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional, Set, Tuple
+
+from aiogram.types import InlineQueryResultArticle
+from cachetools import TTLCache
+
+from tgbot.services.directory import EmployeeIndex, normalize_name
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class SearchEntry:
+    """Закэшированный результат поиска.
+
+    Attributes:
+        index_version: Версия справочника, по которой выполнен поиск
+        matched_ids: Все найденные сотрудники в порядке релевантности
+        results: Отрендеренные результаты inline-запроса
+    """
+
+    index_version: Tuple[int, int]
+    matched_ids: List[int]
+    results: List[InlineQueryResultArticle]
+
+
+class InlineResultCache:
+    """Кэш отрендеренных результатов inline-запросов."""
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        search_ttl_seconds: int = 300,
+        default_ttl_seconds: int = 120,
+    ):
+        """Инициализирует кэш.
+
+        Args:
+            max_size: Максимальное количество наборов результатов каждого типа
+            search_ttl_seconds: Время жизни результатов поиска
+            default_ttl_seconds: Время жизни команд по умолчанию (в них есть
+                подсветка текущих дежурных, поэтому время жизни короче)
+        """
+        self._search: TTLCache = TTLCache(maxsize=max_size, ttl=search_ttl_seconds)
+        self._defaults: TTLCache = TTLCache(maxsize=max_size, ttl=default_ttl_seconds)
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _index_version(index: EmployeeIndex) -> Tuple[int, int]:
+        return index.generation, index.version
+
+    def get_search(self, query: str, index: EmployeeIndex) -> Optional[SearchEntry]:
+        """Получает закэшированный результат поиска.
+
+        Args:
+            query: Поисковый запрос
+            index: Текущий снимок справочника сотрудников
+
+        Returns:
+            Результат или None, если его нет в кэше или справочник изменился
+        """
+        entry: Optional[SearchEntry] = self._search.get(normalize_name(query))
+        if entry is None or entry.index_version != self._index_version(index):
+            return None
+        self.hits += 1
+        return entry
+
+    def get_prefix_candidates(
+        self, query: str, index: EmployeeIndex
+    ) -> Optional[Set[int]]:
+        """Ищет совпадения самого длинного закэшированного префикса запроса.
+
+        Совпадения продолжения запроса всегда входят в совпадения префикса,
+        поэтому поиск можно ограничить ими.
+
+        Args:
+            query: Поисковый запрос
+            index: Текущий снимок справочника сотрудников
+
+        Returns:
+            Идентификаторы кандидатов или None, если подходящего префикса нет
+        """
+        normalized = normalize_name(query)
+        version = self._index_version(index)
+        for end in range(len(normalized) - 1, 0, -1):
+            entry: Optional[SearchEntry] = self._search.get(normalized[:end])
+            if entry is not None and entry.index_version == version:
+                self.prefix_hits += 1
+                return set(entry.matched_ids)
+        self.misses += 1
+        return None
+
+    def store_search(
+        self,
+        query: str,
+        index: EmployeeIndex,
+        matched_ids: List[int],
+        results: List[InlineQueryResultArticle],
+    ) -> None:
+        """Сохраняет результаты поиска.
+
+        Args:
+            query: Поисковый запрос
+            index: Снимок справочника, по которому выполнен поиск
+            matched_ids: Все найденные сотрудники в порядке релевантности
+            results: Отрендеренные результаты inline-запроса (пустой список,
+                если ничего не найдено)
+        """
+        self._search[normalize_name(query)] = SearchEntry(
+            index_version=self._index_version(index),
+            matched_ids=matched_ids,
+            results=results,
+        )
+
+    def get_defaults(self, key: Hashable) -> Optional[List[InlineQueryResultArticle]]:
+        """Получает команды по умолчанию.
+
+        Args:
+            key: Ключ (пользователь, месяц, дата, версия файлов)
+
+        Returns:
+            Результаты или None
+        """
+        return self._defaults.get(key)
+
+    def store_defaults(
+        self, key: Hashable, results: List[InlineQueryResultArticle]
+    ) -> None:
+        """Сохраняет команды по умолчанию.
+
+        Args:
+            key: Ключ (пользователь, месяц, дата, версия файлов)
+            results: Отрендеренные результаты inline-запроса
+        """
+        self._defaults[key] = results
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        self._search.clear()
+        self._defaults.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получает статистику кэша.
+
+        Returns:
+            Словарь со статистикой кэша
+        """
+        return {
+            "search_entries": len(self._search),
+            "default_entries": len(self._defaults),
+            "hits": self.hits,
+            "prefix_hits": self.prefix_hits,
+            "misses": self.misses,
+        }
+
+
+_inline_cache: Optional[InlineResultCache] = None
+
+
+def get_inline_cache() -> InlineResultCache:
+    """Получает глобальный экземпляр кэша inline-результатов (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр InlineResultCache
+    """
+    global _inline_cache
+    if _inline_cache is None:
+        _inline_cache = InlineResultCache()
+    return _inline_cache
@@ -1,63 +1,400 @@
 """Сервис отправки email писем."""
 
+import asyncio
 import logging
 import smtplib
 import ssl
+import time
+from dataclasses import dataclass, field
 from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from typing import Dict, List, Optional
 
 from stp_database.models.STP import Employee, Product
 from stp_database.models.STP.purchase import Purchase
 
-from tgbot.config import load_config
+from tgbot.config import MailConfig, get_config
 from tgbot.misc.helpers import get_role
-
-config = load_config(".env")
+from tgbot.services.background import run_detached
 
 logger = logging.getLogger(__name__)
 
+# Сколько обработчик авторизации ждет доставки письма с кодом, в секундах
+AUTH_EMAIL_TIMEOUT = 20
 
-async def send_email(
-    addresses: list[str] | str, subject: str, body: str, html: bool = True
-) -> None:
-    """Отправляет письмо на указанные email.
 
-    Args:
-        addresses: Список адресов для отправки письма
+@dataclass
+class OutgoingEmail:
+    """Письмо в очереди отправки.
+
+    Attributes:
+        addresses: Адреса получателей
         subject: Заголовок письма
         body: Тело письма
         html: Использовать ли HTML для форматирования
+        attempts: Количество выполненных попыток отправки
+        result: Future с результатом доставки для ожидающего отправителя
     """
-    context = ssl.create_default_context()
 
-    msg = MIMEMultipart()
-    msg["From"] = config.mail.user
-    msg["To"] = ", ".join(addresses) if isinstance(addresses, list) else addresses
-    msg["Subject"] = Header(subject, "utf-8")
+    addresses: List[str]
+    subject: str
+    body: str
+    html: bool = True
+    attempts: int = field(default=0)
+    result: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    def resolve(self, delivered: bool) -> None:
+        """Сообщает ожидающему отправителю результат доставки.
 
-    content_type = "html" if html else "plain"
-    msg.attach(MIMEText(body, content_type, "utf-8"))
+        Args:
+            delivered: Доставлено ли письмо
+        """
+        if self.result is not None and not self.result.done():
+            self.result.set_result(delivered)
 
-    try:
-        with smtplib.SMTP_SSL(
-            host=config.mail.host, port=config.mail.port, context=context
-        ) as server:
-            server.login(user=config.mail.user, password=config.mail.password)
+    def as_string(self, sender: str) -> str:
+        """Собирает MIME представление письма.
+
+        Args:
+            sender: Адрес отправителя
+
+        Returns:
+            Письмо в виде строки
+        """
+        msg = MIMEMultipart()
+        msg["From"] = sender
+        msg["To"] = ", ".join(self.addresses)
+        msg["Subject"] = Header(self.subject, "utf-8")
+
+        content_type = "html" if self.html else "plain"
+        msg.attach(MIMEText(self.body, content_type, "utf-8"))
+        return msg.as_string()
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Проверяет, что повторная отправка письма бессмысленна (ответ сервера 5xx).
+
+    Args:
+        error: Ошибка отправки
+
+    Returns:
+        True если ошибка постоянная, иначе False
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class SmtpConnection:
+    """Постоянное авторизованное подключение к SMTP серверу.
+
+    Методы блокирующие и вызываются из отдельного потока воркером очереди.
+    """
+
+    def __init__(self, mail_config: MailConfig, idle_timeout: float = 60):
+        """Инициализирует подключение.
+
+        Args:
+            mail_config: Конфигурация почтового сервера
+            idle_timeout: Время простоя, после которого подключение проверяется NOOP
+        """
+        self.config = mail_config
+        self.idle_timeout = idle_timeout
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.config.use_ssl:
+            server = smtplib.SMTP_SSL(
+                host=self.config.host,
+                port=self.config.port,
+                context=ssl.create_default_context(),
+                timeout=30,
+            )
+        else:
+            server = smtplib.SMTP(
+                host=self.config.host, port=self.config.port, timeout=30
+            )
+            server.ehlo()
+            if server.has_extn("starttls"):
+                server.starttls(context=ssl.create_default_context())
+        if self.config.user and self.config.password:
+            server.login(user=self.config.user, password=self.config.password)
+        return server
+
+    def _ensure_connected(self) -> smtplib.SMTP:
+        if self._server is not None and (
+            time.monotonic() - self._last_used > self.idle_timeout
+        ):
+            # Сервер мог закрыть простаивающее подключение
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send(self, email: OutgoingEmail) -> None:
+        """Отправляет письмо, при необходимости переподключаясь.
+
+        Args:
+            email: Письмо для отправки
+        """
+        server = self._ensure_connected()
+        try:
+            server.sendmail(
+                from_addr=self.config.user,
+                to_addrs=email.addresses,
+                msg=email.as_string(self.config.user),
+            )
+        except smtplib.SMTPServerDisconnected:
+            # Подключение оборвалось между проверкой и отправкой - пробуем один раз заново
+            self.close()
+            server = self._ensure_connected()
             server.sendmail(
-                from_addr=config.mail.user, to_addrs=addresses, msg=msg.as_string()
+                from_addr=self.config.user,
+                to_addrs=email.addresses,
+                msg=email.as_string(self.config.user),
             )
-    except smtplib.SMTPException as e:
-        logger.error(f"[Email] Ошибка отправки письма: {e}")
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        """Закрывает подключение."""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
 
 
-async def send_auth_email(code: str, email: str, bot_username: str) -> None:
-    """Отправляет письмо с кодом авторизации.
+class MailOutbox:
+    """Очередь исходящих писем с фоновыми воркерами.
+
+    Каждый воркер держит собственное подключение к SMTP серверу и отправляет
+    письма в отдельном потоке, не блокируя цикл событий. Неудачные отправки
+    повторяются с экспоненциальной задержкой.
+    """
+
+    def __init__(
+        self,
+        mail_config: MailConfig,
+        workers: int = 2,
+        max_attempts: int = 5,
+        retry_delay: float = 5,
+        max_queue_size: int = 1000,
+    ):
+        """Инициализирует очередь.
+
+        Args:
+            mail_config: Конфигурация почтового сервера
+            workers: Количество воркеров (и подключений к серверу)
+            max_attempts: Максимальное количество попыток отправки письма
+            retry_delay: Задержка перед первой повторной попыткой в секундах
+            max_queue_size: Максимальный размер очереди
+        """
+        self.config = mail_config
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue[OutgoingEmail] = asyncio.Queue(
+            maxsize=max_queue_size
+        )
+        self._tasks: List[asyncio.Task] = []
+        # Отложенные повторные попытки, которые нужно дослать при остановке
+        self._retries: Dict[asyncio.Task, OutgoingEmail] = {}
+
+    @property
+    def size(self) -> int:
+        """Количество писем, ожидающих отправки."""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Запускает воркеры очереди, если они еще не запущены."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"mail_outbox:{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"[Email] Очередь писем запущена, воркеров: {self.workers}")
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Дожидается отправки очереди и останавливает воркеры.
+
+        Args:
+            timeout: Максимальное время ожидания отправки оставшихся писем
+        """
+        if not self._tasks:
+            return
+        # Письма, ожидающие повтора, отправляем сразу, не дожидаясь задержки
+        for task, email in list(self._retries.items()):
+            if task.cancel():
+                self._put(email)
+        self._retries.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except TimeoutError:
+            logger.warning(f"[Email] Не отправлено писем при остановке: {self.size}")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            self._queue.get_nowait().resolve(False)
+            self._queue.task_done()
+
+    def enqueue(self, email: OutgoingEmail) -> bool:
+        """Ставит письмо в очередь отправки.
+
+        Args:
+            email: Письмо для отправки
+
+        Returns:
+            True если письмо поставлено в очередь, иначе False
+        """
+        self.start()
+        return self._put(email)
+
+    def _put(self, email: OutgoingEmail) -> bool:
+        try:
+            self._queue.put_nowait(email)
+        except asyncio.QueueFull:
+            logger.error(
+                f"[Email] Очередь переполнена, письмо '{email.subject}' на {email.addresses} не отправлено"
+            )
+            email.resolve(False)
+            return False
+        return True
+
+    async def _worker(self, index: int) -> None:
+        connection = SmtpConnection(self.config)
+        try:
+            while True:
+                email = await self._queue.get()
+                try:
+                    await self._deliver(connection, email)
+                except Exception as e:
+                    logger.error(
+                        f"[Email] Непредвиденная ошибка отправки письма '{email.subject}': {e}"
+                    )
+                    email.resolve(False)
+                finally:
+                    self._queue.task_done()
+        finally:
+            await asyncio.to_thread(connection.close)
+
+    async def _deliver(self, connection: SmtpConnection, email: OutgoingEmail) -> None:
+        email.attempts += 1
+        try:
+            await asyncio.to_thread(connection.send, email)
+        except (smtplib.SMTPException, OSError) as e:
+            if is_permanent_error(e):
+                logger.error(
+                    f"[Email] Письмо '{email.subject}' отклонено сервером: {e}"
+                )
+                email.resolve(False)
+                return
+
+            await asyncio.to_thread(connection.close)
+            if email.attempts >= self.max_attempts:
+                logger.error(
+                    f"[Email] Письмо '{email.subject}' на {email.addresses} не отправлено "
+                    f"после {email.attempts} попыток: {e}"
+                )
+                email.resolve(False)
+                return
+
+            delay = self.retry_delay * 2 ** (email.attempts - 1)
+            logger.warning(
+                f"[Email] Ошибка отправки письма '{email.subject}' "
+                f"(попытка {email.attempts}), повтор через {delay:.0f}с: {e}"
+            )
+            task = run_detached(self._requeue(email, delay), name="mail_outbox:retry")
+            self._retries[task] = email
+            task.add_done_callback(lambda done: self._retries.pop(done, None))
+        else:
+            email.resolve(True)
+
+    async def _requeue(self, email: OutgoingEmail, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put(email)
+
+
+_mail_outbox: Optional[MailOutbox] = None
+
+
+def get_mail_outbox() -> MailOutbox:
+    """Получает глобальный экземпляр очереди писем (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр MailOutbox
+    """
+    global _mail_outbox
+    if _mail_outbox is None:
+        _mail_outbox = MailOutbox(get_config().mail)
+    return _mail_outbox
+
+
+async def send_email(
+    addresses: list[str] | str,
+    subject: str,
+    body: str,
+    html: bool = True,
+    wait: bool = False,
+    timeout: Optional[float] = None,
+) -> Optional[bool]:
+    """Ставит письмо на указанные email в очередь отправки.
+
+    Args:
+        addresses: Список адресов для отправки письма
+        subject: Заголовок письма
+        body: Тело письма
+        html: Использовать ли HTML для форматирования
+        wait: Дождаться ли доставки письма, включая повторные попытки
+        timeout: Максимальное время ожидания доставки в секундах
+
+    Returns:
+        С wait - доставлено ли письмо или None, если за timeout оно еще не
+        отправлено. Без wait - поставлено ли письмо в очередь
+    """
+    email = OutgoingEmail(
+        addresses=addresses if isinstance(addresses, list) else [addresses],
+        subject=subject,
+        body=body,
+        html=html,
+    )
+    if wait:
+        email.result = asyncio.get_running_loop().create_future()
+    if not get_mail_outbox().enqueue(email):
+        return False
+    if wait:
+        try:
+            # Письмо продолжает отправляться и после истечения ожидания
+            return await asyncio.wait_for(asyncio.shield(email.result), timeout)
+        except TimeoutError:
+            return None
+    return True
+
+
+async def send_auth_email(code: str, email: str, bot_username: str) -> Optional[bool]:
+    """Отправляет письмо с кодом авторизации и ждет его доставки.
 
     Args:
         code: Код авторизации
         email: Почта для отправки кода
         bot_username: Юзернейм бота Telegram (для гиперссылки)
+
+    Returns:
+        True если письмо доставлено, False если отправить не удалось,
+        None если за AUTH_EMAIL_TIMEOUT письмо еще не отправлено
     """
     email_subject = "Авторизация в боте"
     email_content = f"""Добрый день!<br><br>
@@ -65,7 +402,13 @@ async def send_auth_email(code: str, email: str, bot_username: str) -> None:
 Код для авторизации: <b>{code}</b><br>
 Введите код в бота <a href="https://t.me/{bot_username}">@{bot_username}</a> для завершения авторизации"""
 
-    await send_email(addresses=email, subject=email_subject, body=email_content)
+    return await send_email(
+        addresses=email,
+        subject=email_subject,
+        body=email_content,
+        wait=True,
+        timeout=AUTH_EMAIL_TIMEOUT,
+    )
 
 
 async def send_activation_product_email(
@@ -113,16 +456,16 @@ async def send_activation_product_email(
         case 3:
             if user.division == "НЦК":
                 # Рассылка РГ НЦК
-                email.append(config.mail.nck_email_addr)
+                email.append(get_config().mail.nck_email_addr)
             else:
                 # Рассылка РГ НТП
-                email.append(config.mail.ntp_email_addr)
+                email.append(get_config().mail.ntp_email_addr)
         case 5:
             # Рассылка ГОК
-            email.append(config.mail.gok_email_addr)
+            email.append(get_config().mail.gok_email_addr)
         case 6:
             # Рассылка МИП
-            email.append(config.mail.mip_email_addr)
+            email.append(get_config().mail.mip_email_addr)
 
     # Почта руководителя сотрудника
     if user_head and user_head.email:
@@ -137,7 +480,7 @@ async def send_activation_product_email(
 
     await send_email(addresses=email, subject=email_subject, body=email_content)
     logger.info(
-        f"[Активация предмета] Уведомление об активации {product.name} пользователем {user.fullname} отправлено на {email}"
+        f"[Активация предмета] Уведомление об активации {product.name} пользователем {user.fullname} поставлено в очередь на {email}"
     )
 
 
@@ -185,16 +528,16 @@ async def send_cancel_product_email(
         case 3:
             if user.division == "НЦК":
                 # Рассылка РГ НЦК
-                email.append(config.mail.nck_email_addr)
+                email.append(get_config().mail.nck_email_addr)
             else:
                 # Рассылка РГ НТП
-                email.append(config.mail.ntp_email_addr)
+                email.append(get_config().mail.ntp_email_addr)
         case 5:
             # Рассылка ГОК
-            email.append(config.mail.gok_email_addr)
+            email.append(get_config().mail.gok_email_addr)
         case 6:
             # Рассылка МИП
-            email.append(config.mail.mip_email_addr)
+            email.append(get_config().mail.mip_email_addr)
 
     # Почта руководителя сотрудника
     if user_head and user_head.email:
@@ -209,5 +552,5 @@ async def send_cancel_product_email(
 
     await send_email(addresses=email, subject=email_subject, body=email_content)
     logger.info(
-        f"[Активация предмета] Уведомление об отмене активации {product.name} пользователем {user.fullname} отправлено на {email}"
+        f"[Активация предмета] Уведомление об отмене активации {product.name} пользователем {user.fullname} поставлено в очередь на {email}"
     )
@@ -0,0 +1,457 @@
+"""Метрики производительности бота в формате Prometheus.
+
+Для каждого апдейта собирается разбивка времени: обработчик (или окно
+диалога), общая задержка, количество и время запросов к базам STP и Stats,
+попадания и промахи кэша Excel, вызовы Telegram API. Кроме того, считаются
+длительности задач планировщика.
+
+Метрики отдаются в текстовом формате Prometheus на маршруте /metrics
+веб-сервера вебхука. Отдельная зависимость не нужна: счетчики и гистограммы
+хранятся в памяти процесса.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограмм по умолчанию, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Апдейты дольше порога попадают в лог с разбивкой времени
+SLOW_UPDATE_SECONDS = 1.0
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """Базовая метрика с метками."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """Инициализирует метрику.
+
+        Args:
+            name: Название метрики
+            documentation: Описание метрики
+            labels: Названия меток
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> Iterable[str]:
+        """Строки значений метрики."""
+        return ()
+
+    def render(self) -> str:
+        """Метрика в текстовом формате Prometheus."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """Инициализирует счетчик.
+
+        Args:
+            name: Название метрики
+            documentation: Описание метрики
+            labels: Названия меток
+        """
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Увеличивает счетчик.
+
+        Args:
+            amount: Величина увеличения
+            labels: Значения меток
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Получает значение счетчика.
+
+        Args:
+            labels: Значения меток
+
+        Returns:
+            Текущее значение
+        """
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        """Строки значений счетчика."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Гистограмма распределения значений."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """Инициализирует гистограмму.
+
+        Args:
+            name: Название метрики
+            documentation: Описание метрики
+            labels: Названия меток
+            buckets: Верхние границы корзин по возрастанию
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждого набора меток: счетчики корзин (+Inf последней), сумма
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Добавляет значение.
+
+        Args:
+            value: Значение
+            labels: Значения меток
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        """Получает количество значений.
+
+        Args:
+            labels: Значения меток
+
+        Returns:
+            Количество добавленных значений
+        """
+        counts, _ = self._values.get(self._key(labels), ([], []))
+        return sum(counts)
+
+    def samples(self) -> Iterable[str]:
+        """Строки корзин, суммы и количества значений."""
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        names = (*self.labels, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(names, (*key, le))} {cumulative}"
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Инициализирует пустой набор."""
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """Добавляет метрику.
+
+        Args:
+            metric: Метрика
+
+        Returns:
+            Добавленная метрика
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+UPDATES = registry.register(
+    Counter("bot_updates_total", "Обработанные апдейты", ("handler", "status"))
+)
+UPDATE_DURATION = registry.register(
+    Histogram("bot_update_duration_seconds", "Время обработки апдейта", ("handler",))
+)
+UPDATE_DB_QUERIES = registry.register(
+    Histogram(
+        "bot_update_db_queries",
+        "Количество запросов к базам за апдейт",
+        ("handler",),
+        COUNT_BUCKETS,
+    )
+)
+UPDATE_DB_DURATION = registry.register(
+    Histogram(
+        "bot_update_db_duration_seconds",
+        "Время запросов к базам за апдейт",
+        ("handler",),
+    )
+)
+UPDATE_API_DURATION = registry.register(
+    Histogram(
+        "bot_update_telegram_duration_seconds",
+        "Время вызовов Telegram API за апдейт",
+        ("handler",),
+    )
+)
+DB_QUERY_DURATION = registry.register(
+    Histogram(
+        "bot_db_query_duration_seconds", "Время запроса к базе", ("db",), QUERY_BUCKETS
+    )
+)
+EXCEL_CACHE = registry.register(
+    Counter("bot_excel_cache_requests_total", "Обращения к кэшу Excel", ("result",))
+)
+EXCEL_LOAD_DURATION = registry.register(
+    Histogram("bot_excel_load_duration_seconds", "Время загрузки листа Excel в кэш")
+)
+TELEGRAM_DURATION = registry.register(
+    Histogram(
+        "bot_telegram_request_duration_seconds",
+        "Время вызова Telegram API",
+        ("method",),
+    )
+)
+TELEGRAM_ERRORS = registry.register(
+    Counter("bot_telegram_request_errors_total", "Ошибки Telegram API", ("method",))
+)
+JOB_DURATION = registry.register(
+    Histogram(
+        "bot_scheduler_job_duration_seconds",
+        "Время выполнения задачи планировщика",
+        ("job",),
+        JOB_BUCKETS,
+    )
+)
+JOB_ERRORS = registry.register(
+    Counter("bot_scheduler_job_errors_total", "Ошибки задач планировщика", ("job",))
+)
+
+
+@dataclass(slots=True)
+class UpdateMetrics:
+    """Разбивка времени обработки одного апдейта.
+
+    Attributes:
+        handler: Обработчик или окно диалога
+        started_at: Время начала обработки (perf_counter)
+        db_queries: Количество запросов к базам
+        db_time: Время запросов к базам, с
+        excel_hits: Попадания в кэш Excel
+        excel_misses: Промахи кэша Excel
+        excel_load_time: Время загрузки листов Excel, с
+        api_calls: Количество вызовов Telegram API
+        api_time: Время вызовов Telegram API, с
+    """
+
+    handler: str = "unhandled"
+    started_at: float = 0.0
+    db_queries: int = 0
+    db_time: float = 0.0
+    excel_hits: int = 0
+    excel_misses: int = 0
+    excel_load_time: float = 0.0
+    api_calls: int = 0
+    api_time: float = 0.0
+
+
+_current_update: ContextVar[Optional[UpdateMetrics]] = ContextVar(
+    "current_update_metrics", default=None
+)
+
+
+def get_update_metrics() -> Optional[UpdateMetrics]:
+    """Получает метрики апдейта, который обрабатывается в текущем контексте.
+
+    Returns:
+        Метрики апдейта или None вне обработки апдейта
+    """
+    return _current_update.get()
+
+
+def start_update() -> UpdateMetrics:
+    """Начинает сбор метрик апдейта в текущем контексте.
+
+    Returns:
+        Метрики апдейта
+    """
+    metrics = UpdateMetrics(started_at=time.perf_counter())
+    _current_update.set(metrics)
+    return metrics
+
+
+def finish_update(metrics: UpdateMetrics, status: str = "ok") -> float:
+    """Завершает сбор метрик апдейта и записывает их.
+
+    Args:
+        metrics: Метрики апдейта
+        status: Результат обработки (ok или error)
+
+    Returns:
+        Время обработки апдейта, с
+    """
+    elapsed = time.perf_counter() - metrics.started_at
+    handler = metrics.handler
+    UPDATES.inc(handler=handler, status=status)
+    UPDATE_DURATION.observe(elapsed, handler=handler)
+    UPDATE_DB_QUERIES.observe(metrics.db_queries, handler=handler)
+    UPDATE_DB_DURATION.observe(metrics.db_time, handler=handler)
+    UPDATE_API_DURATION.observe(metrics.api_time, handler=handler)
+
+    if elapsed >= SLOW_UPDATE_SECONDS:
+        logger.warning(
+            f"[Метрики] Медленный апдейт {handler}: {elapsed:.2f}с, "
+            f"БД {metrics.db_queries} запр. / {metrics.db_time:.2f}с, "
+            f"Excel {metrics.excel_hits} попад. / {metrics.excel_misses} пром. / "
+            f"{metrics.excel_load_time:.2f}с, "
+            f"Telegram {metrics.api_calls} выз. / {metrics.api_time:.2f}с"
+        )
+    return elapsed
+
+
+def record_excel_cache(hit: bool, load_time: float = 0.0) -> None:
+    """Учитывает обращение к кэшу Excel.
+
+    Args:
+        hit: Лист найден в кэше
+        load_time: Время загрузки листа при промахе, с
+    """
+    EXCEL_CACHE.inc(result="hit" if hit else "miss")
+    if not hit:
+        EXCEL_LOAD_DURATION.observe(load_time)
+
+    metrics = _current_update.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.excel_hits += 1
+    else:
+        metrics.excel_misses += 1
+        metrics.excel_load_time += load_time
+
+
+def record_telegram_request(method: str, elapsed: float, failed: bool) -> None:
+    """Учитывает вызов Telegram API.
+
+    Args:
+        method: Метод API
+        elapsed: Время вызова, с
+        failed: Вызов завершился ошибкой
+    """
+    TELEGRAM_DURATION.observe(elapsed, method=method)
+    if failed:
+        TELEGRAM_ERRORS.inc(method=method)
+
+    metrics = _current_update.get()
+    if metrics is not None:
+        metrics.api_calls += 1
+        metrics.api_time += elapsed
+
+
+def instrument_engine(engine: AsyncEngine, db: str) -> None:
+    """Подписывает движок базы на учет запросов.
+
+    Контекст апдейта доступен в событиях SQLAlchemy: асинхронный движок
+    выполняет запросы в greenlet с контекстом вызывающей задачи.
+
+    Args:
+        engine: Асинхронный движок базы
+        db: Название базы для метки метрик
+    """
+
+    def before_cursor_execute(
+        conn, _cursor, _statement, _parameters, _context, _executemany
+    ):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(
+        conn, _cursor, _statement, _parameters, _context, _executemany
+    ):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        DB_QUERY_DURATION.observe(elapsed, db=db)
+
+        metrics = _current_update.get()
+        if metrics is not None:
+            metrics.db_queries += 1
+            metrics.db_time += elapsed
+
+    def handle_error(context):
+        # Запрос с ошибкой не вызывает after_cursor_execute
+        connection = context.connection
+        if connection is not None and connection.info.get("metrics_query_start"):
+            connection.info["metrics_query_start"].pop()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
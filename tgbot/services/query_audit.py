@@ -0,0 +1,282 @@
+"""Аудит SQL-запросов: поиск N+1 и бюджеты запросов обработчиков.
+
+Режим разработки и тестов (QUERY_AUDIT=warn или strict). В этом режиме
+каждый запрос к базам STP и Stats учитывается в аудите текущего апдейта
+вместе с формой запроса. Форма - это текст запроса без значений: числа,
+строки и списки IN заменены на "?". Если запрос одной формы повторяется
+в апдейте много раз, это почти всегда N+1 (get_users в цикле).
+
+Обработчики и геттеры объявляют бюджет запросов декоратором query_budget.
+При превышении бюджета или обнаружении N+1 в режиме warn пишется
+предупреждение, а в режиме strict выбрасывается QueryBudgetExceeded.
+Так тесты падают на регрессиях.
+
+В тестах запросы считаются напрямую:
+
+    with count_queries() as audit:
+        await stats_getter(stp_repo=stp_repo, user=user)
+    assert audit.total <= 12, audit.report()
+
+В режиме off (по умолчанию) аудит не подключается и ничего не стоит.
+"""
+
+import functools
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+AUDIT_OFF = "off"
+AUDIT_WARN = "warn"
+AUDIT_STRICT = "strict"
+
+AUDIT_MODES = (AUDIT_OFF, AUDIT_WARN, AUDIT_STRICT)
+
+# Количество запросов одной формы за апдейт, начиная с которого это N+1
+REPEATED_THRESHOLD = 5
+
+_mode = AUDIT_OFF
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Превышен бюджет запросов или найден N+1 в режиме strict."""
+
+
+def statement_shape(statement: str) -> str:
+    """Приводит SQL-запрос к форме без значений.
+
+    Args:
+        statement: Текст запроса
+
+    Returns:
+        Форма запроса: значения и списки IN заменены на "?"
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass(slots=True)
+class QueryAudit:
+    """Запросы, выполненные в одном апдейте или блоке count_queries.
+
+    Attributes:
+        shapes: Количество запросов каждой формы
+        reported: Формы, о повторах которых уже сообщено
+    """
+
+    shapes: Counter = field(default_factory=Counter)
+    reported: Set[str] = field(default_factory=set)
+
+    @property
+    def total(self) -> int:
+        """Общее количество запросов."""
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold: int = REPEATED_THRESHOLD) -> List[Tuple[str, int]]:
+        """Получает формы запросов, повторенные не меньше порога.
+
+        Args:
+            threshold: Минимальное количество повторов
+
+        Returns:
+            Формы и количество их повторов, от частых к редким
+        """
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, limit: int = 5) -> str:
+        """Описание самых частых запросов для логов и сообщений тестов.
+
+        Args:
+            limit: Количество форм запросов в описании
+
+        Returns:
+            Текст описания
+        """
+        lines = [f"Запросов: {self.total}"]
+        for shape, count in self.shapes.most_common(limit):
+            lines.append(f"  {count} x {shape[:200]}")
+        return "\n".join(lines)
+
+
+_current_audit: ContextVar[Optional[QueryAudit]] = ContextVar(
+    "current_query_audit", default=None
+)
+
+
+def set_mode(mode: str) -> str:
+    """Выбирает режим аудита.
+
+    Args:
+        mode: off, warn или strict
+
+    Returns:
+        Выбранный режим
+    """
+    global _mode
+    if mode not in AUDIT_MODES:
+        logger.warning(f"[Аудит SQL] Неизвестный режим {mode}, аудит отключен")
+        mode = AUDIT_OFF
+    _mode = mode
+    if mode != AUDIT_OFF:
+        logger.info(f"[Аудит SQL] Режим аудита запросов: {mode}")
+    return mode
+
+
+def get_mode() -> str:
+    """Получает режим аудита.
+
+    Returns:
+        off, warn или strict
+    """
+    return _mode
+
+
+def is_enabled() -> bool:
+    """Проверяет, включен ли аудит."""
+    return _mode != AUDIT_OFF
+
+
+def get_current_audit() -> Optional[QueryAudit]:
+    """Получает аудит текущего апдейта.
+
+    Returns:
+        Аудит или None вне апдейта
+    """
+    return _current_audit.get()
+
+
+def violation(message: str) -> None:
+    """Сообщает о нарушении: предупреждение или исключение в режиме strict.
+
+    Args:
+        message: Описание нарушения
+
+    Raises:
+        QueryBudgetExceeded: Режим strict
+    """
+    if _mode == AUDIT_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(f"[Аудит SQL] {message}")
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryAudit]:
+    """Считает запросы, выполненные внутри блока.
+
+    Запросы блока учитываются и в аудите апдейта, если он идет.
+
+    Yields:
+        Аудит запросов блока
+    """
+    parent = _current_audit.get()
+    audit = QueryAudit()
+    token = _current_audit.set(audit)
+    try:
+        yield audit
+    finally:
+        _current_audit.reset(token)
+        if parent is not None:
+            parent.shapes.update(audit.shapes)
+            parent.reported |= audit.reported
+
+
+def check_audit(audit: QueryAudit, name: str, budget: Optional[int] = None) -> None:
+    """Проверяет аудит на превышение бюджета и N+1.
+
+    Args:
+        audit: Аудит запросов
+        name: Обработчик или геттер для сообщения
+        budget: Бюджет запросов (None - без бюджета)
+
+    Raises:
+        QueryBudgetExceeded: Нарушение в режиме strict
+    """
+    problems = []
+    if budget is not None and audit.total > budget:
+        problems.append(f"бюджет {budget} превышен")
+    repeated = [item for item in audit.repeated() if item[0] not in audit.reported]
+    if repeated:
+        audit.reported.update(shape for shape, _ in repeated)
+        problems.append(f"возможен N+1 ({repeated[0][1]} одинаковых запросов)")
+    if problems:
+        violation(f"{name}: {', '.join(problems)}\n{audit.report()}")
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Объявляет бюджет запросов обработчика или геттера.
+
+    Работает только при включенном аудите: иначе функция вызывается как есть.
+
+    Args:
+        max_queries: Максимальное количество запросов за вызов
+
+    Returns:
+        Декоратор асинхронной функции
+    """
+
+    def decorator(func: F) -> F:
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _mode == AUDIT_OFF:
+                return await func(*args, **kwargs)
+            with count_queries() as audit:
+                result = await func(*args, **kwargs)
+                check_audit(audit, name, max_queries)
+            return result
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return decorator
+
+
+def audit_engine(engine: AsyncEngine) -> None:
+    """Подписывает движок базы на аудит запросов.
+
+    Args:
+        engine: Асинхронный движок базы
+    """
+
+    def before_cursor_execute(
+        _conn, _cursor, statement, _parameters, _context, _executemany
+    ):
+        audit = _current_audit.get()
+        if audit is not None:
+            audit.shapes[statement_shape(statement)] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
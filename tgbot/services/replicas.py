@@ -0,0 +1,292 @@
+"""Общее состояние нескольких реплик бота.
+
+В режиме нескольких реплик (MULTI_REPLICA) процессы делят через Redis:
+
+- ключи дедупликации и коротких блокировок (SharedKeys) - уведомление или
+  операция выполняется одной репликой;
+- события сброса кэшей (InvalidationBus) - после изменения файлов,
+  сотрудников, балансов или сделок каждая реплика сбрасывает свои кэши в памяти.
+
+Без Redis ключи хранятся в памяти процесса, а события обрабатываются только
+локально (режим одной реплики).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "stpsher"
+REPLICA_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# События сброса кэшей
+FILES_CHANGED = "files_changed"
+EMPLOYEES_CHANGED = "employees_changed"
+BALANCES_CHANGED = "balances_changed"
+EXCHANGES_CHANGED = "exchanges_changed"
+
+_redis: Optional[Redis] = None
+
+
+def setup_replicas(redis: Optional[Redis]) -> None:
+    """Подключает общее состояние реплик к Redis.
+
+    Args:
+        redis: Клиент Redis (None - режим одной реплики)
+    """
+    global _redis
+    _redis = redis
+    if redis is not None:
+        logger.info(f"[Реплики] Общее состояние в Redis, реплика {REPLICA_ID}")
+
+
+def get_redis() -> Optional[Redis]:
+    """Получает клиент Redis общего состояния.
+
+    Returns:
+        Клиент Redis или None в режиме одной реплики
+    """
+    return _redis
+
+
+class SharedKeys:
+    """Набор ключей с TTL, общий для всех реплик.
+
+    Используется для дедупликации (уведомление отправляется той репликой,
+    которая первой заняла ключ) и коротких блокировок операций.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int, max_local: int = 10000):
+        """Инициализирует набор ключей.
+
+        Args:
+            name: Название набора (часть ключа в Redis)
+            ttl_seconds: Время жизни ключа в секундах
+            max_local: Максимальное количество ключей в памяти процесса
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._local: TTLCache = TTLCache(maxsize=max_local, ttl=ttl_seconds)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{KEY_PREFIX}:{self.name}:{key}"
+
+    def _claim_local(self, key: Hashable) -> bool:
+        if key in self._local:
+            return False
+        self._local[key] = True
+        return True
+
+    async def claim(self, key: Hashable) -> bool:
+        """Занимает ключ.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            True если ключ занят этим вызовом, False если он уже занят
+        """
+        redis = get_redis()
+        if redis is None:
+            return self._claim_local(key)
+        try:
+            return bool(
+                await redis.set(
+                    self._key(key), REPLICA_ID, nx=True, ex=self.ttl_seconds
+                )
+            )
+        except RedisError as e:
+            logger.error(f"[Реплики] Не удалось занять ключ {self._key(key)}: {e}")
+            return self._claim_local(key)
+
+    async def release(self, key: Hashable) -> None:
+        """Освобождает ключ.
+
+        Args:
+            key: Ключ
+        """
+        self._local.pop(key, None)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(self._key(key))
+        except RedisError as e:
+            logger.error(f"[Реплики] Не удалось освободить ключ {self._key(key)}: {e}")
+
+
+class InvalidationBus:
+    """Рассылка событий сброса кэшей между репликами через Redis pub/sub."""
+
+    CHANNEL = f"{KEY_PREFIX}:invalidate"
+
+    def __init__(self):
+        """Инициализирует шину без подписчиков."""
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = defaultdict(
+            list
+        )
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, event: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Подписывает обработчик на событие.
+
+        Args:
+            event: Название события
+            handler: Обработчик, получающий данные события
+        """
+        self._handlers[event].append(handler)
+
+    def _dispatch(self, event: str, payload: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(event, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"[Реплики] Ошибка обработчика события {event}: {e}")
+
+    async def publish(self, event: str, **payload: Any) -> None:
+        """Обрабатывает событие локально и рассылает его остальным репликам.
+
+        Args:
+            event: Название события
+            payload: Данные события (сериализуемые в JSON)
+        """
+        self._dispatch(event, payload)
+        await self.broadcast(event, **payload)
+
+    async def broadcast(self, event: str, **payload: Any) -> None:
+        """Рассылает событие остальным репликам без локальной обработки.
+
+        Используется, когда кэш процесса уже обновлен на месте.
+
+        Args:
+            event: Название события
+            payload: Данные события (сериализуемые в JSON)
+        """
+        redis = get_redis()
+        if redis is None:
+            return
+        message = json.dumps(
+            {"event": event, "replica": REPLICA_ID, "payload": payload},
+            ensure_ascii=False,
+        )
+        try:
+            await redis.publish(self.CHANNEL, message)
+        except RedisError as e:
+            logger.error(f"[Реплики] Не удалось разослать событие {event}: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with get_redis().pubsub() as pubsub:
+                    await pubsub.subscribe(self.CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = json.loads(message["data"])
+                        if data["replica"] == REPLICA_ID:
+                            continue
+                        logger.info(
+                            f"[Реплики] Событие {data['event']} от {data['replica']}"
+                        )
+                        self._dispatch(data["event"], data["payload"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Реплики] Подписка на события прервана: {e}")
+                await asyncio.sleep(5)
+
+    def start(self) -> None:
+        """Запускает прием событий от других реплик."""
+        if get_redis() is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen(), name="invalidation-bus")
+
+    async def stop(self) -> None:
+        """Останавливает прием событий."""
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        self._listener = None
+
+
+_bus: Optional[InvalidationBus] = None
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """Получает глобальный экземпляр шины событий (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр InvalidationBus
+    """
+    global _bus
+    if _bus is None:
+        _bus = InvalidationBus()
+    return _bus
+
+
+def _on_files_changed(payload: Dict[str, Any]) -> None:
+    from tgbot.services.directory import get_employee_directory
+    from tgbot.services.files_processing.core.cache import get_cache
+    from tgbot.services.files_processing.managers.files import ScheduleFileManager
+    from tgbot.services.inline_cache import get_inline_cache
+    from tgbot.services.schedule_cache import get_schedule_cache
+    from tgbot.services.uploads import get_upload_metadata
+
+    file_name = payload.get("file_name")
+    if file_name:
+        get_cache().invalidate(Path("uploads") / file_name)
+    else:
+        get_cache().clear()
+    ScheduleFileManager().clear_cache()
+    get_schedule_cache().clear()
+    get_inline_cache().clear()
+    get_employee_directory().invalidate()
+    get_upload_metadata().invalidate()
+
+
+def _on_employees_changed(payload: Dict[str, Any]) -> None:
+    from tgbot.services.directory import get_employee_directory
+
+    user_ids = payload.get("user_ids")
+    if user_ids:
+        get_employee_directory().mark_stale(user_ids)
+    else:
+        get_employee_directory().invalidate()
+
+
+def _on_balances_changed(payload: Dict[str, Any]) -> None:
+    from tgbot.services.balances import get_balance_projection
+
+    projection = get_balance_projection()
+    for user_id in payload.get("user_ids", []):
+        projection.invalidate(user_id)
+
+
+def _on_exchanges_changed(payload: Dict[str, Any]) -> None:
+    from tgbot.services.schedule_cache import get_schedule_cache
+
+    user_ids = payload.get("user_ids")
+    if user_ids is None:
+        get_schedule_cache().bump_exchanges()
+    else:
+        get_schedule_cache().bump_exchanges(set(user_ids))
+
+
+def register_cache_invalidation() -> None:
+    """Подписывает кэши процесса на события сброса."""
+    bus = get_invalidation_bus()
+    bus.subscribe(FILES_CHANGED, _on_files_changed)
+    bus.subscribe(EMPLOYEES_CHANGED, _on_employees_changed)
+    bus.subscribe(BALANCES_CHANGED, _on_balances_changed)
+    bus.subscribe(EXCHANGES_CHANGED, _on_exchanges_changed)
@@ -0,0 +1,221 @@
+"""Кэш отрендеренных графиков сотрудников.
+
+Текст графика меняется только при загрузке новых файлов графиков и дежурных
+или при изменении сделок сотрудника, поэтому готовый текст хранится по ключу
+(сотрудник, месяц, год, режим, дата, версия файлов, версия сделок).
+
+Версии сделок ведутся по сотрудникам и увеличиваются после commit любой
+сессии, изменившей сделки. Изменения объектов Exchange дают номера
+участников сделки, а массовые INSERT/UPDATE/DELETE без известных участников
+увеличивают общую версию и сбрасывают графики всех сотрудников. Остальные
+реплики получают те же изменения событием EXCHANGES_CHANGED.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+from stp_database.models.STP import Exchange
+
+from tgbot.services.background import run_detached
+from tgbot.services.replicas import EXCHANGES_CHANGED, get_invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# Ключ session.info с участниками измененных сделок до commit
+_PENDING_KEY = "schedule_cache_exchange_users"
+
+# Маркер изменения сделок с неизвестными участниками
+_ALL_USERS = None
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleKey:
+    """Ключ отрендеренного графика.
+
+    Attributes:
+        user_id: Идентификатор Telegram сотрудника
+        fullname: ФИО сотрудника
+        division: Направление сотрудника
+        month: Название месяца
+        year: Год
+        compact: Компактный режим
+        with_duties: График дополнен дежурствами и сделками
+        with_links: Сделки оформлены ссылками
+        day: Дата рендера (в графике выделяется текущий день)
+        files_version: Версия файлов графиков и дежурных
+        exchanges_version: Версия сделок сотрудника
+    """
+
+    user_id: Optional[int]
+    fullname: str
+    division: str
+    month: str
+    year: Optional[int]
+    compact: bool
+    with_duties: bool
+    with_links: bool
+    day: date
+    files_version: int
+    exchanges_version: Tuple[int, int]
+
+
+class ScheduleRenderCache:
+    """Кэш текстов графиков с версиями файлов и сделок."""
+
+    def __init__(self, max_size: int = 2000, ttl_seconds: int = 3600):
+        """Инициализирует кэш.
+
+        Args:
+            max_size: Максимальное количество графиков в кэше
+            ttl_seconds: Время жизни графика в секундах
+        """
+        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._exchange_versions: Dict[int, int] = {}
+        self._exchange_epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def exchanges_version(self, user_id: Optional[int]) -> Tuple[int, int]:
+        """Получает версию сделок сотрудника.
+
+        Args:
+            user_id: Идентификатор Telegram сотрудника
+
+        Returns:
+            Пара (общая версия, версия сотрудника)
+        """
+        return self._exchange_epoch, self._exchange_versions.get(user_id, 0)
+
+    def bump_exchanges(self, user_ids: Optional[Set[int]] = _ALL_USERS) -> None:
+        """Помечает графики участников сделок устаревшими.
+
+        Args:
+            user_ids: Идентификаторы Telegram участников. Если не указаны -
+                устаревают графики всех сотрудников
+        """
+        if user_ids is _ALL_USERS:
+            self._exchange_epoch += 1
+            return
+        for user_id in user_ids:
+            self._exchange_versions[user_id] = (
+                self._exchange_versions.get(user_id, 0) + 1
+            )
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Получает отрендеренный график.
+
+        Args:
+            key: Ключ графика
+
+        Returns:
+            Текст графика или None
+        """
+        text = self._cache.get(key)
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    def store(self, key: Hashable, text: str) -> None:
+        """Сохраняет отрендеренный график.
+
+        Args:
+            key: Ключ графика
+            text: Текст графика
+        """
+        self._cache[key] = text
+
+    def clear(self) -> None:
+        """Очищает кэш, например после загрузки файлов."""
+        self._cache.clear()
+
+
+_schedule_cache: Optional[ScheduleRenderCache] = None
+
+
+def get_schedule_cache() -> ScheduleRenderCache:
+    """Получает глобальный экземпляр кэша графиков (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр ScheduleRenderCache
+    """
+    global _schedule_cache
+    if _schedule_cache is None:
+        _schedule_cache = ScheduleRenderCache()
+    return _schedule_cache
+
+
+def _mark_pending(session: Session, user_ids: Optional[Set[int]]) -> None:
+    pending = session.info.get(_PENDING_KEY, set())
+    if pending is _ALL_USERS or user_ids is _ALL_USERS:
+        session.info[_PENDING_KEY] = _ALL_USERS
+    else:
+        session.info[_PENDING_KEY] = pending | user_ids
+
+
+def _on_after_flush(session: Session, _flush_context) -> None:
+    user_ids = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Exchange):
+            attrs = inspect(instance).attrs
+            for name in ("owner_id", "counterpart_id"):
+                # Прежние участники (отмена или переназначение) тоже устарели
+                history = getattr(attrs, name).history
+                user_ids.update(
+                    uid for uid in (getattr(instance, name), *history.deleted) if uid
+                )
+    if user_ids:
+        _mark_pending(session, user_ids)
+
+
+def _on_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is Exchange:
+        _mark_pending(orm_execute_state.session, _ALL_USERS)
+
+
+def _on_after_commit(session: Session) -> None:
+    if _PENDING_KEY not in session.info:
+        return
+    user_ids = session.info.pop(_PENDING_KEY)
+    get_schedule_cache().bump_exchanges(user_ids)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # Синхронная сессия вне цикла событий (скрипты) - рассылать некому
+        return
+    run_detached(
+        get_invalidation_bus().broadcast(
+            EXCHANGES_CHANGED,
+            user_ids=None if user_ids is _ALL_USERS else sorted(user_ids),
+        ),
+        name="schedule_cache:exchanges_changed",
+    )
+
+
+def _on_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_exchange_listeners() -> None:
+    """Подписывает кэш графиков на изменения сделок во всех сессиях."""
+    if event.contains(Session, "after_commit", _on_after_commit):
+        return
+    event.listen(Session, "after_flush", _on_after_flush)
+    event.listen(Session, "do_orm_execute", _on_orm_execute)
+    event.listen(Session, "after_commit", _on_after_commit)
+    event.listen(Session, "after_rollback", _on_after_rollback)
+    logger.info("[Графики] Кэш графиков подписан на изменения сделок")
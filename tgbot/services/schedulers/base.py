@@ -7,14 +7,17 @@ from typing import Optional
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from tgbot.services.schedulers.lease import JobLease
+
 logger = logging.getLogger(__name__)
 
 
 class BaseScheduler(ABC):
     """Base scheduler class providing common interface."""
 
-    def __init__(self, category_name: str):
+    def __init__(self, category_name: str, lease: Optional[JobLease] = None):
         self.category_name = category_name
+        self.lease = lease or JobLease()
         self.logger = logging.getLogger(f"{__name__}.{category_name}")
 
     @abstractmethod
@@ -2,24 +2,31 @@
 
 import logging
 from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.deep_linking import create_start_link
+from apscheduler.events import EVENT_JOB_SUBMITTED, JobSubmissionEvent
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import and_, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from stp_database.models.STP import Exchange
+from stp_database.models.STP import Employee, Exchange
 from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.dialogs.getters.common.exchanges.exchanges import get_exchange_text
 from tgbot.misc.helpers import tz_perm
-from tgbot.services.broadcaster import send_message
+from tgbot.services.broadcaster import OutgoingMessage, send_messages
 from tgbot.services.schedulers.base import BaseScheduler
+from tgbot.services.schedulers.lease import JobLease
 
 logger = logging.getLogger(__name__)
 
 TIME_WINDOW = timedelta(minutes=5)
 MIN_RESCHEDULE = timedelta(minutes=30)
+EXPIRE_BATCH_SIZE = 500
+# Interval jobs count from a fixed point, so every replica schedules the same run times
+INTERVAL_ANCHOR = tz_perm.localize(datetime(2024, 1, 1))
 
 MSG = {
     "expired": "⏳ <b>Сделка истекла</b>\n\nУ сделки наступило время {time_type}\n\n{info}\n\n<i>Ты можешь отредактировать ее и опубликовать снова</i>",
@@ -65,8 +72,9 @@ def create_subscription_keyboard(
 class ExchangesScheduler(BaseScheduler):
     """Exchanges marketplace scheduler."""
 
-    def __init__(self):
-        super().__init__("Биржа подмен")
+    def __init__(self, lease: Optional[JobLease] = None):
+        super().__init__("Биржа подмен", lease=lease)
+        self._run_times: Dict[str, datetime] = {}
 
     def setup_jobs(
         self,
@@ -123,7 +131,11 @@ class ExchangesScheduler(BaseScheduler):
                 "replace_existing": True,
             }
             if trigger == "interval":
-                kwargs.update({"trigger": "interval", "minutes": interval})
+                kwargs.update({
+                    "trigger": "interval",
+                    "minutes": interval,
+                    "start_date": INTERVAL_ANCHOR,
+                })
             else:
                 kwargs.update({
                     "trigger": "cron",
@@ -132,67 +144,172 @@ class ExchangesScheduler(BaseScheduler):
                     "timezone": tz_perm,
                 })
             scheduler.add_job(**kwargs)
+        scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED)
+
+    def _on_job_submitted(self, event: JobSubmissionEvent) -> None:
+        # Dispatched before the job coroutine starts, the lease key uses it
+        if event.job_id.startswith("exchanges_"):
+            self._run_times[event.job_id] = event.scheduled_run_times[-1]
+
+    async def _run_exclusive(self, job_id: str, period: timedelta, func, *args):
+        """Run job only on the replica that holds the lease for this run."""
+        run_time = self._run_times.pop(job_id, None)
+        if not await self.lease.acquire(job_id, period, run_time):
+            return
+        await func(*args)
 
     async def _expired_job(self, pool, bot):
-        await check_expired_offers(pool, bot)
+        await self._run_exclusive(
+            "exchanges_expired", timedelta(minutes=1), check_expired_offers, pool, bot
+        )
 
     async def _upcoming_1h_job(self, pool, bot):
-        await check_upcoming(pool, bot, 1)
+        await self._run_exclusive(
+            "exchanges_upcoming_1h", timedelta(minutes=10), check_upcoming, pool, bot, 1
+        )
 
     async def _upcoming_1d_job(self, pool, bot):
-        await check_upcoming(pool, bot, 24)
+        await self._run_exclusive(
+            "exchanges_upcoming_1d", timedelta(hours=1), check_upcoming, pool, bot, 24
+        )
 
     async def _payment_job(self, pool, bot):
-        await check_payment_dates(pool, bot)
+        await self._run_exclusive(
+            "exchanges_payment", timedelta(days=1), check_payment_dates, pool, bot
+        )
 
     async def _reminder_job(self, pool, bot):
-        await check_payment_reminders(pool, bot)
+        await self._run_exclusive(
+            "exchanges_reminder", timedelta(days=1), check_payment_reminders, pool, bot
+        )
+
+
+async def expire_overdue_exchanges(
+    session: AsyncSession, now: datetime, limit: int = EXPIRE_BATCH_SIZE
+) -> List[Exchange]:
+    """Expire all overdue active exchanges with a single UPDATE.
+
+    Rows are locked with SKIP LOCKED, so concurrent runs never expire
+    (and notify) the same exchange twice.
+
+    Args:
+        session: STP database session
+        now: Current local time
+        limit: Max exchanges to expire per run
+
+    Returns:
+        Expired exchanges detached from the session
+    """
+    local_now = now.replace(tzinfo=None)
+    query = (
+        select(Exchange)
+        .where(
+            Exchange.status == "active",
+            or_(
+                and_(Exchange.owner_intent == "sell", Exchange.start_time <= local_now),
+                and_(Exchange.owner_intent != "sell", Exchange.end_time <= local_now),
+            ),
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    exchanges = list((await session.scalars(query)).all())
+    if not exchanges:
+        await session.rollback()
+        return []
+
+    await session.execute(
+        update(Exchange)
+        .where(Exchange.id.in_([exc.id for exc in exchanges]))
+        .values(status="expired")
+    )
+    # Detach before commit so the returned objects keep their loaded state
+    for exc in exchanges:
+        session.expunge(exc)
+    await session.commit()
+    return exchanges
+
+
+async def load_participants(
+    session: AsyncSession, exchanges: Iterable[Exchange]
+) -> Dict[int, Employee]:
+    """Load owners and counterparts of exchanges with a single query.
+
+    Args:
+        session: STP database session
+        exchanges: Exchanges to load participants for
+
+    Returns:
+        Employees by Telegram user id
+    """
+    user_ids = {
+        user_id
+        for exc in exchanges
+        for user_id in (exc.owner_id, exc.counterpart_id)
+        if user_id
+    }
+    if not user_ids:
+        return {}
+
+    result = await session.scalars(
+        select(Employee).where(Employee.user_id.in_(user_ids))
+    )
+    return {employee.user_id: employee for employee in result}
+
+
+def _participants(exc: Exchange) -> tuple[Optional[int], Optional[int]]:
+    """Return (seller_id, buyer_id) of an exchange."""
+    if exc.owner_intent == "sell":
+        return exc.owner_id, exc.counterpart_id
+    return exc.counterpart_id, exc.owner_id
+
+
+def _open_exchange_keyboard(link: str, text: str = "🎭 Открыть сделку"):
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text=text, url=link)]]
+    )
 
 
 async def check_expired_offers(
     stp_session_pool: async_sessionmaker[AsyncSession], bot: Bot
 ):
-    """Check and hide expired offers."""
+    """Expire overdue offers and notify owners."""
     async with stp_session_pool() as session:
         repo = MainRequestsRepo(session)
-        exchanges = await repo.exchange.get_active_exchanges(
-            include_private=True, limit=200
-        )
-        now = datetime.now(tz_perm)
+        expired = await expire_overdue_exchanges(session, datetime.now(tz_perm))
+        if not expired:
+            return
 
-        for exc in exchanges:
+        employees = await load_participants(session, expired)
+        messages = []
+        for exc in expired:
             try:
-                exp_time = (
-                    exc.start_time if exc.owner_intent == "sell" else exc.end_time
-                )
-                if not exp_time:
-                    continue
-
-                exp_time = _to_local(exp_time)
-                if now >= exp_time:
-                    await repo.exchange.expire_exchange(exc.id)
-                    await _notify_expired(bot, repo, exc)
+                message = await _build_expired_message(bot, repo, exc, employees)
+                if message:
+                    messages.append(message)
             except Exception as e:
                 logger.error(f"[Exchanges] Expired error {exc.id}: {e}")
 
+    logger.info(f"[Exchanges] Expired {len(expired)} exchanges")
+    await send_messages(bot, messages)
 
-async def _notify_expired(bot: Bot, repo: MainRequestsRepo, exc: Exchange):
-    if not exc.owner_id:
-        return
 
-    owner = await repo.employee.get_users(user_id=exc.owner_id)
+async def _build_expired_message(
+    bot: Bot, repo: MainRequestsRepo, exc: Exchange, employees: Dict[int, Employee]
+) -> Optional[OutgoingMessage]:
+    owner = employees.get(exc.owner_id) if exc.owner_id else None
     if not owner:
-        return
+        return None
 
-    info = await get_exchange_text(repo, exc, user_id=owner.user_id)
-    link = await create_start_link(bot, f"exchange_{exc.id}", encode=True)
+    info = await get_exchange_text(
+        repo, exc, user_id=owner.user_id, employees=employees
+    )
+    link = await create_exchange_deeplink(bot, exc.id)
     msg = MSG["expired"].format(
         time_type="начала" if exc.owner_intent == "sell" else "конца", info=info
     )
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="🎭 Открыть сделку", url=link)]]
-    )
+    kb = _open_exchange_keyboard(link)
     if exc.owner_intent == "sell" and _can_reschedule(exc):
         kb.inline_keyboard.append([
             InlineKeyboardButton(
@@ -200,7 +317,7 @@ async def _notify_expired(bot: Bot, repo: MainRequestsRepo, exc: Exchange):
             )
         ])
 
-    await send_message(bot, exc.owner_id, msg, reply_markup=kb)
+    return OutgoingMessage(exc.owner_id, msg, kb)
 
 
 async def check_upcoming(
@@ -216,42 +333,59 @@ async def check_upcoming(
         exchanges = await repo.exchange.get_upcoming_sold_exchanges(
             start_after=start, start_before=end, limit=500
         )
+        if not exchanges:
+            return
 
+        employees = await load_participants(session, exchanges)
+        messages = []
         for exc in exchanges:
             try:
-                await _notify_upcoming(bot, repo, exc, hours)
+                messages.extend(
+                    await _build_upcoming_messages(bot, repo, exc, hours, employees)
+                )
             except Exception as e:
                 logger.error(f"[Exchanges] Upcoming error {exc.id}: {e}")
 
+    await send_messages(bot, messages)
 
-async def _notify_upcoming(bot: Bot, repo: MainRequestsRepo, exc: Exchange, hours: int):
-    link = await create_start_link(bot, f"exchange_{exc.id}", encode=True)
-    emoji, time_text = ("⏰", "через 1 час") if hours == 1 else ("📅", "завтра")
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="🎭 Открыть сделку", url=link)]]
-    )
 
-    seller_id = exc.owner_id if exc.owner_intent == "sell" else exc.counterpart_id
-    buyer_id = exc.counterpart_id if exc.owner_intent == "sell" else exc.owner_id
+async def _build_upcoming_messages(
+    bot: Bot,
+    repo: MainRequestsRepo,
+    exc: Exchange,
+    hours: int,
+    employees: Dict[int, Employee],
+) -> List[OutgoingMessage]:
+    link = await create_exchange_deeplink(bot, exc.id)
+    emoji, time_text = ("⏰", "через 1 час") if hours == 1 else ("📅", "завтра")
+    kb = _open_exchange_keyboard(link)
+    seller_id, buyer_id = _participants(exc)
+    messages = []
 
     if seller_id:
-        info = await get_exchange_text(repo, exc, user_id=seller_id)
-        await send_message(
-            bot,
-            seller_id,
-            MSG["upcoming_seller"].format(emoji=emoji, time=time_text, info=info),
-            reply_markup=kb,
+        info = await get_exchange_text(
+            repo, exc, user_id=seller_id, employees=employees
+        )
+        messages.append(
+            OutgoingMessage(
+                seller_id,
+                MSG["upcoming_seller"].format(emoji=emoji, time=time_text, info=info),
+                kb,
+            )
         )
 
     if buyer_id:
-        info = await get_exchange_text(repo, exc, user_id=buyer_id)
-        await send_message(
-            bot,
-            buyer_id,
-            MSG["upcoming_buyer"].format(emoji=emoji, time=time_text, info=info),
-            reply_markup=kb,
+        info = await get_exchange_text(repo, exc, user_id=buyer_id, employees=employees)
+        messages.append(
+            OutgoingMessage(
+                buyer_id,
+                MSG["upcoming_buyer"].format(emoji=emoji, time=time_text, info=info),
+                kb,
+            )
         )
 
+    return messages
+
 
 async def check_payment_dates(
     stp_session_pool: async_sessionmaker[AsyncSession], bot: Bot
@@ -263,36 +397,53 @@ async def check_payment_dates(
         exchanges = await repo.exchange.get_exchanges_by_payment_date(
             payment_date=today, status="sold", is_paid=False
         )
+        if not exchanges:
+            return
 
+        employees = await load_participants(session, exchanges)
+        messages = []
         for exc in exchanges:
-            await _notify_payment(bot, repo, exc)
+            try:
+                messages.extend(
+                    await _build_payment_messages(bot, repo, exc, employees)
+                )
+            except Exception as e:
+                logger.error(f"[Exchanges] Payment error {exc.id}: {e}")
 
+    await send_messages(bot, messages)
 
-async def _notify_payment(bot: Bot, repo: MainRequestsRepo, exc: Exchange):
-    link = await create_start_link(bot, f"exchange_{exc.id}", encode=True)
-    seller_id = exc.owner_id if exc.owner_intent == "sell" else exc.counterpart_id
-    buyer_id = exc.counterpart_id if exc.owner_intent == "sell" else exc.owner_id
+
+async def _build_payment_messages(
+    bot: Bot, repo: MainRequestsRepo, exc: Exchange, employees: Dict[int, Employee]
+) -> List[OutgoingMessage]:
+    link = await create_exchange_deeplink(bot, exc.id)
+    seller_id, buyer_id = _participants(exc)
+    messages = []
 
     if buyer_id:
-        info = await get_exchange_text(repo, exc, user_id=buyer_id)
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="💰 Отметить оплату", url=link)]
-            ]
-        )
-        await send_message(
-            bot, buyer_id, MSG["payment_buyer"].format(info=info), reply_markup=kb
+        info = await get_exchange_text(repo, exc, user_id=buyer_id, employees=employees)
+        messages.append(
+            OutgoingMessage(
+                buyer_id,
+                MSG["payment_buyer"].format(info=info),
+                _open_exchange_keyboard(link, "💰 Отметить оплату"),
+            )
         )
 
     if seller_id:
-        info = await get_exchange_text(repo, exc, user_id=seller_id)
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[[InlineKeyboardButton(text="🎭 Открыть сделку", url=link)]]
+        info = await get_exchange_text(
+            repo, exc, user_id=seller_id, employees=employees
         )
-        await send_message(
-            bot, seller_id, MSG["payment_seller"].format(info=info), reply_markup=kb
+        messages.append(
+            OutgoingMessage(
+                seller_id,
+                MSG["payment_seller"].format(info=info),
+                _open_exchange_keyboard(link),
+            )
         )
 
+    return messages
+
 
 async def check_payment_reminders(
     stp_session_pool: async_sessionmaker[AsyncSession], bot: Bot
@@ -303,15 +454,28 @@ async def check_payment_reminders(
         users_data = await repo.exchange.get_users_with_unpaid_exchanges(
             status="sold", is_paid=False
         )
+        if not users_data:
+            return
 
+        employees = await load_participants(
+            session, [exc for data in users_data for exc in data["exchanges"]]
+        )
+        messages = []
         for data in users_data:
-            await _send_reminder(bot, repo, data)
+            try:
+                messages.extend(await _build_reminder_messages(repo, data, employees))
+            except Exception as e:
+                logger.error(f"[Exchanges] Reminder error {data['user_id']}: {e}")
 
+    await send_messages(bot, messages)
 
-async def _send_reminder(bot: Bot, repo: MainRequestsRepo, data: dict):
+
+async def _build_reminder_messages(
+    repo: MainRequestsRepo, data: dict, employees: Dict[int, Employee]
+) -> List[OutgoingMessage]:
     user_id, exchanges = data["user_id"], data["exchanges"]
     if not exchanges:
-        return
+        return []
 
     today = datetime.now(tz_perm).date()
     buyer, seller = [], []
@@ -321,28 +485,25 @@ async def _send_reminder(bot: Bot, repo: MainRequestsRepo, data: dict):
             if _to_local(exc.payment_date).date() > today:
                 continue
 
-        if exc.owner_intent == "sell":
-            if exc.counterpart_id == user_id:
-                buyer.append(exc)
-            elif exc.owner_id == user_id:
-                seller.append(exc)
-        else:
-            if exc.owner_id == user_id:
-                buyer.append(exc)
-            elif exc.counterpart_id == user_id:
-                seller.append(exc)
-
-    if buyer:
-        infos = [f"• {await get_exchange_text(repo, exc, user_id)}" for exc in buyer]
-        await send_message(
-            bot, user_id, MSG["reminder_buyer"].format(list="\n\n".join(infos))
+        seller_id, buyer_id = _participants(exc)
+        if buyer_id == user_id:
+            buyer.append(exc)
+        elif seller_id == user_id:
+            seller.append(exc)
+
+    messages = []
+    for key, user_exchanges in (("reminder_buyer", buyer), ("reminder_seller", seller)):
+        if not user_exchanges:
+            continue
+        infos = [
+            f"• {await get_exchange_text(repo, exc, user_id, employees=employees)}"
+            for exc in user_exchanges
+        ]
+        messages.append(
+            OutgoingMessage(user_id, MSG[key].format(list="\n\n".join(infos)))
         )
 
-    if seller:
-        infos = [f"• {await get_exchange_text(repo, exc, user_id)}" for exc in seller]
-        await send_message(
-            bot, user_id, MSG["reminder_seller"].format(list="\n\n".join(infos))
-        )
+    return messages
 
 
 def _to_local(dt: datetime) -> datetime:
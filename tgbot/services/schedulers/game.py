@@ -0,0 +1,78 @@
+"""Game (balances) scheduler."""
+
+import logging
+
+from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from stp_database.repo.STP import MainRequestsRepo
+
+from tgbot.services.balances import get_balance_projection
+from tgbot.services.catalog import get_catalog_cache
+from tgbot.services.schedulers.base import BaseScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class GameScheduler(BaseScheduler):
+    """Game balances scheduler."""
+
+    def __init__(self):
+        super().__init__("Игра")
+
+    def setup_jobs(
+        self,
+        scheduler: AsyncIOScheduler,
+        stp_session_pool: async_sessionmaker[AsyncSession],
+        bot: Bot,
+    ):
+        self._add_job(
+            scheduler,
+            self._reconcile_job,
+            "interval",
+            "reconcile_balances",
+            "Сверка балансов с журналом транзакций",
+            minutes=10,
+            args=[stp_session_pool],
+        )
+
+        self._add_job(
+            scheduler,
+            self._refresh_catalog_job,
+            "interval",
+            "refresh_catalog",
+            "Обновление каталогов достижений и предметов",
+            minutes=5,
+            args=[stp_session_pool],
+        )
+
+    async def _reconcile_job(self, stp_session_pool: async_sessionmaker[AsyncSession]):
+        self._log_job_execution("Сверка балансов", True)
+        try:
+            await reconcile_balances(stp_session_pool)
+            self._log_job_execution("Сверка балансов", True)
+        except Exception as e:
+            self._log_job_execution("Сверка балансов", False, str(e))
+
+    async def _refresh_catalog_job(
+        self, stp_session_pool: async_sessionmaker[AsyncSession]
+    ):
+        try:
+            await refresh_catalog(stp_session_pool)
+            self._log_job_execution("Обновление каталогов", True)
+        except Exception as e:
+            self._log_job_execution("Обновление каталогов", False, str(e))
+
+
+async def reconcile_balances(stp_session_pool: async_sessionmaker[AsyncSession]):
+    """Reconcile cached balances against the transaction ledger."""
+    async with stp_session_pool() as session:
+        repo = MainRequestsRepo(session)
+        return await get_balance_projection().reconcile(repo)
+
+
+async def refresh_catalog(stp_session_pool: async_sessionmaker[AsyncSession]):
+    """Reload achievements and products catalogs."""
+    async with stp_session_pool() as session:
+        repo = MainRequestsRepo(session)
+        return await get_catalog_cache().refresh(repo)
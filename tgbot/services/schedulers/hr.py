@@ -2,22 +2,37 @@
 
 import logging
 import os
+import time
 from collections import defaultdict
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterable, List
 
-import pandas as pd
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from stp_database.models.STP import Employee
+from stp_database.models.STP.group import Group
 from stp_database.repo.STP import MainRequestsRepo
-from stp_database.repo.STP.employee import EmployeeRepo
 
-from tgbot.services.broadcaster import send_message
+from tgbot.services.broadcaster import (
+    ChatAction,
+    OutgoingMessage,
+    run_chat_actions,
+    send_message,
+    send_messages,
+)
+from tgbot.services.directory import get_employee_directory
+from tgbot.services.files_processing.core.workbook import open_workbook
+from tgbot.services.replicas import EMPLOYEES_CHANGED, get_invalidation_bus
 from tgbot.services.schedulers.base import BaseScheduler
 
+if TYPE_CHECKING:
+    from tgbot.services.files_processing.processors.users import EmployeeRef
+
 logger = logging.getLogger(__name__)
 
 MONTH_MAP = {
@@ -59,6 +74,17 @@ class HRScheduler(BaseScheduler):
         super().__init__("HR")
 
     def setup_jobs(self, scheduler: AsyncIOScheduler, stp_session_pool, bot: Bot):
+        # Refresh employee directory
+        self._add_job(
+            scheduler,
+            self._directory_job,
+            "interval",
+            "refresh_directory",
+            "Обновление справочника сотрудников",
+            minutes=5,
+            args=[stp_session_pool],
+        )
+
         # Process fired users
         scheduler.add_job(
             func=self._fired_job,
@@ -109,14 +135,19 @@ class HRScheduler(BaseScheduler):
             run_date=None,
         )
 
+    async def _directory_job(self, stp_session_pool):
+        await self._run_wrapped(refresh_directory, stp_session_pool)
+
     async def _fired_job(self, stp_session_pool, bot):
         await self._run_wrapped(process_fired_users, stp_session_pool, bot)
+        await get_invalidation_bus().publish(EMPLOYEES_CHANGED)
 
     async def _unauth_job(self, stp_session_pool, bot):
         await self._run_wrapped(notify_unauthorized_users, stp_session_pool, bot)
 
     async def _vacation_job(self, stp_session_pool):
         await self._run_wrapped(process_vacation_status, stp_session_pool)
+        await get_invalidation_bus().publish(EMPLOYEES_CHANGED)
 
     async def _run_wrapped(self, func, *args):
         name = func.__name__
@@ -152,12 +183,11 @@ def get_fired_users(files_list: List[str] = None) -> List[str]:
 
     for file_path in schedule_files:
         try:
-            df = pd.read_excel(file_path, sheet_name="ЗАЯВЛЕНИЯ", header=None)
-            for idx in range(len(df)):
+            for row in open_workbook(file_path).iter_rows("ЗАЯВЛЕНИЯ"):
                 try:
-                    fullname = str(df.iloc[idx, 0]) if pd.notna(df.iloc[idx, 0]) else ""
-                    date_val = df.iloc[idx, 1] if pd.notna(df.iloc[idx, 1]) else None
-                    type_val = str(df.iloc[idx, 2]) if pd.notna(df.iloc[idx, 2]) else ""
+                    fullname, date_val, type_val = (*row[:3], None, None, None)[:3]
+                    fullname = str(fullname) if fullname is not None else ""
+                    type_val = str(type_val) if type_val is not None else ""
 
                     if (
                         type_val.strip().lower() in ["увольнение", "декрет"]
@@ -217,56 +247,176 @@ def _find_schedule_files(
     ]
 
 
+async def refresh_directory(stp_session_pool: async_sessionmaker[AsyncSession]):
+    """Reload in-memory employee directory."""
+    async with stp_session_pool() as session:
+        repo = MainRequestsRepo(session)
+        await get_employee_directory().refresh(repo)
+
+
 async def process_fired_users(
     stp_session_pool: async_sessionmaker[AsyncSession], bot: Bot = None
 ):
     """Process fired users - delete from DB and groups."""
+    from tgbot.services.files_processing.processors.users import sync_employees
+
     fired = get_fired_users()
     if not fired:
         return
 
-    async with stp_session_pool() as session:
-        repo = EmployeeRepo(session)
-        total = 0
-        for name in fired:
-            deleted = await repo.delete_user(name)
-            total += deleted or 0
-        logger.info(f"[Увольнения] Deleted {total} records for {len(fired)} users")
+    changes = await sync_employees(stp_session_pool, fired_names=fired)
+    logger.info(
+        f"[Увольнения] Deleted {len(changes.fired)} records for {len(fired)} users"
+    )
+
+    if bot and changes.fired:
+        await remove_from_groups(stp_session_pool, bot, changes.fired)
+
+
+@dataclass(slots=True)
+class GroupRemoval:
+    """Fired employee membership in a group with remove_unemployed=True."""
+
+    group_id: int
+    group_type: str
+    employee: "EmployeeRef"
+
+
+@dataclass(slots=True)
+class GroupRemovalSummary:
+    """Result of removing fired employees from groups."""
 
-    if bot and fired:
-        await remove_from_groups(stp_session_pool, bot, fired)
+    employees: int = 0
+    memberships: int = 0
+    removed: int = 0
+    banned: int = 0
+    ban_failed: int = 0
+    notified: int = 0
+    elapsed: float = 0.0
+
+
+async def plan_group_removals(
+    repo: MainRequestsRepo, employees: Iterable["EmployeeRef"]
+) -> List[GroupRemoval]:
+    """Resolve all (employee, group) pairs to remove.
+
+    Groups with remove_unemployed=True are loaded with one query. Memberships
+    are then read from whichever side needs fewer queries: per group or per
+    employee.
+    """
+    by_user_id = {e.user_id: e for e in employees if e.user_id}
+    if not by_user_id:
+        return []
+
+    groups = {
+        group.group_id: group
+        for group in await repo.session.scalars(
+            select(Group).where(Group.remove_unemployed.is_(True))
+        )
+    }
+    if not groups:
+        return []
+
+    plan = []
+    if len(groups) <= len(by_user_id):
+        for group in groups.values():
+            members = await repo.group_member.get_group_members(group_id=group.group_id)
+            for member in members:
+                employee = by_user_id.get(member.member_id)
+                if employee:
+                    plan.append(
+                        GroupRemoval(group.group_id, group.group_type, employee)
+                    )
+    else:
+        for user_id, employee in by_user_id.items():
+            for gm in await repo.group_member.get_member_groups(member_id=user_id):
+                group = groups.get(gm.group_id)
+                if group:
+                    plan.append(
+                        GroupRemoval(group.group_id, group.group_type, employee)
+                    )
+    return plan
 
 
 async def remove_from_groups(
-    stp_session_pool: async_sessionmaker[AsyncSession], bot: Bot, fired: List[str]
-):
-    """Remove fired users from groups with remove_unemployed=True."""
+    stp_session_pool: async_sessionmaker[AsyncSession],
+    bot: Bot,
+    fired: Iterable["EmployeeRef"],
+) -> GroupRemovalSummary:
+    """Remove fired users from groups with remove_unemployed=True.
+
+    Employees are passed as snapshots taken before deletion, so their Telegram
+    ids are known. Bans run concurrently across chats (ordered within a chat)
+    under a shared rate limit, then each employee gets one notification.
+    """
+    started = time.monotonic()
+    fired = list(fired)
+    summary = GroupRemovalSummary(employees=len(fired))
+
     async with stp_session_pool() as session:
         repo = MainRequestsRepo(session)
+        plan = await plan_group_removals(repo, fired)
+        summary.memberships = len(plan)
+
+        removed = []
+        for removal in plan:
+            if await repo.group_member.remove_member(
+                removal.group_id, removal.employee.user_id
+            ):
+                removed.append(removal)
+        summary.removed = len(removed)
+
+    # Название чата запрашивается один раз перед исключениями в этом чате
+    actions = []
+    for group_id in dict.fromkeys(removal.group_id for removal in removed):
+        actions.append(
+            ChatAction(group_id, partial(bot.get_chat, group_id), "get_chat")
+        )
+    ban_actions = {}
+    for removal in removed:
+        action = ChatAction(
+            removal.group_id,
+            partial(
+                bot.ban_chat_member,
+                chat_id=removal.group_id,
+                user_id=removal.employee.user_id,
+            ),
+            f"ban {removal.employee.fullname}",
+        )
+        ban_actions[id(action)] = removal
+        actions.append(action)
+
+    titles = {}
+    notices = defaultdict(list)
+    for result in await run_chat_actions(actions):
+        removal = ban_actions.get(id(result.action))
+        if removal is None:
+            if result.ok:
+                titles[result.action.chat_id] = result.result.title
+            continue
+        if not result.ok:
+            summary.ban_failed += 1
+            logger.warning(
+                f"[Увольнения] Failed to ban {removal.employee.fullname} "
+                f"in {removal.group_id}: {result.error}"
+            )
+            continue
+        summary.banned += 1
+        title = titles.get(removal.group_id, removal.group_id)
+        notices[removal.employee.user_id].append(
+            f"✋ Ты был исключен из {'группы' if removal.group_type == 'group' else 'канала'} <code>{title}</code>"
+        )
 
-        for fullname in fired:
-            employee = await repo.employee.get_users(fullname=fullname)
-            if not employee or not employee.user_id:
-                continue
-
-            groups = await repo.group_member.get_member_groups(employee.user_id)
-            for gm in groups:
-                group = await repo.group.get_groups(gm.group_id)
-                if not group or not group.remove_unemployed:
-                    continue
-
-                if await repo.group_member.remove_member(gm.group_id, employee.user_id):
-                    try:
-                        await bot.ban_chat_member(
-                            chat_id=gm.group_id, user_id=employee.user_id
-                        )
-                        chat = await bot.get_chat(gm.group_id)
-                        await bot.send_message(
-                            employee.user_id,
-                            f"✋ Ты был исключен из {'группы' if group.group_type == 'group' else 'канала'} <code>{chat.title}</code>",
-                        )
-                    except Exception as e:
-                        logger.warning(f"[Увольнения] Failed to ban {fullname}: {e}")
+    summary.notified = await send_messages(
+        bot,
+        [
+            OutgoingMessage(user_id=user_id, text="\n".join(lines))
+            for user_id, lines in notices.items()
+        ],
+    )
+    summary.elapsed = round(time.monotonic() - started, 2)
+    logger.info(f"[Увольнения] Group removal summary: {asdict(summary)}")
+    return summary
 
 
 async def notify_unauthorized_users(
@@ -361,27 +511,12 @@ def get_vacation_users(files_list: List[str] = None) -> List[str]:
 
 async def process_vacation_status(stp_session_pool: async_sessionmaker[AsyncSession]):
     """Update vacation status in database."""
-    on_vacation = get_vacation_users()
-
-    async with stp_session_pool() as session:
-        repo = EmployeeRepo(session)
-        all_employees = await repo.get_users()
-
-        set_on = 0
-        set_off = 0
-        processed = set()
-
-        for name in on_vacation:
-            processed.add(name)
-            emp = await repo.get_users(fullname=name)
-            if emp and not emp.on_vacation:
-                emp.on_vacation = True
-                set_on += 1
-
-        for emp in all_employees:
-            if emp.on_vacation and emp.fullname not in processed:
-                emp.on_vacation = False
-                set_off += 1
-
-        await session.commit()
-        logger.info(f"[Отпуска] Set on: {set_on}, set off: {set_off}")
+    from tgbot.services.files_processing.processors.users import sync_employees
+
+    changes = await sync_employees(
+        stp_session_pool, vacation_names=set(get_vacation_users())
+    )
+    logger.info(
+        f"[Отпуска] Set on: {len(changes.vacation_on)}, "
+        f"set off: {len(changes.vacation_off)}"
+    )
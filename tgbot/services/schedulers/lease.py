@@ -0,0 +1,184 @@
+"""Cross-replica job run leases backed by Redis."""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+LEASE_PREFIX = "stpsher:scheduler:lease"
+LEADER_KEY = "stpsher:scheduler:leader"
+
+# Продление и освобождение ключа лидера только его владельцем
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class JobLease:
+    """Exactly-once guard for scheduled job runs across bot replicas.
+
+    A run is identified by its scheduled run time, which is the same on every
+    replica as long as the job triggers are aligned to the wall clock. The
+    first replica that sets the run key with ``SET NX`` owns the run, the rest
+    skip it, however far apart their timers actually fire. The key is never
+    released explicitly and expires after ``period``.
+
+    Runs without a known scheduled time fall back to wall-clock slots of
+    length ``period``. Without Redis the lease is always granted (single
+    replica mode).
+    """
+
+    def __init__(self, redis: Optional[Redis] = None, prefix: str = LEASE_PREFIX):
+        self.redis = redis
+        self.prefix = prefix
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _run_key(
+        self, job_id: str, period: timedelta, run_time: Optional[datetime]
+    ) -> str:
+        if run_time is not None:
+            return f"{self.prefix}:{job_id}:{int(run_time.timestamp())}"
+        slot = int(datetime.now().timestamp() // period.total_seconds())
+        return f"{self.prefix}:{job_id}:slot:{slot}"
+
+    async def acquire(
+        self, job_id: str, period: timedelta, run_time: Optional[datetime] = None
+    ) -> bool:
+        """Try to take the lease for a run of a job.
+
+        Args:
+            job_id: Job identifier
+            period: Job interval, defines the key TTL
+            run_time: Scheduled run time. If not given, the run is identified
+                by the current wall-clock slot of length ``period``
+
+        Returns:
+            True if this replica should execute the run, otherwise False
+        """
+        if self.redis is None:
+            return True
+
+        key = self._run_key(job_id, period, run_time)
+        try:
+            acquired = await self.redis.set(
+                key,
+                self.owner,
+                nx=True,
+                px=int(period.total_seconds() * 1000),
+            )
+        except RedisError as e:
+            # Without Redis we cannot know who runs the job, skipping is safer
+            # than sending duplicate notifications. The next run retries.
+            logger.error(f"[Lease] Failed to acquire {key}: {e}")
+            return False
+
+        if not acquired:
+            logger.debug(f"[Lease] {key} is held by another replica, skipping run")
+        return bool(acquired)
+
+    async def close(self) -> None:
+        """Close Redis connection (shared with the scheduler leader)."""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+class SchedulerLeader:
+    """Scheduler leader election across bot replicas.
+
+    Only the replica that holds the leader key runs scheduled jobs. The key has
+    a TTL and is renewed every ``ttl / 3``; if the leader dies, another replica
+    takes over after the TTL expires. Losing Redis demotes the leader, so two
+    replicas never run jobs at the same time for longer than one TTL.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key: str = LEADER_KEY,
+        ttl: timedelta = timedelta(seconds=30),
+    ):
+        self.redis = redis
+        self.key = key
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _try_lead(self) -> bool:
+        ttl_ms = int(self.ttl.total_seconds() * 1000)
+        if self.is_leader:
+            renewed = await self.redis.eval(
+                _RENEW_SCRIPT, 1, self.key, self.owner, ttl_ms
+            )
+            return bool(renewed)
+        acquired = await self.redis.set(self.key, self.owner, nx=True, px=ttl_ms)
+        return bool(acquired)
+
+    async def _run(
+        self,
+        on_elected: Callable[[], Awaitable[None] | None],
+        on_demoted: Callable[[], Awaitable[None] | None],
+    ) -> None:
+        interval = self.ttl.total_seconds() / 3
+        while True:
+            try:
+                leader = await self._try_lead()
+            except RedisError as e:
+                logger.error(f"[Leader] Failed to renew {self.key}: {e}")
+                leader = False
+
+            if leader != self.is_leader:
+                self.is_leader = leader
+                logger.info(
+                    f"[Leader] {self.owner} "
+                    f"{'is now the scheduler leader' if leader else 'lost leadership'}"
+                )
+                result = on_elected() if leader else on_demoted()
+                if asyncio.iscoroutine(result):
+                    await result
+            await asyncio.sleep(interval)
+
+    def start(
+        self,
+        on_elected: Callable[[], Awaitable[None] | None],
+        on_demoted: Callable[[], Awaitable[None] | None],
+    ) -> None:
+        """Start the election loop.
+
+        Args:
+            on_elected: Called when this replica becomes the leader
+            on_demoted: Called when this replica loses leadership
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._run(on_elected, on_demoted), name="scheduler-leader"
+            )
+
+    async def stop(self) -> None:
+        """Stop the election loop and release the key if held."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            try:
+                await self.redis.eval(_RELEASE_SCRIPT, 1, self.key, self.owner)
+            except RedisError as e:
+                logger.error(f"[Leader] Failed to release {self.key}: {e}")
+            self.is_leader = False
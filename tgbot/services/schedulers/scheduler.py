@@ -1,54 +1,101 @@
 """Scheduler service manager."""
 
 import logging
+import time
 
 from aiogram import Bot
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_SUBMITTED,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.jobstores.redis import RedisJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from tgbot.config import load_config
+from tgbot.config import Config
 from tgbot.misc.helpers import tz_perm
+from tgbot.services.metrics import JOB_DURATION, JOB_ERRORS
 from tgbot.services.schedulers.exchanges import ExchangesScheduler
+from tgbot.services.schedulers.game import GameScheduler
 from tgbot.services.schedulers.hr import HRScheduler
+from tgbot.services.schedulers.lease import JobLease, SchedulerLeader
 from tgbot.services.schedulers.studies import StudiesScheduler
 from tgbot.services.schedulers.tutors import TutorsScheduler
 
-config = load_config(".env")
 logger = logging.getLogger(__name__)
 
 
 class SchedulerManager:
     """Scheduler manager."""
 
-    def __init__(self):
+    def __init__(self, config: Config):
+        self.config = config
         self.scheduler = AsyncIOScheduler()
+        # Jobs refreshing in-process caches run on every replica, not only the leader
+        self.local_scheduler = AsyncIOScheduler()
+        self.lease = JobLease()
+        self.leader = None
+        self._job_started = {}
         self._configure()
         self.hr = HRScheduler()
         self.studies = StudiesScheduler()
-        self.exchanges = ExchangesScheduler()
+        self.exchanges = ExchangesScheduler(lease=self.lease)
         self.tutors = TutorsScheduler()
+        self.game = GameScheduler()
 
     def _configure(self):
         jobstores = {"default": MemoryJobStore()}
-        if config.tg_bot.use_redis:
+        if self.config.tg_bot.use_redis:
             jobstores["redis"] = RedisJobStore(
-                host=config.redis.redis_host,
-                port=config.redis.redis_port,
-                password=config.redis.redis_pass,
+                host=self.config.redis.redis_host,
+                port=self.config.redis.redis_port,
+                password=self.config.redis.redis_pass,
                 db=1,
             )
+            redis = Redis(
+                host=self.config.redis.redis_host,
+                port=self.config.redis.redis_port,
+                password=self.config.redis.redis_pass,
+                db=1,
+            )
+            self.lease = JobLease(redis)
+            if self.config.tg_bot.multi_replica:
+                # Задачи выполняет только реплика-лидер
+                self.leader = SchedulerLeader(redis)
 
+        job_defaults = {
+            "coalesce": True,
+            "misfire_grace_time": 300,
+            "replace_existing": True,
+        }
         self.scheduler.configure(
-            jobstores=jobstores,
-            job_defaults={
-                "coalesce": True,
-                "misfire_grace_time": 300,
-                "replace_existing": True,
-            },
+            jobstores=jobstores, job_defaults=job_defaults, timezone=tz_perm
+        )
+        self.local_scheduler.configure(
+            jobstores={"default": MemoryJobStore()},
+            job_defaults=job_defaults,
             timezone=tz_perm,
         )
+        for scheduler in (self.scheduler, self.local_scheduler):
+            scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED)
+            scheduler.add_listener(
+                self._on_job_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
+            )
+
+    def _on_job_submitted(self, event: JobSubmissionEvent) -> None:
+        self._job_started[event.job_id] = time.perf_counter()
+
+    def _on_job_finished(self, event: JobExecutionEvent) -> None:
+        started = self._job_started.pop(event.job_id, None)
+        if started is not None:
+            JOB_DURATION.observe(time.perf_counter() - started, job=event.job_id)
+        if event.exception is not None:
+            JOB_ERRORS.inc(job=event.job_id)
 
     def setup_jobs(
         self,
@@ -65,17 +112,41 @@ class SchedulerManager:
         self.tutors.setup_jobs(
             self.scheduler, stp_session_pool, stats_session_pool, bot
         )
+        # Balance reconciliation and catalog refresh update this replica's caches
+        self.game.setup_jobs(self.local_scheduler, stp_session_pool, bot)
 
         logger.info("[Scheduler] All tasks configured")
 
     def start(self):
-        """Start scheduler."""
-        if not self.scheduler.running:
+        """Start scheduler.
+
+        In multi-replica mode the scheduler starts paused and runs jobs only
+        while this replica is the elected leader. Local cache jobs always run.
+        """
+        if self.scheduler.running:
+            return
+        self.local_scheduler.start()
+        if self.leader is None:
             self.scheduler.start()
             logger.info("[Scheduler] Started")
+            return
+        self.scheduler.start(paused=True)
+        self.leader.start(
+            on_elected=self.scheduler.resume, on_demoted=self.scheduler.pause
+        )
+        logger.info("[Scheduler] Started paused, waiting for leader election")
+
+    async def close(self):
+        """Stop scheduler, give up leadership and close the lease Redis client."""
+        self.shutdown()
+        if self.leader is not None:
+            await self.leader.stop()
+        await self.lease.close()
 
     def shutdown(self):
         """Stop scheduler."""
+        if self.local_scheduler.running:
+            self.local_scheduler.shutdown()
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("[Scheduler] Stopped")
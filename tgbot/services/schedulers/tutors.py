@@ -11,6 +11,7 @@ from stp_database.repo.STP import MainRequestsRepo
 
 from tgbot.misc.helpers import format_fullname, tz_perm
 from tgbot.services.broadcaster import send_message
+from tgbot.services.replicas import SharedKeys
 from tgbot.services.schedulers.base import BaseScheduler
 
 logger = logging.getLogger(__name__)
@@ -23,8 +24,8 @@ class TutorsScheduler(BaseScheduler):
 
     def __init__(self):
         super().__init__("tutors")
-        self._sent = set()
-        self._last_reset = None
+        # Отправленные уведомления, общие для всех реплик (ключ содержит дату)
+        self._sent = SharedKeys("tutors:sent", ttl_seconds=24 * 60 * 60)
 
     def setup_jobs(
         self,
@@ -51,18 +52,11 @@ class TutorsScheduler(BaseScheduler):
         except Exception as e:
             self._log_job_execution("Проверка занятий", False, str(e))
 
-    def _reset_if_needed(self, today):
-        if self._last_reset != today:
-            self._sent.clear()
-            self._last_reset = today
-            logger.info("Reset notification tracking")
-
     def _key(self, training):
-        return f"{training.tutor_fullname}|{training.trainee_fullname}|{training.training_start_time.strftime('%H:%M')}"
+        return f"{training.tutor_fullname}|{training.trainee_fullname}|{training.training_start_time.strftime('%Y-%m-%d %H:%M')}"
 
     async def _check_training(self, stp_session_pool, stats_session_pool, bot):
         now = datetime.now(tz_perm)
-        self._reset_if_needed(now.date())
 
         target = now + NOTIFY_BEFORE
         start, end = target - TIME_WINDOW, target + TIME_WINDOW
@@ -78,7 +72,6 @@ class TutorsScheduler(BaseScheduler):
             for t in trainings
             if t.training_start_time
             and start <= tz_perm.localize(t.training_start_time) <= end
-            and self._key(t) not in self._sent
         ]
 
         if not upcoming:
@@ -89,8 +82,8 @@ class TutorsScheduler(BaseScheduler):
         async with stp_session_pool() as main_session:
             repo = MainRequestsRepo(main_session)
             for t in upcoming:
-                await self._notify(repo, bot, t)
-                self._sent.add(self._key(t))
+                if await self._sent.claim(self._key(t)):
+                    await self._notify(repo, bot, t)
 
     async def _notify(self, repo: MainRequestsRepo, bot: Bot, training):
         times = f"{training.training_start_time.strftime('%H:%M')}-{training.training_end_time.strftime('%H:%M')} ПРМ"
@@ -0,0 +1,74 @@
+"""Замеры этапов запуска бота."""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def process_uptime() -> Optional[float]:
+    """Получает время с запуска процесса, включая импорт модулей.
+
+    Returns:
+        Время в секундах или None, если платформа не дает его узнать
+    """
+    try:
+        with open("/proc/self/stat") as file:
+            # Имя процесса в скобках может содержать пробелы
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    # Поле starttime (22-е в /proc/self/stat) в тиках с загрузки системы
+    return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+
+
+class StartupTimer:
+    """Замеры этапов запуска с записью в лог."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = process_uptime()
+        self.phases: Dict[str, float] = {}
+        self.ready: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замеряет этап запуска.
+
+        Args:
+            name: Название этапа
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases[name] = elapsed
+            logger.info(f"[Startup] {name}: {elapsed * 1000:.0f} мс")
+
+    def mark_ready(self) -> None:
+        """Отмечает готовность бота принимать апдейты."""
+        self.ready = time.perf_counter() - self.started
+        imports = f", импорт модулей {self.imports:.1f} с" if self.imports else ""
+        logger.info(
+            f"[Startup] Бот готов принимать апдейты за {self.ready:.1f} с{imports}"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Замеры в виде словаря для health check.
+
+        Returns:
+            Длительности этапов в миллисекундах
+        """
+        return {
+            "imports_ms": round(self.imports * 1000) if self.imports else None,
+            "ready_ms": round(self.ready * 1000) if self.ready is not None else None,
+            "phases_ms": {
+                name: round(elapsed * 1000) for name, elapsed in self.phases.items()
+            },
+        }
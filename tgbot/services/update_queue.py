@@ -0,0 +1,422 @@
+"""Очередь обработки апдейтов в режиме вебхуков.
+
+Вебхук сразу отвечает Telegram, а апдейт попадает в ограниченную очередь,
+которую разбирают N воркеров. Апдейты одного пользователя (или чата, если
+пользователя нет) всегда попадают к одному воркеру и обрабатываются по порядку.
+
+При переполнении очереди:
+
+- сообщения в группах без команд (низкий приоритет) отбрасываются, как только
+  глубина достигает верхней отметки;
+- остальные апдейты ждут свободного места, задерживая ответ вебхуку.
+
+В режиме нескольких реплик апдейт пересылается реплике, которой принадлежит
+пользователь (ReplicaRouter), чтобы порядок сохранялся и между репликами.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import ClientSession, ClientTimeout, web
+
+from tgbot.services.background import run_detached
+
+logger = logging.getLogger(__name__)
+
+# Типы апдейтов, в которых есть отправитель
+_UPDATE_TYPES = (
+    "message",
+    "edited_message",
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+)
+
+_GROUP_CHAT_TYPES = ("group", "supergroup")
+
+
+@dataclass(slots=True)
+class QueuedUpdate:
+    """Апдейт в очереди.
+
+    Attributes:
+        bot: Экземпляр бота
+        update: Сырой апдейт от Telegram
+        enqueued_at: Время постановки в очередь (loop.time)
+    """
+
+    bot: Bot
+    update: Dict[str, Any]
+    enqueued_at: float
+
+
+def _mix(key: int) -> int:
+    """Перемешивает ключ упорядочивания для выбора реплики.
+
+    hash(int) равен самому числу, поэтому выбор реплики по hash(key) и
+    воркера по hash(key) были бы связаны: реплике доставались бы ключи
+    одного остатка, и часть ее воркеров простаивала бы.
+
+    Args:
+        key: Ключ упорядочивания апдейта
+
+    Returns:
+        Перемешанный ключ, одинаковый во всех процессах
+    """
+    digest = hashlib.blake2b(key.to_bytes(8, "big", signed=True), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+def get_update_key(update: Dict[str, Any]) -> Optional[int]:
+    """Определяет ключ упорядочивания апдейта.
+
+    Args:
+        update: Сырой апдейт от Telegram
+
+    Returns:
+        Идентификатор отправителя или чата, None если их нет
+    """
+    for update_type in _UPDATE_TYPES:
+        event = update.get(update_type)
+        if not event:
+            continue
+        sender = event.get("from")
+        if sender:
+            return sender["id"]
+        chat = event.get("chat")
+        if chat:
+            return chat["id"]
+    return None
+
+
+def is_low_priority(update: Dict[str, Any]) -> bool:
+    """Проверяет, является ли апдейт сообщением в группе без команды.
+
+    Args:
+        update: Сырой апдейт от Telegram
+
+    Returns:
+        True если апдейт можно отбросить при перегрузке
+    """
+    message = update.get("message")
+    if not message or message.get("chat", {}).get("type") not in _GROUP_CHAT_TYPES:
+        return False
+    return not (message.get("text") or "").startswith("/")
+
+
+class UpdateQueue:
+    """Ограниченная очередь апдейтов с воркерами и упорядочиванием по пользователю."""
+
+    def __init__(
+        self,
+        dispatcher: Optional[Dispatcher],
+        workers: int = 8,
+        max_size: int = 1000,
+        high_water: int = 800,
+        **data: Any,
+    ):
+        """Инициализирует очередь.
+
+        Args:
+            dispatcher: Диспетчер апдейтов. Может быть задан позже, до start():
+                принятые до этого апдейты ждут в очереди
+            workers: Количество воркеров
+            max_size: Максимальное количество апдейтов в очереди
+            high_water: Глубина, начиная с которой отбрасываются апдейты
+                низкого приоритета
+            data: Дополнительные данные для обработчиков
+        """
+        self.dispatcher = dispatcher
+        self.data = data
+        self.max_size = max_size
+        self.high_water = min(high_water, max_size)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(workers)]
+        self._slots = asyncio.Semaphore(max_size)
+        self._workers: List[asyncio.Task] = []
+        self._depth = 0
+        self._next_shard = 0
+
+        self.accepted = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+        self.delayed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Количество апдейтов в очереди и в обработке."""
+        return self._depth
+
+    def _shard(self, update: Dict[str, Any]) -> asyncio.Queue:
+        key = get_update_key(update)
+        if key is None:
+            # Апдейты без отправителя распределяются по кругу
+            self._next_shard = (self._next_shard + 1) % len(self._queues)
+            return self._queues[self._next_shard]
+        return self._queues[hash(key) % len(self._queues)]
+
+    async def submit(self, bot: Bot, update: Dict[str, Any]) -> bool:
+        """Ставит апдейт в очередь.
+
+        Args:
+            bot: Экземпляр бота
+            update: Сырой апдейт от Telegram
+
+        Returns:
+            True если апдейт принят, False если отброшен
+        """
+        if is_low_priority(update) and (
+            self._depth >= self.high_water or self._slots.locked()
+        ):
+            self.shed += 1
+            logger.warning(
+                f"[Очередь] Апдейт {update.get('update_id')} отброшен: "
+                f"глубина очереди {self._depth}"
+            )
+            return False
+
+        if self._slots.locked():
+            self.delayed += 1
+        await self._slots.acquire()
+
+        self._depth += 1
+        self.accepted += 1
+        loop = asyncio.get_running_loop()
+        self._shard(update).put_nowait(QueuedUpdate(bot, update, loop.time()))
+        return True
+
+    async def _process(self, item: QueuedUpdate) -> None:
+        result = await self.dispatcher.feed_raw_update(
+            bot=item.bot, update=item.update, **self.data
+        )
+        if isinstance(result, TelegramMethod):
+            await self.dispatcher.silent_call_request(bot=item.bot, result=result)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item: QueuedUpdate = await queue.get()
+            self.last_lag = loop.time() - item.enqueued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            try:
+                await self._process(item)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.exception(
+                    f"[Очередь] Ошибка обработки апдейта {item.update.get('update_id')}: {e}"
+                )
+            finally:
+                self._depth -= 1
+                self._slots.release()
+                queue.task_done()
+
+    def start(self) -> None:
+        """Запускает воркеры.
+
+        Raises:
+            RuntimeError: Диспетчер не задан
+        """
+        if self._workers:
+            return
+        if self.dispatcher is None:
+            raise RuntimeError("Диспетчер очереди апдейтов не задан")
+        self._workers = [
+            asyncio.create_task(self._worker(queue), name=f"update-worker-{idx}")
+            for idx, queue in enumerate(self._queues)
+        ]
+        logger.info(
+            f"[Очередь] Запущено {len(self._workers)} воркеров "
+            f"(размер {self.max_size}, верхняя отметка {self.high_water})"
+        )
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Дожидается обработки очереди и останавливает воркеры.
+
+        Args:
+            timeout: Максимальное время ожидания обработки в секундах
+        """
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"[Очередь] Не обработано {self._depth} апдейтов при остановке"
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> dict[str, Any]:
+        """Получает статистику очереди.
+
+        Максимальная задержка считается с прошлого запроса статистики.
+
+        Returns:
+            Словарь со статистикой очереди
+        """
+        stats = {
+            "depth": self._depth,
+            "max_size": self.max_size,
+            "high_water": self.high_water,
+            "workers": len(self._workers),
+            "worker_depths": [queue.qsize() for queue in self._queues],
+            "accepted": self.accepted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "shed": self.shed,
+            "delayed": self.delayed,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+        self.max_lag = self.last_lag
+        return stats
+
+
+class ReplicaRouter:
+    """Маршрутизация апдейтов между репликами по пользователю.
+
+    Апдейт обрабатывает реплика с номером mix(пользователь) % число реплик,
+    поэтому апдейты одного пользователя всегда попадают в одну очередь.
+    Прокси не может маршрутизировать по пользователю (он есть только в теле
+    запроса), поэтому принявшая апдейт реплика пересылает его владельцу.
+    Если владелец недоступен - апдейт обрабатывается локально.
+    """
+
+    FORWARDED_HEADER = "X-Stpsher-Forwarded"
+
+    def __init__(self, urls: List[str], index: int, secret_token: Optional[str]):
+        """Инициализирует маршрутизатор.
+
+        Args:
+            urls: Внутренние адреса вебхуков всех реплик
+            index: Номер текущей реплики
+            secret_token: Секретный токен вебхука
+        """
+        self.urls = urls
+        self.index = index
+        self.secret_token = secret_token
+        self.forwarded = 0
+        self.forward_failed = 0
+        self._session: Optional[ClientSession] = None
+
+    def get_owner(self, update: Dict[str, Any]) -> int:
+        """Определяет реплику-владельца апдейта.
+
+        Args:
+            update: Сырой апдейт от Telegram
+
+        Returns:
+            Номер реплики
+        """
+        key = get_update_key(update)
+        if key is None:
+            return self.index
+        return _mix(key) % len(self.urls)
+
+    async def forward(self, owner: int, body: bytes) -> bool:
+        """Пересылает апдейт реплике-владельцу.
+
+        Args:
+            owner: Номер реплики
+            body: Тело запроса Telegram
+
+        Returns:
+            True если реплика приняла апдейт
+        """
+        if self._session is None:
+            self._session = ClientSession(timeout=ClientTimeout(total=5))
+        headers = {self.FORWARDED_HEADER: "1", "Content-Type": "application/json"}
+        if self.secret_token:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.secret_token
+        try:
+            async with self._session.post(
+                self.urls[owner], data=body, headers=headers
+            ) as response:
+                if response.status == 200:
+                    self.forwarded += 1
+                    return True
+                logger.warning(
+                    f"[Очередь] Реплика {owner} ответила {response.status} на пересылку"
+                )
+        except Exception as e:
+            logger.warning(f"[Очередь] Реплика {owner} недоступна: {e}")
+        self.forward_failed += 1
+        return False
+
+    async def close(self) -> None:
+        """Закрывает HTTP-сессию."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука, который сразу отвечает и передает апдейт в очередь."""
+
+    def __init__(
+        self,
+        queue: UpdateQueue,
+        bot: Bot,
+        secret_token: Optional[str],
+        router: Optional[ReplicaRouter] = None,
+    ):
+        """Инициализирует обработчик.
+
+        Args:
+            queue: Очередь апдейтов
+            bot: Экземпляр бота
+            secret_token: Секретный токен вебхука
+            router: Маршрутизатор апдейтов между репликами
+        """
+        super().__init__(
+            dispatcher=queue.dispatcher, bot=bot, secret_token=secret_token
+        )
+        self.queue = queue
+        self.router = router
+
+    async def _route(self, bot: Bot, owner: int, body: bytes, update: Dict) -> None:
+        if not await self.router.forward(owner, body):
+            await self.queue.submit(bot, update)
+
+    async def _handle_request_background(
+        self, bot: Bot, request: web.Request
+    ) -> web.Response:
+        body = await request.read()
+        update = bot.session.json_loads(body)
+
+        if self.router and not request.headers.get(ReplicaRouter.FORWARDED_HEADER):
+            owner = self.router.get_owner(update)
+            if owner != self.router.index:
+                run_detached(
+                    self._route(bot, owner, body, update),
+                    name=f"forward-{update.get('update_id')}",
+                )
+                return web.json_response({}, dumps=bot.session.json_dumps)
+
+        started = time.monotonic()
+        await self.queue.submit(bot, update)
+        waited = time.monotonic() - started
+        if waited > 1:
+            logger.warning(f"[Очередь] Ответ вебхуку задержан на {waited:.1f} с")
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        """Закрывает сессии бота и маршрутизатора."""
+        if self.router is not None:
+            await self.router.close()
+        await super().close()
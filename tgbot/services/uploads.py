@@ -0,0 +1,217 @@
+"""Метаданные загруженных файлов.
+
+Под графиками показывается название и дата загрузки файла графика. Сервис
+хранит в памяти последнюю загрузку для каждого (подразделение, период, год),
+поэтому экран графика не зависит от размера истории загрузок. Карта строится
+одним агрегирующим запросом, дополняется при загрузке файла (record) и
+перестраивается после изменения файлов (в том числе на других репликах).
+
+Экраны истории загрузок читают записи постранично (limit/offset в базе).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from stp_database.models.STP.upload import Upload
+from stp_database.repo.STP import MainRequestsRepo
+
+logger = logging.getLogger(__name__)
+
+# Максимальный возраст карты загрузок до перезагрузки при чтении
+UPLOADS_TTL = timedelta(minutes=10)
+
+SCHEDULE_PREFIX = "ГРАФИК"
+
+ScheduleKey = Tuple[str, str, int]
+
+
+@dataclass(slots=True)
+class UploadInfo:
+    """Последняя загрузка файла графика.
+
+    Attributes:
+        file_name: Название файла
+        uploaded_at: Дата загрузки
+    """
+
+    file_name: str
+    uploaded_at: Optional[datetime]
+
+
+def parse_schedule_file_name(file_name: Optional[str]) -> Optional[ScheduleKey]:
+    """Разбирает название файла графика вида "ГРАФИК {подразделение} {период} {год}.xlsx".
+
+    Args:
+        file_name: Название файла
+
+    Returns:
+        (подразделение, период, год) или None, если это не файл графика
+    """
+    if not file_name:
+        return None
+    parts = file_name.split()
+    if len(parts) < 4 or parts[0] != SCHEDULE_PREFIX:
+        return None
+    year = parts[3].split(".")[0]
+    if not year.isdigit():
+        return None
+    return parts[1], parts[2].upper(), int(year)
+
+
+class UploadMetadata:
+    """Последние загрузки файлов графиков и постраничная история загрузок."""
+
+    def __init__(self, ttl: timedelta = UPLOADS_TTL):
+        """Инициализирует сервис.
+
+        Args:
+            ttl: Максимальный возраст карты загрузок до перезагрузки при чтении
+        """
+        self.ttl = ttl
+        self._latest: Optional[Dict[ScheduleKey, UploadInfo]] = None
+        self._loaded_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._latest is not None and datetime.now() - self._loaded_at < self.ttl
+
+    async def _get_latest(
+        self, stp_repo: MainRequestsRepo
+    ) -> Dict[ScheduleKey, UploadInfo]:
+        if self._is_fresh():
+            return self._latest
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._latest
+
+            rows = await stp_repo.session.execute(
+                select(Upload.file_name, func.max(Upload.uploaded_at))
+                .where(Upload.file_name.like(f"{SCHEDULE_PREFIX} %"))
+                .group_by(Upload.file_name)
+            )
+            latest: Dict[ScheduleKey, UploadInfo] = {}
+            for file_name, uploaded_at in rows:
+                self._put(latest, file_name, uploaded_at)
+            self._latest = latest
+            self._loaded_at = datetime.now()
+            logger.debug(f"[Загрузки] Загружено файлов графиков: {len(latest)}")
+            return latest
+
+    @staticmethod
+    def _put(
+        latest: Dict[ScheduleKey, UploadInfo],
+        file_name: str,
+        uploaded_at: Optional[datetime],
+    ) -> None:
+        key = parse_schedule_file_name(file_name)
+        if key is None:
+            return
+        current = latest.get(key)
+        if (
+            current is None
+            or current.uploaded_at is None
+            or (uploaded_at is not None and uploaded_at >= current.uploaded_at)
+        ):
+            latest[key] = UploadInfo(file_name, uploaded_at)
+
+    def record(self, file_name: str, uploaded_at: Optional[datetime] = None) -> None:
+        """Учитывает новую загрузку файла.
+
+        Args:
+            file_name: Название файла
+            uploaded_at: Дата загрузки (по умолчанию текущее время)
+        """
+        if self._latest is not None:
+            self._put(self._latest, file_name, uploaded_at or datetime.now())
+
+    def invalidate(self) -> None:
+        """Помечает карту загрузок устаревшей. Следующее чтение перезагрузит ее."""
+        self._latest = None
+
+    async def get_schedule_upload(
+        self,
+        stp_repo: MainRequestsRepo,
+        division: str,
+        period: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> Optional[UploadInfo]:
+        """Получает последнюю загрузку файла графика подразделения.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            division: Подразделение
+            period: Период графика (I или II), None - любой
+            year: Год графика, None - любой
+
+        Returns:
+            Последняя загрузка или None, если файл не загружался
+        """
+        latest = await self._get_latest(stp_repo)
+        if period is not None and year is not None:
+            return latest.get((division, period, year))
+
+        matching = [
+            info
+            for (file_division, file_period, file_year), info in latest.items()
+            if file_division == division
+            and (period is None or file_period == period)
+            and (year is None or file_year == year)
+        ]
+        return max(
+            matching, key=lambda info: info.uploaded_at or datetime.min, default=None
+        )
+
+    @staticmethod
+    async def get_page(
+        stp_repo: MainRequestsRepo,
+        page: int = 0,
+        page_size: int = 4,
+        file_name: Optional[str] = None,
+    ) -> Tuple[List[Upload], int]:
+        """Получает страницу истории загрузок, от новых к старым.
+
+        Args:
+            stp_repo: Репозиторий операций с базой STP
+            page: Номер страницы (с нуля)
+            page_size: Количество записей на странице
+            file_name: Название файла (None - все файлы)
+
+        Returns:
+            Записи страницы и общее количество записей
+        """
+        count_query = select(func.count()).select_from(Upload)
+        query = select(Upload)
+        if file_name is not None:
+            count_query = count_query.where(Upload.file_name == file_name)
+            query = query.where(Upload.file_name == file_name)
+
+        total = await stp_repo.session.scalar(count_query)
+        records = (
+            await stp_repo.session.scalars(
+                query
+                .order_by(Upload.uploaded_at.desc(), Upload.id.desc())
+                .limit(page_size)
+                .offset(page * page_size)
+            )
+        ).all()
+        return list(records), total or 0
+
+
+_upload_metadata: Optional[UploadMetadata] = None
+
+
+def get_upload_metadata() -> UploadMetadata:
+    """Получает глобальный экземпляр метаданных загрузок (паттерн singleton).
+
+    Returns:
+        Глобальный экземпляр UploadMetadata
+    """
+    global _upload_metadata
+    if _upload_metadata is None:
+        _upload_metadata = UploadMetadata()
+    return _upload_metadata